@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Pyflix.settings')
 
 application = get_asgi_application()
+
+# Constrói os índices em memória do catálogo na inicialização do worker,
+# antes da primeira requisição (ex: autocompletar da busca)
+from filme.autocompletar import aquecer_indices  # noqa: E402
+
+aquecer_indices()
@@ -60,6 +60,11 @@ LOGGING = {
             'level': 'WARNING',
             'propagate': True,
         },
+        'filme': {  # Falhas em segundo plano e requisições lentas (métricas)
+            'handlers': ['file'],
+            'level': 'WARNING',
+            'propagate': True,
+        },
     },
 }
 
@@ -69,7 +74,26 @@ CLOUDINARY_STORAGE = {
     'API_SECRET': os.getenv('CLOUDINARY_API_SECRET'),
 }
 
-DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+# Storages (DEFAULT_FILE_STORAGE é ignorado desde o Django 5.1)
+# Uploads vão para o Cloudinary quando configurado; sem ele (desenvolvimento,
+# testes offline), para MEDIA_ROOT no sistema de arquivos local
+STORAGES = {
+    'default': {
+        'BACKEND': (
+            'cloudinary_storage.storage.MediaCloudinaryStorage'
+            if CLOUDINARY_STORAGE['CLOUD_NAME']
+            else 'django.core.files.storage.FileSystemStorage'
+        ),
+    },
+    # Nomes com hash e versões .gz/.br, servidos como imutáveis (filme/estaticos.py)
+    'staticfiles': {
+        'BACKEND': 'filme.estaticos.ArmazenamentoEstaticos',
+    },
+    # Vídeos dos episódios no disco local, em VIDEOS_ROOT (filme/videos.py)
+    'videos': {
+        'BACKEND': 'filme.videos.ArmazenamentoVideos',
+    },
+}
 
 # Application definition
 
@@ -80,6 +104,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # Busca textual e trigramas do PostgreSQL
     'filme', # Main application for movie management
     'crispy_forms',  # Crispy Forms for better form rendering
     'crispy_bootstrap5',  # Bootstrap 5 template pack for Crispy Forms
@@ -88,6 +113,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'filme.metricas.MetricasMiddleware',  # Primeiro: mede os demais (ver filme/metricas.py)
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -137,12 +163,121 @@ DATABASES = {
 
 
 # Configuração do banco de dados para produção
-DATABASES['default'] = dj_database_url.config(conn_max_age=600, ssl_require=True)
+# DB_SSL_REQUIRE=False permite usar SQLite localmente (ex: DATABASE_URL=sqlite:///db.sqlite3)
+DATABASES['default'] = dj_database_url.config(
+    conn_max_age=600,
+    ssl_require=config('DB_SSL_REQUIRE', default=True, cast=bool),
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# LocMemCache é local a cada processo; em produção com vários workers do gunicorn
+# defina REDIS_URL (requer o pacote 'redis') para compartilhar o cache e as
+# invalidações do catálogo entre os processos.
+# Os backends são os do Django com a contagem de acertos/faltas das métricas.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'filme.metricas.LocMemCacheComMetricas',
+        'LOCATION': 'pyflix',
+    }
+}
+
+if config('REDIS_URL', default=''):
+    CACHES['default'] = {
+        'BACKEND': 'filme.metricas.RedisCacheComMetricas',
+        'LOCATION': config('REDIS_URL'),
+    }
+
+# Cache dos trilhos do catálogo (recentes, em alta, destaque)
+CATALOGO_CACHE_TIMEOUT = 60 * 5  # Segundos no cache compartilhado (Django cache)
+CATALOGO_CACHE_LOCAL_TTL = 10    # Segundos no cache local de cada processo
+
+# Fragmentos de template cacheados ({% cache %}), chaveados por versão
+# (catálogo, histórico do usuário, recomendações): uma alteração troca a chave,
+# então o timeout só limita quanto tempo fragmentos sem uso ocupam o cache
+FRAGMENTOS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Sessões e usuário autenticado no cache: sem consultas de autenticação nas
+# requisições de um usuário já visto. As sessões continuam gravadas no banco
+# (cached_db: o cache só evita a leitura) e o usuário é removido do cache a
+# cada alteração (perfil, senha) e no logout. Com vários workers, use o Redis
+# (REDIS_URL): no LocMemCache a remoção só vale para o próprio processo.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+USUARIO_CACHE_TIMEOUT = 60 * 15  # Segundos no cache de um usuário sem alterações
+
+# Posições de retomada (heartbeats do player agrupados em memória, ver filme/progresso.py)
+PROGRESSO_HEARTBEAT = 10               # Segundos entre os heartbeats do player
+PROGRESSO_DESCARGA_INTERVALO = 15      # Segundos máximos entre gravações
+PROGRESSO_DESCARGA_LIMITE = 20000      # Pares (usuário, episódio) pendentes que forçam gravação
+
+# Verificação de email da página inicial (filtro de Bloom por processo, ver filme/emails.py)
+FILTRO_EMAILS_CAPACIDADE_MINIMA = 10000  # Emails previstos no filtro (o dobro dos usuários, se maior)
+FILTRO_EMAILS_FALSOS_POSITIVOS = 0.01    # Fração dos emails novos que ainda vão ao banco
+
+# Limite de taxa por IP das views abertas a anônimos (ver filme/limites.py)
+# Chave -> requisições por minuto e rajada; remova a chave para desligar o limite
+LIMITE_TAXA = {
+    'homepage': {'por_minuto': 30, 'rajada': 10},  # POST do email na página inicial
+}
+# Proxies confiáveis que acrescentam o IP do cliente em X-Forwarded-For
+# (ex: 1 no Heroku; 0 usa REMOTE_ADDR)
+LIMITE_TAXA_PROXIES = config('LIMITE_TAXA_PROXIES', default=0, cast=int)
+
+# Ranking "Em Alta" (visualizações por hora com decaimento, ver filme/em_alta.py)
+EM_ALTA_MEIA_VIDA_HORAS = 24     # Idade em que uma visualização passa a valer metade
+EM_ALTA_JANELA_HORAS = 24 * 7    # Baldes mais antigos não contam (peso < 1%) e são removidos
+EM_ALTA_TAMANHO = 50             # Posições gravadas pelo comando 'calcular_em_alta'
+
+# Fila de eventos da página de detalhes (ver filme/eventos.py)
+# False: grava na própria requisição, sem a thread (testes, depuração)
+EVENTOS_EM_SEGUNDO_PLANO = config('EVENTOS_EM_SEGUNDO_PLANO', default=True, cast=bool)
+EVENTOS_FILA_LIMITE = 10000        # Eventos na fila de cada processo antes do backpressure
+EVENTOS_ESPERA_FILA_CHEIA = 0.05   # Segundos que a requisição espera por espaço na fila
+EVENTOS_LOTE = 500                 # Eventos gravados por lote
+EVENTOS_INTERVALO = 1.0            # Segundos máximos para completar um lote
+
+# Versões redimensionadas das thumbnails (ver filme/imagens.py)
+# Cada perfil define as larguras geradas e o atributo 'sizes' do <img>
+IMAGENS_PERFIS = {
+    'trilho': {'larguras': (320, 640), 'sizes': '(max-width: 600px) 50vw, 25vw'},  # Trilhos da home
+    'cartao': {'larguras': (384, 768), 'sizes': '384px'},   # Catálogo, pesquisa e relacionados
+    'destaque': {'larguras': (1280, 1920), 'sizes': '100vw'},  # Imagem de fundo do destaque
+}
+IMAGENS_PASTA = 'thumb_filmes/renditions'  # Pasta das versões no storage
+IMAGENS_PROCESSOS = config('IMAGENS_PROCESSOS', default=0, cast=int)  # 0 = número de CPUs
+# Gera as versões logo após o upload (False: apenas pelo comando gerar_imagens)
+IMAGENS_GERAR_AO_ENVIAR = config('IMAGENS_GERAR_AO_ENVIAR', default=True, cast=bool)
+
+# Busca de filmes: "postgres" (tsvector + trigramas) ou "memoria" (índice invertido em Python)
+# Vazio escolhe automaticamente pelo banco em uso
+BUSCA_BACKEND = config('BUSCA_BACKEND', default='')
+
+# Views do catálogo (filmes, detalhes, pesquisa) em versão assíncrona
+# Use com o deploy ASGI (Procfile.asgi: gunicorn + workers uvicorn); sob WSGI
+# cada requisição assíncrona ganharia um loop de eventos próprio, sem vantagem
+VIEWS_ASSINCRONAS = config('VIEWS_ASSINCRONAS', default=False, cast=bool)
+
+# Métricas de desempenho por requisição (ver filme/metricas.py), em admin/metrics/
+METRICAS_ATIVAS = config('METRICAS_ATIVAS', default=True, cast=bool)
+# Token do scraper do Prometheus (Authorization: Bearer); vazio: apenas a equipe logada
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')
+# Fração das requisições que guarda o SQL; as que passarem de METRICAS_LENTA_MS
+# vão para o log com as consultas (0 desativa o log de requisições lentas)
+METRICAS_LENTAS_AMOSTRA = config('METRICAS_LENTAS_AMOSTRA', default=0.0, cast=float)
+METRICAS_LENTA_MS = config('METRICAS_LENTA_MS', default=500, cast=int)
 
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 AUTH_USER_MODEL = 'filme.Usuario'  # Custom user model
+AUTHENTICATION_BACKENDS = [
+    'filme.autenticacao.BackendUsuarioEmCache',  # Usuário da sessão lido do cache
+    # Sessões abertas antes do cache guardam o backend padrão: continuam
+    # válidas (sem cache) até o próximo login
+    'django.contrib.auth.backends.ModelBackend',
+]
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -182,10 +317,39 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ] # Directory for static files (CSS, JS, images, etc.)
 
+# Arquivos sem hash no nome (fora do manifesto) ficam 1 dia no cache do navegador;
+# os com hash são servidos como imutáveis pelo WhiteNoise
+WHITENOISE_MAX_AGE = config('WHITENOISE_MAX_AGE', default=0 if DEBUG else 86400, cast=int)
+
+# Proxy reverso com ESI na frente da aplicação (Varnish, CDN): as páginas de
+# detalhes e pesquisa, sem as partes pessoais, ficam no cache do proxy por
+# PROXY_CACHE_MAX_AGE segundos (Surrogate-Control) e depois são revalidadas
+# pela ETag. PROXY_CACHE_LOCAL liga o proxy em processo (filme/proxy.py),
+# para desenvolvimento e testes sem um proxy de verdade
+PROXY_CACHE_MAX_AGE = config('PROXY_CACHE_MAX_AGE', default=60, cast=int)
+PROXY_CACHE_LOCAL = config('PROXY_CACHE_LOCAL', default=False, cast=bool)
+
+# Folha de estilos compilada (comando compilar_estilos): pastas varridas em busca
+# das classes do Tailwind e arquivo gerado, publicado pelo collectstatic
+ESTILOS_FONTES = [
+    BASE_DIR / 'templates',
+    BASE_DIR / 'filme' / 'templates',
+    BASE_DIR / 'static' / 'js',
+]
+ESTILOS_SAIDA = BASE_DIR / 'static' / 'css' / 'pyflix.css'
+
 MEDIA_URL = 'media/' # URL for media files (uploads, thumbnails, etc.)
 
 MEDIA_ROOT = BASE_DIR / 'media' # Directory where media files are stored
 
+# Vídeos enviados para os episódios (ver filme/videos.py): fora de MEDIA_ROOT,
+# servidos só para usuários logados, com requisições parciais (Range)
+VIDEOS_ROOT = config('VIDEOS_ROOT', default=str(BASE_DIR / 'videos'))
+VIDEOS_MAX_AGE = 3600  # Segundos no cache do navegador (privado) antes de revalidar
+# Prefixo de uma location 'internal' do nginx apontando para VIDEOS_ROOT:
+# a aplicação só autoriza e o nginx envia o arquivo (vazio: a aplicação envia)
+VIDEOS_X_ACCEL_REDIRECT = config('VIDEOS_X_ACCEL_REDIRECT', default='')
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
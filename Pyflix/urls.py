@@ -19,8 +19,14 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from filme.views import MetricasView  # Endpoint de métricas sob o admin
+
 # Lista principal de padrões de URL do projeto
 urlpatterns = [
+    # Métricas de desempenho no formato do Prometheus (equipe ou token)
+    # Acesso: dominio.com/admin/metrics/
+    path('admin/metrics/', MetricasView.as_view(), name='metricas'),
+
     # URL para o painel administrativo do Django
     # Acesso: dominio.com/admin/
     path('admin/', admin.site.urls),
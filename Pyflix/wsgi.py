@@ -14,3 +14,18 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Pyflix.settings')
 
 application = get_wsgi_application()
+
+# Constrói os índices em memória do catálogo na inicialização do worker,
+# antes da primeira requisição (ex: autocompletar da busca)
+from filme.autocompletar import aquecer_indices  # noqa: E402
+
+aquecer_indices()
+
+# Proxy com cache e ESI em processo, no lugar de um proxy reverso de verdade
+# (desenvolvimento e testes): ver filme/proxy.py
+from django.conf import settings  # noqa: E402
+
+if settings.PROXY_CACHE_LOCAL:
+    from filme.proxy import ProxyCacheESI  # noqa: E402
+
+    application = ProxyCacheESI(application)
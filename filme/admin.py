@@ -1,23 +1,84 @@
 # Importações necessárias para configurar o Django Admin
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin  # Admin padrão para usuários
-from .models import Episodio, Filme, Usuario  # Modelos do app filme
+from .models import Episodio, EventoPendente, Filme, HistoricoVisualizacao, ProgressoEpisodio, Usuario  # Modelos do app filme
 
-# Personalização do UserAdmin para incluir o campo filmes_vistos
-# Converte os fieldsets originais do UserAdmin de tupla para lista para permitir modificações
-campos = list(UserAdmin.fieldsets)
 
-# Adiciona uma nova seção "Histórico" com o campo filmes_vistos
-# Este campo mostra quais filmes o usuário já assistiu
-campos.append(
-    ("Histórico", {"fields": ("filmes_vistos",)}),
-)
+class EpisodioInline(admin.TabularInline):
+    """
+    Episódios editados na própria página do filme.
+    """
+    model = Episodio
+    extra = 1
+
+
+class FilmeAdmin(admin.ModelAdmin):
+    """
+    Admin de filmes, com os episódios em linha.
+    """
+    list_display = ("titulo", "categoria", "visualizacoes", "data_criacao")
+    list_filter = ("categoria",)
+    search_fields = ("titulo", "identificador")
+    inlines = (EpisodioInline,)
+
+
+class EpisodioAdmin(admin.ModelAdmin):
+    """
+    Admin de episódios.
+
+    Episodio.__str__ exibe o título do filme: list_select_related traz o
+    filme no mesmo SELECT da listagem, em vez de uma consulta por linha.
+    """
+    list_display = ("__str__", "filme", "link_video", "video")
+    list_select_related = ("filme",)
+    raw_id_fields = ("filme",)  # Evita carregar todos os filmes no form
+    search_fields = ("titulo", "filme__titulo")
+
+    def get_queryset(self, request):
+        # Também usado pelas páginas de edição/remoção, que exibem o __str__
+        return super().get_queryset(request).com_filme()
+
+
+class HistoricoVisualizacaoAdmin(admin.ModelAdmin):
+    """
+    Admin do histórico de visualizações.
+
+    Substitui a antiga seção "Histórico" (filmes_vistos) do UserAdmin:
+    o histórico pode ser grande, então é listado e filtrado à parte.
+    """
+    list_display = ("usuario", "filme", "ultima_visualizacao")
+    list_select_related = ("usuario", "filme")  # Evita uma consulta por linha
+    raw_id_fields = ("usuario", "filme")        # Evita carregar todos os usuários/filmes no form
+    search_fields = ("usuario__username", "filme__titulo")
+    date_hierarchy = "ultima_visualizacao"
+
+
+class ProgressoEpisodioAdmin(admin.ModelAdmin):
+    """
+    Admin das posições de retomada (gravadas em lote, ver filme/progresso.py).
+    """
+    list_display = ("usuario", "episodio", "posicao", "duracao", "atualizado_em")
+    list_select_related = ("usuario", "episodio__filme")  # Episodio.__str__ exibe o filme
+    raw_id_fields = ("usuario", "episodio")
+    search_fields = ("usuario__username", "episodio__titulo", "episodio__filme__titulo")
+
+
+class EventoPendenteAdmin(admin.ModelAdmin):
+    """
+    Admin dos eventos na tabela durável da fila (ver filme/eventos.py).
+
+    Apenas para acompanhamento: os eventos são processados pelo comando
+    'drenar_eventos'.
+    """
+    list_display = ("id", "tipo", "criado_em")
+    list_filter = ("tipo",)
+    readonly_fields = ("tipo", "dados", "criado_em")
 
-# Converte de volta para tupla e substitui os fieldsets originais
-# ATENÇÃO: Isso modifica globalmente a classe UserAdmin para todo o projeto
-UserAdmin.fieldsets = tuple(campos)
 
 # Registra os modelos no Django Admin para que apareçam na interface administrativa
-admin.site.register(Filme)        # Permite administrar filmes
-admin.site.register(Episodio)     # Permite administrar episódios
-admin.site.register(Usuario, UserAdmin)  # Registra usuários com as configurações personalizadas
+admin.site.register(Filme, FilmeAdmin)        # Permite administrar filmes
+admin.site.register(Episodio, EpisodioAdmin)  # Permite administrar episódios
+admin.site.register(Usuario, UserAdmin)  # Registra usuários com o admin padrão
+admin.site.register(HistoricoVisualizacao, HistoricoVisualizacaoAdmin)  # Histórico de visualizações
+admin.site.register(EventoPendente, EventoPendenteAdmin)  # Fila de eventos (fallback durável)
+admin.site.register(ProgressoEpisodio, ProgressoEpisodioAdmin)  # Posições de retomada
@@ -17,3 +17,18 @@ class FilmeConfig(AppConfig):
     # Nome da aplicação Django - deve corresponder ao nome da pasta do app
     # Usado pelo Django para identificar e referenciar esta aplicação
     name = 'filme'
+
+    def ready(self):
+        """
+        Executado quando a aplicação é carregada.
+
+        Importa o módulo de sinais para registrar os receptores
+        (invalidação de cache do catálogo, etc.) e instala o medidor de
+        consultas das métricas em cada conexão com o banco.
+        """
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401
+        from .metricas import instalar_medidor
+
+        connection_created.connect(instalar_medidor, dispatch_uid="pyflix_metricas")
@@ -0,0 +1,44 @@
+# Usuário autenticado das sessões lido do cache
+#
+# O AuthenticationMiddleware carrega o usuário da sessão a cada requisição
+# (get_user do backend). Este backend guarda o usuário no cache do Django
+# por USUARIO_CACHE_TIMEOUT segundos; os sinais de filme/signals.py o
+# removem a cada alteração do usuário (perfil, senha, permissões) e no
+# logout. O hash da senha vem junto: a verificação da sessão
+# (get_session_auth_hash) continua derrubando as sessões antigas após a
+# troca de senha.
+from django.conf import settings  # Tempo do usuário no cache
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache  # Cache do Django (compartilhado entre processos)
+
+from .cache import CHAVE_USUARIO_AUTENTICADO
+
+
+class BackendUsuarioEmCache(ModelBackend):
+    """
+    ModelBackend cujo get_user() lê o usuário do cache antes do banco.
+
+    O login (authenticate) e as permissões são os do ModelBackend. Usuários
+    inexistentes não são guardados: a sessão de um usuário removido cai
+    no banco e termina normalmente.
+    """
+
+    def get_user(self, user_id):
+        chave = CHAVE_USUARIO_AUTENTICADO.format(user_id)
+        usuario = cache.get(chave)
+        if usuario is None:
+            usuario = super().get_user(user_id)
+            if usuario is not None:
+                cache.set(chave, usuario, settings.USUARIO_CACHE_TIMEOUT)
+            return usuario
+        return usuario if self.user_can_authenticate(usuario) else None
+
+    async def aget_user(self, user_id):
+        chave = CHAVE_USUARIO_AUTENTICADO.format(user_id)
+        usuario = await cache.aget(chave)
+        if usuario is None:
+            usuario = await super().aget_user(user_id)
+            if usuario is not None:
+                await cache.aset(chave, usuario, settings.USUARIO_CACHE_TIMEOUT)
+            return usuario
+        return usuario if self.user_can_authenticate(usuario) else None
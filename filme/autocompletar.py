@@ -0,0 +1,115 @@
+# Autocompletar da busca: índice de prefixos em memória sobre os títulos dos filmes
+import bisect  # Busca binária na lista ordenada de chaves
+import logging  # Registro de falhas no aquecimento
+
+from django.db import DatabaseError  # Banco indisponível ao iniciar o processo
+
+from .busca import normalizar  # Mesma normalização da busca (sem acentos, minúsculo)
+from .cache import IndiceEmMemoria  # Base dos índices em memória do catálogo
+from .emails import filtro_emails  # Filtro de emails da página inicial (aquecido junto)
+from .models import Filme
+
+logger = logging.getLogger(__name__)
+
+
+def chaves_do_titulo(titulo):
+    """
+    Retorna as chaves de prefixo de um título: o título normalizado inteiro
+    e cada sufixo que começa em uma palavra, para que "pyt" encontre
+    "Programação em Python".
+
+    Ex: "Programação em Python" -> ["programacao em python", "em python", "python"]
+    """
+    palavras = normalizar(titulo).split()
+    return [" ".join(palavras[i:]) for i in range(len(palavras))]
+
+
+class IndiceAutocompletar(IndiceEmMemoria):
+    """
+    Lista ordenada de (chave_normalizada, filme_id) pesquisada com bisect.
+
+    Encontrar as sugestões de um prefixo custa O(log n) mais o número de
+    sugestões, sem nenhuma consulta ao banco.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chaves = []    # [(chave, filme_id)] em ordem crescente
+        self._titulos = {}   # filme_id -> título original (exibido na sugestão)
+
+    def construir(self):
+        """Lê os títulos de todos os filmes e monta a lista ordenada."""
+        chaves, titulos = [], {}
+        for filme_id, titulo in Filme.objects.values_list("id", "titulo").iterator(chunk_size=5000):
+            titulos[filme_id] = titulo
+            chaves.extend((chave, filme_id) for chave in chaves_do_titulo(titulo))
+        chaves.sort()
+        return chaves, titulos
+
+    def instalar(self, dados):
+        self._chaves, self._titulos = dados
+
+    def atualizar(self, filme_id):
+        """Atualiza as chaves de um único filme (ou as remove, se ele não existir mais)."""
+        if not self.construido:
+            return  # O índice será construído no próximo uso
+        titulo = Filme.objects.filter(pk=filme_id).values_list("titulo", flat=True).first()
+        with self.lock:
+            antigo = self._titulos.pop(filme_id, None)
+            if antigo is not None:
+                for chave in chaves_do_titulo(antigo):
+                    posicao = bisect.bisect_left(self._chaves, (chave, filme_id))
+                    if posicao < len(self._chaves) and self._chaves[posicao] == (chave, filme_id):
+                        del self._chaves[posicao]
+            if titulo is not None:
+                self._titulos[filme_id] = titulo
+                for chave in chaves_do_titulo(titulo):
+                    bisect.insort(self._chaves, (chave, filme_id))
+        self.marcar_atualizado()
+
+    def sugerir(self, prefixo, limite=8):
+        """
+        Retorna até 'limite' sugestões [(filme_id, titulo)] para o prefixo.
+
+        Títulos que começam com o prefixo vêm antes dos que apenas têm
+        uma palavra começando com ele.
+        """
+        prefixo = " ".join(normalizar(prefixo).split())
+        if not prefixo:
+            return []
+        self.garantir_atualizado()
+        with self.lock:
+            inicio_titulo, sugestoes = [], []
+            vistos = set()
+            posicao = bisect.bisect_left(self._chaves, (prefixo,))
+            while posicao < len(self._chaves) and len(vistos) < limite * 4:
+                chave, filme_id = self._chaves[posicao]
+                if not chave.startswith(prefixo):
+                    break
+                if filme_id not in vistos:
+                    vistos.add(filme_id)
+                    titulo = self._titulos[filme_id]
+                    destino = inicio_titulo if normalizar(titulo) == chave else sugestoes
+                    destino.append((filme_id, titulo))
+                posicao += 1
+        return (inicio_titulo + sugestoes)[:limite]
+
+
+# Instância única por processo
+indice_autocompletar = IndiceAutocompletar()
+
+
+def aquecer_indices():
+    """
+    Constrói o índice do autocompletar e o filtro de emails da página
+    inicial na inicialização do processo, para que a primeira digitação ou
+    o primeiro formulário não paguem a construção.
+
+    Se o banco não estiver disponível (ex: migrações pendentes), cada índice
+    será construído no primeiro uso.
+    """
+    for nome, indice in (("autocompletar", indice_autocompletar), ("filtro de emails", filtro_emails)):
+        try:
+            indice.reconstruir()
+        except DatabaseError:
+            logger.warning("Índice %s não aquecido; será construído no primeiro uso.", nome)
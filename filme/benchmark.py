@@ -0,0 +1,387 @@
+# Benchmark das requisições do Pyflix: catálogos sintéticos e medição de latência
+#
+# Usado pelo comando 'benchmark_requisicoes'. A população usa bulk_create em
+# lotes (sem sinais): a busca e os trilhos são reindexados ao final.
+import http.client  # Gerador de carga HTTP
+import random  # Dados sintéticos reproduzíveis (semente)
+import re  # Token CSRF do formulário da página inicial
+import statistics  # Média dos tempos
+import threading  # Servidor HTTP local
+import time  # Relógio de alta resolução
+import tracemalloc  # Alocações por requisição
+from collections import Counter  # Baldes por hora do ranking "Em Alta"
+from concurrent.futures import ThreadPoolExecutor  # Clientes HTTP simultâneos
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings  # Nome do cookie de sessão
+from django.contrib.auth.hashers import make_password  # Um único hash para todos os usuários
+from django.core.handlers.wsgi import WSGIHandler  # Aplicação servida pelo servidor local
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connection  # Contagem das consultas
+from django.test import Client  # Cliente de testes (sem rede)
+from django.test.utils import CaptureQueriesContext, override_settings  # Consultas; autenticação no banco
+from django.urls import reverse
+from django.utils import timezone
+
+from .busca import normalizar, reindexar_catalogo
+from .cache import invalidar_catalogo, invalidar_usuarios
+from .em_alta import calcular_em_alta, gravar_em_alta, inicio_janela, truncar_hora
+from .models import LISTA_CATEGORIAS, Episodio, Filme, HistoricoVisualizacao, Usuario, VisualizacaoHora
+
+# Tamanhos de catálogo disponíveis (--tamanho)
+TAMANHOS = {
+    "1k": {"filmes": 1_000, "episodios_por_filme": 3, "usuarios": 1_000, "vistos_por_usuario": 20},
+    "100k": {"filmes": 100_000, "episodios_por_filme": 3, "usuarios": 20_000, "vistos_por_usuario": 50},
+    "1m": {"filmes": 1_000_000, "episodios_por_filme": 3, "usuarios": 100_000, "vistos_por_usuario": 50},
+}
+
+# Vocabulário dos títulos e descrições sintéticos (também usado nas pesquisas)
+PALAVRAS = [
+    "python", "django", "dados", "programação", "análise", "redes", "segurança", "nuvem",
+    "algoritmos", "banco", "web", "api", "testes", "desempenho", "arquitetura", "linux",
+    "javascript", "docker", "carreira", "projeto", "estruturas", "machine", "learning",
+    "backend", "frontend", "mobile", "git", "sql", "cache", "filas",
+]
+
+CENARIOS = ("homefilmes", "filme_detalhes", "pesquisa", "homepage_post", "progresso_post")
+
+# Autenticação anterior ao cache (sessão e usuário lidos do banco a cada
+# requisição), medida com --comparar-autenticacao
+AUTENTICACAO_NO_BANCO = {
+    "SESSION_ENGINE": "django.contrib.sessions.backends.db",
+    "AUTHENTICATION_BACKENDS": ["django.contrib.auth.backends.ModelBackend"],
+}
+
+
+def popular(filmes, episodios_por_filme, usuarios, vistos_por_usuario, semente=0, tamanho_lote=5000):
+    """
+    Popula o banco com um catálogo sintético e reprodutível.
+
+    Cada tabela é gravada em lotes de 'tamanho_lote' linhas, gerados sob
+    demanda (a memória não cresce com o tamanho do catálogo). O histórico
+    concentra parte das visualizações nos 5% de filmes mais populares; as
+    que caem na janela do ranking "Em Alta" viram baldes por hora, e o
+    ranking é calculado ao final.
+    """
+    aleatorio = random.Random(semente)
+    categorias = [categoria for categoria, _ in LISTA_CATEGORIAS]
+    hoje = timezone.now().date()
+
+    def gerar_filmes():
+        for i in range(filmes):
+            titulo = f"{aleatorio.choice(PALAVRAS).title()} {aleatorio.choice(PALAVRAS)} {i}"
+            yield Filme(
+                titulo=titulo,
+                titulo_busca=normalizar(titulo),  # Preenchido pelo sinal pre_save, que o bulk_create não dispara
+                categoria=aleatorio.choice(categorias),
+                visualizacoes=int(aleatorio.paretovariate(1.2)),
+                data_criacao=hoje - timedelta(days=aleatorio.randrange(3650)),
+                duracao=aleatorio.randint(5, 180),
+                descricao=" ".join(aleatorio.choices(PALAVRAS, k=12)),
+                thumbnail="thumb_filmes/benchmark.png",
+            )
+
+    _gravar_em_lotes(Filme, gerar_filmes(), tamanho_lote)
+    filme_ids = list(Filme.objects.order_by("pk").values_list("pk", flat=True))
+
+    def gerar_episodios():
+        for filme_id in filme_ids:
+            for numero in range(1, episodios_por_filme + 1):
+                yield Episodio(
+                    filme_id=filme_id,
+                    titulo=f"Episódio {numero}",
+                    link_video=f"https://videos.example.com/{filme_id}/{numero}",
+                )
+
+    _gravar_em_lotes(Episodio, gerar_episodios(), tamanho_lote)
+
+    senha = make_password("benchmark")
+    _gravar_em_lotes(
+        Usuario,
+        (
+            Usuario(username=f"bench{i}", email=f"bench{i}@example.com", password=senha)
+            for i in range(usuarios)
+        ),
+        tamanho_lote,
+    )
+    usuario_ids = list(Usuario.objects.order_by("pk").values_list("pk", flat=True))
+
+    populares = filme_ids[: max(1, len(filme_ids) // 20)]
+    agora = timezone.now()
+    janela = inicio_janela(agora)
+    por_hora = Counter()  # Baldes do ranking "Em Alta" (apenas a janela recente)
+
+    def gerar_historico():
+        for usuario_id in usuario_ids:
+            vistos = set(aleatorio.sample(populares, min(len(populares), vistos_por_usuario // 2)))
+            while len(vistos) < min(vistos_por_usuario, len(filme_ids)):
+                vistos.add(aleatorio.choice(filme_ids))
+            for filme_id in vistos:
+                instante = agora - timedelta(minutes=aleatorio.randrange(525_600))
+                if instante >= janela:
+                    por_hora[(filme_id, truncar_hora(instante))] += 1
+                yield HistoricoVisualizacao(
+                    usuario_id=usuario_id, filme_id=filme_id, ultima_visualizacao=instante
+                )
+
+    _gravar_em_lotes(HistoricoVisualizacao, gerar_historico(), tamanho_lote)
+    _gravar_em_lotes(
+        VisualizacaoHora,
+        (
+            VisualizacaoHora(filme_id=filme_id, hora=hora, quantidade=quantidade)
+            for (filme_id, hora), quantidade in por_hora.items()
+        ),
+        tamanho_lote,
+    )
+    gravar_em_alta(calcular_em_alta())
+
+    # Gravações em massa não disparam os sinais: invalida os trilhos e o filtro de
+    # emails e reindexa a busca (depois de invalidar, para o índice em memória
+    # ficar na versão nova do catálogo)
+    invalidar_usuarios()
+    invalidar_catalogo()
+    reindexar_catalogo()
+
+
+def _gravar_em_lotes(modelo, objetos, tamanho_lote):
+    lote = []
+    for objeto in objetos:
+        lote.append(objeto)
+        if len(lote) == tamanho_lote:
+            modelo.objects.bulk_create(lote)
+            lote = []
+    if lote:
+        modelo.objects.bulk_create(lote)
+
+
+def percentil(ordenados, p):
+    """Percentil p (0-100) de uma lista ordenada, pelo método do posto mais próximo."""
+    if not ordenados:
+        return None
+    posto = max(1, -(-len(ordenados) * p // 100))  # Arredonda para cima
+    return ordenados[int(posto) - 1]
+
+
+def resumo(tempos_ms):
+    """Estatísticas de latência de uma lista de tempos em milissegundos."""
+    ordenados = sorted(tempos_ms)
+    return {
+        "requisicoes": len(ordenados),
+        "media_ms": round(statistics.fmean(ordenados), 3) if ordenados else None,
+        "p50_ms": _arredondar(percentil(ordenados, 50)),
+        "p95_ms": _arredondar(percentil(ordenados, 95)),
+        "p99_ms": _arredondar(percentil(ordenados, 99)),
+    }
+
+
+def _arredondar(valor):
+    return None if valor is None else round(valor, 3)
+
+
+class GeradorRequisicoes:
+    """
+    Sorteia as requisições de cada cenário: (método, caminho, dados, autenticada).
+    """
+
+    def __init__(self, semente=0):
+        self.aleatorio = random.Random(semente)
+        ids = Filme.objects.values_list("pk", flat=True)
+        self.filme_ids = list(ids.order_by("?")[:10_000])  # Amostra do catálogo
+        self.episodio_ids = list(Episodio.objects.values_list("pk", flat=True).order_by("?")[:10_000])
+        self.emails = list(Usuario.objects.values_list("email", flat=True)[:1000])
+
+    def __call__(self, cenario):
+        if cenario == "homefilmes":
+            return "GET", reverse("filme:filmes"), None, True
+        if cenario == "filme_detalhes":
+            filme_id = self.aleatorio.choice(self.filme_ids)
+            return "GET", reverse("filme:filme_detalhes", args=[filme_id]), None, True
+        if cenario == "pesquisa":
+            termo = " ".join(self.aleatorio.sample(PALAVRAS, self.aleatorio.choice((1, 2))))
+            return "GET", reverse("filme:pesquisa"), {"q": termo}, True
+        if cenario == "homepage_post":
+            # Metade de emails cadastrados (vai para o login), metade novos (criar conta)
+            email = (
+                self.aleatorio.choice(self.emails)
+                if self.emails and self.aleatorio.random() < 0.5
+                else f"novo{self.aleatorio.randrange(10**9)}@example.com"
+            )
+            return "POST", reverse("filme:homepage"), {"email": email}, False
+        if cenario == "progresso_post":
+            # Heartbeat do player: nenhuma consulta além da autenticação
+            episodio_id = self.aleatorio.choice(self.episodio_ids)
+            dados = {"posicao": self.aleatorio.randrange(3600), "duracao": 3600}
+            return "POST", reverse("filme:progresso_episodio", args=[episodio_id]), dados, True
+        raise ValueError(f"Cenário desconhecido: {cenario}")
+
+
+def medir_cliente(cenario, usuario, gerador, repeticoes, aquecimento=20, amostra_alocacoes=50):
+    """
+    Mede o cenário com o Client de testes do Django (sem rede nem servidor).
+
+    A latência é medida em uma passada sem instrumentação; as consultas e as
+    alocações (pico do tracemalloc), em uma passada separada de
+    'amostra_alocacoes' requisições, pois a instrumentação distorce os tempos.
+    """
+    clientes = {True: Client(), False: Client()}
+    clientes[True].force_login(usuario)
+
+    def requisitar():
+        metodo, caminho, dados, autenticada = gerador(cenario)
+        cliente = clientes[autenticada]
+        if metodo == "GET":
+            return cliente.get(caminho, dados)
+        return cliente.post(caminho, dados)
+
+    for _ in range(aquecimento):
+        requisitar()
+
+    tempos, erros = [], 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resposta = requisitar()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        erros += resposta.status_code >= 400
+
+    consultas, alocacoes = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(min(repeticoes, amostra_alocacoes)):
+            tracemalloc.reset_peak()
+            antes = tracemalloc.get_traced_memory()[0]
+            with CaptureQueriesContext(connection) as capturadas:
+                requisitar()
+            alocacoes.append(tracemalloc.get_traced_memory()[1] - antes)
+            consultas.append(len(capturadas))
+    finally:
+        tracemalloc.stop()
+
+    resultado = resumo(tempos)
+    resultado.update({
+        "erros": erros,
+        "consultas_por_requisicao": round(statistics.fmean(consultas), 2) if consultas else None,
+        "alocacao_pico_kb": round(statistics.fmean(alocacoes) / 1024, 1) if alocacoes else None,
+    })
+    return resultado
+
+
+class _ManipuladorSilencioso(WSGIRequestHandler):
+    """Não registra cada requisição no log (distorceria a medição)."""
+
+    def log_message(self, *args):
+        pass
+
+
+class ServidorLocal:
+    """
+    Servidor WSGI multithread do Django em uma porta livre de 127.0.0.1,
+    usado pelo gerador de carga HTTP.
+    """
+
+    def __enter__(self):
+        self.servidor = ThreadedWSGIServer(("127.0.0.1", 0), _ManipuladorSilencioso)
+        self.servidor.set_app(WSGIHandler())
+        self.porta = self.servidor.server_address[1]
+        self.thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *excecao):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+def medir_http(cenario, usuario, gerador, repeticoes, concorrencia, porta, aquecimento=20):
+    """
+    Mede o cenário com 'concorrencia' clientes HTTP simultâneos contra o
+    servidor local, somando 'repeticoes' requisições. Inclui a vazão (rps).
+    """
+    cliente = Client()
+    cliente.force_login(usuario)  # Sessão gravada no banco, reutilizada pelas conexões HTTP
+    sessao = f"{settings.SESSION_COOKIE_NAME}={cliente.cookies[settings.SESSION_COOKIE_NAME].value}"
+    csrf = _obter_csrf(porta)
+    sorteio = threading.Lock()  # O gerador (random.Random) não é compartilhado sem lock
+
+    def requisitar(_):
+        with sorteio:
+            metodo, caminho, dados, autenticada = gerador(cenario)
+        cookies = [sessao] if autenticada else []
+        corpo = None
+        if metodo == "GET" and dados:
+            caminho = f"{caminho}?{urlencode(dados)}"
+        elif metodo == "POST":
+            cookies.append(f"csrftoken={csrf}")
+            corpo = urlencode({**dados, "csrfmiddlewaretoken": csrf})
+        cabecalhos = {"Cookie": "; ".join(cookies)}
+        if corpo is not None:
+            cabecalhos["Content-Type"] = "application/x-www-form-urlencoded"
+        conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=60)
+        try:
+            inicio = time.perf_counter()
+            conexao.request(metodo, caminho, body=corpo, headers=cabecalhos)
+            resposta = conexao.getresponse()
+            resposta.read()
+            return (time.perf_counter() - inicio) * 1000, resposta.status
+        finally:
+            conexao.close()
+
+    with ThreadPoolExecutor(max_workers=concorrencia) as pool:
+        list(pool.map(requisitar, range(aquecimento)))
+        inicio = time.perf_counter()
+        medidas = list(pool.map(requisitar, range(repeticoes)))
+        duracao = time.perf_counter() - inicio
+
+    resultado = resumo([tempo for tempo, _ in medidas])
+    resultado.update({
+        "erros": sum(status >= 400 for _, status in medidas),
+        "concorrencia": concorrencia,
+        "rps": round(repeticoes / duracao, 1),
+    })
+    return resultado
+
+
+def _obter_csrf(porta):
+    """Token CSRF de um visitante anônimo (cookie e campo do formulário)."""
+    conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=60)
+    try:
+        conexao.request("GET", reverse("filme:homepage"))
+        html = conexao.getresponse().read().decode()
+    finally:
+        conexao.close()
+    encontrado = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', html)
+    return encontrado.group(1) if encontrado else ""
+
+
+def medir_autenticacao_no_banco(cenarios, usuario, gerador, repeticoes):
+    """
+    Mede os cenários com o Client de testes e a autenticação anterior ao
+    cache (AUTENTICACAO_NO_BANCO). Comparado a medir_cliente() com as
+    configurações atuais, mostra as consultas e o tempo que o cache das
+    sessões e do usuário economiza por requisição.
+    """
+    with override_settings(**AUTENTICACAO_NO_BANCO):
+        return {
+            cenario: medir_cliente(cenario, usuario, gerador, repeticoes)
+            for cenario in cenarios
+        }
+
+
+def comparar(anterior, atual):
+    """
+    Compara dois resultados do benchmark (JSON) e retorna linhas de texto
+    com a variação de p50/p95 e consultas de cada cenário.
+    """
+    linhas = []
+    for modo in ("cliente", "http"):
+        for cenario, novo in atual.get(modo, {}).items():
+            antigo = anterior.get(modo, {}).get(cenario)
+            if not antigo:
+                continue
+            partes = []
+            for chave in ("p50_ms", "p95_ms", "consultas_por_requisicao"):
+                if antigo.get(chave) and novo.get(chave) is not None:
+                    variacao = (novo[chave] - antigo[chave]) / antigo[chave] * 100
+                    partes.append(f"{chave} {antigo[chave]} -> {novo[chave]} ({variacao:+.1f}%)")
+            linhas.append(f"{modo}/{cenario}: " + "; ".join(partes))
+    return linhas
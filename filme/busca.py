@@ -0,0 +1,414 @@
+# Motor de busca do catálogo: texto normalizado, ranking e busca aproximada
+import bisect  # Localiza a posição do cursor na lista ranqueada
+import math  # Cálculo do IDF do ranking
+import re  # Separação do texto em palavras
+import unicodedata  # Remoção de acentos
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings  # Backend de busca configurado
+from django.contrib.postgres.search import (  # Busca textual do PostgreSQL
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramWordSimilarity,
+)
+from django.core.exceptions import BadRequest  # Resposta 400 para cursor inválido
+from django.db import connection, transaction  # Banco em uso e reindexação em lotes
+from django.db.models import F, FloatField, Value  # Expressões para o vetor de busca e o rank
+from django.db.models.functions import Cast  # Rank em double precision (cursor exato)
+
+from .cache import IndiceEmMemoria  # Base dos índices em memória do catálogo
+from .models import LISTA_CATEGORIAS, Episodio, Filme
+from .paginacao import PaginaCursor, codificar_cursor, decodificar_cursor, paginar_por_cursor
+
+# Configuração de idioma do PostgreSQL (stemming em português)
+CONFIG_POSTGRES = "portuguese"
+
+# Peso de cada campo no ranking (título vale mais que a descrição)
+PESOS = {"titulo": 3.0, "categoria": 2.0, "episodios": 2.0, "descricao": 1.0}
+
+# Similaridade mínima (trigramas) para a busca aproximada ("progamacao" -> "programacao")
+SIMILARIDADE_MINIMA = 0.4
+
+# Palavras muito comuns em português que não ajudam a ranquear
+PALAVRAS_IGNORADAS = frozenset(
+    "a o as os e de da do das dos em no na nos nas um uma uns umas para por com "
+    "sem que se ao aos the of".split()
+)
+
+# Rótulos das categorias (ex: "PROGRAMACAO" -> "Programação")
+ROTULOS_CATEGORIAS = dict(LISTA_CATEGORIAS)
+
+
+def normalizar(texto):
+    """
+    Normaliza um texto para busca: sem acentos e em minúsculas.
+
+    Ex: "Programação" -> "programacao"
+    """
+    decomposto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def tokenizar(texto):
+    """Divide o texto normalizado em palavras, ignorando as muito comuns."""
+    return [
+        palavra for palavra in re.findall(r"\w+", normalizar(texto))
+        if palavra not in PALAVRAS_IGNORADAS
+    ]
+
+
+def trigramas(termo):
+    """
+    Retorna os trigramas de um termo, no mesmo formato do pg_trgm
+    (dois espaços antes e um depois).
+    """
+    termo = f"  {termo} "
+    return {termo[i:i + 3] for i in range(len(termo) - 2)}
+
+
+def campos_do_filme(titulo, categoria, descricao, titulos_episodios):
+    """
+    Retorna o texto de cada campo pesquisável de um filme.
+    """
+    return {
+        "titulo": titulo,
+        "categoria": ROTULOS_CATEGORIAS.get(categoria, categoria),
+        "episodios": " ".join(titulos_episodios),
+        "descricao": descricao,
+    }
+
+
+class BackendMemoria(IndiceEmMemoria):
+    """
+    Índice invertido em Python puro, usado no SQLite (testes e desenvolvimento).
+
+    Mantém, por palavra, os filmes que a contêm com o peso acumulado dos
+    campos, e um índice de trigramas do vocabulário para a busca aproximada.
+    """
+
+    TAMANHO_CACHE_CONSULTAS = 256  # Rankings recentes guardados para as próximas páginas
+
+    def __init__(self):
+        super().__init__()
+        self._postagens = {}         # palavra -> {filme_id: peso}
+        self._palavras_filme = {}    # filme_id -> conjunto de palavras do filme
+        self._trigramas = {}         # trigrama -> conjunto de palavras do vocabulário
+        self._consultas = OrderedDict()  # consulta normalizada -> ranking [(-pontuacao, id)]
+
+    # Construção e atualização
+
+    def construir(self):
+        """Lê todos os filmes e episódios e monta um índice novo."""
+        episodios = defaultdict(list)
+        for filme_id, titulo in Episodio.objects.values_list("filme_id", "titulo").iterator():
+            episodios[filme_id].append(titulo)
+
+        novo = BackendMemoria()
+        filmes = Filme.objects.values_list("id", "titulo", "categoria", "descricao")
+        for filme_id, titulo, categoria, descricao in filmes.iterator(chunk_size=2000):
+            novo._adicionar(
+                filme_id, campos_do_filme(titulo, categoria, descricao, episodios[filme_id])
+            )
+        return novo._postagens, novo._palavras_filme, novo._trigramas
+
+    def instalar(self, dados):
+        self._postagens, self._palavras_filme, self._trigramas = dados
+        self._consultas.clear()
+
+    def reindexar(self, tamanho_lote=1000):
+        """Reconstrói o índice inteiro (após gravações em massa)."""
+        self.reconstruir()
+
+    def atualizar_varios(self, filme_ids):
+        """Reindexa vários filmes (ex: um lote da importação do catálogo)."""
+        for filme_id in filme_ids:
+            self.atualizar(filme_id)
+
+    def atualizar(self, filme_id):
+        """Reindexa um único filme (ou o remove, se não existir mais)."""
+        if not self.construido:
+            return  # Nada a atualizar: o índice será construído na primeira busca
+        filme = Filme.objects.filter(pk=filme_id).values_list(
+            "titulo", "categoria", "descricao"
+        ).first()
+        titulos_episodios = list(
+            Episodio.objects.filter(filme_id=filme_id).values_list("titulo", flat=True)
+        )
+        with self.lock:
+            self._remover(filme_id)
+            if filme is not None:
+                self._adicionar(filme_id, campos_do_filme(*filme, titulos_episodios))
+            self._consultas.clear()
+        self.marcar_atualizado()
+
+    def _adicionar(self, filme_id, campos):
+        pesos = defaultdict(float)
+        for campo, texto in campos.items():
+            for palavra in tokenizar(texto):
+                pesos[palavra] += PESOS[campo]
+        for palavra, peso in pesos.items():
+            if palavra not in self._postagens:
+                self._postagens[palavra] = {}
+                for trigrama in trigramas(palavra):
+                    self._trigramas.setdefault(trigrama, set()).add(palavra)
+            self._postagens[palavra][filme_id] = peso
+        self._palavras_filme[filme_id] = set(pesos)
+
+    def _remover(self, filme_id):
+        for palavra in self._palavras_filme.pop(filme_id, ()):
+            postagem = self._postagens[palavra]
+            postagem.pop(filme_id, None)
+            if not postagem:
+                # Palavra saiu do vocabulário: remove também dos trigramas
+                del self._postagens[palavra]
+                for trigrama in trigramas(palavra):
+                    self._trigramas[trigrama].discard(palavra)
+
+    # Consulta
+
+    def _semelhantes(self, palavra):
+        """Retorna {palavra_do_vocabulario: similaridade} para a busca aproximada."""
+        alvo = trigramas(palavra)
+        comuns = defaultdict(int)
+        for trigrama in alvo:
+            for candidata in self._trigramas.get(trigrama, ()):
+                comuns[candidata] += 1
+        semelhantes = {}
+        for candidata, quantidade in comuns.items():
+            similaridade = quantidade / (len(alvo) + len(trigramas(candidata)) - quantidade)
+            if similaridade >= SIMILARIDADE_MINIMA:
+                semelhantes[candidata] = similaridade
+        return semelhantes
+
+    def _ranquear(self, consulta):
+        """
+        Retorna a lista [(-pontuacao, filme_id)] em ordem crescente
+        (maior pontuação primeiro, desempate pelo id).
+
+        Todas as palavras da consulta precisam casar (E lógico). Palavras
+        sem nenhuma ocorrência exata são trocadas pelas mais parecidas
+        do vocabulário (busca aproximada por trigramas).
+        """
+        total_filmes = max(len(self._palavras_filme), 1)
+
+        # Para cada palavra: [(postagem, fator)] das alternativas (exata ou aproximadas)
+        termos = []
+        for palavra in tokenizar(consulta):
+            alternativas = (
+                {palavra: 1.0} if palavra in self._postagens else self._semelhantes(palavra)
+            )
+            if not alternativas:
+                return []  # Palavra sem correspondência: nenhum filme tem todas
+            # Fator = similaridade x IDF (palavras raras valem mais)
+            termos.append([
+                (
+                    self._postagens[alternativa],
+                    similaridade * math.log(1 + total_filmes / len(self._postagens[alternativa])),
+                )
+                for alternativa, similaridade in alternativas.items()
+            ])
+        if not termos:
+            return []
+
+        # Começa pela palavra mais rara: os candidatos só diminuem a partir dela
+        termos.sort(key=lambda alternativas: sum(len(postagem) for postagem, _ in alternativas))
+        pontuacoes = {}
+        for postagem, fator in termos[0]:
+            for filme_id, peso in postagem.items():
+                if fator * peso > pontuacoes.get(filme_id, 0.0):
+                    pontuacoes[filme_id] = fator * peso
+        for alternativas in termos[1:]:
+            proximas = {}
+            for filme_id, pontuacao in pontuacoes.items():
+                melhor = max(
+                    (fator * postagem[filme_id] for postagem, fator in alternativas
+                     if filme_id in postagem),
+                    default=None,
+                )
+                if melhor is not None:  # E lógico: o filme precisa casar com todas as palavras
+                    proximas[filme_id] = pontuacao + melhor
+            pontuacoes = proximas
+            if not pontuacoes:
+                return []
+        return sorted(zip([-pontuacao for pontuacao in pontuacoes.values()], pontuacoes))
+
+    def ranking(self, consulta):
+        """Retorna o ranking da consulta, reaproveitando o de consultas recentes."""
+        self.garantir_atualizado()
+        chave = " ".join(tokenizar(consulta))
+        with self.lock:
+            if chave in self._consultas:
+                self._consultas.move_to_end(chave)
+                return self._consultas[chave]
+            resultado = self._ranquear(chave)
+            self._consultas[chave] = resultado
+            if len(self._consultas) > self.TAMANHO_CACHE_CONSULTAS:
+                self._consultas.popitem(last=False)
+            return resultado
+
+    def pesquisar(self, consulta, cursor, tamanho):
+        """Retorna uma PaginaCursor com os filmes da consulta, do mais relevante ao menos."""
+        resultado = self.ranking(consulta)
+        inicio = 0
+        if cursor:
+            pontuacao, filme_id = decodificar_cursor(cursor, 2)
+            if not isinstance(pontuacao, (int, float)) or not isinstance(filme_id, int):
+                raise BadRequest("Cursor de paginação inválido.")
+            inicio = bisect.bisect_right(resultado, (-pontuacao, filme_id))
+        fatia = resultado[inicio:inicio + tamanho + 1]
+
+        proximo_cursor = None
+        if len(fatia) > tamanho:
+            fatia = fatia[:tamanho]
+            proximo_cursor = codificar_cursor([-fatia[-1][0], fatia[-1][1]])
+
+        filmes = Filme.objects.in_bulk([filme_id for _, filme_id in fatia])
+        pagina = []
+        for pontuacao, filme_id in fatia:
+            if filme_id in filmes:  # Pode ter sido removido desde a indexação
+                filmes[filme_id].rank = -pontuacao
+                pagina.append(filmes[filme_id])
+        return PaginaCursor(pagina, proximo_cursor)
+
+
+class BackendPostgres:
+    """
+    Busca textual nativa do PostgreSQL.
+
+    Usa a coluna desnormalizada Filme.vetor_busca (tsvector com pesos A/B/C,
+    índice GIN) para a busca ranqueada e Filme.titulo_busca (índice GIN de
+    trigramas) para a busca aproximada quando nada é encontrado.
+    O texto é normalizado em Python antes de indexar e consultar, o que
+    torna a busca insensível a acentos sem depender da extensão unaccent.
+    """
+
+    ordenacao = ("-rank", "id")
+
+    def vetor(self, titulo, categoria, descricao, titulos_episodios):
+        """Expressão SearchVector ponderada com os campos já normalizados."""
+        campos = campos_do_filme(titulo, categoria, descricao, titulos_episodios)
+        return (
+            SearchVector(Value(normalizar(campos["titulo"])), weight="A", config=CONFIG_POSTGRES)
+            + SearchVector(
+                Value(normalizar(f'{campos["categoria"]} {campos["episodios"]}')),
+                weight="B",
+                config=CONFIG_POSTGRES,
+            )
+            + SearchVector(Value(normalizar(campos["descricao"])), weight="C", config=CONFIG_POSTGRES)
+        )
+
+    def atualizar(self, filme_id):
+        """Recalcula o vetor de busca de um filme."""
+        filme = Filme.objects.filter(pk=filme_id).values_list(
+            "titulo", "categoria", "descricao"
+        ).first()
+        if filme is None:
+            return
+        titulos_episodios = list(
+            Episodio.objects.filter(filme_id=filme_id).values_list("titulo", flat=True)
+        )
+        Filme.objects.filter(pk=filme_id).update(
+            vetor_busca=self.vetor(*filme, titulos_episodios)
+        )
+
+    def reindexar(self, tamanho_lote=1000):
+        """
+        Recalcula o vetor de busca de todos os filmes, em lotes pela chave
+        primária (uma transação e uma leitura de episódios por lote).
+        """
+        ultimo = 0
+        while True:
+            filmes = list(
+                Filme.objects.filter(pk__gt=ultimo)
+                .order_by("pk")
+                .values_list("pk", "titulo", "categoria", "descricao")[:tamanho_lote]
+            )
+            if not filmes:
+                break
+            self._reindexar_lote(filmes)
+            ultimo = filmes[-1][0]
+
+    def atualizar_varios(self, filme_ids):
+        """Recalcula o vetor de busca de vários filmes (uma leitura de episódios)."""
+        self._reindexar_lote(list(
+            Filme.objects.filter(pk__in=filme_ids).values_list("pk", "titulo", "categoria", "descricao")
+        ))
+
+    def _reindexar_lote(self, filmes):
+        episodios = defaultdict(list)
+        for filme_id, titulo in Episodio.objects.filter(
+            filme_id__in=[filme[0] for filme in filmes]
+        ).values_list("filme_id", "titulo"):
+            episodios[filme_id].append(titulo)
+        with transaction.atomic():
+            for filme_id, titulo, categoria, descricao in filmes:
+                Filme.objects.filter(pk=filme_id).update(
+                    vetor_busca=self.vetor(titulo, categoria, descricao, episodios[filme_id])
+                )
+
+    def pesquisar(self, consulta, cursor, tamanho):
+        """
+        Retorna uma PaginaCursor com os filmes da consulta, do mais relevante ao menos.
+
+        SearchRank e TrigramWordSimilarity retornam real (float4); o rank
+        vira double precision para que o valor guardado no cursor volte
+        idêntico na próxima página (rank = v AND id > i nos empates).
+        """
+        termos = normalizar(consulta)
+        busca = SearchQuery(termos, config=CONFIG_POSTGRES, search_type="websearch")
+        filmes = Filme.objects.filter(vetor_busca=busca).annotate(
+            rank=Cast(SearchRank(F("vetor_busca"), busca), FloatField())
+        )
+        if not filmes.exists():
+            # Nada encontrado: busca aproximada por trigramas no título
+            filmes = Filme.objects.filter(titulo_busca__trigram_word_similar=termos).annotate(
+                rank=Cast(TrigramWordSimilarity(termos, "titulo_busca"), FloatField())
+            )
+        return paginar_por_cursor(filmes, self.ordenacao, cursor, tamanho)
+
+
+# Instâncias criadas sob demanda (uma por processo)
+_backends = {}
+
+
+def backend_busca():
+    """
+    Retorna o backend de busca configurado em BUSCA_BACKEND.
+
+    "postgres" ou "memoria"; vazio escolhe pelo banco em uso.
+    """
+    nome = settings.BUSCA_BACKEND or (
+        "postgres" if connection.vendor == "postgresql" else "memoria"
+    )
+    if nome not in _backends:
+        _backends[nome] = BackendPostgres() if nome == "postgres" else BackendMemoria()
+    return _backends[nome]
+
+
+def indexar_filme(filme_id):
+    """Atualiza o índice de busca de um filme (chamado pelos sinais após o commit)."""
+    backend_busca().atualizar(filme_id)
+
+
+def indexar_filmes(filme_ids):
+    """
+    Atualiza o índice de busca de vários filmes gravados em massa
+    (bulk_create/update não disparam os sinais).
+    """
+    backend_busca().atualizar_varios(filme_ids)
+
+
+def reindexar_catalogo():
+    """
+    Reindexa todo o catálogo na busca.
+
+    Necessário após gravações em massa que não disparam os sinais
+    (bulk_create/update), como a população do benchmark.
+    """
+    backend_busca().reindexar()
+
+
+def pesquisar(consulta, cursor=None, tamanho=24):
+    """Pesquisa filmes no backend configurado, retornando uma PaginaCursor."""
+    return backend_busca().pesquisar(consulta, cursor, tamanho)
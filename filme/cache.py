@@ -0,0 +1,411 @@
+# Camada de cache do catálogo: trilhos (rails) e índices em memória
+import threading  # Lock para acesso concorrente ao cache local
+import time  # Relógio monotônico para expiração e versão inicial
+from datetime import datetime, timezone  # Instante da última mudança das páginas (Last-Modified)
+
+from django.conf import settings  # Configurações do projeto (TTLs)
+from django.core.cache import cache  # Cache do Django (compartilhado entre processos)
+from django.db import connection  # Conexão da thread de reconstrução
+
+from .metricas import registro_metricas  # Tempo de carregamento dos trilhos
+
+# Chave do cache que guarda a versão atual do catálogo
+# Toda alteração em Filme incrementa essa versão, invalidando os trilhos antigos
+CHAVE_VERSAO_CATALOGO = "pyflix:catalogo:versao"
+
+# Versão do histórico de cada usuário (trilho "Continuar Assistindo")
+CHAVE_VERSAO_HISTORICO = "pyflix:historico:versao:{}"
+
+# Versão das recomendações, incrementada a cada execução de calcular_recomendacoes
+CHAVE_VERSAO_RECOMENDACOES = "pyflix:recomendacoes:versao"
+
+# Versão dos emails cadastrados, incrementada a cada usuário criado ou alterado
+CHAVE_VERSAO_USUARIOS = "pyflix:usuarios:versao"
+
+# Versão e instante da última mudança das páginas do catálogo (ETag e
+# Last-Modified de detalhes e pesquisa): mudam com o catálogo e com os
+# relacionados pré-calculados
+CHAVE_VERSAO_PAGINAS = "pyflix:paginas:versao"
+CHAVE_PAGINAS_MODIFICADAS_EM = "pyflix:paginas:modificadas_em"
+
+# Versão das posições de retomada de cada usuário, trocada a cada lote
+# gravado (ETag pessoal da página de detalhes)
+CHAVE_VERSAO_PROGRESSO = "pyflix:progresso:versao:{}"
+
+# Usuário autenticado de cada sessão (AuthenticationMiddleware), removido a
+# cada alteração do usuário (ver filme/autenticacao.py)
+CHAVE_USUARIO_AUTENTICADO = "pyflix:usuario:{}"
+
+
+class CacheLocalTTL:
+    """
+    Cache em memória do processo com expiração por tempo (TTL).
+
+    Evita até mesmo a ida ao cache do Django enquanto a entrada for recente.
+    Cada entrada guarda a versão do catálogo com que foi calculada.
+    """
+
+    def __init__(self):
+        self._dados = {}                # nome -> (expira_em, versao, valor)
+        self._lock = threading.Lock()   # Protege o dicionário entre threads
+
+    def obter(self, nome):
+        """
+        Retorna (versao, valor) se a entrada existir e não tiver expirado,
+        caso contrário retorna None.
+        """
+        with self._lock:
+            entrada = self._dados.get(nome)
+            if entrada is None:
+                return None
+            expira_em, versao, valor = entrada
+            if expira_em < time.monotonic():
+                del self._dados[nome]   # Entrada vencida
+                return None
+            return versao, valor
+
+    def definir(self, nome, versao, valor, ttl):
+        """Guarda o valor calculado para a versão informada."""
+        with self._lock:
+            self._dados[nome] = (time.monotonic() + ttl, versao, valor)
+
+    def limpar(self):
+        """Remove todas as entradas do processo."""
+        with self._lock:
+            self._dados.clear()
+
+
+# Instância única por processo
+cache_local = CacheLocalTTL()
+
+
+def obter_versao(chave, timeout=None):
+    """
+    Retorna o número de versão guardado na chave do cache do Django.
+
+    Se a chave não existir (cache reiniciado, expulso ou expirado), cria
+    uma versão baseada no relógio para nunca reaproveitar entradas
+    chaveadas por versões antigas.
+    """
+    versao = cache.get(chave)
+    if versao is None:
+        cache.add(chave, int(time.time() * 1000), timeout=timeout)
+        versao = cache.get(chave)
+    return versao
+
+
+async def aobter_versao(chave, timeout=None):
+    """Versão assíncrona de obter_versao(), para as views assíncronas."""
+    versao = await cache.aget(chave)
+    if versao is None:
+        await cache.aadd(chave, int(time.time() * 1000), timeout=timeout)
+        versao = await cache.aget(chave)
+    return versao
+
+
+def incrementar_versao(chave, timeout=None):
+    """
+    Incrementa a versão guardada na chave, invalidando tudo o que foi
+    cacheado com a versão anterior. Retorna a nova versão.
+    """
+    try:
+        return cache.incr(chave)
+    except ValueError:
+        # Chave inexistente: obter_versao() cria uma nova versão baseada no relógio
+        return obter_versao(chave, timeout)
+
+
+def versao_catalogo():
+    """
+    Retorna a versão atual do catálogo guardada no cache do Django.
+    """
+    return obter_versao(CHAVE_VERSAO_CATALOGO)
+
+
+async def aversao_catalogo():
+    """Versão assíncrona de versao_catalogo()."""
+    return await aobter_versao(CHAVE_VERSAO_CATALOGO)
+
+
+def invalidar_catalogo():
+    """
+    Invalida todos os trilhos do catálogo.
+
+    Incrementa a versão compartilhada (outros processos percebem ao vencer
+    o TTL local) e limpa imediatamente o cache local deste processo.
+    """
+    incrementar_versao(CHAVE_VERSAO_CATALOGO)
+    cache_local.limpar()
+    invalidar_paginas()
+
+
+def _estado_paginas(valores):
+    return (
+        valores[CHAVE_VERSAO_PAGINAS],
+        datetime.fromtimestamp(valores[CHAVE_PAGINAS_MODIFICADAS_EM], tz=timezone.utc),
+    )
+
+
+def estado_paginas():
+    """
+    Retorna (versão, instante da última mudança) das páginas do catálogo,
+    com uma única ida ao cache.
+
+    Se alguma das chaves sumiu do cache, a versão recomeça pelo relógio e
+    o instante passa a ser agora: as respostas anteriores deixam de valer.
+    """
+    valores = cache.get_many([CHAVE_VERSAO_PAGINAS, CHAVE_PAGINAS_MODIFICADAS_EM])
+    if len(valores) < 2:
+        obter_versao(CHAVE_VERSAO_PAGINAS)
+        cache.add(CHAVE_PAGINAS_MODIFICADAS_EM, time.time(), timeout=None)
+        valores = cache.get_many([CHAVE_VERSAO_PAGINAS, CHAVE_PAGINAS_MODIFICADAS_EM])
+    return _estado_paginas(valores)
+
+
+async def aestado_paginas():
+    """Versão assíncrona de estado_paginas()."""
+    valores = await cache.aget_many([CHAVE_VERSAO_PAGINAS, CHAVE_PAGINAS_MODIFICADAS_EM])
+    if len(valores) < 2:
+        await aobter_versao(CHAVE_VERSAO_PAGINAS)
+        await cache.aadd(CHAVE_PAGINAS_MODIFICADAS_EM, time.time(), timeout=None)
+        valores = await cache.aget_many([CHAVE_VERSAO_PAGINAS, CHAVE_PAGINAS_MODIFICADAS_EM])
+    return _estado_paginas(valores)
+
+
+def invalidar_paginas():
+    """
+    Invalida as respostas condicionais (ETag e Last-Modified) das páginas
+    do catálogo, no navegador e no proxy reverso.
+    """
+    incrementar_versao(CHAVE_VERSAO_PAGINAS)
+    cache.set(CHAVE_PAGINAS_MODIFICADAS_EM, time.time(), timeout=None)
+
+
+def versao_historico(usuario_id):
+    """
+    Retorna a versão do histórico de visualizações do usuário.
+
+    Expira junto com os fragmentos que a usam, para não acumular uma chave
+    por usuário no cache.
+    """
+    return obter_versao(
+        CHAVE_VERSAO_HISTORICO.format(usuario_id), settings.FRAGMENTOS_CACHE_TIMEOUT
+    )
+
+
+async def aversao_historico(usuario_id):
+    """Versão assíncrona de versao_historico()."""
+    return await aobter_versao(
+        CHAVE_VERSAO_HISTORICO.format(usuario_id), settings.FRAGMENTOS_CACHE_TIMEOUT
+    )
+
+
+def invalidar_historico(usuario_id):
+    """
+    Invalida os fragmentos que exibem o histórico do usuário.
+    """
+    incrementar_versao(
+        CHAVE_VERSAO_HISTORICO.format(usuario_id), settings.FRAGMENTOS_CACHE_TIMEOUT
+    )
+
+
+def versao_progresso(usuario_id):
+    """
+    Retorna a versão das posições de retomada do usuário.
+
+    Expira junto com os fragmentos, como a versão do histórico.
+    """
+    return obter_versao(
+        CHAVE_VERSAO_PROGRESSO.format(usuario_id), settings.FRAGMENTOS_CACHE_TIMEOUT
+    )
+
+
+async def aversao_progresso(usuario_id):
+    """Versão assíncrona de versao_progresso()."""
+    return await aobter_versao(
+        CHAVE_VERSAO_PROGRESSO.format(usuario_id), settings.FRAGMENTOS_CACHE_TIMEOUT
+    )
+
+
+def invalidar_progresso(usuario_ids):
+    """
+    Troca a versão das posições de vários usuários com uma única ida ao
+    cache (set_many com uma versão nova, baseada no relógio).
+    """
+    versao = time.time_ns()
+    cache.set_many(
+        {CHAVE_VERSAO_PROGRESSO.format(usuario_id): versao for usuario_id in usuario_ids},
+        settings.FRAGMENTOS_CACHE_TIMEOUT,
+    )
+
+
+def versao_recomendacoes():
+    """
+    Retorna a versão atual das recomendações pré-calculadas.
+    """
+    return obter_versao(CHAVE_VERSAO_RECOMENDACOES)
+
+
+async def aversao_recomendacoes():
+    """Versão assíncrona de versao_recomendacoes()."""
+    return await aobter_versao(CHAVE_VERSAO_RECOMENDACOES)
+
+
+def invalidar_recomendacoes():
+    """
+    Invalida os fragmentos de recomendações de todos os usuários.
+    """
+    incrementar_versao(CHAVE_VERSAO_RECOMENDACOES)
+
+
+def versao_usuarios():
+    """
+    Retorna a versão atual dos emails cadastrados (filtro da página inicial).
+    """
+    return obter_versao(CHAVE_VERSAO_USUARIOS)
+
+
+def invalidar_usuarios():
+    """
+    Avisa os outros processos que um email foi cadastrado ou alterado.
+    Retorna a nova versão.
+    """
+    return incrementar_versao(CHAVE_VERSAO_USUARIOS)
+
+
+def invalidar_usuario_autenticado(usuario_id):
+    """
+    Remove do cache o usuário carregado pelas sessões: a próxima requisição
+    o lê do banco (perfil, senha ou permissões alterados, logout).
+    """
+    cache.delete(CHAVE_USUARIO_AUTENTICADO.format(usuario_id))
+
+
+def obter_rail(nome, carregar):
+    """
+    Retorna o conteúdo de um trilho do catálogo, usando os caches em camadas.
+
+    Ordem de consulta:
+    1. Cache local do processo (sem nenhuma ida à rede enquanto o TTL valer)
+    2. Cache do Django, chaveado pela versão do catálogo
+    3. Banco de dados, através da função 'carregar' (deve retornar uma lista)
+    """
+    entrada = cache_local.obter(nome)
+    if entrada is not None:
+        return entrada[1]
+
+    versao = versao_catalogo()
+    chave = f"pyflix:catalogo:{nome}:{versao}"
+    valor = cache.get(chave)
+    if valor is None:
+        inicio = time.perf_counter()
+        valor = carregar()  # Consulta o banco apenas quando os dois caches falham
+        registro_metricas.observar(
+            "pyflix_trilho_carregamento_segundos", {"trilho": nome}, time.perf_counter() - inicio
+        )
+        cache.set(chave, valor, settings.CATALOGO_CACHE_TIMEOUT)
+
+    cache_local.definir(nome, versao, valor, settings.CATALOGO_CACHE_LOCAL_TTL)
+    return valor
+
+
+async def aobter_rail(nome, carregar):
+    """
+    Versão assíncrona de obter_rail(), com as mesmas camadas e chaves
+    (os trilhos são compartilhados entre as views síncronas e assíncronas).
+
+    'carregar' é uma função assíncrona que retorna a lista do trilho.
+    """
+    entrada = cache_local.obter(nome)
+    if entrada is not None:
+        return entrada[1]
+
+    versao = await aversao_catalogo()
+    chave = f"pyflix:catalogo:{nome}:{versao}"
+    valor = await cache.aget(chave)
+    if valor is None:
+        inicio = time.perf_counter()
+        valor = await carregar()
+        registro_metricas.observar(
+            "pyflix_trilho_carregamento_segundos", {"trilho": nome}, time.perf_counter() - inicio
+        )
+        await cache.aset(chave, valor, settings.CATALOGO_CACHE_TIMEOUT)
+
+    cache_local.definir(nome, versao, valor, settings.CATALOGO_CACHE_LOCAL_TTL)
+    return valor
+
+
+class IndiceEmMemoria:
+    """
+    Base para índices do catálogo mantidos em memória em cada processo.
+
+    O índice é construído na primeira utilização, atualizado de forma
+    incremental pelos sinais de Filme/Episodio deste processo e
+    reconstruído em segundo plano quando outro processo altera o catálogo
+    (percebido pela mudança da versão do catálogo no cache do Django).
+
+    Subclasses implementam construir() (lê o banco e retorna os dados)
+    e instalar(dados) (troca os dados em uso, sob o lock). Índices que não
+    dependem do catálogo sobrescrevem versao_atual().
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()   # Protege os dados do índice
+        self.versao = None              # Versão do catálogo refletida no índice
+        self._reconstruindo = False     # Evita reconstruções simultâneas
+
+    def versao_atual(self):
+        """Versão compartilhada que o índice acompanha (padrão: a do catálogo)."""
+        return versao_catalogo()
+
+    def construir(self):
+        """Lê o catálogo e retorna os dados do índice (implementado pelas subclasses)."""
+        raise NotImplementedError
+
+    def instalar(self, dados):
+        """Substitui os dados em uso pelos recém-construídos (sob o lock)."""
+        raise NotImplementedError
+
+    @property
+    def construido(self):
+        """Indica se o índice já foi construído neste processo."""
+        return self.versao is not None
+
+    def reconstruir(self):
+        """Reconstrói o índice inteiro de forma síncrona."""
+        versao = self.versao_atual()  # Lida antes: mudanças durante a construção geram nova reconstrução
+        dados = self.construir()
+        with self.lock:
+            self.instalar(dados)
+            self.versao = versao
+
+    def garantir_atualizado(self):
+        """
+        Constrói o índice se necessário ou agenda a reconstrução se estiver defasado.
+
+        A primeira construção é síncrona; as seguintes rodam em uma thread,
+        enquanto as consultas continuam usando o índice anterior.
+        """
+        if not self.construido:
+            self.reconstruir()
+        elif self.versao_atual() != self.versao:
+            self._reconstruir_em_segundo_plano()
+
+    def marcar_atualizado(self):
+        """Registra que o índice reflete a versão atual (após atualização incremental)."""
+        self.versao = self.versao_atual()
+
+    def _reconstruir_em_segundo_plano(self):
+        with self.lock:
+            if self._reconstruindo:
+                return
+            self._reconstruindo = True
+
+        def tarefa():
+            try:
+                self.reconstruir()
+            finally:
+                self._reconstruindo = False
+                connection.close()  # Conexão própria desta thread
+
+        threading.Thread(target=tarefa, daemon=True).start()
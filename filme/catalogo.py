@@ -0,0 +1,391 @@
+# Importação e exportação do catálogo (filmes e episódios) em JSONL ou CSV
+#
+# Tudo em fluxo: os arquivos são lidos e escritos registro a registro
+# (geradores) e gravados em lotes, então a memória não cresce com o tamanho
+# do catálogo. A importação faz upsert pela chave Filme.identificador e
+# (filme, titulo) dos episódios; as thumbnails remotas são baixadas e
+# validadas em um pool de threads enquanto o lote anterior é gravado.
+#
+# JSONL: um filme por linha, com os episódios aninhados:
+#   {"identificador": "...", "titulo": "...", "categoria": "PROGRAMACAO",
+#    "duracao": 30, "descricao": "...", "data_criacao": "2024-01-31",
+#    "thumbnail": "https://... ou caminho no storage",
+#    "episodios": [{"titulo": "...", "link_video": "https://...", "video": "episodios/..."}]}
+#
+# "video" é o nome do arquivo enviado no storage dos vídeos (VIDEOS_ROOT; os
+# arquivos são copiados à parte); com ele, "link_video" pode ficar vazio,
+# como em Episodio.clean(). Sem a chave "video", o arquivo de um episódio
+# já existente é mantido.
+#
+# CSV: uma linha por episódio, com as colunas do filme repetidas (CAMPOS_CSV);
+# as linhas de um filme devem ser consecutivas. Filme sem episódios: uma
+# linha com as colunas do episódio vazias.
+import csv  # Leitura e escrita em CSV
+import hashlib  # Nome estável das thumbnails baixadas
+import io  # Validação da imagem em memória
+import itertools  # Lotes e agrupamento das linhas do CSV
+import json  # Leitura e escrita em JSONL
+import logging  # Falhas das thumbnails
+import os  # Extensão das thumbnails
+from concurrent.futures import ThreadPoolExecutor  # Downloads em paralelo
+from datetime import date  # data_criacao
+from urllib.parse import urlparse  # Extensão da thumbnail pela URL
+from urllib.request import urlopen  # Download das thumbnails
+
+from django.core.exceptions import ValidationError  # URLs inválidas dos episódios
+from django.core.files.base import ContentFile  # Gravação da thumbnail no storage
+from django.core.files.storage import default_storage  # Storage configurado em STORAGES
+from django.core.validators import URLValidator
+from django.db import transaction  # Uma transação por lote
+from django.db.models import Prefetch  # Episódios da exportação
+from PIL import Image  # Validação das thumbnails baixadas
+
+from .busca import indexar_filmes, normalizar  # Campos de busca (o bulk_create não dispara os sinais)
+from .cache import invalidar_catalogo  # Trilhos e índices em memória após a importação
+from .imagens import gerar_imagens, precisa_gerar  # Versões redimensionadas das thumbnails novas
+from .models import LISTA_CATEGORIAS, Episodio, Filme, novo_identificador
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_FILME = (
+    "identificador", "titulo", "categoria", "duracao", "descricao", "data_criacao", "thumbnail",
+)
+CAMPOS_CSV = CAMPOS_FILME + ("episodio_titulo", "episodio_link_video", "episodio_video")
+
+# Campos sobrescritos quando o filme já existe (data_criacao é mantida; as
+# visualizações e os campos de busca/relacionados não vêm do arquivo)
+CAMPOS_ATUALIZADOS = [
+    "titulo", "titulo_busca", "categoria", "duracao", "descricao", "thumbnail",
+    "imagens", "placeholder", "cor_predominante", "atualizado_em",
+]
+
+CATEGORIAS = {categoria for categoria, _ in LISTA_CATEGORIAS}
+PASTA_THUMBNAILS = "thumb_filmes/importadas"
+THUMBNAIL_TIMEOUT = 30                # Segundos por download
+THUMBNAIL_LIMITE = 10 * 1024 * 1024   # Bytes máximos por thumbnail
+
+validar_url = URLValidator(schemes=["http", "https"])
+
+
+class RegistroInvalido(ValueError):
+    """Registro do arquivo que não pode ser importado (a importação continua)."""
+
+
+# Leitura
+
+def ler_jsonl(arquivo):
+    """Gera (número da linha, registro) de um arquivo JSONL, ignorando linhas vazias."""
+    for numero, linha in enumerate(arquivo, start=1):
+        if not linha.strip():
+            continue
+        try:
+            yield numero, json.loads(linha)
+        except ValueError as erro:
+            yield numero, RegistroInvalido(f"JSON inválido: {erro}")
+
+
+def ler_csv(arquivo):
+    """
+    Gera (número da linha, registro) de um arquivo CSV, juntando as linhas
+    consecutivas do mesmo identificador em um filme com seus episódios.
+    """
+    linhas = enumerate(csv.DictReader(arquivo), start=2)  # Linha 1: cabeçalho
+    # Linhas sem identificador são filmes distintos
+    chave = lambda par: par[1].get("identificador") or f"#{par[0]}"  # noqa: E731
+    for _, grupo in itertools.groupby(linhas, key=chave):
+        grupo = list(grupo)
+        numero, primeira = grupo[0]
+        registro = {campo: primeira.get(campo) for campo in CAMPOS_FILME}
+        registro["episodios"] = [
+            {
+                "titulo": linha["episodio_titulo"],
+                "link_video": linha.get("episodio_link_video"),
+                "video": linha.get("episodio_video"),  # None em CSVs sem a coluna
+            }
+            for _, linha in grupo
+            if linha.get("episodio_titulo")
+        ]
+        yield numero, registro
+
+
+LEITORES = {"jsonl": ler_jsonl, "csv": ler_csv}
+
+
+def validar(dados):
+    """
+    Confere e normaliza um registro lido do arquivo.
+
+    Retorna um dicionário com os campos do filme e os episódios
+    ({titulo: (link_video, video)}, video None sem a chave no arquivo) ou
+    levanta RegistroInvalido.
+    """
+    if isinstance(dados, RegistroInvalido):
+        raise dados
+    if not isinstance(dados, dict):
+        raise RegistroInvalido("o registro deve ser um objeto")
+    titulo = (dados.get("titulo") or "").strip()
+    if not titulo or len(titulo) > 100:
+        raise RegistroInvalido("titulo obrigatório, com até 100 caracteres")
+    if dados.get("categoria") not in CATEGORIAS:
+        raise RegistroInvalido(f"categoria inválida: {dados.get('categoria')!r}")
+    try:
+        duracao = int(dados.get("duracao"))
+    except (TypeError, ValueError):
+        raise RegistroInvalido(f"duracao inválida: {dados.get('duracao')!r}")
+    identificador = str(dados.get("identificador") or "").strip()
+    if len(identificador) > 100:
+        raise RegistroInvalido("identificador com mais de 100 caracteres")
+    thumbnail = (dados.get("thumbnail") or "").strip()
+    if not thumbnail:
+        raise RegistroInvalido("thumbnail obrigatória")
+    data_criacao = None
+    if dados.get("data_criacao"):
+        try:
+            data_criacao = date.fromisoformat(dados["data_criacao"])
+        except (TypeError, ValueError):
+            raise RegistroInvalido(f"data_criacao inválida: {dados['data_criacao']!r}")
+
+    episodios = {}
+    for episodio in dados.get("episodios") or []:
+        if not isinstance(episodio, dict):
+            raise RegistroInvalido("cada episódio deve ser um objeto")
+        titulo_episodio = (episodio.get("titulo") or "").strip()
+        if not titulo_episodio or len(titulo_episodio) > 100:
+            raise RegistroInvalido("titulo do episódio obrigatório, com até 100 caracteres")
+        video = episodio.get("video")
+        if video is not None and (
+            not isinstance(video, str) or len(video) > 100 or video.startswith("/") or ".." in video
+        ):
+            raise RegistroInvalido(f"video inválido: {video!r}")
+        link_video = episodio.get("link_video") or ""
+        if link_video or not video:  # Sem arquivo enviado, o link é obrigatório
+            try:
+                validar_url(link_video)
+            except ValidationError:
+                raise RegistroInvalido(f"link_video inválido: {episodio.get('link_video')!r}")
+        episodios[titulo_episodio] = (link_video, video)  # Títulos repetidos: o último vale
+
+    return {
+        "identificador": identificador,
+        "titulo": titulo,
+        "categoria": dados["categoria"],
+        "duracao": duracao,
+        "descricao": dados.get("descricao") or "",
+        "data_criacao": data_criacao,
+        "thumbnail": thumbnail,
+        "episodios": episodios,
+    }
+
+
+# Thumbnails
+
+def obter_thumbnail(origem, storage=None):
+    """
+    Retorna o nome da thumbnail no storage (roda nas threads do pool).
+
+    Caminhos são usados como estão (arquivos já no storage). URLs são
+    baixadas uma única vez: o nome do arquivo vem do hash da URL, então
+    uma nova importação reaproveita o arquivo já gravado.
+    """
+    if not origem.startswith(("http://", "https://")):
+        return origem
+    storage = storage or default_storage
+    extensao = os.path.splitext(urlparse(origem).path)[1].lower() or ".jpg"
+    nome = f"{PASTA_THUMBNAILS}/{hashlib.sha256(origem.encode()).hexdigest()[:32]}{extensao}"
+    if storage.exists(nome):
+        return nome
+    with urlopen(origem, timeout=THUMBNAIL_TIMEOUT) as resposta:
+        conteudo = resposta.read(THUMBNAIL_LIMITE + 1)
+    if len(conteudo) > THUMBNAIL_LIMITE:
+        raise RegistroInvalido(f"thumbnail maior que {THUMBNAIL_LIMITE} bytes")
+    try:
+        Image.open(io.BytesIO(conteudo)).verify()  # Recusa o que não for uma imagem
+    except Exception as erro:
+        raise RegistroInvalido(f"thumbnail não é uma imagem válida: {erro}")
+    return storage.save(nome, ContentFile(conteudo))
+
+
+def _baixar(registro, storage):
+    try:
+        return obter_thumbnail(registro["thumbnail"], storage), None
+    except Exception as erro:
+        logger.warning("Falha ao obter a thumbnail %s: %s", registro["thumbnail"], erro)
+        return None, erro
+
+
+# Importação
+
+def importar(arquivo, formato="jsonl", tamanho_lote=1000, threads=8, gerar=False,
+             storage=None, relatar_erro=None):
+    """
+    Importa o catálogo de um arquivo aberto (texto) em lotes de 'tamanho_lote'.
+
+    Cada lote é gravado em uma transação: upsert dos filmes pelo
+    identificador e dos episódios por (filme, titulo), seguido da
+    indexação na busca. Registros inválidos são informados a
+    relatar_erro(linha, mensagem) e ignorados. Com gerar=True, as versões
+    redimensionadas das thumbnails novas são geradas a cada lote.
+
+    Retorna {"filmes", "episodios", "erros"}.
+    """
+    totais = {"filmes": 0, "episodios": 0, "erros": 0}
+
+    def erro(numero, mensagem):
+        totais["erros"] += 1
+        if relatar_erro:
+            relatar_erro(numero, mensagem)
+
+    def validos():
+        for numero, dados in LEITORES[formato](arquivo):
+            try:
+                yield numero, validar(dados)
+            except RegistroInvalido as excecao:
+                erro(numero, str(excecao))
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        lotes = _lotes(validos(), tamanho_lote)
+        lote = next(lotes, None)
+        # Os downloads do próximo lote começam antes da gravação do atual
+        thumbnails = _agendar(pool, lote, storage)
+        while lote:
+            proximo = next(lotes, None)
+            thumbnails_proximo = _agendar(pool, proximo, storage)
+            filmes, episodios, ids = _gravar_lote(lote, [futuro.result() for futuro in thumbnails], erro)
+            totais["filmes"] += filmes
+            totais["episodios"] += episodios
+            if gerar and ids:
+                gerar_imagens(
+                    [filme for filme in Filme.objects.filter(pk__in=ids) if precisa_gerar(filme)],
+                    invalidar=False,  # Uma invalidação no fim da importação
+                )
+            lote, thumbnails = proximo, thumbnails_proximo
+
+    # O bulk_create não dispara os sinais: trilhos e índices em memória
+    # (busca e autocompletar) são reconstruídos pela nova versão do catálogo
+    invalidar_catalogo()
+    return totais
+
+
+def _lotes(itens, tamanho):
+    while True:
+        lote = list(itertools.islice(itens, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+def _agendar(pool, lote, storage):
+    return [pool.submit(_baixar, registro, storage) for _, registro in lote or []]
+
+
+def _gravar_lote(lote, thumbnails, erro):
+    """Grava um lote de registros válidos; retorna (filmes, episódios, ids dos filmes)."""
+    filmes = {}  # identificador -> (Filme, episódios); repetidos no lote: o último vale
+    for (numero, registro), (thumbnail, falha) in zip(lote, thumbnails):
+        if falha is not None:
+            erro(numero, f"thumbnail: {falha}")
+            continue
+        filme = Filme(
+            identificador=registro["identificador"] or novo_identificador(),
+            titulo=registro["titulo"],
+            titulo_busca=normalizar(registro["titulo"]),  # Preenchido pelo sinal pre_save, que o bulk_create não dispara
+            categoria=registro["categoria"],
+            duracao=registro["duracao"],
+            descricao=registro["descricao"],
+            thumbnail=thumbnail,
+        )
+        if registro["data_criacao"]:
+            filme.data_criacao = registro["data_criacao"]
+        filmes[filme.identificador] = (filme, registro["episodios"])
+    if not filmes:
+        return 0, 0, []
+
+    with transaction.atomic():
+        # Versões redimensionadas: mantidas se a thumbnail não mudou, descartadas
+        # (serão geradas de novo) se mudou
+        existentes = Filme.objects.filter(identificador__in=filmes).values_list(
+            "identificador", "thumbnail", "imagens", "placeholder", "cor_predominante"
+        )
+        for identificador, thumbnail, imagens, placeholder, cor in existentes:
+            filme = filmes[identificador][0]
+            if filme.thumbnail.name == thumbnail:
+                filme.imagens, filme.placeholder, filme.cor_predominante = imagens, placeholder, cor
+
+        Filme.objects.bulk_create(
+            [filme for filme, _ in filmes.values()],
+            update_conflicts=True,
+            unique_fields=["identificador"],
+            update_fields=CAMPOS_ATUALIZADOS,
+        )
+        ids = dict(Filme.objects.filter(identificador__in=filmes).values_list("identificador", "pk"))
+        # Episódios sem a chave "video" no arquivo mantêm o arquivo já enviado
+        com_video, sem_video = [], []
+        for identificador, (_, episodios_filme) in filmes.items():
+            for titulo, (link_video, video) in episodios_filme.items():
+                episodio = Episodio(filme_id=ids[identificador], titulo=titulo, link_video=link_video)
+                if video is None:
+                    sem_video.append(episodio)
+                else:
+                    episodio.video = video
+                    com_video.append(episodio)
+        for episodios, campos in ((com_video, ["link_video", "video"]), (sem_video, ["link_video"])):
+            Episodio.objects.bulk_create(
+                episodios,
+                batch_size=5000,
+                update_conflicts=True,
+                unique_fields=["filme", "titulo"],
+                update_fields=campos,
+            )
+        episodios = com_video + sem_video
+        indexar_filmes(list(ids.values()))
+    return len(filmes), len(episodios), list(ids.values())
+
+
+# Exportação
+
+def exportar(saida, formato="jsonl", tamanho_lote=2000):
+    """
+    Escreve o catálogo no arquivo aberto (texto), em ordem de id.
+
+    Lê os filmes com .iterator(chunk_size=tamanho_lote) e os episódios de
+    cada bloco em uma consulta extra (prefetch). Retorna o número de filmes.
+    """
+    filmes = (
+        Filme.objects.order_by("pk")
+        .only(*CAMPOS_FILME)
+        .prefetch_related(Prefetch(
+            "episodios",
+            queryset=Episodio.objects.order_by("pk").only("filme_id", "titulo", "link_video", "video"),
+        ))
+    )
+    escritor = csv.writer(saida) if formato == "csv" else None
+    if escritor:
+        escritor.writerow(CAMPOS_CSV)
+
+    total = 0
+    for filme in filmes.iterator(chunk_size=tamanho_lote):
+        registro = {
+            "identificador": filme.identificador,
+            "titulo": filme.titulo,
+            "categoria": filme.categoria,
+            "duracao": filme.duracao,
+            "descricao": filme.descricao,
+            "data_criacao": filme.data_criacao.isoformat(),
+            "thumbnail": filme.thumbnail.name,
+        }
+        episodios = [
+            (episodio.titulo, episodio.link_video, episodio.video.name or "")
+            for episodio in filme.episodios.all()
+        ]
+        if escritor:
+            colunas = [registro[campo] for campo in CAMPOS_FILME]
+            for episodio in episodios or [("", "", "")]:
+                escritor.writerow(colunas + list(episodio))
+        else:
+            registro["episodios"] = [
+                {"titulo": titulo, "link_video": link_video, "video": video}
+                for titulo, link_video, video in episodios
+            ]
+            saida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        total += 1
+    return total
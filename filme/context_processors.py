@@ -1,44 +1,92 @@
+# Importa o SimpleLazyObject para adiar as consultas até o template usar a variável
+from django.utils.functional import SimpleLazyObject
+
+from .cache import aobter_rail, obter_rail  # Cache em camadas dos trilhos do catálogo
 # Importa o modelo Filme para fazer consultas ao banco de dados
 from .models import Filme
+from . import em_alta  # Ranking "Em Alta" pré-calculado (com decaimento)
+
+
+def _filmes_recentes():
+    """
+    Retorna a lista (cacheada) dos 8 filmes mais recentes.
+    """
+    return obter_rail(
+        "recentes",
+        # Busca todos os filmes, ordena pela data de criação (mais recente primeiro)
+        # e limita aos primeiros 8 resultados
+        lambda: list(Filme.objects.all().order_by('-data_criacao')[:8]),
+    )
+
+
+def _filmes_em_alta():
+    """
+    Retorna a lista (cacheada) dos 8 filmes em alta.
+    """
+    return obter_rail(
+        "em_alta",
+        # Primeiras 8 posições do ranking calculado por 'calcular_em_alta'
+        # (visualizações recentes com decaimento exponencial)
+        lambda: em_alta.filmes_em_alta(8),
+    )
+
+
+async def afilmes_recentes():
+    """
+    Versão assíncrona de _filmes_recentes(), usada pelas views assíncronas
+    (mesmo trilho no cache).
+    """
+    return await aobter_rail(
+        "recentes",
+        lambda: _alista(Filme.objects.all().order_by('-data_criacao')[:8]),
+    )
+
+
+async def afilmes_em_alta():
+    """Versão assíncrona de _filmes_em_alta() (mesmo trilho no cache)."""
+    return await aobter_rail("em_alta", lambda: em_alta.afilmes_em_alta(8))
+
+
+async def _alista(queryset):
+    return [filme async for filme in queryset]
+
 
 def lista_filmes_recentes(request):
     """
     Context processor que fornece uma lista dos filmes mais recentes.
-    
+
     Este processador de contexto torna disponível em todos os templates
     uma lista dos 8 filmes mais recentemente adicionados ao sistema.
+    A lista é avaliada apenas se o template usar a variável (lazy) e
+    vem do cache do catálogo quando disponível.
     """
-    # Busca todos os filmes, ordena pela data de criação (mais recente primeiro) 
-    # e limita aos primeiros 8 resultados
-    filmes = Filme.objects.all().order_by('-data_criacao')[:8]  # Get the 8 most recent movies
-    
     # Retorna um dicionário que será adicionado ao contexto de todos os templates
-    return {'lista_filmes_recentes': filmes}
+    return {'lista_filmes_recentes': SimpleLazyObject(_filmes_recentes)}
 
 def lista_filmes_em_alta(request):
     """
     Context processor que fornece uma lista dos filmes mais populares.
-    
+
     Este processador de contexto torna disponível em todos os templates
-    uma lista dos 8 filmes com maior número de visualizações.
+    uma lista dos 8 filmes em alta (visualizações recentes, ver filme/em_alta.py).
+    A lista é avaliada apenas se o template usar a variável (lazy) e
+    vem do cache do catálogo quando disponível.
     """
-    # Busca todos os filmes, ordena pelo número de visualizações (maior primeiro)
-    # e limita aos primeiros 8 resultados
-    filmes = Filme.objects.all().order_by('-visualizacoes')[:8]  # Get the 8 most viewed movies
-    
     # Retorna um dicionário que será adicionado ao contexto de todos os templates
-    return {'lista_filmes_em_alta': filmes}
+    return {'lista_filmes_em_alta': SimpleLazyObject(_filmes_em_alta)}
 
 def filme_destaque(request):
     """
     Context processor que fornece um filme em destaque.
-    
+
     Este processador de contexto torna disponível em todos os templates
     o filme mais recentemente adicionado para ser usado como destaque principal.
+    Reaproveita o trilho de recentes, sem consulta própria ao banco.
     """
-    # Busca o filme mais recente (primeiro na ordenação por data de criação descendente)
-    # .first() retorna apenas o primeiro resultado ou None se não houver filmes
-    filmes = Filme.objects.order_by('-data_criacao').first()  # Get the most recent movie
-    
+    def _destaque():
+        # O primeiro da lista de recentes é o filme mais recente (ou None se vazia)
+        filmes = _filmes_recentes()
+        return filmes[0] if filmes else None
+
     # Retorna um dicionário que será adicionado ao contexto de todos os templates
-    return {'filme_destaque': filmes}
\ No newline at end of file
+    return {'filme_destaque': SimpleLazyObject(_destaque)}
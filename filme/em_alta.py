@@ -0,0 +1,113 @@
+# Ranking "Em Alta": visualizações por hora com decaimento exponencial
+#
+# A fila de eventos soma cada visualização ao balde (filme, hora) em
+# VisualizacaoHora. O comando 'calcular_em_alta' (agendado, ex: a cada 15
+# minutos) pondera os baldes da janela pela idade, com meia-vida
+# EM_ALTA_MEIA_VIDA_HORAS, e grava o topo em FilmeEmAlta; o trilho lê as
+# primeiras posições por uma chave única, sem ordenar o catálogo.
+import heapq  # Topo do ranking sem ordenar todas as pontuações
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings  # Meia-vida, janela e tamanho do ranking
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Filme, FilmeEmAlta, VisualizacaoHora
+from .visualizacoes import afilmes_mais_vistos, filmes_mais_vistos  # Ranking antes do primeiro cálculo
+
+
+def truncar_hora(instante):
+    """Início da hora do instante (chave dos baldes de VisualizacaoHora)."""
+    return instante.replace(minute=0, second=0, microsecond=0)
+
+
+def inicio_janela(agora):
+    """Hora mais antiga considerada pelo ranking."""
+    return truncar_hora(agora) - timedelta(hours=settings.EM_ALTA_JANELA_HORAS)
+
+
+def pontuacoes(agora=None, tamanho_lote=10_000):
+    """
+    Retorna {filme_id: pontuação} das visualizações da janela.
+
+    Cada visualização vale 2 ** (-idade / meia-vida), com a idade em horas
+    contada do início do balde: uma visualização de agora vale 1 e uma de
+    uma meia-vida atrás vale 0,5. Os pesos são calculados uma vez por hora
+    da janela e os baldes são lidos em fluxo.
+    """
+    agora = agora or timezone.now()
+    meia_vida = settings.EM_ALTA_MEIA_VIDA_HORAS
+    pesos = {}
+    resultado = defaultdict(float)
+    baldes = (
+        VisualizacaoHora.objects.filter(hora__gte=inicio_janela(agora), hora__lte=agora)
+        .values_list("filme_id", "hora", "quantidade")
+        .iterator(chunk_size=tamanho_lote)
+    )
+    for filme_id, hora, quantidade in baldes:
+        peso = pesos.get(hora)
+        if peso is None:
+            idade = (agora - hora).total_seconds() / 3600
+            peso = pesos[hora] = 0.5 ** (idade / meia_vida)
+        resultado[filme_id] += quantidade * peso
+    return resultado
+
+
+def calcular_em_alta(quantidade=None, agora=None):
+    """
+    Retorna o topo do ranking: lista [(filme_id, pontuação)], da maior
+    pontuação para a menor (empates pelo id, para um resultado estável).
+    """
+    quantidade = quantidade or settings.EM_ALTA_TAMANHO
+    return heapq.nlargest(
+        quantidade, pontuacoes(agora).items(), key=lambda item: (item[1], -item[0])
+    )
+
+
+def gravar_em_alta(ranking):
+    """
+    Substitui o ranking gravado pelo calculado.
+
+    A troca acontece em uma única transação: o trilho continua lendo o
+    ranking antigo até o commit. Filmes removidos durante o cálculo são
+    descartados. O trilho cacheado passa a mostrar o novo ranking quando
+    vence (CATALOGO_CACHE_TIMEOUT). Retorna o número de posições gravadas.
+    """
+    with transaction.atomic():
+        existentes = set(
+            Filme.objects.filter(pk__in=[filme_id for filme_id, _ in ranking]).values_list("pk", flat=True)
+        )
+        linhas = [
+            FilmeEmAlta(filme_id=filme_id, posicao=posicao, pontuacao=pontuacao)
+            for posicao, (filme_id, pontuacao) in enumerate(
+                item for item in ranking if item[0] in existentes
+            )
+        ]
+        FilmeEmAlta.objects.all().delete()
+        FilmeEmAlta.objects.bulk_create(linhas)
+    return len(linhas)
+
+
+def remover_baldes_antigos(agora=None):
+    """
+    Remove os baldes mais antigos que a janela (não contam mais no ranking).
+    Retorna o número de baldes removidos.
+    """
+    agora = agora or timezone.now()
+    removidos, _ = VisualizacaoHora.objects.filter(hora__lt=inicio_janela(agora)).delete()
+    return removidos
+
+
+def filmes_em_alta(limite):
+    """
+    Retorna os 'limite' primeiros filmes do ranking "Em Alta".
+
+    Antes do primeiro cálculo (ranking vazio), usa o total de visualizações.
+    """
+    return FilmeEmAlta.objects.filmes(limite) or filmes_mais_vistos(limite)
+
+
+async def afilmes_em_alta(limite):
+    """Versão assíncrona de filmes_em_alta()."""
+    return await FilmeEmAlta.objects.afilmes(limite) or await afilmes_mais_vistos(limite)
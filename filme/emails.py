@@ -0,0 +1,130 @@
+# Verificação barata de email cadastrado (formulário da página inicial)
+#
+# Um filtro de Bloom em memória, por processo, responde "certamente não
+# cadastrado" sem ir ao banco; só os emails que talvez existam (cadastrados
+# ou falsos positivos, ~1%) chegam à consulta pelo índice de Lower(email).
+# O filtro é construído na inicialização do worker (aquecer_indices), recebe
+# os emails criados ou alterados neste processo e é reconstruído em segundo
+# plano quando outro processo muda a versão dos usuários.
+import hashlib  # Posições dos bits de cada email
+import math  # Dimensionamento do filtro
+
+from django.conf import settings  # Capacidade mínima e taxa de falsos positivos
+from django.db.models.functions import Lower  # Mesma expressão do índice usuario_email_normalizado_idx
+
+from .cache import CHAVE_VERSAO_USUARIOS, IndiceEmMemoria, incrementar_versao, versao_usuarios
+from .metricas import registro_metricas  # Respostas do filtro (evitadas x consultadas)
+from .models import Usuario
+
+
+def normalizar_email(email):
+    """Email sem espaços nas pontas e em minúsculas (chave do filtro e do índice)."""
+    return (email or "").strip().lower()
+
+
+class FiltroBloom:
+    """
+    Conjunto aproximado em um bytearray: 'in' nunca erra para um valor
+    adicionado e erra (falso positivo) com a taxa escolhida para os demais,
+    enquanto o número de valores não passar da capacidade.
+    """
+
+    def __init__(self, capacidade, taxa_falsos_positivos=0.01):
+        capacidade = max(capacidade, 1)
+        # m = -n ln(p) / ln(2)^2 bits e k = (m / n) ln(2) posições por valor
+        self.tamanho = math.ceil(-capacidade * math.log(taxa_falsos_positivos) / math.log(2) ** 2)
+        self.posicoes_por_valor = max(1, round(self.tamanho / capacidade * math.log(2)))
+        self._bits = bytearray(math.ceil(self.tamanho / 8))
+
+    def _posicoes(self, valor):
+        # Duplo hash (Kirsch-Mitzenmacher): k posições a partir de um único digest
+        digest = hashlib.blake2b(valor.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.tamanho for i in range(self.posicoes_por_valor))
+
+    def adicionar(self, valor):
+        for posicao in self._posicoes(valor):
+            self._bits[posicao >> 3] |= 1 << (posicao & 7)
+
+    def __contains__(self, valor):
+        return all(self._bits[posicao >> 3] & (1 << (posicao & 7)) for posicao in self._posicoes(valor))
+
+
+class FiltroEmails(IndiceEmMemoria):
+    """
+    Filtro de Bloom com os emails normalizados de todos os usuários.
+
+    Acompanha a versão dos usuários (não a do catálogo). Enquanto estiver
+    defasado, não responde: a consulta ao banco decide, para que um email
+    cadastrado em outro processo nunca seja tratado como inexistente.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._filtro = FiltroBloom(1)
+
+    def versao_atual(self):
+        return versao_usuarios()
+
+    def construir(self):
+        """Lê os emails de todos os usuários, com folga para os próximos cadastros."""
+        total = Usuario.objects.count()
+        filtro = FiltroBloom(
+            max(total * 2, settings.FILTRO_EMAILS_CAPACIDADE_MINIMA),
+            settings.FILTRO_EMAILS_FALSOS_POSITIVOS,
+        )
+        for email in Usuario.objects.values_list("email", flat=True).iterator(chunk_size=5000):
+            filtro.adicionar(normalizar_email(email))
+        return filtro
+
+    def instalar(self, dados):
+        self._filtro = dados
+
+    def pode_existir(self, email):
+        """
+        Retorna False apenas se o email (normalizado) certamente não está
+        cadastrado; True se está, se é um falso positivo ou se o filtro
+        está defasado.
+        """
+        if not self.construido:
+            self.reconstruir()
+        elif self.versao_atual() != self.versao:
+            self._reconstruir_em_segundo_plano()
+            return True
+        with self.lock:
+            return email in self._filtro
+
+    def registrar(self, email):
+        """
+        Adiciona um email criado ou alterado e avisa os outros processos.
+
+        Chamado após o commit. Se só este processo mudou a versão desde a
+        construção, o filtro continua atual; senão, será reconstruído.
+        """
+        versao = incrementar_versao(CHAVE_VERSAO_USUARIOS)
+        with self.lock:
+            if not self.construido:
+                return  # O filtro será construído no próximo uso
+            self._filtro.adicionar(normalizar_email(email))
+            if versao == self.versao + 1:
+                self.versao = versao
+
+
+# Instância única por processo
+filtro_emails = FiltroEmails()
+
+
+def email_cadastrado(email):
+    """
+    Indica se existe usuário com o email (sem diferenciar maiúsculas).
+
+    O filtro descarta sem consulta os emails que certamente não existem;
+    os demais são confirmados pelo índice de Lower(email).
+    """
+    email = normalizar_email(email)
+    if not filtro_emails.pode_existir(email):
+        registro_metricas.incrementar("pyflix_filtro_emails_total", {"resultado": "evitada"})
+        return False
+    registro_metricas.incrementar("pyflix_filtro_emails_total", {"resultado": "consultada"})
+    return Usuario.objects.alias(email_normalizado=Lower("email")).filter(email_normalizado=email).exists()
@@ -0,0 +1,23 @@
+# Armazenamento dos arquivos estáticos: nomes com hash e versões pré-comprimidas
+#
+# O 'collectstatic' do deploy grava cada arquivo com o hash do conteúdo no
+# nome (ex: css/pyflix.3f2a1b.css) e as versões .gz e .br (com o pacote
+# brotli instalado). O WhiteNoise serve a versão comprimida aceita pelo
+# navegador e marca os arquivos com hash como imutáveis (Cache-Control
+# max-age de 10 anos, immutable): um arquivo alterado ganha outro nome, e
+# o navegador nunca precisa revalidar o antigo.
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class ArmazenamentoEstaticos(CompressedManifestStaticFilesStorage):
+    """
+    CompressedManifestStaticFilesStorage que, sem o manifesto do
+    'collectstatic' (desenvolvimento e testes), usa os nomes originais.
+
+    Com o manifesto, um arquivo ausente dele continua sendo um erro.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:  # 'collectstatic' ainda não rodou
+            return name
+        return super().stored_name(name)
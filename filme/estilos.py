@@ -0,0 +1,376 @@
+# Folha de estilos compilada no build: utilitários do Tailwind usados pelos templates
+#
+# Antes, cada página carregava o compilador do Tailwind no navegador
+# (@tailwindcss/browser), que gerava o CSS em tempo de execução, depois do
+# download do script. O comando 'compilar_estilos' faz o mesmo na hora do
+# build: procura as classes candidatas nos templates e scripts (como o
+# Tailwind, qualquer palavra pode ser uma classe), gera só os utilitários
+# conhecidos e grava um arquivo minificado em static/css, servido pelo
+# WhiteNoise com hash no nome. Tokens sem utilitário são ignorados; com
+# --verificar, as classes de atributos class="..." que parecem utilitários
+# mas não geram CSS (erros de digitação, utilitários fora da tabela) fazem o
+# comando falhar, exceto as de CLASSES_CONHECIDAS.
+#
+# A tabela cobre o subconjunto do Tailwind v4 que o Pyflix usa: espaçamento,
+# tamanhos, flexbox, tipografia, cores da paleta padrão, bordas e os
+# variantes hover:, focus: e de largura de tela (sm: a 2xl:). Como no
+# Tailwind v4, o preflight e os utilitários ficam em camadas (@layer), e o
+# CSS sem camada dos templates e do Bootstrap tem precedência sobre eles.
+import difflib  # Prefixos de utilitário com erro de digitação
+import re  # Candidatos a classe e tabela de utilitários
+
+from django.conf import settings  # Arquivos varridos e arquivo gerado
+
+CABECALHO = "/* Gerado por 'python manage.py compilar_estilos' a partir dos templates; não editar. */\n"
+
+# Preflight do Tailwind v4 (reset dos estilos do navegador), minificado
+PREFLIGHT = (
+    "*,::after,::before,::backdrop,::file-selector-button{box-sizing:border-box;margin:0;padding:0;border:0 solid}"
+    "html,:host{line-height:1.5;-webkit-text-size-adjust:100%;tab-size:4;font-family:ui-sans-serif,system-ui,"
+    "sans-serif,\"Apple Color Emoji\",\"Segoe UI Emoji\",\"Segoe UI Symbol\",\"Noto Color Emoji\";"
+    "-webkit-tap-highlight-color:transparent}"
+    "hr{height:0;color:inherit;border-top-width:1px}"
+    "abbr:where([title]){text-decoration:underline dotted}"
+    "h1,h2,h3,h4,h5,h6{font-size:inherit;font-weight:inherit}"
+    "a{color:inherit;text-decoration:inherit}"
+    "b,strong{font-weight:bolder}"
+    "code,kbd,samp,pre{font-family:ui-monospace,SFMono-Regular,Menlo,Monaco,Consolas,monospace;font-size:1em}"
+    "small{font-size:80%}"
+    "sub,sup{font-size:75%;line-height:0;position:relative;vertical-align:baseline}sub{bottom:-.25em}sup{top:-.5em}"
+    "table{text-indent:0;border-color:inherit;border-collapse:collapse}"
+    ":-moz-focusring{outline:auto}"
+    "progress{vertical-align:baseline}"
+    "summary{display:list-item}"
+    "ol,ul,menu{list-style:none}"
+    "img,svg,video,canvas,audio,iframe,embed,object{display:block;vertical-align:middle}"
+    "img,video{max-width:100%;height:auto}"
+    "button,input,select,optgroup,textarea,::file-selector-button{font:inherit;font-feature-settings:inherit;"
+    "font-variation-settings:inherit;letter-spacing:inherit;color:inherit;border-radius:0;"
+    "background-color:transparent;opacity:1}"
+    "::placeholder{opacity:1}"
+    "textarea{resize:vertical}"
+    "button,input:where([type=button],[type=reset],[type=submit]),::file-selector-button{appearance:button}"
+    "::-webkit-inner-spin-button,::-webkit-outer-spin-button{height:auto}"
+    "[hidden]:where(:not([hidden=until-found])){display:none!important}"
+)
+
+# Larguras mínimas dos variantes de tela, na ordem em que são emitidos
+TELAS = {"sm": "40rem", "md": "48rem", "lg": "64rem", "xl": "80rem", "2xl": "96rem"}
+
+# Pseudo-classes dos variantes de estado
+ESTADOS = {"hover": ":hover", "focus": ":focus"}
+
+# Cores da paleta padrão usadas (ou prováveis) nos templates
+CORES = {
+    "transparent": "transparent",
+    "current": "currentcolor",
+    "black": "#000",
+    "white": "#fff",
+    "gray-50": "#f9fafb", "gray-100": "#f3f4f6", "gray-200": "#e5e7eb", "gray-300": "#d1d5db",
+    "gray-400": "#9ca3af", "gray-500": "#6b7280", "gray-600": "#4b5563", "gray-700": "#374151",
+    "gray-800": "#1f2937", "gray-900": "#111827",
+    "red-500": "#ef4444", "red-600": "#dc2626", "red-700": "#b91c1c",
+    "blue-500": "#3b82f6", "blue-600": "#2563eb",
+}
+
+# Tamanhos de fonte: (font-size, line-height)
+FONTES = {
+    "xs": (".75rem", "1rem"), "sm": (".875rem", "1.25rem"), "base": ("1rem", "1.5rem"),
+    "lg": ("1.125rem", "1.75rem"), "xl": ("1.25rem", "1.75rem"), "2xl": ("1.5rem", "2rem"),
+    "3xl": ("1.875rem", "2.25rem"), "4xl": ("2.25rem", "2.5rem"), "5xl": ("3rem", "1"),
+    "6xl": ("3.75rem", "1"),
+}
+
+RAIOS = {"none": "0", "sm": ".25rem", "": ".25rem", "md": ".375rem", "lg": ".5rem", "xl": ".75rem", "full": "9999px"}
+
+_LADOS = {"": "", "x": "-inline", "y": "-block", "t": "-top", "r": "-right", "b": "-bottom", "l": "-left"}
+_CANTOS = {"t": ("top-left", "top-right"), "r": ("top-right", "bottom-right"),
+           "b": ("bottom-right", "bottom-left"), "l": ("top-left", "bottom-left")}
+_NUMERO = r"(\d+(?:\.5)?)"
+
+
+def _espaco(valor):
+    """Valor da escala de espaçamento em rem (1 unidade = 0,25rem), 'px' ou 'auto'."""
+    if valor in ("px", "auto"):
+        return "1px" if valor == "px" else "auto"
+    rem = float(valor) / 4
+    return f"{rem:g}rem" if rem else "0"
+
+
+def _tamanho(valor, tela):
+    """Largura ou altura: escala de espaçamento, fração, 'full', 'screen' ou 'auto'."""
+    if "/" in valor:
+        numerador, denominador = valor.split("/")
+        return f"{int(numerador) / int(denominador) * 100:.6g}%"
+    return {"full": "100%", "screen": tela}.get(valor) or _espaco(valor)
+
+
+def _espacamentos(prefixo, propriedade, valores):
+    """
+    Entradas de margem ou padding: todos os lados, depois eixos, depois um
+    lado só (nessa ordem, 'px-4 pl-2' usa 2 à esquerda).
+    """
+    return [
+        (
+            rf"{prefixo}({lados})-({valores})",
+            lambda m, propriedade=propriedade: f"{propriedade}{_LADOS[m[1]]}:{_espaco(m[2])}",
+        )
+        for lados in ("", "[xy]", "[trbl]")
+    ]
+
+
+def _estaticos(tabela):
+    """Entradas da tabela de utilitários para classes de nome fixo."""
+    return [(re.escape(nome), declaracoes) for nome, declaracoes in tabela.items()]
+
+
+# Utilitários na ordem de emissão (a ordem decide entre classes da mesma
+# especificidade: 'rounded-md rounded-l-none' arredonda só a direita).
+# Cada entrada é (expressão, declarações): uma string fixa ou uma função
+# que recebe o match e retorna as declarações (ou None, se não gera CSS).
+UTILITARIOS = [
+    *_estaticos({
+        "static": "position:static", "fixed": "position:fixed", "absolute": "position:absolute",
+        "relative": "position:relative", "sticky": "position:sticky",
+        "visible": "visibility:visible", "invisible": "visibility:hidden",
+    }),
+    (r"inset-" + _NUMERO, lambda m: f"inset:{_espaco(m[1])}"),
+    (r"(top|right|bottom|left)-" + _NUMERO, lambda m: f"{m[1]}:{_espaco(m[2])}"),
+    (r"z-(\d+)", lambda m: f"z-index:{m[1]}"),
+    *_espacamentos("m", "margin", r"\d+(?:\.5)?|px|auto"),
+    *_estaticos({
+        "block": "display:block", "inline-block": "display:inline-block", "inline": "display:inline",
+        "flex": "display:flex", "inline-flex": "display:inline-flex", "grid": "display:grid",
+        "contents": "display:contents", "hidden": "display:none",
+    }),
+    (r"w-(\d+(?:\.5)?|\d+/\d+|full|screen|auto|px)", lambda m: f"width:{_tamanho(m[1], '100vw')}"),
+    (r"min-w-(\d+(?:\.5)?|full|screen)", lambda m: f"min-width:{_tamanho(m[1], '100vw')}"),
+    (r"max-w-(\d+(?:\.5)?|full|screen)", lambda m: f"max-width:{_tamanho(m[1], '100vw')}"),
+    (r"h-(\d+(?:\.5)?|\d+/\d+|full|screen|auto|px)", lambda m: f"height:{_tamanho(m[1], '100vh')}"),
+    (r"min-h-(\d+(?:\.5)?|full|screen)", lambda m: f"min-height:{_tamanho(m[1], '100vh')}"),
+    *_estaticos({
+        "flex-1": "flex:1", "flex-auto": "flex:auto", "flex-none": "flex:none",
+        "flex-shrink-0": "flex-shrink:0", "shrink-0": "flex-shrink:0",
+        "flex-grow": "flex-grow:1", "grow": "flex-grow:1", "flex-grow-0": "flex-grow:0", "grow-0": "flex-grow:0",
+        "cursor-pointer": "cursor:pointer",
+        "flex-row": "flex-direction:row", "flex-col": "flex-direction:column",
+        "flex-wrap": "flex-wrap:wrap", "flex-nowrap": "flex-wrap:nowrap",
+        "items-start": "align-items:flex-start", "items-end": "align-items:flex-end",
+        "items-center": "align-items:center", "items-stretch": "align-items:stretch",
+        "items-baseline": "align-items:baseline",
+        "justify-start": "justify-content:flex-start", "justify-end": "justify-content:flex-end",
+        "justify-center": "justify-content:center", "justify-between": "justify-content:space-between",
+        "justify-around": "justify-content:space-around", "justify-evenly": "justify-content:space-evenly",
+    }),
+    (r"gap-" + _NUMERO, lambda m: f"gap:{_espaco(m[1])}"),
+    # space-x/space-y afastam os filhos, não o próprio elemento (ver _SUFIXOS)
+    (r"space-x-" + _NUMERO, lambda m: f"margin-inline-end:{_espaco(m[1])}"),
+    (r"space-y-" + _NUMERO, lambda m: f"margin-block-end:{_espaco(m[1])}"),
+    *_estaticos({
+        "overflow-hidden": "overflow:hidden", "overflow-auto": "overflow:auto",
+        "overflow-x-auto": "overflow-x:auto", "overflow-y-auto": "overflow-y:auto",
+    }),
+    (r"rounded(?:-(none|sm|md|lg|xl|full))?", lambda m: f"border-radius:{RAIOS[m[1] or '']}"),
+    (r"rounded-([trbl])(?:-(none|sm|md|lg|xl|full))?", lambda m: ";".join(
+        f"border-{canto}-radius:{RAIOS[m[2] or '']}" for canto in _CANTOS[m[1]]
+    )),
+    (r"border(?:-([xytrbl]))?(?:-(\d+))?", lambda m: (
+        f"border{_LADOS[m[1] or '']}-style:solid;"
+        f"border{_LADOS[m[1] or '']}-width:{m[2] or 1}px"
+    )),
+    (r"border-([a-z]+(?:-\d+)?)", lambda m: m[1] in CORES and f"border-color:{CORES[m[1]]}"),
+    (r"bg-([a-z]+(?:-\d+)?)", lambda m: m[1] in CORES and f"background-color:{CORES[m[1]]}"),
+    *_estaticos({
+        "bg-no-repeat": "background-repeat:no-repeat", "bg-cover": "background-size:cover",
+        "bg-center": "background-position:center",
+        "object-cover": "object-fit:cover", "object-contain": "object-fit:contain",
+    }),
+    *_espacamentos("p", "padding", r"\d+(?:\.5)?|px"),
+    *_estaticos({
+        "text-left": "text-align:left", "text-center": "text-align:center",
+        "text-right": "text-align:right", "text-justify": "text-align:justify",
+    }),
+    (r"text-(xs|sm|base|lg|xl|[2-6]xl)", lambda m: "font-size:{};line-height:{}".format(*FONTES[m[1]])),
+    *_estaticos({
+        "font-normal": "font-weight:400", "font-medium": "font-weight:500",
+        "font-semibold": "font-weight:600", "font-bold": "font-weight:700",
+    }),
+    (r"text-([a-z]+(?:-\d+)?)", lambda m: m[1] in CORES and f"color:{CORES[m[1]]}"),
+    *_estaticos({
+        "underline": "text-decoration-line:underline", "no-underline": "text-decoration-line:none",
+    }),
+    (r"opacity-(\d+)", lambda m: f"opacity:{int(m[1]) / 100:g}"),
+    *_estaticos({
+        "bg-blend-overlay": "background-blend-mode:overlay", "bg-blend-multiply": "background-blend-mode:multiply",
+        "outline-none": "outline-style:none",
+    }),
+    (r"ring(?:-(\d+))?", lambda m: f"box-shadow:0 0 0 {m[1] or 1}px var(--tw-ring-color,currentcolor)"),
+    (r"ring-([a-z]+(?:-\d+)?)", lambda m: m[1] in CORES and f"--tw-ring-color:{CORES[m[1]]}"),
+]
+UTILITARIOS = [(re.compile(expressao), declaracoes) for expressao, declaracoes in UTILITARIOS]
+
+# Classes sem utilitário usadas de propósito nos templates: CSS próprio
+# (blocos <style> dos templates), ganchos dos scripts e Bootstrap (páginas
+# de formulário). Uma classe nova dessas entra aqui.
+CLASSES_CONHECIDAS = frozenset({
+    # CSS próprio e scripts
+    "arrow__btn", "item", "movie_lis", "page", "rolagem-sentinela", "showcase", "wrapper",
+    # Bootstrap
+    "border-bottom", "form-group", "text-decoration-none",
+})
+
+# Prefixos dos utilitários da tabela (e de vizinhos que ela não cobre): uma
+# classe desconhecida com um deles provavelmente é um utilitário com erro
+PREFIXOS_UTILITARIOS = frozenset(
+    "static fixed absolute relative sticky visible invisible inset top right bottom left z "
+    "m mx my mt mr mb ml p px py pt pr pb pl block inline flex grid contents hidden "
+    "w min max h shrink grow cursor items justify content self gap space overflow "
+    "rounded border bg object text font underline no opacity outline ring shadow".split()
+)
+
+# Seletor complementar dos utilitários que estilizam os filhos
+_SUFIXOS = {"space-x-": ">:not(:last-child)", "space-y-": ">:not(:last-child)"}
+
+# Palavras que podem ser classes: letras, números e os separadores do Tailwind
+_CANDIDATO = re.compile(r"[A-Za-z0-9_:/.\-]+")
+_ATRIBUTO_CLASSE = re.compile(r"""class=["']([^"']*)["']""")
+_EXPRESSAO_TEMPLATE = re.compile(r"{[{%].*?[%}]}")
+
+
+def extrair_candidatos(texto):
+    """Conjunto de todas as palavras do texto que podem ser classes."""
+    return set(_CANDIDATO.findall(texto))
+
+
+def classes_declaradas(texto):
+    """Conjunto das classes escritas em atributos class="..." do texto."""
+    return {
+        classe
+        for atributo in _ATRIBUTO_CLASSE.findall(texto)
+        for classe in _EXPRESSAO_TEMPLATE.sub(" ", atributo).split()
+    }
+
+
+def parece_utilitario(classe):
+    """
+    Indica se a classe tem variante ('md:...') ou prefixo de utilitário,
+    mesmo com erro de digitação ('bg-...', 'justufy-...').
+    """
+    prefixo = re.split(r"[-,]", classe)[0]
+    return (
+        ":" in classe
+        or prefixo in PREFIXOS_UTILITARIOS
+        or bool(difflib.get_close_matches(prefixo, PREFIXOS_UTILITARIOS, n=1, cutoff=0.8))
+    )
+
+
+def resolver(utilitario):
+    """
+    Retorna (posição na tabela, declarações) do utilitário, sem variantes,
+    ou None se ele não gera CSS.
+    """
+    for posicao, (expressao, declaracoes) in enumerate(UTILITARIOS):
+        match = expressao.fullmatch(utilitario)
+        if match:
+            resultado = declaracoes(match) if callable(declaracoes) else declaracoes
+            if resultado:
+                return posicao, resultado
+    return None
+
+
+def _escapar(classe):
+    """Nome da classe como seletor CSS (':', '/' e '.' escapados)."""
+    return re.sub(r"([:/.])", r"\\\1", classe)
+
+
+def regra(classe):
+    """
+    Retorna (chave de ordenação, tela, CSS) da classe, com variantes
+    (ex: 'md:hover:bg-red-700'), ou None se ela não gera CSS.
+    """
+    *variantes, utilitario = classe.split(":")
+    tela = None
+    pseudo = ""
+    for variante in variantes:
+        if variante in TELAS and tela is None:
+            tela = variante
+        elif variante in ESTADOS:
+            pseudo += ESTADOS[variante]
+        else:
+            return None  # Variante desconhecido: a classe não gera CSS
+    resolvido = resolver(utilitario)
+    if resolvido is None:
+        return None
+    posicao, declaracoes = resolvido
+    sufixo = next((s for prefixo, s in _SUFIXOS.items() if utilitario.startswith(prefixo)), "")
+    css = f".{_escapar(classe)}{pseudo}{sufixo}{{{declaracoes}}}"
+    if "hover" in variantes:
+        css = f"@media (hover:hover){{{css}}}"  # Como no v4: sem hover em telas de toque
+    return (posicao, bool(pseudo), classe), tela, css
+
+
+def gerar_css(classes):
+    """
+    CSS minificado (preflight e utilitários) das classes dadas.
+
+    Os utilitários sem variante de tela vêm primeiro; os de cada tela vêm
+    depois, em ordem crescente de largura, para que 'md:text-left'
+    substitua 'text-center' a partir da largura média.
+    """
+    por_tela = {tela: [] for tela in [None, *TELAS]}
+    for classe in classes:
+        gerada = regra(classe)
+        if gerada:
+            chave, tela, css = gerada
+            por_tela[tela].append((chave, css))
+    utilitarios = []
+    for tela, regras in por_tela.items():
+        bloco = "".join(css for _, css in sorted(regras))
+        if bloco and tela:
+            bloco = f"@media (min-width:{TELAS[tela]}){{{bloco}}}"
+        utilitarios.append(bloco)
+    return (
+        CABECALHO
+        + "@layer theme,base,components,utilities;"
+        + f"@layer base{{{PREFLIGHT}}}"
+        + f"@layer utilities{{{''.join(utilitarios)}}}\n"
+    )
+
+
+def arquivos_fonte(fontes=None):
+    """Arquivos varridos (ESTILOS_FONTES), em ordem, para um resultado estável."""
+    arquivos = []
+    for fonte in fontes or settings.ESTILOS_FONTES:
+        arquivos.extend(sorted(
+            caminho for caminho in fonte.rglob("*")
+            if caminho.is_file() and caminho.suffix in (".html", ".js")
+        ))
+    return arquivos
+
+
+def desconhecidas(ignoradas):
+    """
+    Classes que não geraram CSS, parecem utilitários e não estão em
+    CLASSES_CONHECIDAS (ex: 'justufy-between', 'bg-opacity-75').
+    """
+    return [
+        classe for classe in ignoradas
+        if classe not in CLASSES_CONHECIDAS and parece_utilitario(classe)
+    ]
+
+
+def compilar(fontes=None):
+    """
+    Retorna (css, classes_ignoradas): a folha de estilos das classes
+    encontradas nas fontes e as classes de atributos class="..." que não
+    geraram CSS (erros de digitação, classes de CSS próprio ou do Bootstrap;
+    ver desconhecidas()).
+    """
+    candidatos = set()
+    declaradas = set()
+    for arquivo in arquivos_fonte(fontes):
+        texto = arquivo.read_text(encoding="utf-8")
+        candidatos |= extrair_candidatos(texto)
+        declaradas |= classes_declaradas(texto)
+    ignoradas = sorted(classe for classe in declaradas if regra(classe) is None)
+    return gerar_css(candidatos), ignoradas
@@ -0,0 +1,275 @@
+# Fila de eventos em memória para as gravações fora do caminho da requisição
+#
+# A página de detalhes publica a visualização (histórico + contador) e responde;
+# uma thread do processo agrupa os eventos em lotes e os grava com um upsert.
+# A tabela EventoPendente é o fallback durável: recebe os eventos quando a fila
+# está cheia, quando um lote falha e no encerramento do processo, e é drenada
+# pelo comando 'drenar_eventos'.
+import atexit  # Persiste a fila quando o processo termina
+import logging  # Falhas dos lotes em segundo plano
+import os  # PID: cada processo (após o fork do gunicorn) tem sua fila
+import queue  # Fila limitada entre as requisições e a thread de gravação
+import threading  # Thread de gravação e lock das métricas
+import time  # Prazo para completar um lote
+from collections import Counter  # Métricas e visualizações por filme
+
+from django.conf import settings  # Tamanho da fila, do lote e intervalos
+from django.db import close_old_connections, transaction
+from django.utils import timezone  # Instante da visualização
+from django.utils.dateparse import parse_datetime  # Instantes lidos da tabela durável
+
+from .em_alta import truncar_hora  # Baldes por hora do ranking "Em Alta"
+from .models import EventoPendente, Filme, HistoricoVisualizacao, Usuario, VisualizacaoHora
+from .visualizacoes import gravar_incrementos  # Contador com F(), na transação do lote
+
+logger = logging.getLogger(__name__)
+
+
+def processar_visualizacoes(eventos):
+    """
+    Grava um lote de visualizações: um upsert no histórico (a visualização
+    mais recente de cada par usuário/filme), os baldes por hora do ranking
+    "Em Alta" e os incrementos do contador (UPDATE com F()), tudo na
+    transação de processar().
+
+    Eventos de filmes ou usuários removidos desde a publicação são
+    descartados antes da gravação: as chaves estrangeiras são verificadas
+    só no commit (DEFERRABLE), quando o lote inteiro já teria falhado.
+    """
+    filme_ids = {evento["filme"] for evento in eventos}
+    usuario_ids = {evento["usuario"] for evento in eventos}
+    filmes = set(Filme.objects.filter(pk__in=filme_ids).values_list("pk", flat=True))
+    usuarios = set(Usuario.objects.filter(pk__in=usuario_ids).values_list("pk", flat=True))
+
+    ultimas, por_filme, por_hora = {}, Counter(), Counter()
+    for evento in eventos:
+        if evento["filme"] not in filmes or evento["usuario"] not in usuarios:
+            continue
+        chave = (evento["usuario"], evento["filme"])
+        instante = parse_datetime(evento["instante"])
+        ultimas[chave] = max(instante, ultimas.get(chave, instante))
+        por_filme[evento["filme"]] += 1
+        por_hora[(evento["filme"], truncar_hora(instante))] += 1
+
+    if ultimas:
+        HistoricoVisualizacao.objects.registrar_varios(ultimas)
+        VisualizacaoHora.objects.registrar_varios(por_hora)
+        gravar_incrementos(por_filme)
+
+
+# Função que grava cada tipo de evento; recebe a lista de dados do lote
+PROCESSADORES = {
+    "visualizacao": processar_visualizacoes,
+}
+
+
+def processar(eventos):
+    """
+    Processa uma lista de eventos [(tipo, dados)], agrupando por tipo.
+
+    Tudo em uma transação: se uma gravação falhar, nenhuma das anteriores
+    fica no banco, e o lote pode ir inteiro para a tabela durável sem que
+    a nova tentativa conte nada duas vezes.
+    """
+    por_tipo = {}
+    for tipo, dados in eventos:
+        por_tipo.setdefault(tipo, []).append(dados)
+    with transaction.atomic():
+        for tipo, lista in por_tipo.items():
+            PROCESSADORES[tipo](lista)
+
+
+def persistir(eventos):
+    """Grava eventos [(tipo, dados)] na tabela durável."""
+    EventoPendente.objects.bulk_create(
+        [EventoPendente(tipo=tipo, dados=dados) for tipo, dados in eventos],
+        batch_size=1000,
+    )
+
+
+class FilaEventos:
+    """
+    Fila limitada de eventos com uma thread de gravação em lote por processo.
+
+    Garantia "pelo menos uma vez": um lote só sai da memória depois de
+    gravado, ou depois de copiado para a tabela durável se a gravação
+    falhar (ou o processo encerrar). Um evento pode ser gravado duas vezes
+    se o processo encerrar no meio de um lote; nunca é descartado em
+    silêncio. Com a fila cheia, quem publica espera um pouco
+    (backpressure) e, se ainda não houver espaço, grava o evento
+    diretamente na tabela durável.
+    """
+
+    def __init__(self):
+        self._fila = None
+        self._pid = None                 # Processo dono da fila e da thread
+        self._lote_atual = []            # Lote sendo gravado (persistido no encerramento)
+        self._lock = threading.Lock()    # Protege a criação da thread e as métricas
+        self._metricas = Counter()
+
+    def publicar(self, tipo, dados):
+        """
+        Publica um evento para gravação em segundo plano.
+
+        Com EVENTOS_EM_SEGUNDO_PLANO=False (ex: testes), grava na hora.
+        """
+        self._contar("publicados")
+        if not settings.EVENTOS_EM_SEGUNDO_PLANO:
+            processar([(tipo, dados)])
+            self._contar("processados")
+            return
+        self._garantir_thread()
+        try:
+            self._fila.put((tipo, dados), timeout=settings.EVENTOS_ESPERA_FILA_CHEIA)
+        except queue.Full:
+            persistir([(tipo, dados)])
+            self._contar("desviados")
+
+    def metricas(self):
+        """
+        Retorna as métricas da fila deste processo:
+        profundidade e capacidade atuais e os totais desde o início.
+        """
+        with self._lock:
+            metricas = dict(self._metricas)
+        metricas["profundidade"] = self._fila.qsize() if self._fila else 0
+        metricas["capacidade"] = settings.EVENTOS_FILA_LIMITE
+        return metricas
+
+    def drenar(self):
+        """
+        Grava, na thread atual, todos os eventos que estão na fila deste processo.
+
+        Retorna o número de eventos gravados.
+        """
+        eventos = self._retirar_todos()
+        if eventos:
+            self._gravar(eventos)
+        return len(eventos)
+
+    def encerrar(self):
+        """
+        Copia para a tabela durável o lote em andamento e os eventos da fila
+        (encerramento do processo: não há tempo para gravá-los).
+        """
+        eventos = list(self._lote_atual) + self._retirar_todos()
+        if eventos:
+            persistir(eventos)
+        return len(eventos)
+
+    def _contar(self, nome, quantidade=1):
+        with self._lock:
+            self._metricas[nome] += quantidade
+
+    def _garantir_thread(self):
+        # Após o fork dos workers do gunicorn (--preload), a fila e a thread
+        # herdadas do processo pai não existem mais: cada processo cria as suas
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._fila = queue.Queue(maxsize=settings.EVENTOS_FILA_LIMITE)
+            threading.Thread(target=self._executar, name="fila-eventos", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _retirar_todos(self):
+        eventos = []
+        while self._fila is not None:
+            try:
+                eventos.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        return eventos
+
+    def _executar(self):
+        while True:
+            self._lote_atual = self._coletar_lote()
+            close_old_connections()  # Reconecta se o banco derrubou a conexão ociosa
+            self._gravar(self._lote_atual)
+            self._lote_atual = []
+
+    def _coletar_lote(self):
+        """
+        Espera o primeiro evento e completa o lote até EVENTOS_LOTE eventos
+        ou até EVENTOS_INTERVALO segundos, o que vier antes.
+        """
+        lote = [self._fila.get()]
+        prazo = time.monotonic() + settings.EVENTOS_INTERVALO
+        while len(lote) < settings.EVENTOS_LOTE:
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                lote.append(self._fila.get(timeout=restante))
+            except queue.Empty:
+                break
+        return lote
+
+    def _gravar(self, eventos):
+        try:
+            processar(eventos)
+        except Exception:
+            logger.exception("Falha ao gravar um lote de %s eventos", len(eventos))
+            self._contar("falhas")
+            try:
+                persistir(eventos)
+            except Exception:
+                # Banco indisponível: os eventos voltam para a fila (sem bloquear)
+                logger.exception("Falha ao persistir %s eventos", len(eventos))
+                for evento in eventos:
+                    try:
+                        self._fila.put_nowait(evento)
+                    except queue.Full:
+                        self._contar("perdidos")
+                return
+            self._contar("desviados", len(eventos))
+            return
+        self._contar("processados", len(eventos))
+        self._contar("lotes")
+
+
+# Instância única por processo
+fila_eventos = FilaEventos()
+
+
+def registrar_visualizacao(usuario, filme):
+    """
+    Publica a visualização do filme pelo usuário (histórico e contador).
+    """
+    fila_eventos.publicar(
+        "visualizacao",
+        {"usuario": usuario.pk, "filme": filme.pk, "instante": timezone.now().isoformat()},
+    )
+
+
+def drenar_banco(tamanho_lote=500):
+    """
+    Processa os eventos da tabela durável em lotes, na ordem de chegada.
+
+    Cada lote é processado (inclusive o contador de visualizações) e
+    removido na mesma transação; no PostgreSQL,
+    SKIP LOCKED permite drenar com vários processos ao mesmo tempo.
+    Retorna o número de eventos processados.
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            lote = list(
+                EventoPendente.objects.select_for_update(skip_locked=True).order_by("id")[:tamanho_lote]
+            )
+            if not lote:
+                break
+            processar([(evento.tipo, evento.dados) for evento in lote])
+            EventoPendente.objects.filter(pk__in=[evento.pk for evento in lote]).delete()
+        total += len(lote)
+    return total
+
+
+@atexit.register
+def _persistir_ao_encerrar():
+    """Guarda na tabela durável os eventos ainda na fila quando o processo termina."""
+    try:
+        fila_eventos.encerrar()
+    except Exception:
+        logger.exception("Falha ao persistir a fila de eventos no encerramento")
@@ -0,0 +1,215 @@
+# Versões redimensionadas (renditions) das thumbnails dos filmes em WebP/AVIF,
+# prévia embutida (LQIP) e cor predominante
+#
+# O módulo não importa modelos: as funções de codificação rodam em processos
+# do pool (ProcessPoolExecutor) e precisam ser importáveis sem o Django configurado
+# (as importações do Django abaixo são lazy e não leem as configurações).
+# O pool é usado só pelos comandos; no processo web a geração após o upload
+# codifica na própria thread (gerar_imagem).
+import base64  # Prévia embutida no HTML como data URI
+import hashlib  # Hash do original: nomes novos a cada troca de imagem (cache do navegador)
+import io  # Imagens em memória
+import logging  # Falhas na geração em segundo plano
+import os  # Nome base do arquivo original e número de CPUs
+import threading  # Geração após o upload sem bloquear a requisição
+from collections import deque  # Janela de imagens em processamento
+from concurrent.futures import ProcessPoolExecutor  # Codificação em paralelo
+
+from django.conf import settings  # Perfis de tamanho e número de processos
+from django.core.files.base import ContentFile  # Gravação das renditions no storage
+from django.core.files.storage import default_storage  # Storage configurado em STORAGES
+from django.db import connection  # Conexão da thread de geração
+from django.utils import timezone  # Última alteração do filme (páginas condicionais)
+from PIL import Image, ImageOps, features  # Pillow: leitura, redimensionamento e codificação
+
+from .cache import invalidar_catalogo  # Fragmentos passam a usar as novas imagens
+
+logger = logging.getLogger(__name__)
+
+# Formatos gerados, do mais eficiente para o mais compatível (ordem dos <source>)
+# AVIF apenas se o Pillow instalado tiver suporte
+FORMATOS = [
+    formato
+    for formato, disponivel in (("avif", features.check("avif")), ("webp", features.check("webp")))
+    if disponivel
+]
+TIPOS = {"avif": "image/avif", "webp": "image/webp"}
+QUALIDADE = {"avif": 55, "webp": 80}
+
+# Prévia (LQIP): largura em pixels e qualidade; ampliada pelo navegador, fica borrada
+PLACEHOLDER_LARGURA = 16
+PLACEHOLDER_QUALIDADE = 40
+
+
+def larguras_necessarias():
+    """Todas as larguras dos perfis (sem repetição), em ordem crescente."""
+    return sorted({
+        largura for perfil in settings.IMAGENS_PERFIS.values() for largura in perfil["larguras"]
+    })
+
+
+def gerar_placeholder(imagem):
+    """
+    Retorna uma prévia minúscula da imagem como data URI WebP (poucas
+    centenas de bytes), para ser embutida no HTML.
+    """
+    altura = max(1, round(imagem.height * PLACEHOLDER_LARGURA / imagem.width))
+    previa = imagem.convert("RGB").resize((PLACEHOLDER_LARGURA, altura), Image.BOX)
+    saida = io.BytesIO()
+    previa.save(saida, "WEBP", quality=PLACEHOLDER_QUALIDADE)
+    return "data:image/webp;base64," + base64.b64encode(saida.getvalue()).decode()
+
+
+def calcular_cor_predominante(imagem):
+    """
+    Retorna a cor predominante da imagem em #rrggbb.
+
+    Reduz a imagem e a quantiza em poucas cores; a cor mais frequente
+    representa melhor a imagem do que a média (que tende ao cinza).
+    """
+    reduzida = imagem.convert("RGB").resize((64, 64), Image.BOX)
+    quantizada = reduzida.quantize(colors=5)
+    _, indice = max(quantizada.getcolors())
+    r, g, b = quantizada.getpalette()[indice * 3:indice * 3 + 3]
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def codificar(original, larguras, formatos):
+    """
+    Gera as renditions de uma imagem (roda em um processo do pool).
+
+    Recebe os bytes do original e retorna (renditions, placeholder, cor),
+    com renditions = [(largura, formato, bytes)]. Larguras maiores que o
+    original não são ampliadas: viram uma única rendition na largura original.
+    """
+    imagem = Image.open(io.BytesIO(original))
+    imagem = ImageOps.exif_transpose(imagem)  # Respeita a rotação das fotos
+    if imagem.mode not in ("RGB", "RGBA"):
+        imagem = imagem.convert("RGBA" if "transparency" in imagem.info else "RGB")
+
+    resultado = []
+    for largura in sorted({min(largura, imagem.width) for largura in larguras}):
+        altura = max(1, round(imagem.height * largura / imagem.width))
+        redimensionada = imagem.resize((largura, altura), Image.LANCZOS, reducing_gap=2.0)
+        for formato in formatos:
+            saida = io.BytesIO()
+            redimensionada.save(saida, formato.upper(), quality=QUALIDADE[formato])
+            resultado.append((largura, formato, saida.getvalue()))
+    return resultado, gerar_placeholder(imagem), calcular_cor_predominante(imagem)
+
+
+def gravar(nome_original, original, renditions, storage=None):
+    """
+    Grava as renditions no storage e retorna o dicionário salvo em Filme.imagens:
+
+        {"origem": nome do original,
+         "webp": {"384": url, "768": url, ...},
+         "avif": {...}}
+    """
+    storage = storage or default_storage
+    resumo = hashlib.sha256(original).hexdigest()[:12]
+    base = os.path.splitext(os.path.basename(nome_original))[0]
+    imagens = {"origem": nome_original}
+    for largura, formato, conteudo in renditions:
+        nome = storage.save(
+            f"{settings.IMAGENS_PASTA}/{base}-{resumo}-{largura}.{formato}", ContentFile(conteudo)
+        )
+        imagens.setdefault(formato, {})[str(largura)] = storage.url(nome)
+    return imagens
+
+
+def precisa_gerar(filme):
+    """Indica se as renditions/prévia do filme não existem ou são de outra imagem."""
+    return bool(filme.thumbnail) and (
+        filme.imagens.get("origem") != filme.thumbnail.name or not filme.placeholder
+    )
+
+
+def salvar_imagens(filme, imagens, placeholder, cor_predominante, invalidar=True):
+    """
+    Guarda as URLs, a prévia e a cor no filme sem disparar os sinais de
+    gravação e invalida o catálogo para os fragmentos usarem as novas imagens
+    (com invalidar=False, quem chama invalida uma vez ao fim do lote).
+    """
+    filme.imagens = imagens
+    filme.placeholder = placeholder
+    filme.cor_predominante = cor_predominante
+    filme.atualizado_em = timezone.now()
+    type(filme).objects.filter(pk=filme.pk).update(
+        imagens=imagens, placeholder=placeholder, cor_predominante=cor_predominante,
+        atualizado_em=filme.atualizado_em,
+    )
+    if invalidar:
+        invalidar_catalogo()
+
+
+def gerar_imagens(filmes, processos=None, invalidar=True):
+    """
+    Gera e grava as renditions dos filmes usando um pool de processos.
+
+    A leitura dos originais e a gravação no storage ficam no processo
+    principal; apenas a decodificação/redimensionamento/codificação (a
+    parte pesada, presa à CPU) vai para o pool. O catálogo é invalidado
+    uma vez no fim, e não a cada filme (com invalidar=False, por quem
+    chama). Retorna quantos filmes foram processados.
+    """
+    processos = processos or settings.IMAGENS_PROCESSOS or os.cpu_count() or 1
+    larguras = larguras_necessarias()
+    processados = 0
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        pendentes = deque()
+        for filme in filmes:
+            with filme.thumbnail.open("rb") as arquivo:
+                original = arquivo.read()
+            pendentes.append((filme, original, pool.submit(codificar, original, larguras, FORMATOS)))
+            # Limita os originais em memória a alguns por processo
+            if len(pendentes) >= 2 * processos:
+                processados += _concluir(pendentes.popleft())
+        while pendentes:
+            processados += _concluir(pendentes.popleft())
+    if processados and invalidar:
+        invalidar_catalogo()
+    return processados
+
+
+def _concluir(pendente):
+    filme, original, futuro = pendente
+    try:
+        renditions, placeholder, cor = futuro.result()
+    except Exception:
+        logger.exception("Falha ao gerar as imagens do filme %s", filme.pk)
+        return 0
+    salvar_imagens(
+        filme, gravar(filme.thumbnail.name, original, renditions), placeholder, cor, invalidar=False
+    )
+    return 1
+
+
+def gerar_imagem(filme):
+    """
+    Gera e grava as renditions de um único filme no próprio processo/thread.
+
+    Usada no processo web: criar um pool (fork) a partir de uma thread de
+    um worker com outras threads e conexões abertas pode travar o processo
+    filho; o pool fica para os comandos (gerar_imagens, importar_catalogo).
+    """
+    with filme.thumbnail.open("rb") as arquivo:
+        original = arquivo.read()
+    renditions, placeholder, cor = codificar(original, larguras_necessarias(), FORMATOS)
+    salvar_imagens(filme, gravar(filme.thumbnail.name, original, renditions), placeholder, cor)
+
+
+def agendar_imagens(filme):
+    """
+    Gera as renditions de um filme recém-enviado em uma thread, para que
+    o upload (ex: no admin) não espere a codificação.
+    """
+    def tarefa():
+        try:
+            gerar_imagem(filme)
+        except Exception:
+            logger.exception("Falha ao gerar as imagens do filme %s", filme.pk)
+        finally:
+            connection.close()  # Conexão própria desta thread
+
+    threading.Thread(target=tarefa, daemon=True).start()
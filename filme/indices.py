@@ -0,0 +1,157 @@
+# Verificação dos planos das consultas quentes do Pyflix com EXPLAIN
+#
+# Usado pelo comando 'verificar_indices' e pelos testes: cada consulta de
+# CONSULTAS é montada com valores reais do banco e o plano retornado pelo
+# banco não pode ter leitura sequencial da tabela (nem ordenação fora do
+# índice, quando a consulta depende da ordem).
+import re  # Leitura dos planos
+
+from django.db import connection, transaction
+from django.db.models.functions import Lower  # Mesma consulta de filme/emails.py
+
+from .models import Filme, FilmeEmAlta, HistoricoVisualizacao, Usuario
+from .paginacao import _filtrar_apos_cursor, codificar_cursor
+
+
+class ConsultaQuente:
+    """
+    Consulta de um caminho quente da aplicação, com o que o plano deve cumprir.
+
+    'montar' recebe a amostra (ver amostra()) e retorna o queryset; com
+    'ordenada', a ordem do resultado deve vir do próprio índice (LIMIT sem
+    ordenar a tabela inteira).
+    """
+
+    def __init__(self, nome, origem, montar, ordenada=False):
+        self.nome = nome          # Nome curto exibido no relatório
+        self.origem = origem      # Onde a consulta é feita (view, trilho, ...)
+        self.montar = montar      # Função amostra -> queryset
+        self.ordenada = ordenada  # A ordem deve vir do índice
+
+
+# Consultas verificadas, na ordem do relatório
+CONSULTAS = [
+    ConsultaQuente(
+        "usuario_email", "HomePageView.get_success_url",
+        lambda a: Usuario.objects.alias(email_normalizado=Lower("email")).filter(
+            email_normalizado=a["email"].lower()
+        ),
+    ),
+    ConsultaQuente(
+        "filmes_recentes", "trilho de recentes (context processor)",
+        lambda a: Filme.objects.order_by("-data_criacao")[:8], ordenada=True,
+    ),
+    ConsultaQuente(
+        "filmes_em_alta", "trilho em alta (ranking FilmeEmAlta)",
+        lambda a: FilmeEmAlta.objects._filmes(8), ordenada=True,
+    ),
+    ConsultaQuente(
+        "filmes_mais_vistos", "trilho em alta antes do primeiro ranking",
+        lambda a: Filme.objects.order_by("-visualizacoes")[:8], ordenada=True,
+    ),
+    ConsultaQuente(
+        "mesma_categoria", "relacionados_por_categoria",
+        lambda a: Filme.objects.filter(categoria=a["filme"].categoria)
+        .exclude(id=a["filme"].id).order_by("titulo")[:5],
+        ordenada=True,
+    ),
+    ConsultaQuente(
+        "episodios_do_filme", "página de detalhes (filme.episodios.all)",
+        lambda a: a["filme"].episodios.all(), ordenada=True,
+    ),
+    ConsultaQuente(
+        "catalogo_cursor", "HomeFilmes (paginação por cursor)",
+        lambda a: _filtrar_apos_cursor(
+            Filme.objects.all(), ("titulo", "id"),
+            codificar_cursor([a["filme"].titulo, a["filme"].id]),
+        )[:25],
+        ordenada=True,
+    ),
+    ConsultaQuente(
+        "historico_recente", "filmes_recentes do usuário",
+        lambda a: HistoricoVisualizacao.objects.filter(usuario=a["usuario"])
+        .order_by("-ultima_visualizacao")[:8],
+        ordenada=True,
+    ),
+]
+
+# Trechos dos planos: leitura sequencial, ordenação e nome do índice usado
+_PLANOS = {
+    "sqlite": {
+        # "SCAN tabela" sem "USING ... INDEX" percorre a tabela inteira
+        "sequencial": re.compile(r"\bSCAN (\w+)(?! USING)(?!\w)"),
+        "ordenacao": re.compile(r"USE TEMP B-TREE FOR (?:ORDER BY|RIGHT PART OF ORDER BY)"),
+        "indice": re.compile(r"USING (?:COVERING )?INDEX (\w+)"),
+    },
+    "postgresql": {
+        "sequencial": re.compile(r"Seq Scan on (\w+)"),
+        "ordenacao": re.compile(r"(?:^|->\s*)(?:Incremental )?Sort\b", re.MULTILINE),
+        "indice": re.compile(r"(?:Index(?: Only)? Scan(?: Backward)? using|Bitmap Index Scan on) (\w+)"),
+    },
+}
+
+
+def amostra():
+    """
+    Valores reais usados para montar as consultas: um usuário com histórico,
+    o seu email e um filme que ele viu. Retorna None sem histórico no banco.
+    """
+    historico = HistoricoVisualizacao.objects.select_related("usuario", "filme").order_by("pk").first()
+    if historico is None:
+        return None
+    return {"usuario": historico.usuario, "filme": historico.filme, "email": historico.usuario.email}
+
+
+def analisar(plano, vendor, ordenada):
+    """
+    Retorna (problemas, indices) de um plano em texto: a lista do que o
+    plano viola e os índices que ele usa.
+    """
+    padroes = _PLANOS[vendor]
+    problemas = [
+        f"leitura sequencial de {tabela}" for tabela in padroes["sequencial"].findall(plano)
+    ]
+    if ordenada and padroes["ordenacao"].search(plano):
+        problemas.append("ordenação fora do índice")
+    return problemas, sorted(set(padroes["indice"].findall(plano)))
+
+
+def verificar(consultas=None):
+    """
+    Executa EXPLAIN em cada consulta e retorna uma lista de dicionários
+    (nome, origem, indices, problemas, plano). Sem problemas, a consulta
+    usa índice.
+
+    No PostgreSQL as leituras sequenciais são desencorajadas durante a
+    verificação (enable_seqscan = off): em um catálogo pequeno o
+    planejador prefere ler a tabela inteira mesmo com o índice certo, e
+    a leitura sequencial só aparece se nenhum índice atende à consulta.
+    """
+    if connection.vendor not in _PLANOS:
+        raise ValueError(f"Banco não suportado pela verificação: {connection.vendor}")
+    valores = amostra()
+    if valores is None:
+        raise ValueError("O banco não tem histórico de visualizações para montar as consultas.")
+
+    resultados = []
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        for consulta in consultas or CONSULTAS:
+            plano = consulta.montar(valores).explain()
+            problemas, indices = analisar(plano, connection.vendor, consulta.ordenada)
+            resultados.append({
+                "nome": consulta.nome,
+                "origem": consulta.origem,
+                "indices": indices,
+                "problemas": problemas,
+                "plano": plano,
+            })
+    return resultados
+
+
+def atualizar_estatisticas():
+    """Atualiza as estatísticas do planejador após popular o banco (ANALYZE)."""
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
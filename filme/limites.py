@@ -0,0 +1,79 @@
+# Limite de taxa por IP (balde de tokens) das views abertas a visitantes anônimos
+#
+# Os baldes ficam na memória do processo, sem nenhuma ida à rede por
+# requisição: com vários workers, cada um aplica o limite às requisições que
+# atende. Os clientes menos recentes são descartados acima de um teto, para
+# que uma varredura com muitos IPs não faça a memória crescer sem limite.
+import threading  # Lock dos baldes entre as threads do worker
+import time  # Relógio monotônico da reposição dos tokens
+from collections import OrderedDict  # Baldes na ordem do último acesso
+
+from django.conf import settings  # Proxies confiáveis à frente da aplicação
+
+
+class LimitadorTaxa:
+    """
+    Baldes de tokens por chave (ex: nome da view e IP).
+
+    Cada balde começa cheio com 'rajada' tokens e recebe 'por_minuto'
+    tokens por minuto, até o máximo da rajada; cada requisição consome um.
+    """
+
+    def __init__(self, max_clientes=10_000):
+        self.max_clientes = max_clientes
+        self._baldes = OrderedDict()   # chave -> [tokens, instante da última reposição]
+        self._lock = threading.Lock()
+
+    def consumir(self, chave, por_minuto, rajada, agora=None):
+        """
+        Consome um token do balde da chave.
+
+        Retorna 0 se a requisição pode seguir ou, se o balde está vazio, os
+        segundos até o próximo token (usados no cabeçalho Retry-After).
+        """
+        agora = time.monotonic() if agora is None else agora
+        taxa = por_minuto / 60
+        with self._lock:
+            balde = self._baldes.get(chave)
+            if balde is None:
+                balde = self._baldes[chave] = [rajada, agora]
+                if len(self._baldes) > self.max_clientes:
+                    self._baldes.popitem(last=False)  # Descarta o cliente há mais tempo sem acessar
+            else:
+                self._baldes.move_to_end(chave)
+                balde[0] = min(rajada, balde[0] + (agora - balde[1]) * taxa)
+                balde[1] = agora
+            if balde[0] >= 1:
+                balde[0] -= 1
+                return 0
+            return (1 - balde[0]) / taxa
+
+    def limpar(self):
+        """Remove todos os baldes do processo."""
+        with self._lock:
+            self._baldes.clear()
+
+
+# Instância única por processo
+limitador_taxa = LimitadorTaxa()
+
+
+def ip_do_cliente(request):
+    """
+    IP do cliente da requisição.
+
+    Atrás de proxies (ex: o roteador do Heroku), o IP real é o informado em
+    X-Forwarded-For pelo proxy mais externo confiável: com N proxies
+    (LIMITE_TAXA_PROXIES), o N-ésimo endereço a partir do fim. Endereços
+    anteriores são enviados pelo próprio cliente e não são confiáveis.
+    """
+    proxies = settings.LIMITE_TAXA_PROXIES
+    if proxies:
+        encaminhados = [
+            endereco.strip()
+            for endereco in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+            if endereco.strip()
+        ]
+        if len(encaminhados) >= proxies:
+            return encaminhados[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
@@ -0,0 +1,69 @@
+# Comando: python manage.py benchmark_relacionados
+import statistics  # Média e percentis dos tempos
+import time  # Relógio de alta resolução
+
+from django.core.management.base import BaseCommand, CommandError  # Base dos comandos
+from django.db import connection  # Contagem das consultas executadas
+from django.test.utils import CaptureQueriesContext  # Captura das consultas de cada leitura
+
+from filme.models import Filme, FilmeRelacionado
+
+
+def consulta_anterior(filme, limite=5):
+    """Consulta usada antes do pré-cálculo: mesma categoria, por título."""
+    return list(Filme.objects.filter(categoria=filme.categoria).exclude(id=filme.id)[0:limite])
+
+
+def consulta_precalculada(filme, limite=5):
+    """Leitura da tabela de relacionados pela chave (origem, posicao)."""
+    return FilmeRelacionado.objects.filmes(filme, limite)
+
+
+class Command(BaseCommand):
+    """
+    Compara o tempo da consulta de relacionados anterior (por categoria)
+    com a leitura da tabela pré-calculada, no banco configurado.
+
+    Rode 'calcular_relacionados' antes, com o catálogo já populado.
+    """
+    help = "Compara a consulta de relacionados por categoria com a tabela pré-calculada."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeticoes", type=int, default=200,
+            help="Leituras medidas por abordagem (padrão: 200).",
+        )
+
+    def medir(self, funcao, filmes):
+        tempos, consultas = [], 0
+        for filme in filmes:
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                funcao(filme)
+                tempos.append((time.perf_counter() - inicio) * 1000)
+            consultas += len(capturadas)
+        tempos.sort()
+        return {
+            "media_ms": statistics.fmean(tempos),
+            "p95_ms": tempos[int(len(tempos) * 0.95) - 1],
+            "consultas_por_leitura": consultas / len(filmes),
+        }
+
+    def handle(self, *args, **options):
+        ids = list(Filme.objects.order_by("?").values_list("id", flat=True)[: options["repeticoes"]])
+        if not ids:
+            raise CommandError("Catálogo vazio: nada a medir.")
+        filmes = list(Filme.objects.filter(id__in=ids).only("id", "categoria"))
+        filmes = (filmes * (options["repeticoes"] // len(filmes) + 1))[: options["repeticoes"]]
+
+        # Aquecimento: conexão aberta e páginas do banco em memória
+        for funcao in (consulta_anterior, consulta_precalculada):
+            funcao(filmes[0])
+
+        for nome, funcao in (("categoria", consulta_anterior), ("pre-calculado", consulta_precalculada)):
+            resultado = self.medir(funcao, filmes)
+            self.stdout.write(
+                f"{nome:>14}: média {resultado['media_ms']:.3f} ms | "
+                f"p95 {resultado['p95_ms']:.3f} ms | "
+                f"{resultado['consultas_por_leitura']:.1f} consulta(s) por leitura"
+            )
@@ -0,0 +1,182 @@
+# Comando: python manage.py benchmark_requisicoes --tamanho 1k
+import json  # Resultado em JSON (arquivo ou saída padrão)
+import os  # Banco SQLite temporário
+import platform  # Versão do Python no resultado
+import subprocess  # Commit medido
+import tempfile  # Banco SQLite temporário
+import time  # Duração da população
+
+import django
+from django.conf import settings  # Hosts permitidos pelo servidor local
+from django.core.management.base import BaseCommand, CommandError  # Base dos comandos
+from django.db import connection  # Banco de testes do benchmark
+from django.test.utils import override_settings  # Configurações do ambiente medido
+
+from filme import benchmark
+from filme.models import Usuario
+
+
+class Command(BaseCommand):
+    """
+    Mede as requisições principais do Pyflix (homefilmes, detalhes,
+    pesquisa, o POST da página inicial e o heartbeat do player) sobre um
+    catálogo sintético.
+
+    Cria um banco de testes separado (como o 'manage.py test'), popula
+    com o tamanho escolhido e mede cada cenário com o Client de testes
+    (latência, consultas e alocações) e com clientes HTTP simultâneos
+    contra um servidor local (latência e vazão). O banco configurado
+    nunca é alterado.
+    """
+    help = "Mede latência, consultas e alocações das requisições principais em um catálogo sintético."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanho", choices=sorted(benchmark.TAMANHOS), default="1k",
+            help="Tamanho do catálogo sintético (padrão: 1k).",
+        )
+        parser.add_argument(
+            "--repeticoes", type=int, default=200,
+            help="Requisições medidas por cenário (padrão: 200).",
+        )
+        parser.add_argument(
+            "--concorrencia", type=int, default=8,
+            help="Clientes HTTP simultâneos (padrão: 8).",
+        )
+        parser.add_argument(
+            "--cenario", action="append", choices=benchmark.CENARIOS,
+            help="Cenário a medir (pode repetir; padrão: todos).",
+        )
+        parser.add_argument(
+            "--sem-http", action="store_true",
+            help="Mede apenas com o Client de testes, sem o servidor HTTP local.",
+        )
+        parser.add_argument(
+            "--comparar-autenticacao", action="store_true",
+            help="Mede também com a sessão e o usuário lidos do banco (sem o cache da autenticação).",
+        )
+        parser.add_argument(
+            "--manter-banco", action="store_true",
+            help="Mantém (e reutiliza) o banco populado entre execuções.",
+        )
+        parser.add_argument(
+            "--semente", type=int, default=0,
+            help="Semente dos dados e das requisições sorteadas (padrão: 0).",
+        )
+        parser.add_argument(
+            "--saida",
+            help="Arquivo JSON do resultado (padrão: saída padrão).",
+        )
+        parser.add_argument(
+            "--comparar",
+            help="JSON de uma execução anterior para comparar p50/p95 e consultas.",
+        )
+
+    def handle(self, *args, **options):
+        anterior = None
+        if options["comparar"]:
+            try:
+                with open(options["comparar"]) as arquivo:
+                    anterior = json.load(arquivo)
+            except (OSError, ValueError) as erro:
+                raise CommandError(f"Não foi possível ler {options['comparar']}: {erro}")
+
+        # Banco de testes em arquivo no SQLite: o padrão (em memória) não é
+        # visto pelas threads do servidor HTTP local
+        teste = connection.settings_dict.setdefault("TEST", {})
+        if connection.vendor == "sqlite" and not teste.get("NAME"):
+            teste["NAME"] = os.path.join(tempfile.gettempdir(), "pyflix_benchmark.sqlite3")
+
+        hosts = [*settings.ALLOWED_HOSTS, "testserver", "127.0.0.1"]
+        with override_settings(
+            SECURE_SSL_REDIRECT=False,  # O servidor local e o Client falam HTTP
+            SESSION_COOKIE_SECURE=False,
+            CSRF_COOKIE_SECURE=False,
+            ALLOWED_HOSTS=hosts,
+            LIMITE_TAXA={},  # Todas as requisições vêm do mesmo IP
+            DEBUG=False,
+        ):
+            nome_original = connection.settings_dict["NAME"]
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, keepdb=options["manter_banco"]
+            )
+            try:
+                resultado = self.executar(options)
+            finally:
+                if not options["manter_banco"]:
+                    connection.creation.destroy_test_db(nome_original, verbosity=0)
+
+        texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+        if options["saida"]:
+            with open(options["saida"], "w") as arquivo:
+                arquivo.write(texto + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Resultado gravado em {options['saida']}."))
+        else:
+            self.stdout.write(texto)
+        if anterior:
+            for linha in benchmark.comparar(anterior, resultado):
+                self.stdout.write(linha)
+        if "cliente_autenticacao_no_banco" in resultado:
+            self.stdout.write("Autenticação no banco -> em cache:")
+            for linha in benchmark.comparar(
+                {"cliente": resultado["cliente_autenticacao_no_banco"]}, {"cliente": resultado["cliente"]}
+            ):
+                self.stdout.write(linha)
+
+    def executar(self, options):
+        tamanho = benchmark.TAMANHOS[options["tamanho"]]
+        cenarios = options["cenario"] or list(benchmark.CENARIOS)
+
+        populacao_s = None
+        if not Usuario.objects.exists():  # Com --manter-banco, reutiliza o catálogo já populado
+            inicio = time.perf_counter()
+            benchmark.popular(**tamanho, semente=options["semente"])
+            populacao_s = round(time.perf_counter() - inicio, 2)
+            self.stderr.write(f"Catálogo {options['tamanho']} populado em {populacao_s} s.")
+
+        usuario = Usuario.objects.order_by("pk").first()
+        gerador = benchmark.GeradorRequisicoes(options["semente"])
+        resultado = {
+            "commit": self.commit(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "banco": connection.vendor,
+            "tamanho": options["tamanho"],
+            "catalogo": tamanho,
+            "populacao_s": populacao_s,
+            "repeticoes": options["repeticoes"],
+            "cliente": {},
+        }
+
+        for cenario in cenarios:
+            self.stderr.write(f"Client de testes: {cenario}...")
+            resultado["cliente"][cenario] = benchmark.medir_cliente(
+                cenario, usuario, gerador, options["repeticoes"]
+            )
+
+        if options["comparar_autenticacao"]:
+            self.stderr.write("Client de testes com a autenticação no banco...")
+            resultado["cliente_autenticacao_no_banco"] = benchmark.medir_autenticacao_no_banco(
+                cenarios, usuario, gerador, options["repeticoes"]
+            )
+
+        if not options["sem_http"]:
+            resultado["http"] = {}
+            with benchmark.ServidorLocal() as servidor:
+                for cenario in cenarios:
+                    self.stderr.write(f"HTTP ({options['concorrencia']} clientes): {cenario}...")
+                    resultado["http"][cenario] = benchmark.medir_http(
+                        cenario, usuario, gerador, options["repeticoes"],
+                        options["concorrencia"], servidor.porta,
+                    )
+        return resultado
+
+    def commit(self):
+        """Commit do código medido (None fora de um repositório git)."""
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,31 @@
+# Comando: python manage.py calcular_em_alta
+import time  # Medição do tempo de cálculo
+
+from django.core.management.base import BaseCommand  # Base dos comandos de gerenciamento
+
+from filme.em_alta import calcular_em_alta, gravar_em_alta, remover_baldes_antigos
+
+
+class Command(BaseCommand):
+    """
+    Recalcula o ranking "Em Alta" a partir das visualizações por hora, com
+    decaimento exponencial, e remove os baldes que saíram da janela.
+
+    Deve ser agendado periodicamente (ex: cron a cada 15 minutos).
+    """
+    help = "Recalcula o ranking \"Em Alta\" exibido na página inicial."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--quantidade", type=int,
+            help="Posições gravadas no ranking (padrão: EM_ALTA_TAMANHO).",
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        posicoes = gravar_em_alta(calcular_em_alta(options["quantidade"]))
+        removidos = remover_baldes_antigos()
+        self.stdout.write(self.style.SUCCESS(
+            f"{posicoes} filmes em alta gravados ({removidos} baldes antigos removidos) "
+            f"em {time.perf_counter() - inicio:.2f}s."
+        ))
@@ -0,0 +1,56 @@
+# Comando: python manage.py calcular_recomendacoes
+import time  # Medição do tempo de cálculo
+
+from django.core.exceptions import ImproperlyConfigured  # NumPy/SciPy ausentes
+from django.core.management.base import BaseCommand, CommandError  # Base dos comandos
+
+from filme.recomendacoes import calcular_recomendacoes
+
+
+class Command(BaseCommand):
+    """
+    Recalcula o trilho "Recomendados para você" de todos os usuários
+    (filtragem colaborativa item-item sobre o histórico de visualizações).
+
+    Requer o grupo opcional de dependências "recomendacoes" (NumPy e SciPy).
+    Deve ser agendado periodicamente (ex: cron diário).
+    """
+    help = "Recalcula as recomendações personalizadas de todos os usuários."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--quantidade", type=int, default=20,
+            help="Recomendações guardadas por usuário (padrão: 20).",
+        )
+        parser.add_argument(
+            "--vizinhos", type=int, default=50,
+            help="Filmes similares mantidos por filme (padrão: 50).",
+        )
+        parser.add_argument(
+            "--bloco-itens", type=int, default=2048,
+            help="Filmes por bloco no cálculo das similaridades (padrão: 2048).",
+        )
+        parser.add_argument(
+            "--bloco-usuarios", type=int, default=2000,
+            help="Usuários por bloco no cálculo e na gravação (padrão: 2000).",
+        )
+        parser.add_argument(
+            "--trabalhadores", type=int, default=None,
+            help="Threads do pool (padrão: número de CPUs, até 8).",
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        try:
+            gravadas = calcular_recomendacoes(
+                options["quantidade"],
+                options["vizinhos"],
+                options["bloco_itens"],
+                options["bloco_usuarios"],
+                options["trabalhadores"],
+            )
+        except ImproperlyConfigured as erro:
+            raise CommandError(str(erro))
+        self.stdout.write(self.style.SUCCESS(
+            f"{gravadas} recomendações gravadas em {time.perf_counter() - inicio:.2f}s."
+        ))
@@ -0,0 +1,35 @@
+# Comando: python manage.py calcular_relacionados
+import time  # Medição do tempo de cálculo
+
+from django.core.management.base import BaseCommand  # Base dos comandos de gerenciamento
+
+from filme.relacionados import calcular_relacionados, gravar_relacionados
+
+
+class Command(BaseCommand):
+    """
+    Pré-calcula os filmes relacionados de todo o catálogo a partir do
+    histórico de visualizações (com a categoria como complemento).
+
+    Deve ser agendado periodicamente (ex: cron a cada hora).
+    """
+    help = "Pré-calcula os filmes relacionados exibidos na página de detalhes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--quantidade", type=int, default=10,
+            help="Relacionados guardados por filme (padrão: 10).",
+        )
+        parser.add_argument(
+            "--max-por-usuario", type=int, default=200,
+            help="Filmes mais recentes de cada usuário considerados (padrão: 200).",
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        resultado = calcular_relacionados(options["quantidade"], options["max_por_usuario"])
+        linhas = gravar_relacionados(resultado)
+        self.stdout.write(self.style.SUCCESS(
+            f"{linhas} relacionados gravados para {len(resultado)} filmes "
+            f"em {time.perf_counter() - inicio:.2f}s."
+        ))
@@ -0,0 +1,57 @@
+# Comando: python manage.py compilar_estilos
+from django.conf import settings  # Arquivo gerado (ESTILOS_SAIDA)
+from django.core.management.base import BaseCommand, CommandError  # Base dos comandos de gerenciamento
+
+from filme.estilos import compilar, desconhecidas
+
+
+class Command(BaseCommand):
+    """
+    Gera a folha de estilos do Pyflix (ESTILOS_SAIDA) com os utilitários do
+    Tailwind encontrados nos templates e scripts (ESTILOS_FONTES).
+
+    Deve rodar após mudar classes nos templates; o arquivo gerado vai para
+    o repositório e o 'collectstatic' do deploy o publica com hash no nome.
+    Com --verificar (para a CI), não grava e falha se o arquivo estiver
+    desatualizado ou se algum template usar uma classe que parece utilitário
+    mas não gera CSS (ver filme.estilos.CLASSES_CONHECIDAS).
+    """
+    help = "Gera a folha de estilos com os utilitários do Tailwind usados nos templates."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verificar", action="store_true",
+            help="Não grava; falha se o arquivo gerado estiver desatualizado ou houver utilitários desconhecidos.",
+        )
+
+    def handle(self, *args, **options):
+        css, ignoradas = compilar()
+        saida = settings.ESTILOS_SAIDA
+        if options["verbosity"] >= 2 and ignoradas:
+            self.stdout.write("Classes sem utilitário (CSS próprio, Bootstrap ou erro de digitação):")
+            for classe in ignoradas:
+                self.stdout.write(f"  {classe}")
+
+        suspeitas = desconhecidas(ignoradas)
+        if suspeitas:
+            self.stderr.write(
+                "Classes que parecem utilitários mas não geram CSS (corrija ou inclua em "
+                f"CLASSES_CONHECIDAS): {', '.join(suspeitas)}"
+            )
+
+        atual = saida.read_text(encoding="utf-8") if saida.exists() else None
+        if options["verificar"]:
+            if suspeitas:
+                raise CommandError(f"{len(suspeitas)} classes desconhecidas nos templates.")
+            if atual != css:
+                raise CommandError(
+                    f"{saida} está desatualizado; rode 'python manage.py compilar_estilos'."
+                )
+            self.stdout.write(self.style.SUCCESS(f"{saida} está atualizado."))
+            return
+        if atual == css:
+            self.stdout.write(f"{saida} já estava atualizado ({len(css.encode())} bytes).")
+            return
+        saida.parent.mkdir(parents=True, exist_ok=True)
+        saida.write_text(css, encoding="utf-8")
+        self.stdout.write(self.style.SUCCESS(f"{saida} gerado ({len(css.encode())} bytes)."))
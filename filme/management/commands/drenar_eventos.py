@@ -0,0 +1,32 @@
+# Comando: python manage.py drenar_eventos
+import time  # Medição do tempo de processamento
+
+from django.core.management.base import BaseCommand  # Base dos comandos de gerenciamento
+
+from filme.eventos import drenar_banco
+from filme.models import EventoPendente
+
+
+class Command(BaseCommand):
+    """
+    Processa os eventos da tabela durável da fila (EventoPendente):
+    eventos desviados com a fila cheia, de lotes que falharam ou que
+    estavam na fila quando um processo encerrou.
+
+    Deve ser agendado periodicamente (ex: cron a cada minuto).
+    """
+    help = "Processa os eventos pendentes da tabela durável da fila de eventos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote", type=int, default=500,
+            help="Eventos processados por transação (padrão: 500).",
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        processados = drenar_banco(options["lote"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{processados} eventos processados em {time.perf_counter() - inicio:.2f}s "
+            f"({EventoPendente.objects.count()} pendentes)."
+        ))
@@ -0,0 +1,47 @@
+# Comando: python manage.py exportar_catalogo catalogo.jsonl
+import time  # Medição do tempo de exportação
+
+from django.core.management.base import BaseCommand, CommandError  # Base dos comandos de gerenciamento
+
+from filme.catalogo import LEITORES, exportar
+
+
+class Command(BaseCommand):
+    """
+    Exporta filmes e episódios para um arquivo JSONL ou CSV, no mesmo
+    formato lido por 'importar_catalogo', em fluxo (sem carregar o
+    catálogo inteiro em memória).
+    """
+    help = "Exporta filmes e episódios para um arquivo JSONL ou CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "arquivo", nargs="?", default="-",
+            help="Arquivo de saída (padrão: '-', a saída padrão).",
+        )
+        parser.add_argument(
+            "--formato", choices=sorted(LEITORES),
+            help="Formato do arquivo (padrão: pela extensão; jsonl na saída padrão).",
+        )
+        parser.add_argument(
+            "--lote", type=int, default=2000,
+            help="Filmes lidos por consulta (padrão: 2000).",
+        )
+
+    def handle(self, *args, **options):
+        caminho = options["arquivo"]
+        formato = options["formato"] or ("csv" if caminho.lower().endswith(".csv") else "jsonl")
+
+        inicio = time.perf_counter()
+        if caminho == "-":
+            exportar(self.stdout, formato, options["lote"])  # Apenas os registros na saída padrão
+            return
+        try:
+            arquivo = open(caminho, "w", newline="", encoding="utf-8")
+        except OSError as erro:
+            raise CommandError(f"Não foi possível criar {caminho}: {erro}")
+        with arquivo:
+            total = exportar(arquivo, formato, options["lote"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} filmes exportados para {caminho} em {time.perf_counter() - inicio:.2f}s."
+        ))
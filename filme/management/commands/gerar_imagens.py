@@ -0,0 +1,38 @@
+# Comando: python manage.py gerar_imagens
+import time  # Medição do tempo de geração
+
+from django.core.management.base import BaseCommand  # Base dos comandos de gerenciamento
+
+from filme.imagens import gerar_imagens, precisa_gerar
+from filme.models import Filme
+
+
+class Command(BaseCommand):
+    """
+    Gera as versões redimensionadas (WebP/AVIF), a prévia (LQIP) e a cor
+    predominante das thumbnails dos filmes que ainda não as têm, ou de
+    todos com --todos (ex: após mudar os perfis em IMAGENS_PERFIS).
+    """
+    help = "Gera as versões redimensionadas, a prévia e a cor predominante das thumbnails dos filmes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--todos", action="store_true",
+            help="Regera as imagens de todos os filmes, mesmo os já processados.",
+        )
+        parser.add_argument(
+            "--processos", type=int, default=None,
+            help="Processos do pool de codificação (padrão: IMAGENS_PROCESSOS ou número de CPUs).",
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        filmes = (
+            filme
+            for filme in Filme.objects.exclude(thumbnail="").iterator(chunk_size=500)
+            if options["todos"] or precisa_gerar(filme)
+        )
+        processados = gerar_imagens(filmes, options["processos"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Imagens geradas para {processados} filmes em {time.perf_counter() - inicio:.2f}s."
+        ))
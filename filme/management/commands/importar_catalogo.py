@@ -0,0 +1,59 @@
+# Comando: python manage.py importar_catalogo catalogo.jsonl
+import sys  # Leitura da entrada padrão ("-")
+import time  # Medição do tempo de importação
+
+from django.core.management.base import BaseCommand, CommandError  # Base dos comandos de gerenciamento
+
+from filme.catalogo import LEITORES, importar
+
+
+class Command(BaseCommand):
+    """
+    Importa filmes e episódios de um arquivo JSONL ou CSV (formato em
+    filme/catalogo.py), em fluxo e em lotes: filmes já existentes (mesmo
+    identificador) são atualizados e os episódios, acrescentados ou
+    atualizados pelo título.
+    """
+    help = "Importa (upsert) filmes e episódios de um arquivo JSONL ou CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument("arquivo", help="Arquivo a importar ('-' para a entrada padrão).")
+        parser.add_argument(
+            "--formato", choices=sorted(LEITORES),
+            help="Formato do arquivo (padrão: pela extensão; jsonl na entrada padrão).",
+        )
+        parser.add_argument(
+            "--lote", type=int, default=1000,
+            help="Filmes gravados por transação (padrão: 1000).",
+        )
+        parser.add_argument(
+            "--threads", type=int, default=8,
+            help="Downloads de thumbnails simultâneos (padrão: 8).",
+        )
+        parser.add_argument(
+            "--gerar-imagens", action="store_true",
+            help="Gera as versões redimensionadas das thumbnails novas a cada lote "
+                 "(sem a opção, rode 'gerar_imagens' depois).",
+        )
+
+    def handle(self, *args, **options):
+        caminho = options["arquivo"]
+        formato = options["formato"] or ("csv" if caminho.lower().endswith(".csv") else "jsonl")
+
+        def relatar_erro(linha, mensagem):
+            self.stderr.write(f"Linha {linha}: {mensagem}")
+
+        inicio = time.perf_counter()
+        try:
+            arquivo = sys.stdin if caminho == "-" else open(caminho, newline="", encoding="utf-8")
+        except OSError as erro:
+            raise CommandError(f"Não foi possível abrir {caminho}: {erro}")
+        with arquivo:
+            totais = importar(
+                arquivo, formato, options["lote"], options["threads"],
+                gerar=options["gerar_imagens"], relatar_erro=relatar_erro,
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{totais['filmes']} filmes e {totais['episodios']} episódios importados "
+            f"em {time.perf_counter() - inicio:.2f}s ({totais['erros']} registros com erro)."
+        ))
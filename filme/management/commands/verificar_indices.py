@@ -0,0 +1,84 @@
+# Comando: python manage.py verificar_indices
+import os  # Banco SQLite temporário
+import tempfile  # Banco SQLite temporário
+import time  # Duração da população
+
+from django.core.management.base import BaseCommand, CommandError  # Base dos comandos
+from django.db import connection  # Banco de testes da verificação
+
+from filme import benchmark, indices
+from filme.models import Usuario
+
+
+class Command(BaseCommand):
+    """
+    Verifica com EXPLAIN que as consultas quentes do Pyflix (email da página
+    inicial, trilhos, mesma categoria, episódios, paginação do catálogo e
+    histórico) usam índice, sobre um catálogo sintético.
+
+    Cria um banco de testes separado (como o 'manage.py test'), aplica as
+    migrações, popula com o tamanho escolhido e falha se algum plano ler a
+    tabela inteira ou ordenar fora do índice. Deve rodar na CI a cada
+    mudança nos modelos; o banco configurado nunca é alterado.
+    """
+    help = "Verifica com EXPLAIN que as consultas quentes usam índice (falha se não usarem)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanho", choices=sorted(benchmark.TAMANHOS), default="1k",
+            help="Tamanho do catálogo sintético (padrão: 1k).",
+        )
+        parser.add_argument(
+            "--manter-banco", action="store_true",
+            help="Mantém (e reutiliza) o banco populado entre execuções.",
+        )
+        parser.add_argument(
+            "--semente", type=int, default=0,
+            help="Semente dos dados sintéticos (padrão: 0).",
+        )
+
+    def handle(self, *args, **options):
+        # Com --manter-banco no SQLite, o banco de testes precisa estar em arquivo
+        teste = connection.settings_dict.setdefault("TEST", {})
+        if connection.vendor == "sqlite" and not teste.get("NAME"):
+            teste["NAME"] = os.path.join(tempfile.gettempdir(), "pyflix_indices.sqlite3")
+
+        nome_original = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["manter_banco"]
+        )
+        try:
+            resultados = self.executar(options)
+        finally:
+            if not options["manter_banco"]:
+                connection.creation.destroy_test_db(nome_original, verbosity=0)
+
+        falhas = [resultado for resultado in resultados if resultado["problemas"]]
+        for resultado in resultados:
+            indices_usados = ", ".join(resultado["indices"]) or "nenhum"
+            if resultado["problemas"]:
+                linha = self.style.ERROR(
+                    f"FALHA {resultado['nome']} ({resultado['origem']}): "
+                    + "; ".join(resultado["problemas"])
+                )
+            else:
+                linha = self.style.SUCCESS(f"ok    {resultado['nome']}: {indices_usados}")
+            self.stdout.write(linha)
+            # Plano completo das falhas (ou de todas as consultas com -v 2)
+            if resultado["problemas"] or options["verbosity"] >= 2:
+                self.stdout.write(resultado["plano"])
+        if falhas:
+            raise CommandError(f"{len(falhas)} consulta(s) quente(s) sem índice.")
+
+    def executar(self, options):
+        if not Usuario.objects.exists():  # Com --manter-banco, reutiliza o catálogo já populado
+            inicio = time.perf_counter()
+            benchmark.popular(**benchmark.TAMANHOS[options["tamanho"]], semente=options["semente"])
+            self.stderr.write(
+                f"Catálogo {options['tamanho']} populado em {time.perf_counter() - inicio:.1f} s."
+            )
+        indices.atualizar_estatisticas()
+        try:
+            return indices.verificar()
+        except ValueError as erro:
+            raise CommandError(str(erro))
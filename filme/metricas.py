@@ -0,0 +1,372 @@
+# Métricas de desempenho por requisição no formato texto do Prometheus
+#
+# O MetricasMiddleware mede cada requisição (tempo total, consultas ao banco e
+# o tempo delas, renderização do template, acessos ao cache e tamanho da
+# resposta) e agrega por view em histogramas em memória do processo, expostos
+# em admin/metrics/. Com vários workers do gunicorn, cada processo tem seus
+# próprios números: cada scrape lê o processo que atendeu a requisição.
+#
+# As consultas do template são separadas das da view: os context processors
+# do catálogo são lazy e só consultam o banco durante a renderização.
+import bisect  # Balde de cada observação
+import contextvars  # Medição da requisição atual (threads e tarefas assíncronas)
+import logging  # Log das requisições lentas
+import random  # Amostragem do log de requisições lentas
+import threading  # Lock do registro
+import time  # Relógio de alta resolução
+from collections import Counter, defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings  # Amostragem e limite das requisições lentas
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Limites superiores dos baldes de cada histograma
+BALDES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BALDES_CONSULTAS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+BALDES_BYTES = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Métricas conhecidas: nome -> (tipo, descrição, baldes)
+METRICAS = {
+    "pyflix_requisicao_segundos": (
+        "histogram", "Tempo total da requisição por view.", BALDES_SEGUNDOS,
+    ),
+    "pyflix_consultas_por_requisicao": (
+        "histogram", "Consultas ao banco por requisição.", BALDES_CONSULTAS,
+    ),
+    "pyflix_consultas_segundos": (
+        "histogram", "Tempo das consultas ao banco por requisição (fase: view ou template).",
+        BALDES_SEGUNDOS,
+    ),
+    "pyflix_template_segundos": (
+        "histogram", "Tempo de renderização do template (inclui os context processors lazy).",
+        BALDES_SEGUNDOS,
+    ),
+    "pyflix_resposta_bytes": (
+        "histogram", "Tamanho do corpo da resposta.", BALDES_BYTES,
+    ),
+    "pyflix_trilho_carregamento_segundos": (
+        "histogram", "Tempo de carregamento de um trilho do catálogo do banco (falta nos caches).",
+        BALDES_SEGUNDOS,
+    ),
+    "pyflix_requisicoes_total": (
+        "counter", "Requisições atendidas por view e classe de status.", None,
+    ),
+    "pyflix_cache_total": (
+        "counter", "Leituras do cache do Django por view (resultado: acerto ou falta).", None,
+    ),
+    "pyflix_filtro_emails_total": (
+        "counter", "Verificações de email da página inicial (resultado: evitada pelo filtro ou consultada).",
+        None,
+    ),
+    "pyflix_limite_taxa_total": (
+        "counter", "Requisições recusadas (429) pelo limite de taxa por IP, por view.", None,
+    ),
+}
+
+
+class Histograma:
+    """Histograma cumulativo no estilo do Prometheus (baldes, soma e contagem)."""
+
+    def __init__(self, baldes):
+        self.baldes = baldes
+        self.contagens = [0] * (len(baldes) + 1)  # O último balde é o +Inf
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(self.baldes, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def cumulativos(self):
+        """Retorna [(limite, contagem acumulada)], terminando em ("+Inf", total)."""
+        acumulado, resultado = 0, []
+        for limite, contagem in zip((*self.baldes, "+Inf"), self.contagens):
+            acumulado += contagem
+            resultado.append((limite, acumulado))
+        return resultado
+
+
+class RegistroMetricas:
+    """
+    Histogramas e contadores do processo, indexados por (nome, rótulos).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histogramas = {}
+        self._contadores = defaultdict(float)
+
+    def observar(self, nome, rotulos, valor):
+        """Registra uma observação no histograma 'nome' com os rótulos (dict)."""
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = Histograma(METRICAS[nome][2])
+            histograma.observar(valor)
+
+    def incrementar(self, nome, rotulos, valor=1):
+        """Soma 'valor' ao contador 'nome' com os rótulos (dict)."""
+        with self._lock:
+            self._contadores[(nome, tuple(sorted(rotulos.items())))] += valor
+
+    def histograma(self, nome, **rotulos):
+        """Retorna o histograma com os rótulos informados (None se não houver)."""
+        return self._histogramas.get((nome, tuple(sorted(rotulos.items()))))
+
+    def contador(self, nome, **rotulos):
+        return self._contadores.get((nome, tuple(sorted(rotulos.items()))), 0)
+
+    def limpar(self):
+        with self._lock:
+            self._histogramas.clear()
+            self._contadores.clear()
+
+    def exportar(self):
+        """Retorna todas as métricas no formato texto do Prometheus."""
+        with self._lock:
+            histogramas = {
+                chave: (histograma.cumulativos(), histograma.soma, histograma.total)
+                for chave, histograma in self._histogramas.items()
+            }
+            contadores = dict(self._contadores)
+
+        linhas = []
+        for nome, (tipo, descricao, _) in METRICAS.items():
+            series = sorted(
+                (chave, valor) for chave, valor in (histogramas if tipo == "histogram" else contadores).items()
+                if chave[0] == nome
+            )
+            if not series:
+                continue
+            linhas += [f"# HELP {nome} {descricao}", f"# TYPE {nome} {tipo}"]
+            for (_, rotulos), valor in series:
+                if tipo == "counter":
+                    linhas.append(f"{nome}{_rotulos(rotulos)} {_numero(valor)}")
+                    continue
+                cumulativos, soma, total = valor
+                for limite, acumulado in cumulativos:
+                    linhas.append(f"{nome}_bucket{_rotulos((*rotulos, ('le', limite)))} {acumulado}")
+                linhas.append(f"{nome}_sum{_rotulos(rotulos)} {_numero(soma)}")
+                linhas.append(f"{nome}_count{_rotulos(rotulos)} {total}")
+        return "\n".join(linhas) + "\n"
+
+
+def formatar_medidores(nome, descricao, valores, rotulo):
+    """
+    Formata um dicionário {valor do rótulo: número} como um gauge do Prometheus
+    (ex: as métricas da fila de eventos).
+    """
+    linhas = [f"# HELP {nome} {descricao}", f"# TYPE {nome} gauge"]
+    for chave, valor in sorted(valores.items()):
+        linhas.append(f"{nome}{_rotulos(((rotulo, chave),))} {_numero(valor)}")
+    return "\n".join(linhas) + "\n"
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ""
+    pares = ",".join(f'{chave}="{_escapar(valor)}"' for chave, valor in rotulos)
+    return "{" + pares + "}"
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+# Instância única por processo
+registro_metricas = RegistroMetricas()
+
+
+class MedicaoRequisicao:
+    """Números acumulados durante uma requisição."""
+
+    def __init__(self, guardar_sql):
+        self.consultas = 0
+        self.fase = "view"                              # "template" durante a renderização
+        self.tempo_consultas = {"view": 0.0, "template": 0.0}
+        self.template = 0.0
+        self.cache = Counter()                          # acerto/falta
+        self.sql = [] if guardar_sql else None          # [(segundos, sql)] das requisições amostradas
+
+
+# Medição da requisição em andamento; copiada para as threads do sync_to_async
+# e para as tarefas do asyncio.gather (o objeto é o mesmo, os números somam)
+_medicao = contextvars.ContextVar("pyflix_medicao", default=None)
+
+
+def medir_consulta(execute, sql, params, many, context):
+    """
+    Wrapper de execução do banco (connection.execute_wrappers): soma a
+    consulta à medição da requisição atual, se houver.
+    """
+    medicao = _medicao.get()
+    if medicao is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duracao = time.perf_counter() - inicio
+        medicao.consultas += 1
+        medicao.tempo_consultas[medicao.fase] += duracao
+        if medicao.sql is not None:
+            medicao.sql.append((duracao, sql))
+
+
+def instalar_medidor(sender, connection, **kwargs):
+    """
+    Instala medir_consulta() em cada conexão aberta (sinal connection_created,
+    conectado em FilmeConfig.ready()).
+
+    Fica instalado permanentemente, em vez do context manager
+    connection.execute_wrapper() por requisição: as conexões são por
+    thread, e as views assíncronas consultam o banco nas threads do
+    sync_to_async, não na thread do middleware. Fora de uma requisição
+    medida, o wrapper apenas repassa a consulta.
+    """
+    if medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(medir_consulta)
+
+
+def registrar_cache(acertos, faltas):
+    """Soma leituras do cache à medição da requisição atual, se houver."""
+    medicao = _medicao.get()
+    if medicao is not None:
+        medicao.cache["acerto"] += acertos
+        medicao.cache["falta"] += faltas
+
+
+# Leituras feitas pelo get_many() que a implementação base repassa ao get()
+_em_get_many = contextvars.ContextVar("pyflix_em_get_many", default=False)
+_AUSENTE = object()
+
+
+class MetricasCacheMixin:
+    """
+    Conta acertos e faltas das leituras do cache do Django
+    (get/get_many e as versões assíncronas, que delegam a eles).
+    """
+
+    def get(self, key, default=None, version=None):
+        valor = super().get(key, _AUSENTE, version)
+        if not _em_get_many.get():
+            registrar_cache(valor is not _AUSENTE, valor is _AUSENTE)
+        return default if valor is _AUSENTE else valor
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        token = _em_get_many.set(True)
+        try:
+            valores = super().get_many(keys, version)
+        finally:
+            _em_get_many.reset(token)
+        registrar_cache(len(valores), len(keys) - len(valores))
+        return valores
+
+
+class LocMemCacheComMetricas(MetricasCacheMixin, LocMemCache):
+    """LocMemCache com a contagem de acertos/faltas (ver CACHES)."""
+
+
+class RedisCacheComMetricas(MetricasCacheMixin, RedisCache):
+    """RedisCache com a contagem de acertos/faltas (ver CACHES)."""
+
+
+class MetricasMiddleware:
+    """
+    Mede cada requisição e registra os números por view (nome da URL).
+
+    Deve ser o primeiro da lista MIDDLEWARE, para medir os demais e ter o
+    seu process_template_response() chamado por último, logo antes da
+    renderização. Com METRICAS_LENTAS_AMOSTRA > 0, uma fração das
+    requisições guarda o SQL executado e, se passar de METRICAS_LENTA_MS,
+    é registrada no log com as consultas.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICAS_ATIVAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicao, inicio = self._iniciar()
+        token = _medicao.set(medicao)
+        try:
+            resposta = self.get_response(request)
+        finally:
+            _medicao.reset(token)
+        self._concluir(request, resposta, medicao, inicio)
+        return resposta
+
+    async def __acall__(self, request):
+        medicao, inicio = self._iniciar()
+        token = _medicao.set(medicao)
+        try:
+            resposta = await self.get_response(request)
+        finally:
+            _medicao.reset(token)
+        self._concluir(request, resposta, medicao, inicio)
+        return resposta
+
+    def process_template_response(self, request, resposta):
+        medicao = _medicao.get()
+        if medicao is None:
+            return resposta
+        inicio = time.perf_counter()
+        medicao.fase = "template"
+
+        def renderizada(_):
+            medicao.template += time.perf_counter() - inicio
+            medicao.fase = "view"
+
+        resposta.add_post_render_callback(renderizada)
+        return resposta
+
+    def _iniciar(self):
+        amostrada = random.random() < settings.METRICAS_LENTAS_AMOSTRA
+        return MedicaoRequisicao(guardar_sql=amostrada), time.perf_counter()
+
+    def _concluir(self, request, resposta, medicao, inicio):
+        duracao = time.perf_counter() - inicio
+        match = request.resolver_match
+        view = {"view": match.view_name if match else "sem_rota"}
+
+        registro_metricas.observar("pyflix_requisicao_segundos", view, duracao)
+        registro_metricas.observar("pyflix_consultas_por_requisicao", view, medicao.consultas)
+        for fase, tempo in medicao.tempo_consultas.items():
+            registro_metricas.observar("pyflix_consultas_segundos", {**view, "fase": fase}, tempo)
+        if medicao.template:
+            registro_metricas.observar("pyflix_template_segundos", view, medicao.template)
+        if not resposta.streaming:
+            registro_metricas.observar("pyflix_resposta_bytes", view, len(resposta.content))
+        registro_metricas.incrementar(
+            "pyflix_requisicoes_total", {**view, "status": f"{resposta.status_code // 100}xx"}
+        )
+        for resultado, total in medicao.cache.items():
+            registro_metricas.incrementar("pyflix_cache_total", {**view, "resultado": resultado}, total)
+
+        if medicao.sql is not None and duracao * 1000 >= settings.METRICAS_LENTA_MS:
+            logger.warning(
+                "Requisição lenta: %s %s (%s) em %.0f ms; %s consultas em %.0f ms; template %.0f ms\n%s",
+                request.method, request.path, view["view"], duracao * 1000, medicao.consultas,
+                sum(medicao.tempo_consultas.values()) * 1000, medicao.template * 1000,
+                "\n".join(f"[{tempo * 1000:.1f} ms] {sql}" for tempo, sql in medicao.sql),
+            )
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:33
+
+import datetime
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+TAMANHO_LOTE = 2000
+
+
+def copiar_filmes_vistos(apps, schema_editor):
+    """
+    Copia as linhas do antigo ManyToMany Usuario.filmes_vistos para o histórico.
+
+    O M2M não tinha data; as linhas recebem o horário da migração, recuando
+    1 microssegundo por posição para preservar a ordem de inserção (id maior
+    = visto mais recentemente).
+    """
+    Usuario = apps.get_model('filme', 'Usuario')
+    HistoricoVisualizacao = apps.get_model('filme', 'HistoricoVisualizacao')
+    FilmesVistos = Usuario.filmes_vistos.through
+
+    maior_id = FilmesVistos.objects.order_by('-id').values_list('id', flat=True).first()
+    if maior_id is None:
+        return
+    agora = django.utils.timezone.now()
+
+    lote = []
+    for linha in FilmesVistos.objects.order_by('id').iterator(chunk_size=TAMANHO_LOTE):
+        lote.append(HistoricoVisualizacao(
+            usuario_id=linha.usuario_id,
+            filme_id=linha.filme_id,
+            ultima_visualizacao=agora - datetime.timedelta(microseconds=maior_id - linha.id),
+        ))
+        if len(lote) >= TAMANHO_LOTE:
+            HistoricoVisualizacao.objects.bulk_create(lote, ignore_conflicts=True)
+            lote = []
+    HistoricoVisualizacao.objects.bulk_create(lote, ignore_conflicts=True)
+
+
+def restaurar_filmes_vistos(apps, schema_editor):
+    """
+    Reverte a migração, copiando o histórico de volta para o ManyToMany.
+    """
+    Usuario = apps.get_model('filme', 'Usuario')
+    HistoricoVisualizacao = apps.get_model('filme', 'HistoricoVisualizacao')
+    FilmesVistos = Usuario.filmes_vistos.through
+
+    lote = []
+    historico = HistoricoVisualizacao.objects.order_by('ultima_visualizacao')
+    for item in historico.iterator(chunk_size=TAMANHO_LOTE):
+        lote.append(FilmesVistos(usuario_id=item.usuario_id, filme_id=item.filme_id))
+        if len(lote) >= TAMANHO_LOTE:
+            FilmesVistos.objects.bulk_create(lote, ignore_conflicts=True)
+            lote = []
+    FilmesVistos.objects.bulk_create(lote, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filme', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoricoVisualizacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ultima_visualizacao', models.DateTimeField(default=django.utils.timezone.now)),
+                ('filme', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historico', to='filme.filme')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historico', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Histórico de visualização',
+                'verbose_name_plural': 'Históricos de visualização',
+                'ordering': ['-ultima_visualizacao'],
+                'indexes': [models.Index(fields=['usuario', '-ultima_visualizacao'], name='historico_usuario_recente_idx')],
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'filme'), name='historico_usuario_filme_unico')],
+            },
+        ),
+        migrations.RunPython(copiar_filmes_vistos, restaurar_filmes_vistos),
+        migrations.RemoveField(
+            model_name='usuario',
+            name='filmes_vistos',
+        ),
+    ]
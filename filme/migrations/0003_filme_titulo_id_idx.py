@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filme', '0002_historicovisualizacao'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='filme',
+            index=models.Index(fields=['titulo', 'id'], name='filme_titulo_id_idx'),
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:37
+
+import unicodedata
+from collections import defaultdict
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+import filme.models
+
+TAMANHO_LOTE = 1000
+
+# Cópias congeladas de filme/busca.py e filme/models.py: a migração não
+# importa o código da aplicação, que pode mudar depois dela
+CONFIG_POSTGRES = 'portuguese'
+
+ROTULOS_CATEGORIAS = {
+    'ANALISES': 'Análises',
+    'PROGRAMACAO': 'Programação',
+    'APRESENTACAO': 'Apresentação',
+    'OUTROS': 'Outros',
+}
+
+
+def normalizar(texto):
+    """Texto sem acentos e em minúsculas (ex: "Programação" -> "programacao")."""
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def campos_do_filme(titulo, categoria, descricao, titulos_episodios):
+    """Texto de cada campo pesquisável de um filme."""
+    return {
+        'titulo': titulo,
+        'categoria': ROTULOS_CATEGORIAS.get(categoria, categoria),
+        'episodios': ' '.join(titulos_episodios),
+        'descricao': descricao,
+    }
+
+
+def preencher_campos_busca(apps, schema_editor):
+    """
+    Preenche titulo_busca (todos os bancos) e vetor_busca (PostgreSQL)
+    dos filmes já existentes.
+    """
+    Filme = apps.get_model('filme', 'Filme')
+    Episodio = apps.get_model('filme', 'Episodio')
+    postgres = schema_editor.connection.vendor == 'postgresql'
+    SearchVector = django.contrib.postgres.search.SearchVector
+    Value = models.Value
+
+    episodios = defaultdict(list)
+    if postgres:
+        for filme_id, titulo in Episodio.objects.values_list('filme_id', 'titulo').iterator():
+            episodios[filme_id].append(titulo)
+
+    filmes = Filme.objects.values_list('id', 'titulo', 'categoria', 'descricao')
+    for filme_id, titulo, categoria, descricao in filmes.iterator(chunk_size=TAMANHO_LOTE):
+        campos = {'titulo_busca': normalizar(titulo)}
+        if postgres:
+            texto = campos_do_filme(titulo, categoria, descricao, episodios[filme_id])
+            campos['vetor_busca'] = (
+                SearchVector(Value(normalizar(texto['titulo'])), weight='A', config=CONFIG_POSTGRES)
+                + SearchVector(
+                    Value(normalizar(f"{texto['categoria']} {texto['episodios']}")),
+                    weight='B',
+                    config=CONFIG_POSTGRES,
+                )
+                + SearchVector(Value(normalizar(texto['descricao'])), weight='C', config=CONFIG_POSTGRES)
+            )
+        Filme.objects.filter(pk=filme_id).update(**campos)
+
+
+class ExtensaoTrigramas(TrigramExtension):
+    """
+    TrigramExtension que, como na ida, não faz nada fora do PostgreSQL
+    também na volta (a original consulta pg_extension em qualquer banco).
+    """
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filme', '0003_filme_titulo_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='filme',
+            name='titulo_busca',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='filme',
+            name='vetor_busca',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(preencher_campos_busca, migrations.RunPython.noop),
+        ExtensaoTrigramas(),
+        migrations.AddIndex(
+            model_name='filme',
+            index=filme.models.IndiceGinPostgres(fields=['vetor_busca'], name='filme_vetor_busca_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='filme',
+            index=filme.models.IndiceGinPostgres(
+                django.contrib.postgres.indexes.OpClass('titulo_busca', name='gin_trgm_ops'),
+                name='filme_titulo_busca_trgm',
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filme', '0004_busca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilmeRelacionado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicao', models.PositiveSmallIntegerField()),
+                ('pontuacao', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Filme relacionado',
+                'verbose_name_plural': 'Filmes relacionados',
+                'ordering': ['origem', 'posicao'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='filme',
+            index=models.Index(fields=['categoria', 'titulo'], name='filme_categoria_titulo_idx'),
+        ),
+        migrations.AddField(
+            model_name='filmerelacionado',
+            name='origem',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relacionados', to='filme.filme'),
+        ),
+        migrations.AddField(
+            model_name='filmerelacionado',
+            name='relacionado',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relacionado_a', to='filme.filme'),
+        ),
+        migrations.AddConstraint(
+            model_name='filmerelacionado',
+            constraint=models.UniqueConstraint(fields=('origem', 'posicao'), name='relacionado_origem_posicao_unico'),
+        ),
+    ]
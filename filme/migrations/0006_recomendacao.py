@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filme', '0005_relacionados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Recomendacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicao', models.PositiveSmallIntegerField()),
+                ('pontuacao', models.FloatField()),
+                ('filme', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recomendado_para', to='filme.filme')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recomendacoes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Recomendação',
+                'verbose_name_plural': 'Recomendações',
+                'ordering': ['usuario', 'posicao'],
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'posicao'), name='recomendacao_usuario_posicao_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 17:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filme', '0006_recomendacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='filme',
+            name='imagens',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
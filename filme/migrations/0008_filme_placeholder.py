@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filme', '0007_filme_imagens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='filme',
+            name='cor_predominante',
+            field=models.CharField(blank=True, editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='filme',
+            name='placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-18 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filme', '0008_filme_placeholder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoPendente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=50)),
+                ('dados', models.JSONField()),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Evento pendente',
+                'verbose_name_plural': 'Eventos pendentes',
+                'ordering': ['id'],
+            },
+        ),
+    ]
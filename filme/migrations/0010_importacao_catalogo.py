@@ -0,0 +1,72 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:02
+
+import uuid
+
+from django.db import migrations, models
+
+import filme.models
+
+TAMANHO_LOTE = 2000
+
+
+def preencher_identificadores(apps, schema_editor):
+    """
+    Gera um identificador para cada filme existente (um por linha: o
+    default da coluna seria avaliado uma única vez para todas).
+    """
+    Filme = apps.get_model('filme', 'Filme')
+    lote = []
+    for filme in Filme.objects.filter(identificador__isnull=True).only('id').iterator(chunk_size=TAMANHO_LOTE):
+        filme.identificador = uuid.uuid4().hex
+        lote.append(filme)
+        if len(lote) >= TAMANHO_LOTE:
+            Filme.objects.bulk_update(lote, ['identificador'])
+            lote = []
+    Filme.objects.bulk_update(lote, ['identificador'])
+
+
+def renomear_episodios_repetidos(apps, schema_editor):
+    """
+    Numera os episódios com o mesmo título no mesmo filme ("Aula", "Aula (2)"),
+    antes da restrição única (filme, titulo).
+    """
+    Episodio = apps.get_model('filme', 'Episodio')
+    repetidos = (
+        Episodio.objects.values('filme_id', 'titulo')
+        .annotate(total=models.Count('id'))
+        .filter(total__gt=1)
+    )
+    for grupo in repetidos.iterator():
+        episodios = Episodio.objects.filter(
+            filme_id=grupo['filme_id'], titulo=grupo['titulo']
+        ).order_by('id')
+        for numero, episodio in enumerate(episodios[1:], start=2):
+            sufixo = f' ({numero})'
+            episodio.titulo = episodio.titulo[:100 - len(sufixo)] + sufixo
+            episodio.save(update_fields=['titulo'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filme', '0009_eventopendente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='filme',
+            name='identificador',
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.RunPython(preencher_identificadores, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='filme',
+            name='identificador',
+            field=models.CharField(default=filme.models.novo_identificador, max_length=100, unique=True),
+        ),
+        migrations.RunPython(renomear_episodios_repetidos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='episodio',
+            constraint=models.UniqueConstraint(fields=('filme', 'titulo'), name='episodio_filme_titulo_unico'),
+        ),
+    ]
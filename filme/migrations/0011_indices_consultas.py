@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-18 17:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('filme', '0010_importacao_catalogo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='filme',
+            index=models.Index(fields=['-data_criacao'], name='filme_data_criacao_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='filme',
+            index=models.Index(fields=['-visualizacoes'], name='filme_visualizacoes_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['email'], name='usuario_email_idx'),
+        ),
+    ]
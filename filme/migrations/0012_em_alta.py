@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-18 17:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filme', '0011_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilmeEmAlta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicao', models.PositiveSmallIntegerField(unique=True)),
+                ('pontuacao', models.FloatField()),
+                ('filme', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='em_alta', to='filme.filme')),
+            ],
+            options={
+                'verbose_name': 'Filme em alta',
+                'verbose_name_plural': 'Filmes em alta',
+                'ordering': ['posicao'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VisualizacaoHora',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hora', models.DateTimeField()),
+                ('quantidade', models.PositiveIntegerField(default=0)),
+                ('filme', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visualizacoes_por_hora', to='filme.filme')),
+            ],
+            options={
+                'verbose_name': 'Visualizações por hora',
+                'verbose_name_plural': 'Visualizações por hora',
+                'ordering': ['-hora', 'filme'],
+                'indexes': [models.Index(fields=['hora'], name='visualizacao_hora_hora_idx')],
+                'constraints': [models.UniqueConstraint(fields=('filme', 'hora'), name='visualizacao_hora_filme_hora_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 17:55
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('filme', '0012_em_alta'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='usuario',
+            name='usuario_email_idx',
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='usuario_email_normalizado_idx'),
+        ),
+    ]
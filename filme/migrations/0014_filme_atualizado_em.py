@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filme', '0013_email_normalizado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='filme',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
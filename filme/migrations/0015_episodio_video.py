@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:20
+
+import filme.videos
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filme', '0014_filme_atualizado_em'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='episodio',
+            name='video',
+            field=models.FileField(blank=True, storage=filme.videos.armazenamento_videos, upload_to='episodios/'),
+        ),
+        migrations.AlterField(
+            model_name='episodio',
+            name='link_video',
+            field=models.URLField(blank=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:24
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filme', '0015_episodio_video'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgressoEpisodio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicao', models.FloatField()),
+                ('duracao', models.FloatField()),
+                ('atualizado_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('episodio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progressos', to='filme.episodio')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progressos', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Progresso de episódio',
+                'verbose_name_plural': 'Progressos de episódios',
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'episodio'), name='progresso_usuario_episodio_unico')],
+            },
+        ),
+    ]
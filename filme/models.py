@@ -1,8 +1,18 @@
 # Importações necessárias para criar modelos Django
+import uuid  # Identificador estável dos filmes (importação/exportação do catálogo)
+from functools import partial  # Invalidação após o commit com o id já fixado
 from django.contrib.auth.models import AbstractUser  # Modelo base para usuários personalizados
-from django.db import models  # Classes base para campos de modelo
+from django.contrib.postgres.indexes import GinIndex, OpClass  # Índices da busca (PostgreSQL)
+from django.contrib.postgres.search import SearchVectorField  # Vetor de busca textual (PostgreSQL)
+from django.core.exceptions import ValidationError  # Episódio sem link nem arquivo
+from django.db import models, transaction  # Campos de modelo e ações após o commit
+from django.db.models.functions import Lower  # Índice do email normalizado
+from django.urls import reverse  # URL do vídeo servido pela aplicação
 from django.utils import timezone  # Utilitários de data/hora do Django
 
+from .cache import invalidar_historico  # Versão dos fragmentos do histórico do usuário
+from .videos import armazenamento_videos  # Vídeos dos episódios no disco local
+
 # Lista de escolhas para categorias de filmes
 # Formato: (valor_no_banco, valor_exibido_ao_usuário)
 LISTA_CATEGORIAS = [
@@ -13,15 +23,70 @@ LISTA_CATEGORIAS = [
 ]
 
 
+class IndiceGinPostgres(GinIndex):
+    """
+    GinIndex criado só no PostgreSQL.
+
+    Nos outros bancos (SQLite dos testes e do desenvolvimento) não gera SQL:
+    lá a busca usa o índice em memória de filme/busca.py.
+    """
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        if schema_editor.connection.vendor != "postgresql":
+            return ""
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+    def remove_sql(self, model, schema_editor, **kwargs):
+        if schema_editor.connection.vendor != "postgresql":
+            return ""
+        return super().remove_sql(model, schema_editor, **kwargs)
+
+
+# QuerySets com os carregamentos relacionados usados pelas views e pelo admin
+class FilmeQuerySet(models.QuerySet):
+    """
+    QuerySet de Filme com presets de carregamento dos relacionamentos.
+    """
+
+    def com_episodios(self):
+        """
+        Carrega os episódios de todos os filmes em uma consulta extra
+        (em vez de uma por filme ao acessar filme.episodios.all).
+        """
+        return self.prefetch_related("episodios")
+
+
+class EpisodioQuerySet(models.QuerySet):
+    """
+    QuerySet de Episodio com presets de carregamento dos relacionamentos.
+    """
+
+    def com_filme(self):
+        """
+        Traz o filme no mesmo SELECT (JOIN), usado por Episodio.__str__.
+        """
+        return self.select_related("filme")
+
+
+def novo_identificador():
+    """Identificador padrão de um filme criado no Pyflix (fora de uma importação)."""
+    return uuid.uuid4().hex
+
+
 # Definição dos modelos do banco de dados
 class Filme(models.Model):
     """
     Modelo que representa um filme/vídeo na plataforma.
     
     Armazena informações básicas como título, categoria, visualizações,
-    data de criação, duração, descrição e thumbnail.
+    data de criação, duração, descrição e thumbnail, além dos campos
+    desnormalizados usados pela busca.
     """
     
+    # Identificador estável do filme no catálogo de origem: chave do upsert do
+    # comando import_catalog e exportado por export_catalog
+    identificador = models.CharField(max_length=100, unique=True, default=novo_identificador)
+    
     # Campo de texto para o título do filme (máximo 100 caracteres)
     titulo = models.CharField(max_length=100)  # Título do filme
     
@@ -46,6 +111,29 @@ class Filme(models.Model):
     thumbnail = models.ImageField(
         upload_to="thumb_filmes/"
     )  # Imagem de thumbnail do filme
+    
+    # URLs das versões redimensionadas da thumbnail (WebP/AVIF por largura),
+    # geradas após o upload ou pelo comando gerar_imagens (ver filme/imagens.py)
+    imagens = models.JSONField(default=dict, blank=True, editable=False)
+    
+    # Prévia minúscula da thumbnail (data URI WebP) e cor predominante (#rrggbb),
+    # exibidas no próprio HTML enquanto a imagem carrega (geradas junto com 'imagens')
+    placeholder = models.TextField(blank=True, editable=False)
+    cor_predominante = models.CharField(max_length=7, blank=True, editable=False)
+
+    # Última alteração do filme ou dos seus episódios (ETag e Last-Modified da página de detalhes)
+    # O contador de visualizações é gravado com update() e não altera este campo
+    atualizado_em = models.DateTimeField(auto_now=True)
+    
+    # Campos desnormalizados da busca, mantidos pelos sinais (ver filme/busca.py)
+    # Título sem acentos e em minúsculas, usado na busca aproximada e no autocompletar
+    titulo_busca = models.CharField(max_length=100, default="", editable=False)
+    
+    # Vetor de busca textual (PostgreSQL) com título, categoria, episódios e descrição
+    vetor_busca = SearchVectorField(null=True, editable=False)
+
+    # Manager com os presets de FilmeQuerySet (ex: Filme.objects.com_episodios())
+    objects = FilmeQuerySet.as_manager()
 
     def __str__(self):
         """
@@ -61,13 +149,26 @@ class Filme(models.Model):
         verbose_name = "Filme"              # Nome singular no admin
         verbose_name_plural = "Filmes"      # Nome plural no admin
         ordering = ["titulo"]               # Ordenação padrão por título
+        indexes = [
+            # Índice composto da paginação por cursor (keyset) do catálogo
+            models.Index(fields=["titulo", "id"], name="filme_titulo_id_idx"),
+            # Filmes da mesma categoria (complemento dos relacionados), já na ordem por título
+            models.Index(fields=["categoria", "titulo"], name="filme_categoria_titulo_idx"),
+            # Trilhos da página inicial: recentes (-data_criacao) e em alta (-visualizacoes)
+            models.Index(fields=["-data_criacao"], name="filme_data_criacao_desc_idx"),
+            models.Index(fields=["-visualizacoes"], name="filme_visualizacoes_desc_idx"),
+            # Busca textual (vetor_busca) e aproximada por trigramas (titulo_busca), só no PostgreSQL
+            IndiceGinPostgres(fields=["vetor_busca"], name="filme_vetor_busca_gin"),
+            IndiceGinPostgres(OpClass("titulo_busca", name="gin_trgm_ops"), name="filme_titulo_busca_trgm"),
+        ]
 
 
 class Episodio(models.Model):
     """
     Modelo que representa um episódio de um filme/série.
     
-    Cada episódio está vinculado a um filme e contém título e link do vídeo.
+    Cada episódio está vinculado a um filme e contém título e o vídeo:
+    um link externo ou um arquivo enviado, servido pela aplicação.
     Relacionamento: Um filme pode ter vários episódios (1:N).
     """
     
@@ -82,15 +183,39 @@ class Episodio(models.Model):
     titulo = models.CharField(max_length=100)  # Título do episódio
     
     # Campo URL para armazenar o link do vídeo (valida formato de URL)
-    link_video = models.URLField()  # Link do vídeo do episódio
+    link_video = models.URLField(blank=True)  # Link do vídeo do episódio
+
+    # Arquivo de vídeo enviado, no storage "videos" (sem URL pública: ver url_video)
+    video = models.FileField(upload_to="episodios/", storage=armazenamento_videos, blank=True)
+
+    # Manager com os presets de EpisodioQuerySet (ex: Episodio.objects.com_filme())
+    objects = EpisodioQuerySet.as_manager()
 
     def __str__(self):
         """
         Representação string do episódio.
         Formato: "Nome do Filme - Título do Episódio"
+
+        Acessa o filme: em listagens, use Episodio.objects.com_filme()
+        para não fazer uma consulta por episódio.
         """
         return f"{self.filme.titulo} - {self.titulo}"
 
+    def clean(self):
+        """Exige o link ou o arquivo do vídeo."""
+        if not self.link_video and not self.video:
+            raise ValidationError("Informe o link do vídeo ou envie o arquivo.")
+
+    @property
+    def url_video(self):
+        """
+        URL do vídeo exibida na página: o player do Pyflix para o arquivo
+        enviado (com a posição de retomada) ou o link externo.
+        """
+        if self.video:
+            return reverse("filme:player_episodio", args=[self.pk])
+        return self.link_video
+
     class Meta:
         """
         Metadados do modelo Episodio.
@@ -98,20 +223,23 @@ class Episodio(models.Model):
         verbose_name = "Episódio"           # Nome singular no admin
         verbose_name_plural = "Episódios"   # Nome plural no admin
         ordering = ["titulo"]               # Ordenação padrão por título
+        constraints = [
+            # Chave do upsert dos episódios na importação do catálogo; o índice
+            # único também atende aos episódios de um filme na ordem por título
+            models.UniqueConstraint(fields=["filme", "titulo"], name="episodio_filme_titulo_unico"),
+        ]
 
 
 class Usuario(AbstractUser):
     """
     Modelo de usuário personalizado que estende o AbstractUser do Django.
     
-    Herda todos os campos padrão (username, email, password, etc.) e adiciona
-    funcionalidades específicas da aplicação, como histórico de filmes assistidos.
+    Herda todos os campos padrão (username, email, password, etc.). O histórico
+    de filmes assistidos é guardado no modelo HistoricoVisualizacao.
     """
 
-    # Campo Many-to-Many que relaciona usuários com filmes assistidos
-    # Um usuário pode assistir vários filmes e um filme pode ser assistido por vários usuários
-    # As aspas em "Filme" evitam erro de referência circular (modelo ainda não foi definido)
-    filmes_vistos = models.ManyToManyField("Filme")  # Filmes que o usuário já viu
+    # O histórico de filmes assistidos fica em HistoricoVisualizacao
+    # (acessível por usuario.historico), com a data da última visualização
 
     class Meta:
         """
@@ -120,3 +248,520 @@ class Usuario(AbstractUser):
         verbose_name = "Usuário"            # Nome singular no admin
         verbose_name_plural = "Usuários"    # Nome plural no admin
         ordering = ["username"]             # Ordenação padrão por nome de usuário
+        indexes = [
+            # Verificação do email na página inicial (HomePageView), sem
+            # diferenciar maiúsculas (ver filme/emails.py)
+            models.Index(Lower("email"), name="usuario_email_normalizado_idx"),
+        ]
+
+
+class HistoricoVisualizacaoManager(models.Manager):
+    """
+    Manager do histórico com operações de gravação e leitura otimizadas.
+    """
+
+    def registrar_varios(self, visualizacoes):
+        """
+        Registra várias visualizações com um único upsert.
+
+        Recebe {(usuario_id, filme_id): instante}; usado pela fila de
+        eventos para gravar um lote inteiro (ver filme/eventos.py). Um único
+        INSERT ... ON CONFLICT DO UPDATE cria a linha na primeira visualização
+        e apenas atualiza 'ultima_visualizacao' nas seguintes. Após o commit,
+        invalida o trilho "Continuar Assistindo" cacheado de cada usuário.
+        """
+        self.bulk_create(
+            [
+                self.model(usuario_id=usuario_id, filme_id=filme_id, ultima_visualizacao=instante)
+                for (usuario_id, filme_id), instante in visualizacoes.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["usuario", "filme"],
+            update_fields=["ultima_visualizacao"],
+        )
+        for usuario_id in {usuario_id for usuario_id, _ in visualizacoes}:
+            transaction.on_commit(partial(invalidar_historico, usuario_id))
+
+    def filmes_recentes(self, usuario, limite=8):
+        """
+        Retorna os 'limite' filmes vistos mais recentemente pelo usuário.
+
+        Uma única consulta limitada e ordenada pelo índice
+        (usuario, -ultima_visualizacao), já trazendo o Filme com select_related.
+        """
+        return [item.filme for item in self._recentes(usuario, limite)]
+
+    async def afilmes_recentes(self, usuario, limite=8):
+        """Versão assíncrona de filmes_recentes()."""
+        return [item.filme async for item in self._recentes(usuario, limite)]
+
+    def _recentes(self, usuario, limite):
+        return (
+            self.filter(usuario=usuario)
+            .select_related("filme")
+            .order_by("-ultima_visualizacao")[:limite]
+        )
+
+
+class HistoricoVisualizacao(models.Model):
+    """
+    Modelo que registra quais filmes cada usuário assistiu e quando.
+
+    Existe uma única linha por par (usuário, filme), atualizada a cada
+    nova visualização. Substitui o antigo ManyToMany Usuario.filmes_vistos,
+    que não tinha data nem ordenação.
+    """
+
+    # Usuário que assistiu o filme
+    # related_name: permite acessar o histórico a partir do usuário (usuario.historico.all())
+    usuario = models.ForeignKey(
+        Usuario, on_delete=models.CASCADE, related_name="historico"
+    )
+
+    # Filme assistido
+    filme = models.ForeignKey(
+        Filme, on_delete=models.CASCADE, related_name="historico"
+    )
+
+    # Data/hora da visualização mais recente desse filme pelo usuário
+    ultima_visualizacao = models.DateTimeField(default=timezone.now)
+
+    objects = HistoricoVisualizacaoManager()
+
+    def __str__(self):
+        """
+        Representação string do histórico.
+        Formato: "usuário - filme"
+        """
+        return f"{self.usuario_id} - {self.filme_id}"
+
+    class Meta:
+        """
+        Metadados do modelo HistoricoVisualizacao.
+        """
+        verbose_name = "Histórico de visualização"
+        verbose_name_plural = "Históricos de visualização"
+        ordering = ["-ultima_visualizacao"]  # Mais recentes primeiro
+        constraints = [
+            # Garante uma linha por par (usuário, filme), base do upsert
+            models.UniqueConstraint(
+                fields=["usuario", "filme"], name="historico_usuario_filme_unico"
+            ),
+        ]
+        indexes = [
+            # Atende o trilho "Continuar Assistindo" (filtro por usuário, ordem por data)
+            models.Index(
+                fields=["usuario", "-ultima_visualizacao"], name="historico_usuario_recente_idx"
+            ),
+        ]
+
+
+class FilmeRelacionadoManager(models.Manager):
+    """
+    Manager dos filmes relacionados pré-calculados.
+    """
+
+    def filmes(self, filme, limite=5):
+        """
+        Retorna os 'limite' filmes relacionados ao filme, na ordem de relevância.
+
+        Uma única consulta pela chave única (origem, posicao), com JOIN pela
+        chave primária de Filme; instancia apenas os Filmes.
+        """
+        return list(self._filmes(filme, limite))
+
+    async def afilmes(self, filme, limite=5):
+        """Versão assíncrona de filmes()."""
+        return [relacionado async for relacionado in self._filmes(filme, limite)]
+
+    def _filmes(self, filme, limite):
+        return Filme.objects.filter(relacionado_a__origem=filme).order_by(
+            "relacionado_a__posicao"
+        )[:limite]
+
+
+class FilmeRelacionado(models.Model):
+    """
+    Filmes relacionados a cada filme, pré-calculados pelo comando
+    'calcular_relacionados' (ver filme/relacionados.py).
+
+    Uma linha por par (filme de origem, filme relacionado), com a posição no
+    ranking. A relação vem de quem assistiu os dois filmes (histórico de
+    visualizações), completada com filmes da mesma categoria.
+    """
+
+    # Filme cuja página de detalhes exibe os relacionados
+    origem = models.ForeignKey(
+        Filme, on_delete=models.CASCADE, related_name="relacionados"
+    )
+
+    # Filme sugerido
+    relacionado = models.ForeignKey(
+        Filme, on_delete=models.CASCADE, related_name="relacionado_a"
+    )
+
+    # Posição no ranking de relevância (0 = mais relacionado)
+    posicao = models.PositiveSmallIntegerField()
+
+    # Similaridade entre os filmes (0 quando vem apenas da categoria)
+    pontuacao = models.FloatField(default=0)
+
+    objects = FilmeRelacionadoManager()
+
+    def __str__(self):
+        """
+        Representação string do relacionamento.
+        Formato: "origem -> relacionado"
+        """
+        return f"{self.origem_id} -> {self.relacionado_id}"
+
+    class Meta:
+        """
+        Metadados do modelo FilmeRelacionado.
+        """
+        verbose_name = "Filme relacionado"
+        verbose_name_plural = "Filmes relacionados"
+        ordering = ["origem", "posicao"]
+        constraints = [
+            # Uma posição por filme: a leitura da página de detalhes usa essa chave
+            models.UniqueConstraint(
+                fields=["origem", "posicao"], name="relacionado_origem_posicao_unico"
+            ),
+        ]
+
+
+class RecomendacaoManager(models.Manager):
+    """
+    Manager das recomendações pré-calculadas por usuário.
+    """
+
+    def filmes(self, usuario, limite=8):
+        """
+        Retorna os 'limite' filmes recomendados ao usuário, na ordem de relevância.
+
+        Uma única consulta pela chave única (usuario, posicao).
+        """
+        return list(self._filmes(usuario, limite))
+
+    async def afilmes(self, usuario, limite=8):
+        """Versão assíncrona de filmes()."""
+        return [filme async for filme in self._filmes(usuario, limite)]
+
+    def _filmes(self, usuario, limite):
+        return Filme.objects.filter(recomendado_para__usuario=usuario).order_by(
+            "recomendado_para__posicao"
+        )[:limite]
+
+
+class Recomendacao(models.Model):
+    """
+    Filmes recomendados a cada usuário, calculados pelo comando
+    'calcular_recomendacoes' (filtragem colaborativa item-item,
+    ver filme/recomendacoes.py).
+
+    Uma linha por par (usuário, filme recomendado), com a posição no ranking.
+    """
+
+    # Usuário que recebe a recomendação
+    usuario = models.ForeignKey(
+        Usuario, on_delete=models.CASCADE, related_name="recomendacoes"
+    )
+
+    # Filme recomendado
+    filme = models.ForeignKey(
+        Filme, on_delete=models.CASCADE, related_name="recomendado_para"
+    )
+
+    # Posição no ranking do usuário (0 = mais recomendado)
+    posicao = models.PositiveSmallIntegerField()
+
+    # Pontuação da filtragem colaborativa (soma das similaridades com os filmes vistos)
+    pontuacao = models.FloatField()
+
+    objects = RecomendacaoManager()
+
+    def __str__(self):
+        """
+        Representação string da recomendação.
+        Formato: "usuário -> filme"
+        """
+        return f"{self.usuario_id} -> {self.filme_id}"
+
+    class Meta:
+        """
+        Metadados do modelo Recomendacao.
+        """
+        verbose_name = "Recomendação"
+        verbose_name_plural = "Recomendações"
+        ordering = ["usuario", "posicao"]
+        constraints = [
+            # Uma posição por usuário: o trilho "Recomendados para você" usa essa chave
+            models.UniqueConstraint(
+                fields=["usuario", "posicao"], name="recomendacao_usuario_posicao_unico"
+            ),
+        ]
+
+
+class EventoPendente(models.Model):
+    """
+    Eventos da fila em memória gravados no banco (fallback durável).
+
+    Recebe os eventos quando a fila do processo está cheia, quando um lote
+    falha e quando o processo encerra com eventos na fila. São processados
+    pelo comando 'drenar_eventos' (ver filme/eventos.py).
+    """
+
+    # Tipo do evento (chave de PROCESSADORES em filme/eventos.py)
+    tipo = models.CharField(max_length=50)
+
+    # Dados do evento, no mesmo formato publicado na fila
+    dados = models.JSONField()
+
+    # Quando o evento foi gravado no banco
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """
+        Representação string do evento.
+        Formato: "tipo #id"
+        """
+        return f"{self.tipo} #{self.pk}"
+
+    class Meta:
+        """
+        Metadados do modelo EventoPendente.
+        """
+        verbose_name = "Evento pendente"
+        verbose_name_plural = "Eventos pendentes"
+        ordering = ["id"]  # Ordem de chegada
+
+
+class VisualizacaoHoraManager(models.Manager):
+    """
+    Manager das visualizações por hora, com a gravação em lote.
+    """
+
+    def registrar_varios(self, contagens):
+        """
+        Soma visualizações aos baldes por hora.
+
+        Recebe {(filme_id, hora): quantidade}, com 'hora' já truncada. Cria
+        os baldes que faltam com quantidade 0 (ignorando os que já existem,
+        inclusive os criados ao mesmo tempo por outro processo) e soma com
+        UPDATE ... SET quantidade = quantidade + N, agrupando os filmes de
+        mesma hora e mesmo incremento em um único UPDATE.
+        """
+        self.bulk_create(
+            [self.model(filme_id=filme_id, hora=hora) for filme_id, hora in contagens],
+            ignore_conflicts=True,
+        )
+        grupos = {}
+        for (filme_id, hora), quantidade in contagens.items():
+            grupos.setdefault((hora, quantidade), []).append(filme_id)
+        for (hora, quantidade), filme_ids in sorted(grupos.items()):
+            self.filter(hora=hora, filme_id__in=sorted(filme_ids)).update(
+                quantidade=models.F("quantidade") + quantidade
+            )
+
+
+class VisualizacaoHora(models.Model):
+    """
+    Visualizações de cada filme agrupadas por hora.
+
+    Gravadas pela fila de eventos junto com o histórico (ver filme/eventos.py)
+    e lidas pelo comando 'calcular_em_alta', que remove os baldes mais
+    antigos que a janela do ranking (ver filme/em_alta.py).
+    """
+
+    # Filme visualizado
+    filme = models.ForeignKey(
+        Filme, on_delete=models.CASCADE, related_name="visualizacoes_por_hora"
+    )
+
+    # Início da hora (minutos, segundos e microssegundos zerados)
+    hora = models.DateTimeField()
+
+    # Visualizações do filme nessa hora
+    quantidade = models.PositiveIntegerField(default=0)
+
+    objects = VisualizacaoHoraManager()
+
+    def __str__(self):
+        """
+        Representação string do balde.
+        Formato: "filme @ hora: quantidade"
+        """
+        return f"{self.filme_id} @ {self.hora:%Y-%m-%d %H}h: {self.quantidade}"
+
+    class Meta:
+        """
+        Metadados do modelo VisualizacaoHora.
+        """
+        verbose_name = "Visualizações por hora"
+        verbose_name_plural = "Visualizações por hora"
+        ordering = ["-hora", "filme"]
+        constraints = [
+            # Um balde por filme e hora: chave da soma em lote
+            models.UniqueConstraint(fields=["filme", "hora"], name="visualizacao_hora_filme_hora_unico"),
+        ]
+        indexes = [
+            # Leitura da janela do ranking e remoção dos baldes antigos
+            models.Index(fields=["hora"], name="visualizacao_hora_hora_idx"),
+        ]
+
+
+class FilmeEmAltaManager(models.Manager):
+    """
+    Manager do ranking "Em Alta" pré-calculado.
+    """
+
+    def filmes(self, limite=8):
+        """
+        Retorna os 'limite' filmes em alta, na ordem do ranking.
+
+        Uma única consulta pela chave única 'posicao'.
+        """
+        return list(self._filmes(limite))
+
+    async def afilmes(self, limite=8):
+        """Versão assíncrona de filmes()."""
+        return [filme async for filme in self._filmes(limite)]
+
+    def _filmes(self, limite):
+        return Filme.objects.filter(em_alta__isnull=False).order_by("em_alta__posicao")[:limite]
+
+
+class FilmeEmAlta(models.Model):
+    """
+    Ranking "Em Alta", calculado pelo comando 'calcular_em_alta' a partir
+    das visualizações por hora com decaimento exponencial (ver
+    filme/em_alta.py).
+
+    Uma linha por filme do topo, com a posição e a pontuação.
+    """
+
+    # Filme do ranking
+    filme = models.OneToOneField(
+        Filme, on_delete=models.CASCADE, related_name="em_alta"
+    )
+
+    # Posição no ranking (0 = mais em alta)
+    posicao = models.PositiveSmallIntegerField(unique=True)
+
+    # Visualizações recentes ponderadas pela idade (meia-vida EM_ALTA_MEIA_VIDA_HORAS)
+    pontuacao = models.FloatField()
+
+    objects = FilmeEmAltaManager()
+
+    def __str__(self):
+        """
+        Representação string da posição.
+        Formato: "#posição filme"
+        """
+        return f"#{self.posicao} {self.filme_id}"
+
+    class Meta:
+        """
+        Metadados do modelo FilmeEmAlta.
+        """
+        verbose_name = "Filme em alta"
+        verbose_name_plural = "Filmes em alta"
+        ordering = ["posicao"]
+
+
+class ProgressoEpisodioManager(models.Manager):
+    """
+    Manager das posições de retomada, com a gravação em lote.
+    """
+
+    def registrar_varios(self, progressos):
+        """
+        Grava várias posições com um único upsert.
+
+        Recebe {(usuario_id, episodio_id): (posicao, duracao, instante)};
+        usado pelo buffer dos heartbeats do player (ver filme/progresso.py).
+        """
+        self.bulk_create(
+            [
+                self.model(
+                    usuario_id=usuario_id, episodio_id=episodio_id,
+                    posicao=posicao, duracao=duracao, atualizado_em=instante,
+                )
+                for (usuario_id, episodio_id), (posicao, duracao, instante) in progressos.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["usuario", "episodio"],
+            update_fields=["posicao", "duracao", "atualizado_em"],
+            batch_size=1000,
+        )
+
+    def dos_episodios(self, usuario_id, episodio_ids):
+        """
+        Posições gravadas do usuário nos episódios, em uma única consulta
+        pelo índice único (usuario, episodio): {episodio_id: (posicao, duracao)}.
+        """
+        return {
+            episodio_id: (posicao, duracao)
+            for episodio_id, posicao, duracao in self._dos_episodios(usuario_id, episodio_ids)
+        }
+
+    async def ados_episodios(self, usuario_id, episodio_ids):
+        """Versão assíncrona de dos_episodios()."""
+        return {
+            episodio_id: (posicao, duracao)
+            async for episodio_id, posicao, duracao in self._dos_episodios(usuario_id, episodio_ids)
+        }
+
+    def _dos_episodios(self, usuario_id, episodio_ids):
+        return self.filter(usuario_id=usuario_id, episodio_id__in=episodio_ids).values_list(
+            "episodio_id", "posicao", "duracao"
+        )
+
+
+class ProgressoEpisodio(models.Model):
+    """
+    Até onde cada usuário assistiu cada episódio (posição de retomada).
+
+    Os heartbeats do player são agrupados em memória e gravados em lote
+    (ver filme/progresso.py): a linha guarda a posição do último lote.
+    """
+
+    # Usuário que assistiu
+    usuario = models.ForeignKey(
+        Usuario, on_delete=models.CASCADE, related_name="progressos"
+    )
+
+    # Episódio assistido
+    episodio = models.ForeignKey(
+        Episodio, on_delete=models.CASCADE, related_name="progressos"
+    )
+
+    # Posição e duração do vídeo, em segundos
+    posicao = models.FloatField()
+    duracao = models.FloatField()
+
+    # Instante do heartbeat gravado
+    atualizado_em = models.DateTimeField(default=timezone.now)
+
+    objects = ProgressoEpisodioManager()
+
+    def __str__(self):
+        """
+        Representação string do progresso.
+        Formato: "usuário - episódio: posição"
+        """
+        return f"{self.usuario_id} - {self.episodio_id}: {self.posicao:.0f}s"
+
+    class Meta:
+        """
+        Metadados do modelo ProgressoEpisodio.
+        """
+        verbose_name = "Progresso de episódio"
+        verbose_name_plural = "Progressos de episódios"
+        constraints = [
+            # Uma linha por par (usuário, episódio), base do upsert; o índice
+            # único também atende à leitura das posições do usuário
+            models.UniqueConstraint(
+                fields=["usuario", "episodio"], name="progresso_usuario_episodio_unico"
+            ),
+        ]
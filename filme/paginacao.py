@@ -0,0 +1,142 @@
+# Paginação por cursor (keyset) para listagens grandes do catálogo
+import base64  # Codificação do cursor em texto seguro para URL
+import json  # Serialização dos valores do cursor
+
+from django.core.exceptions import BadRequest, ValidationError  # Resposta 400 para cursor inválido
+from django.core.serializers.json import DjangoJSONEncoder  # Serializa datas/decimais
+from django.db.models import Q  # Filtros compostos (OR/AND)
+
+
+class PaginaCursor:
+    """
+    Página de resultados de uma paginação por cursor.
+
+    Diferente do Page do Django, não conhece o total de páginas (isso exigiria
+    um COUNT); sabe apenas se existe próxima página e qual é o seu cursor.
+    """
+
+    def __init__(self, object_list, proximo_cursor):
+        self.object_list = object_list        # Itens desta página
+        self.proximo_cursor = proximo_cursor  # Cursor da próxima página (ou None)
+
+    @property
+    def has_next(self):
+        """Indica se existe uma próxima página."""
+        return self.proximo_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def codificar_cursor(valores):
+    """
+    Codifica os valores da última linha da página em um cursor opaco.
+    """
+    dados = json.dumps(valores, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(dados.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor, quantidade):
+    """
+    Decodifica um cursor, validando que tenha 'quantidade' valores escalares
+    (texto ou número: listas, objetos e null nunca saem de codificar_cursor).
+
+    Lança BadRequest (HTTP 400) se o cursor estiver malformado.
+    """
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+    except (ValueError, TypeError):
+        raise BadRequest("Cursor de paginação inválido.")
+    if not isinstance(valores, list) or len(valores) != quantidade:
+        raise BadRequest("Cursor de paginação inválido.")
+    if not all(isinstance(valor, (str, int, float)) for valor in valores):
+        raise BadRequest("Cursor de paginação inválido.")
+    return valores
+
+
+def _filtro_apos(ordenacao, valores):
+    """
+    Monta o filtro "linhas depois do cursor" para a ordenação informada.
+
+    Para ordenacao=("titulo", "id") e valores=(t, i) gera:
+        titulo >= t AND (titulo > t OR (titulo = t AND id > i))
+    A primeira condição delimita o intervalo do índice composto; a segunda
+    desempata. Campos com "-" (descendentes) usam <= e <.
+    """
+    campos = [campo.lstrip("-") for campo in ordenacao]
+    descendente = [campo.startswith("-") for campo in ordenacao]
+
+    desempate = Q()
+    for posicao in reversed(range(len(campos))):
+        operador = "lt" if descendente[posicao] else "gt"
+        condicao = Q(**{f"{campos[posicao]}__{operador}": valores[posicao]})
+        if posicao < len(campos) - 1:
+            condicao |= Q(**{campos[posicao]: valores[posicao]}) & desempate
+        desempate = condicao
+
+    limite = "lte" if descendente[0] else "gte"
+    return Q(**{f"{campos[0]}__{limite}": valores[0]}) & desempate
+
+
+def _campo(queryset, nome):
+    """Campo do modelo ou, para anotações (ex: "rank" da busca), o output_field."""
+    anotacao = queryset.query.annotations.get(nome)
+    return anotacao.output_field if anotacao is not None else queryset.model._meta.get_field(nome)
+
+
+def _filtrar_apos_cursor(queryset, ordenacao, cursor):
+    """
+    Ordena o queryset e, se houver cursor, mantém apenas as linhas depois dele.
+
+    Cada valor do cursor é convertido pelo to_python() do campo da ordenação:
+    um valor do tipo errado (ex: texto no lugar do id) gera BadRequest, e
+    não um erro do banco ao executar a consulta.
+    """
+    queryset = queryset.order_by(*ordenacao)
+    if cursor:
+        valores = decodificar_cursor(cursor, len(ordenacao))
+        try:
+            valores = [
+                _campo(queryset, campo.lstrip("-")).to_python(valor)
+                for campo, valor in zip(ordenacao, valores)
+            ]
+            queryset = queryset.filter(_filtro_apos(ordenacao, valores))
+        except (ValidationError, TypeError, ValueError):
+            raise BadRequest("Cursor de paginação inválido.")
+    return queryset
+
+
+def _montar_pagina(itens, ordenacao, tamanho):
+    """Monta a PaginaCursor a partir de até 'tamanho' + 1 itens lidos."""
+    proximo_cursor = None
+    if len(itens) > tamanho:
+        itens = itens[:tamanho]
+        ultimo = itens[-1]
+        proximo_cursor = codificar_cursor(
+            [getattr(ultimo, campo.lstrip("-")) for campo in ordenacao]
+        )
+    return PaginaCursor(itens, proximo_cursor)
+
+
+def paginar_por_cursor(queryset, ordenacao, cursor, tamanho):
+    """
+    Retorna uma PaginaCursor com até 'tamanho' itens após o cursor.
+
+    A ordenação deve terminar em um campo único (ex: "id") para que o
+    cursor seja determinístico. Nunca usa OFFSET: o custo de qualquer
+    página é o mesmo da primeira, independente da profundidade.
+    """
+    queryset = _filtrar_apos_cursor(queryset, ordenacao, cursor)
+    # Busca um item a mais apenas para saber se existe próxima página
+    return _montar_pagina(list(queryset[: tamanho + 1]), ordenacao, tamanho)
+
+
+async def apaginar_por_cursor(queryset, ordenacao, cursor, tamanho):
+    """Versão assíncrona de paginar_por_cursor(), com o ORM assíncrono."""
+    queryset = _filtrar_apos_cursor(queryset, ordenacao, cursor)
+    itens = [item async for item in queryset[: tamanho + 1]]
+    return _montar_pagina(itens, ordenacao, tamanho)
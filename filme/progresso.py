@@ -0,0 +1,256 @@
+# Posições de retomada dos episódios: heartbeats do player agrupados em memória
+#
+# O player envia a posição a cada PROGRESSO_HEARTBEAT segundos. Cada heartbeat
+# só substitui, no buffer do processo, a última posição do par (usuário,
+# episódio): nenhuma ida ao banco ou ao cache por requisição. O buffer é
+# gravado com um único upsert (bulk_create com update_conflicts) ao atingir
+# PROGRESSO_DESCARGA_LIMITE pares ou, por um temporizador, até
+# PROGRESSO_DESCARGA_INTERVALO segundos depois do primeiro heartbeat pendente
+# (mesmo que a sessão pare ali), em uma thread à parte; a página de detalhes
+# soma às posições gravadas as ainda pendentes neste processo.
+import atexit  # Grava o buffer quando o processo termina
+import logging  # Falhas das gravações em segundo plano
+import threading  # Lock do buffer, thread de gravação e temporizador
+import time  # Relógio monotônico do intervalo de gravação
+
+from django.conf import settings  # Intervalo, limite e gravação em segundo plano
+from django.db import connection, transaction
+from django.utils import timezone  # Instante do heartbeat
+
+from .cache import invalidar_progresso  # ETag pessoal da página de detalhes
+from .models import Episodio, ProgressoEpisodio, Usuario
+
+logger = logging.getLogger(__name__)
+
+# Ids verificados por consulta antes do upsert (limite de parâmetros do SQLite)
+_LOTE_VERIFICACAO = 500
+
+
+class Progresso:
+    """Posição de retomada de um episódio, como exibida na página de detalhes."""
+
+    def __init__(self, posicao, duracao):
+        self.posicao = posicao  # Segundos assistidos
+        self.duracao = duracao  # Duração do vídeo em segundos
+
+    @property
+    def percentual(self):
+        """Parte assistida, de 0 a 100."""
+        return min(100, round(self.posicao * 100 / self.duracao)) if self.duracao else 0
+
+    @property
+    def retomar_em(self):
+        """Posição no formato do player (m:ss ou h:mm:ss)."""
+        minutos, segundos = divmod(int(self.posicao), 60)
+        horas, minutos = divmod(minutos, 60)
+        return f"{horas}:{minutos:02d}:{segundos:02d}" if horas else f"{minutos}:{segundos:02d}"
+
+
+class BufferProgresso:
+    """
+    Última posição de cada par (usuário, episódio) ainda não gravada.
+
+    Guarda {usuario_id: {episodio_id: (posicao, duracao, instante)}}: a
+    página de detalhes lê as pendentes de um usuário sem percorrer o
+    buffer inteiro. Um heartbeat repetido não aumenta o buffer.
+    """
+
+    def __init__(self):
+        self._pendentes = {}
+        self._em_descarga = {}           # Lote sendo gravado neste momento
+        self._total_pendente = 0         # Pares (usuário, episódio) no buffer
+        self._ultima_descarga = time.monotonic()
+        self._descarregando = False      # Há uma thread de gravação em andamento
+        self._temporizador = None        # Gravação agendada pelo intervalo
+        self._lock = threading.Lock()           # Protege o buffer
+        self._lock_descarga = threading.Lock()  # Uma gravação por vez no processo
+
+    def registrar(self, usuario_id, episodio_id, posicao, duracao):
+        """
+        Registra a posição atual do usuário no episódio (heartbeat).
+
+        Dispara a gravação quando o buffer atinge o limite ou o intervalo
+        desde a última gravação já passou; senão, agenda a gravação pelo
+        intervalo. Falhas da gravação não chegam ao heartbeat: são logadas
+        e as posições ficam no buffer.
+        """
+        instante = timezone.now()
+        with self._lock:
+            episodios = self._pendentes.setdefault(usuario_id, {})
+            if episodio_id not in episodios:
+                self._total_pendente += 1
+            episodios[episodio_id] = (posicao, duracao, instante)
+            descarregar = not self._descarregando and (
+                self._total_pendente >= settings.PROGRESSO_DESCARGA_LIMITE
+                or time.monotonic() - self._ultima_descarga >= settings.PROGRESSO_DESCARGA_INTERVALO
+            )
+            if descarregar and settings.EVENTOS_EM_SEGUNDO_PLANO:
+                self._descarregando = True
+        if not descarregar:
+            if settings.EVENTOS_EM_SEGUNDO_PLANO:
+                self._agendar()
+            return
+        if settings.EVENTOS_EM_SEGUNDO_PLANO:
+            threading.Thread(target=self._descarregar_em_segundo_plano, daemon=True).start()
+            return
+        try:
+            self.descarregar()
+        except Exception:
+            logger.exception("Falha ao gravar as posições de retomada")
+
+    def pendentes(self, usuario_id):
+        """Posições ainda não gravadas do usuário: {episodio_id: (posicao, duracao)}."""
+        with self._lock:
+            return {
+                episodio_id: (posicao, duracao)
+                for lote in (self._em_descarga, self._pendentes)
+                for episodio_id, (posicao, duracao, _) in lote.get(usuario_id, {}).items()
+            }
+
+    def total_pendente(self):
+        """Número de pares (usuário, episódio) ainda não gravados."""
+        with self._lock:
+            return self._total_pendente
+
+    def descarregar(self):
+        """
+        Grava todas as posições pendentes com um upsert, na thread atual.
+
+        Pares de usuários ou episódios removidos desde o heartbeat são
+        descartados. Em caso de erro, as posições voltam ao buffer (sem
+        sobrescrever heartbeats mais novos). Retorna o número de pares gravados.
+        """
+        with self._lock_descarga:
+            with self._lock:
+                lote = self._pendentes
+                self._em_descarga = lote
+                self._pendentes = {}
+                self._total_pendente = 0
+                self._ultima_descarga = time.monotonic()
+            if not lote:
+                return 0
+            progressos = {
+                (usuario_id, episodio_id): valores
+                for usuario_id, episodios in lote.items()
+                for episodio_id, valores in episodios.items()
+            }
+            try:
+                gravados = self._gravar(progressos)
+            except Exception:
+                with self._lock:
+                    for usuario_id, episodios in lote.items():
+                        atuais = self._pendentes.setdefault(usuario_id, {})
+                        for episodio_id, valores in episodios.items():
+                            if episodio_id not in atuais:
+                                atuais[episodio_id] = valores
+                                self._total_pendente += 1
+                    self._em_descarga = {}
+                raise
+            with self._lock:
+                self._em_descarga = {}
+            return gravados
+
+    def _gravar(self, progressos):
+        usuarios = _existentes(Usuario, {usuario_id for usuario_id, _ in progressos})
+        episodios = _existentes(Episodio, {episodio_id for _, episodio_id in progressos})
+        validos = {
+            chave: valores
+            for chave, valores in progressos.items()
+            if chave[0] in usuarios and chave[1] in episodios
+        }
+        if validos:
+            with transaction.atomic():
+                ProgressoEpisodio.objects.registrar_varios(validos)
+            invalidar_progresso({usuario_id for usuario_id, _ in validos})
+        return len(validos)
+
+    def _agendar(self):
+        """Agenda a gravação pelo intervalo, se ainda não houver uma agendada."""
+        with self._lock:
+            if self._temporizador is not None:
+                return
+            self._temporizador = threading.Timer(
+                settings.PROGRESSO_DESCARGA_INTERVALO, self._ao_fim_do_intervalo
+            )
+            self._temporizador.daemon = True
+            self._temporizador.start()
+
+    def _ao_fim_do_intervalo(self):
+        with self._lock:
+            self._temporizador = None
+            if self._descarregando:
+                return  # A gravação em andamento reagenda o que sobrar
+            self._descarregando = True
+        self._descarregar_em_segundo_plano()
+
+    def _descarregar_em_segundo_plano(self):
+        try:
+            self.descarregar()
+        except Exception:
+            logger.exception("Falha ao gravar as posições de retomada")
+        finally:
+            with self._lock:
+                self._descarregando = False
+                restantes = bool(self._pendentes)
+            connection.close()  # Conexão própria desta thread
+        if restantes:
+            self._agendar()  # Posições de uma falha ou chegadas durante a gravação
+
+    def limpar(self):
+        """Descarta as posições pendentes (testes)."""
+        with self._lock:
+            self._pendentes = {}
+            self._total_pendente = 0
+
+
+def _existentes(modelo, ids):
+    """Ids do conjunto que ainda existem na tabela do modelo."""
+    ids = sorted(ids)
+    existentes = set()
+    for inicio in range(0, len(ids), _LOTE_VERIFICACAO):
+        existentes.update(
+            modelo.objects.filter(pk__in=ids[inicio:inicio + _LOTE_VERIFICACAO]).values_list("pk", flat=True)
+        )
+    return existentes
+
+
+# Instância única por processo
+buffer_progresso = BufferProgresso()
+
+
+@atexit.register
+def _descarregar_ao_encerrar():
+    """Tenta gravar as posições pendentes quando o processo termina."""
+    try:
+        buffer_progresso.descarregar()
+    except Exception:
+        pass  # Banco indisponível no encerramento: nada mais a fazer
+
+
+def progresso_dos_episodios(usuario_id, episodios):
+    """
+    Posições de retomada do usuário nos episódios: uma consulta às
+    gravadas, completadas pelas pendentes deste processo (mais novas).
+    Retorna {episodio_id: Progresso}.
+    """
+    ids = [episodio.pk for episodio in episodios]
+    if not ids:
+        return {}
+    return _combinar(ProgressoEpisodio.objects.dos_episodios(usuario_id, ids), usuario_id, ids)
+
+
+async def aprogresso_dos_episodios(usuario_id, episodios):
+    """Versão assíncrona de progresso_dos_episodios()."""
+    ids = [episodio.pk for episodio in episodios]
+    if not ids:
+        return {}
+    return _combinar(await ProgressoEpisodio.objects.ados_episodios(usuario_id, ids), usuario_id, ids)
+
+
+def _combinar(gravados, usuario_id, ids):
+    pendentes = buffer_progresso.pendentes(usuario_id)
+    return {
+        episodio_id: Progresso(*pendentes.get(episodio_id) or gravados[episodio_id])
+        for episodio_id in ids
+        if episodio_id in pendentes or episodio_id in gravados
+    }
@@ -0,0 +1,145 @@
+# Proxy reverso com cache e ESI, em processo, na frente da aplicação WSGI
+#
+# Substituto local de um proxy de verdade (Varnish, CDN) para desenvolvimento
+# e testes (PROXY_CACHE_LOCAL): anuncia ESI à aplicação (Surrogate-Capability),
+# guarda as páginas marcadas com Surrogate-Control max-age, revalida as
+# vencidas pela ETag (If-None-Match -> 304) e, a cada resposta, troca os
+# <esi:include> pelos fragmentos pessoais, pedidos à aplicação com os cookies
+# do usuário. Só requisições GET com sessão passam pelo cache: as demais
+# (anônimos, formulários) vão direto à aplicação.
+import html  # URL do fragmento escapada no atributo src
+import io  # Corpo vazio das requisições dos fragmentos
+import re  # <esi:include> e max-age do Surrogate-Control
+import threading  # Lock do cache entre as threads do servidor
+import time  # Validade das entradas
+from collections import OrderedDict  # Entradas na ordem do último acesso
+from urllib.parse import urlsplit  # Caminho e query string do fragmento
+
+from django.conf import settings  # Nome do cookie de sessão
+
+CAPACIDADE = 'pyflix="ESI/1.0"'
+_INCLUDE = re.compile(rb'<esi:include src="([^"]*)"\s*/>')
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+# Cabeçalhos condicionais do cliente: as respostas montadas não têm validadores
+_CONDICIONAIS = ("HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE")
+
+
+class ProxyCacheESI:
+    """
+    Aplicação WSGI que envolve outra com um cache compartilhado e ESI.
+
+    As entradas são chaveadas pelo host, caminho e query string (a página
+    guardada não tem partes pessoais) e limitadas a 'max_entradas', com
+    descarte da menos usada. 'requisicoes_origem' conta as requisições
+    repassadas à aplicação (páginas, revalidações e fragmentos).
+    """
+
+    def __init__(self, aplicacao, max_entradas=1000, relogio=time.monotonic):
+        self.aplicacao = aplicacao
+        self.max_entradas = max_entradas
+        self.relogio = relogio
+        self.requisicoes_origem = 0
+        self._entradas = OrderedDict()  # chave -> [expira_em, status, cabeçalhos, corpo]
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        environ = dict(environ, HTTP_SURROGATE_CAPABILITY=CAPACIDADE)
+        for cabecalho in _CONDICIONAIS:
+            environ.pop(cabecalho, None)
+        if environ.get("REQUEST_METHOD") == "GET" and self._tem_sessao(environ):
+            status, cabecalhos, corpo = self._com_cache(environ)
+        else:
+            status, cabecalhos, corpo = self._origem(environ)
+
+        controle = _cabecalho(cabecalhos, "Surrogate-Control") or ""
+        remover = {"surrogate-control", "content-length"}
+        if 'content="ESI/1.0"' in controle:
+            corpo = _INCLUDE.sub(lambda match: self._fragmento(environ, match[1]), corpo)
+            remover |= {"etag", "last-modified"}  # A página montada é do usuário
+        cabecalhos = [(nome, valor) for nome, valor in cabecalhos if nome.lower() not in remover]
+        cabecalhos.append(("Content-Length", str(len(corpo))))
+        start_response(status, cabecalhos)
+        return [corpo]
+
+    def limpar(self):
+        """Remove todas as páginas guardadas."""
+        with self._lock:
+            self._entradas.clear()
+
+    def _tem_sessao(self, environ):
+        return f"{settings.SESSION_COOKIE_NAME}=" in environ.get("HTTP_COOKIE", "")
+
+    def _chave(self, environ):
+        return (environ.get("HTTP_HOST", ""), environ.get("PATH_INFO", ""), environ.get("QUERY_STRING", ""))
+
+    def _com_cache(self, environ):
+        chave = self._chave(environ)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                self._entradas.move_to_end(chave)
+        agora = self.relogio()
+        if entrada is not None and entrada[0] > agora:
+            return entrada[1:]
+
+        requisicao = dict(environ)
+        etag = entrada and _cabecalho(entrada[2], "ETag")
+        if etag:
+            requisicao["HTTP_IF_NONE_MATCH"] = etag  # Revalida a página vencida
+        status, cabecalhos, corpo = self._origem(requisicao)
+        if status.startswith("304") and entrada is not None:
+            status, cabecalhos, corpo = entrada[1:]  # A página guardada continua valendo
+            max_age = self._max_age(cabecalhos)
+        else:
+            max_age = self._max_age(cabecalhos) if status.startswith("200") else 0
+        with self._lock:
+            if max_age:
+                self._entradas[chave] = [agora + max_age, status, cabecalhos, corpo]
+                self._entradas.move_to_end(chave)
+                if len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+            else:
+                self._entradas.pop(chave, None)
+        return status, cabecalhos, corpo
+
+    def _max_age(self, cabecalhos):
+        controle = _MAX_AGE.search(_cabecalho(cabecalhos, "Surrogate-Control") or "")
+        return int(controle[1]) if controle else 0
+
+    def _fragmento(self, environ, src):
+        """Corpo do fragmento (vazio se a aplicação não responder 200)."""
+        url = urlsplit(html.unescape(src.decode()))
+        requisicao = dict(
+            environ,
+            PATH_INFO=url.path,
+            QUERY_STRING=url.query,
+            REQUEST_METHOD="GET",
+            CONTENT_LENGTH="0",
+        )
+        requisicao["wsgi.input"] = io.BytesIO()
+        requisicao.pop("HTTP_SURROGATE_CAPABILITY")
+        status, _, corpo = self._origem(requisicao)
+        return corpo if status.startswith("200") else b""
+
+    def _origem(self, environ):
+        """Repassa a requisição à aplicação e retorna (status, cabeçalhos, corpo)."""
+        self.requisicoes_origem += 1
+        resposta = {}
+
+        def start_response(status, cabecalhos, exc_info=None):
+            resposta["status"], resposta["cabecalhos"] = status, list(cabecalhos)
+
+        partes = self.aplicacao(environ, start_response)
+        try:
+            corpo = b"".join(partes)
+        finally:
+            if hasattr(partes, "close"):
+                partes.close()
+        return resposta["status"], resposta["cabecalhos"], corpo
+
+
+def _cabecalho(cabecalhos, nome):
+    """Valor do cabeçalho (sem diferenciar maiúsculas) ou None."""
+    nome = nome.lower()
+    return next((valor for chave, valor in cabecalhos if chave.lower() == nome), None)
@@ -0,0 +1,229 @@
+# Recomendações personalizadas: filtragem colaborativa item-item com matrizes esparsas
+#
+# NumPy e SciPy são dependências opcionais (grupo "recomendacoes" do pyproject):
+# são importados apenas quando o cálculo roda, nunca pelas views.
+import os  # Número de CPUs para o pool de threads
+from collections import deque  # Janela de blocos em andamento
+from concurrent.futures import ThreadPoolExecutor  # Blocos calculados em paralelo
+
+from django.core.exceptions import ImproperlyConfigured  # Dependência opcional ausente
+from django.db import transaction  # Gravação atômica de cada bloco de usuários
+
+from .cache import invalidar_recomendacoes  # Versão dos fragmentos de recomendações
+from .models import HistoricoVisualizacao, Recomendacao
+
+
+def _importar_numpy():
+    """
+    Importa NumPy e scipy.sparse sob demanda.
+
+    Lança ImproperlyConfigured com a instrução de instalação se não estiverem disponíveis.
+    """
+    try:
+        import numpy as np
+        from scipy import sparse
+    except ImportError as erro:
+        raise ImproperlyConfigured(
+            "O cálculo de recomendações precisa do NumPy e do SciPy. "
+            "Instale o grupo opcional: pip install 'copia-netflix[recomendacoes]'."
+        ) from erro
+    return np, sparse
+
+
+def em_paralelo(funcao, blocos, trabalhadores):
+    """
+    Aplica 'funcao' a cada bloco em um pool de threads e devolve os
+    resultados na ordem dos blocos, à medida que ficam prontos.
+
+    No máximo 2 x trabalhadores blocos ficam em andamento (ou prontos e
+    ainda não consumidos), então a memória não cresce com o número de blocos.
+    As multiplicações esparsas do SciPy liberam o GIL, então as threads
+    realmente rodam em paralelo.
+    """
+    with ThreadPoolExecutor(max_workers=trabalhadores) as pool:
+        pendentes = deque()
+        for bloco in blocos:
+            pendentes.append(pool.submit(funcao, bloco))
+            if len(pendentes) >= 2 * trabalhadores:
+                yield pendentes.popleft().result()
+        while pendentes:
+            yield pendentes.popleft().result()
+
+
+def _melhores(np, indices, valores, quantidade):
+    """
+    Retorna (indices, valores) dos 'quantidade' maiores valores, em ordem
+    decrescente de valor (empate pelo menor índice).
+    """
+    if len(valores) > quantidade:
+        selecionados = np.argpartition(-valores, quantidade - 1)[:quantidade]
+        indices, valores = indices[selecionados], valores[selecionados]
+    ordem = np.lexsort((indices, -valores))
+    return indices[ordem], valores[ordem]
+
+
+def matriz_visualizacoes(tamanho_lote=100_000):
+    """
+    Carrega o histórico em uma matriz esparsa binária usuários x filmes (CSR).
+
+    Os ids do banco são mapeados para linhas/colunas contíguas.
+    Retorna (matriz, usuario_ids, filme_ids), onde usuario_ids[linha] e
+    filme_ids[coluna] são os ids originais.
+    """
+    np, sparse = _importar_numpy()
+
+    # Lê o histórico em lotes, sem montar uma lista Python com todas as linhas
+    partes, lote = [], []
+    historico = HistoricoVisualizacao.objects.values_list("usuario_id", "filme_id").iterator(
+        chunk_size=tamanho_lote
+    )
+    for par in historico:
+        lote.append(par)
+        if len(lote) == tamanho_lote:
+            partes.append(np.array(lote, dtype=np.int64))
+            lote = []
+    if lote:
+        partes.append(np.array(lote, dtype=np.int64))
+    pares = np.concatenate(partes) if partes else np.empty((0, 2), dtype=np.int64)
+
+    usuario_ids, linhas = np.unique(pares[:, 0], return_inverse=True)
+    filme_ids, colunas = np.unique(pares[:, 1], return_inverse=True)
+    matriz = sparse.csr_matrix(
+        (np.ones(len(pares), dtype=np.float32), (linhas, colunas)),
+        shape=(len(usuario_ids), len(filme_ids)),
+    )
+    return matriz, usuario_ids, filme_ids
+
+
+def vizinhos_itens(matriz, vizinhos=50, bloco_itens=2048, trabalhadores=1):
+    """
+    Calcula, para cada filme, os 'vizinhos' filmes mais similares (cosseno
+    entre as colunas da matriz de visualizações).
+
+    A matriz de similaridade completa (filmes x filmes) nunca é montada:
+    cada bloco de 'bloco_itens' filmes é multiplicado pela matriz inteira e
+    imediatamente podado para os melhores vizinhos. Retorna uma matriz
+    esparsa filmes x filmes com no máximo 'vizinhos' valores por linha.
+    """
+    np, sparse = _importar_numpy()
+    total_itens = matriz.shape[1]
+
+    # Normaliza as colunas: o produto escalar entre colunas vira o cosseno
+    usuarios_por_filme = np.asarray(matriz.sum(axis=0)).ravel()
+    inversas = (1 / np.sqrt(usuarios_por_filme)).astype(np.float32)
+    normalizada = (matriz @ sparse.diags(inversas)).tocsr()
+    transposta = normalizada.T.tocsr()  # filmes x usuários
+
+    def calcular_bloco(inicio):
+        fim = min(inicio + bloco_itens, total_itens)
+        similaridades = (transposta[inicio:fim] @ normalizada).tocsr()
+        linhas, colunas, valores = [], [], []
+        for linha in range(fim - inicio):
+            a, b = similaridades.indptr[linha], similaridades.indptr[linha + 1]
+            indices, pontos = similaridades.indices[a:b], similaridades.data[a:b]
+            proprio = indices != inicio + linha  # Um filme não é vizinho de si mesmo
+            indices, pontos = _melhores(np, indices[proprio], pontos[proprio], vizinhos)
+            linhas.append(np.full(len(indices), inicio + linha, dtype=np.int32))
+            colunas.append(indices)
+            valores.append(pontos)
+        return linhas, colunas, valores
+
+    linhas, colunas, valores = [], [], []
+    for bloco in em_paralelo(calcular_bloco, range(0, total_itens, bloco_itens), trabalhadores):
+        linhas.extend(bloco[0])
+        colunas.extend(bloco[1])
+        valores.extend(bloco[2])
+    if not valores:
+        return sparse.csr_matrix((total_itens, total_itens), dtype=np.float32)
+    return sparse.csr_matrix(
+        (np.concatenate(valores), (np.concatenate(linhas), np.concatenate(colunas))),
+        shape=(total_itens, total_itens),
+    )
+
+
+def recomendar(matriz, vizinhos, quantidade=20, bloco_usuarios=2000, trabalhadores=1):
+    """
+    Gera as recomendações de cada bloco de usuários.
+
+    A pontuação de um filme para o usuário é a soma das similaridades
+    entre ele e os filmes que o usuário já viu (linha da matriz x vizinhos);
+    os filmes já vistos são descartados. Produz, na ordem dos blocos,
+    (inicio, fim, [(linha_usuario, colunas_filmes, pontuacoes), ...]).
+    """
+    np, _ = _importar_numpy()
+    total_usuarios = matriz.shape[0]
+
+    def calcular_bloco(inicio):
+        fim = min(inicio + bloco_usuarios, total_usuarios)
+        vistos = matriz[inicio:fim]
+        pontuacoes = (vistos @ vizinhos).tocsr()
+        # Zera, de uma vez para o bloco todo, as pontuações dos filmes já vistos
+        pontuacoes = (pontuacoes - pontuacoes.multiply(vistos)).tocsr()
+        pontuacoes.eliminate_zeros()
+        resultado = []
+        for linha in range(fim - inicio):
+            a, b = pontuacoes.indptr[linha], pontuacoes.indptr[linha + 1]
+            indices, pontos = _melhores(
+                np, pontuacoes.indices[a:b], pontuacoes.data[a:b], quantidade
+            )
+            resultado.append((inicio + linha, indices, pontos))
+        return inicio, fim, resultado
+
+    yield from em_paralelo(calcular_bloco, range(0, total_usuarios, bloco_usuarios), trabalhadores)
+
+
+def gravar_bloco(usuario_ids, filme_ids, inicio, fim, resultado, tamanho_lote=5000):
+    """
+    Substitui as recomendações dos usuários do bloco, em uma transação.
+    """
+    linhas = [
+        Recomendacao(
+            usuario_id=int(usuario_ids[linha]),
+            filme_id=int(filme_ids[coluna]),
+            posicao=posicao,
+            pontuacao=float(pontuacao),
+        )
+        for linha, colunas, pontuacoes in resultado
+        for posicao, (coluna, pontuacao) in enumerate(zip(colunas, pontuacoes))
+    ]
+    with transaction.atomic():
+        Recomendacao.objects.filter(usuario_id__in=usuario_ids[inicio:fim].tolist()).delete()
+        Recomendacao.objects.bulk_create(linhas, batch_size=tamanho_lote)
+    return len(linhas)
+
+
+def calcular_recomendacoes(
+    quantidade=20, vizinhos=50, bloco_itens=2048, bloco_usuarios=2000, trabalhadores=None
+):
+    """
+    Recalcula as recomendações de todos os usuários com histórico e
+    remove as de quem ficou sem histórico.
+
+    A memória fica limitada à matriz de visualizações (algumas cópias de
+    tamanho proporcional ao histórico), à matriz podada de vizinhos
+    (filmes x vizinhos) e aos blocos em andamento, independente do
+    número de usuários x filmes. Cada bloco de usuários é gravado assim
+    que fica pronto, pela thread principal (dona da conexão com o banco).
+
+    Retorna o número de recomendações gravadas.
+    """
+    trabalhadores = trabalhadores or min(8, os.cpu_count() or 1)
+    matriz, usuario_ids, filme_ids = matriz_visualizacoes()
+    # Usuários que ficaram sem histórico não estão em nenhum bloco: as
+    # recomendações antigas deles saem aqui (por subconsulta, sem passar
+    # a lista de ids da matriz como parâmetros)
+    removidas, _ = Recomendacao.objects.exclude(
+        usuario_id__in=HistoricoVisualizacao.objects.values("usuario_id")
+    ).delete()
+    if matriz.nnz == 0:
+        if removidas:
+            invalidar_recomendacoes()
+        return 0
+    vizinhos_por_filme = vizinhos_itens(matriz, vizinhos, bloco_itens, trabalhadores)
+    gravadas = 0
+    for inicio, fim, resultado in recomendar(
+        matriz, vizinhos_por_filme, quantidade, bloco_usuarios, trabalhadores
+    ):
+        gravadas += gravar_bloco(usuario_ids, filme_ids, inicio, fim, resultado)
+    invalidar_recomendacoes()
+    return gravadas
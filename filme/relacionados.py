@@ -0,0 +1,139 @@
+# Filmes relacionados: pré-cálculo a partir do histórico de visualizações ("quem viu X também viu Y")
+import heapq  # Seleção dos N melhores sem ordenar tudo
+import math  # Raiz quadrada da similaridade de cosseno
+from collections import Counter, defaultdict  # Contagens de visualizações e coocorrências
+from itertools import combinations  # Pares de filmes vistos pelo mesmo usuário
+
+from django.db import transaction  # Troca atômica da tabela de relacionados
+
+from .cache import invalidar_paginas  # As páginas de detalhes exibem os relacionados
+from .models import Filme, FilmeRelacionado, HistoricoVisualizacao
+
+
+def coocorrencias(max_por_usuario=200):
+    """
+    Conta quantos usuários assistiram cada filme e cada par de filmes.
+
+    Percorre o histórico uma única vez, agrupado por usuário, considerando
+    apenas os 'max_por_usuario' filmes mais recentes de cada um (limita o
+    custo quadrático dos pares para usuários com históricos enormes).
+
+    Retorna (vistos, pares): vistos[filme] = usuários que viram o filme e
+    pares[a][b] = usuários que viram a e b.
+    """
+    vistos = Counter()
+    pares = defaultdict(Counter)
+
+    def contar(filmes):
+        vistos.update(filmes)
+        for a, b in combinations(filmes, 2):
+            pares[a][b] += 1
+            pares[b][a] += 1
+
+    usuario_atual, filmes = None, []
+    historico = (
+        HistoricoVisualizacao.objects.order_by("usuario_id", "-ultima_visualizacao")
+        .values_list("usuario_id", "filme_id")
+        .iterator(chunk_size=5000)
+    )
+    for usuario_id, filme_id in historico:
+        if usuario_id != usuario_atual:
+            contar(filmes)
+            usuario_atual, filmes = usuario_id, []
+        if len(filmes) < max_por_usuario:
+            filmes.append(filme_id)
+    contar(filmes)
+    return vistos, pares
+
+
+def calcular_relacionados(quantidade=10, max_por_usuario=200):
+    """
+    Calcula os 'quantidade' filmes mais relacionados a cada filme.
+
+    A relação é a similaridade de cosseno entre os conjuntos de usuários
+    que assistiram cada filme: coocorrências / sqrt(vistos_a * vistos_b),
+    que não favorece filmes apenas por serem populares. Filmes sem
+    coocorrências suficientes são completados com os mais vistos da mesma
+    categoria.
+
+    Retorna {filme_id: [(relacionado_id, pontuacao), ...]}.
+    """
+    vistos, pares = coocorrencias(max_por_usuario)
+
+    # Filmes de cada categoria, dos mais vistos para os menos vistos
+    por_categoria = defaultdict(list)
+    categorias = {}
+    for filme_id, categoria in Filme.objects.order_by("-visualizacoes", "titulo").values_list(
+        "id", "categoria"
+    ):
+        por_categoria[categoria].append(filme_id)
+        categorias[filme_id] = categoria
+
+    resultado = {}
+    for filme_id, categoria in categorias.items():
+        candidatos = (
+            (contagem / math.sqrt(vistos[filme_id] * vistos[outro]), outro)
+            for outro, contagem in pares.get(filme_id, {}).items()
+            if outro in categorias  # Ignora filmes removidos durante o cálculo
+        )
+        # Maior pontuação primeiro; empate pelo menor id (resultado determinístico)
+        melhores = heapq.nsmallest(quantidade, candidatos, key=lambda item: (-item[0], item[1]))
+        escolhidos = [(outro, pontuacao) for pontuacao, outro in melhores]
+
+        # Completa com a mesma categoria
+        usados = {filme_id, *(outro for outro, _ in escolhidos)}
+        for outro in por_categoria[categoria]:
+            if len(escolhidos) >= quantidade:
+                break
+            if outro not in usados:
+                escolhidos.append((outro, 0.0))
+        resultado[filme_id] = escolhidos
+    return resultado
+
+
+def gravar_relacionados(resultado, tamanho_lote=1000):
+    """
+    Substitui a tabela de relacionados pelo resultado calculado.
+
+    A troca acontece em uma única transação: as páginas de detalhes
+    continuam lendo os relacionados antigos até o commit. Em seguida, as
+    respostas condicionais das páginas deixam de valer.
+    """
+    linhas = [
+        FilmeRelacionado(origem_id=filme_id, relacionado_id=outro, posicao=posicao, pontuacao=pontuacao)
+        for filme_id, relacionados in resultado.items()
+        for posicao, (outro, pontuacao) in enumerate(relacionados)
+    ]
+    with transaction.atomic():
+        FilmeRelacionado.objects.all().delete()
+        FilmeRelacionado.objects.bulk_create(linhas, batch_size=tamanho_lote)
+    invalidar_paginas()
+    return len(linhas)
+
+
+def relacionados_por_categoria(filme, limite=5):
+    """
+    Filmes da mesma categoria, usados enquanto os relacionados do filme
+    ainda não foram calculados (ex: filme recém-cadastrado).
+
+    Atendida pelo índice (categoria, titulo).
+    """
+    return list(_mesma_categoria(filme, limite))
+
+
+def _mesma_categoria(filme, limite):
+    return Filme.objects.filter(categoria=filme.categoria).exclude(id=filme.id).order_by("titulo")[:limite]
+
+
+def filmes_relacionados(filme, limite=5):
+    """
+    Retorna os filmes relacionados exibidos na página de detalhes.
+    """
+    return FilmeRelacionado.objects.filmes(filme, limite) or relacionados_por_categoria(filme, limite)
+
+
+async def afilmes_relacionados(filme, limite=5):
+    """Versão assíncrona de filmes_relacionados()."""
+    return await FilmeRelacionado.objects.afilmes(filme, limite) or [
+        outro async for outro in _mesma_categoria(filme, limite)
+    ]
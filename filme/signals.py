@@ -0,0 +1,107 @@
+# Receptores de sinais da aplicação 'filme'
+from django.conf import settings  # Geração de imagens após o upload
+from django.contrib.auth.signals import user_logged_out  # Usuário autenticado em cache
+from django.db import transaction  # Permite adiar ações até o commit da transação
+from django.db.models.signals import post_delete, post_save, pre_save  # Sinais de gravação/remoção
+from django.dispatch import receiver  # Decorador para registrar receptores
+from django.utils import timezone  # Última alteração do filme ao mudar um episódio
+
+from .autocompletar import indice_autocompletar  # Índice de prefixos do autocompletar
+from .busca import indexar_filme, normalizar  # Manutenção do índice de busca
+from .cache import invalidar_catalogo, invalidar_usuario_autenticado  # Invalidação dos caches
+from .emails import filtro_emails  # Filtro de emails da página inicial
+from .imagens import agendar_imagens, precisa_gerar  # Versões redimensionadas da thumbnail
+from .models import Episodio, Filme, Usuario
+
+
+@receiver(pre_save, sender=Filme)
+def preencher_titulo_busca(sender, instance, **kwargs):
+    """
+    Mantém o título normalizado (sem acentos, minúsculo) usado pela busca.
+    """
+    instance.titulo_busca = normalizar(instance.titulo)
+
+
+@receiver(post_save, sender=Filme)
+@receiver(post_delete, sender=Filme)
+def invalidar_catalogo_ao_alterar_filme(sender, instance, **kwargs):
+    """
+    Invalida o cache do catálogo sempre que um Filme é salvo ou removido
+    e reindexa o filme na busca e no autocompletar.
+
+    As ações acontecem após o commit, nessa ordem, para que nenhum
+    processo volte a cachear os dados antigos enquanto a transação ainda
+    não terminou.
+    """
+    filme_id = instance.pk  # Capturado agora: após o delete() o pk vira None
+    transaction.on_commit(invalidar_catalogo)
+    transaction.on_commit(lambda: indexar_filme(filme_id))
+    transaction.on_commit(lambda: indice_autocompletar.atualizar(filme_id))
+
+
+@receiver(post_save, sender=Filme)
+def gerar_imagens_ao_enviar_thumbnail(sender, instance, **kwargs):
+    """
+    Gera as versões redimensionadas quando a thumbnail é nova ou foi trocada.
+
+    A geração roda em segundo plano após o commit; até terminar, as
+    páginas usam a imagem original.
+    """
+    if settings.IMAGENS_GERAR_AO_ENVIAR and precisa_gerar(instance):
+        transaction.on_commit(lambda: agendar_imagens(instance))
+
+
+@receiver(post_save, sender=Episodio)
+@receiver(post_delete, sender=Episodio)
+def reindexar_ao_alterar_episodio(sender, instance, **kwargs):
+    """
+    Reindexa o filme na busca quando um de seus episódios muda,
+    já que os títulos dos episódios fazem parte do texto pesquisável.
+
+    A página de detalhes lista os episódios: o filme passa a contar como
+    alterado (atualizado_em), sem disparar os sinais do Filme.
+    """
+    filme_id = instance.filme_id
+    Filme.objects.filter(pk=filme_id).update(atualizado_em=timezone.now())
+    transaction.on_commit(invalidar_catalogo)
+    transaction.on_commit(lambda: indexar_filme(filme_id))
+
+
+@receiver(post_save, sender=Usuario)
+def registrar_email_no_filtro(sender, instance, update_fields=None, **kwargs):
+    """
+    Adiciona ao filtro da página inicial o email de um usuário criado ou
+    editado (e avisa os outros processos) após o commit.
+
+    Gravações parciais sem o email (ex: last_login no login) são ignoradas.
+    """
+    if update_fields is not None and "email" not in update_fields:
+        return
+    email = instance.email
+    transaction.on_commit(lambda: filtro_emails.registrar(email))
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def invalidar_usuario_autenticado_ao_alterar(sender, instance, **kwargs):
+    """
+    Remove do cache o usuário das sessões quando ele é salvo (perfil em
+    EditarPerfil, senha em alterar_senha, admin) ou removido.
+
+    A remoção acontece já (a própria requisição, ex: update_session_auth_hash
+    após trocar a senha, lê o usuário novo) e de novo após o commit, pois
+    outra requisição pode ter guardado a versão antiga antes do commit.
+    """
+    usuario_id = instance.pk  # Capturado agora: após o delete() o pk vira None
+    invalidar_usuario_autenticado(usuario_id)
+    transaction.on_commit(lambda: invalidar_usuario_autenticado(usuario_id))
+
+
+@receiver(user_logged_out)
+def invalidar_usuario_autenticado_no_logout(sender, request, user, **kwargs):
+    """
+    Remove do cache o usuário que saiu (a sessão já é removida do cache
+    pelo flush do logout).
+    """
+    if user is not None:
+        invalidar_usuario_autenticado(user.pk)
@@ -0,0 +1,49 @@
+# Template tag dos fragmentos pessoais: <esi:include> atrás de um proxy reverso com ESI
+from django import template
+from django.urls import reverse
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+class FragmentoPessoalNode(template.Node):
+    def __init__(self, nome, argumentos, nodelist):
+        self.nome = nome                # Nome da URL do fragmento
+        self.argumentos = argumentos    # Argumentos da URL
+        self.nodelist = nodelist        # Conteúdo renderizado sem proxy
+
+    def render(self, context):
+        if not context.get("esi"):
+            return self.nodelist.render(context)
+        url = reverse(
+            self.nome.resolve(context), args=[argumento.resolve(context) for argumento in self.argumentos]
+        )
+        request = context.get("request")
+        if request is not None and request.GET:
+            url += "?" + request.GET.urlencode()  # Ex: o termo da pesquisa no campo da navbar
+        return format_html('<esi:include src="{}"/>', url)
+
+
+@register.tag
+def fragmento_pessoal(parser, token):
+    """
+    Marca uma parte da página que depende do usuário (ou muda a cada acesso).
+
+    Sem proxy com ESI, o conteúdo é renderizado normalmente. Quando a view
+    atende um proxy com ESI (variável 'esi' do contexto), a parte vira um
+    <esi:include> da URL do fragmento, com a mesma query string: o resto da
+    página fica igual para todos os usuários e pode ser compartilhado no
+    cache do proxy.
+
+    Uso: {% fragmento_pessoal "filme:fragmento_navbar" %}...{% endfragmento_pessoal %}
+    """
+    partes = token.split_contents()
+    if len(partes) < 2:
+        raise template.TemplateSyntaxError(f"'{partes[0]}' precisa do nome da URL do fragmento.")
+    nodelist = parser.parse(("endfragmento_pessoal",))
+    parser.delete_first_token()
+    return FragmentoPessoalNode(
+        parser.compile_filter(partes[1]),
+        [parser.compile_filter(argumento) for argumento in partes[2:]],
+        nodelist,
+    )
@@ -0,0 +1,30 @@
+# Template tag dos ícones: SVGs do Ionicons copiados para static/icones, embutidos no HTML
+from functools import cache  # Cada SVG é lido do disco uma vez por processo
+
+from django import template
+from django.contrib.staticfiles import finders  # Localiza o SVG entre os arquivos estáticos
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+@cache
+def _svg(nome):
+    caminho = finders.find(f"icones/{nome}.svg")
+    if caminho is None:
+        raise template.TemplateSyntaxError(f"Ícone desconhecido: {nome}")
+    with open(caminho, encoding="utf-8") as arquivo:
+        return mark_safe(arquivo.read().strip())
+
+
+@register.inclusion_tag("icone.html")
+def icone(nome, classe=""):
+    """
+    Renderiza o ícone como SVG embutido: sem script nem requisição extra.
+
+    O SVG mede 1em e usa a cor do texto, como o <ion-icon> que substitui;
+    o tamanho vem das classes (ex: "text-2xl").
+
+    Uso: {% icone "play" "text-2xl" %}
+    """
+    return {"svg": _svg(nome), "classe": classe}
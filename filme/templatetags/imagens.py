@@ -0,0 +1,49 @@
+# Template tags das imagens dos filmes: <picture> com srcset das versões redimensionadas
+from django import template
+from django.conf import settings  # Perfis de tamanho das imagens
+
+from filme.imagens import TIPOS  # Tipos MIME dos formatos gerados
+
+register = template.Library()
+
+
+@register.inclusion_tag("imagem_filme.html")
+def imagem_filme(filme, perfil, classe="", carregamento="lazy"):
+    """
+    Renderiza a thumbnail do filme como <picture> com uma <source> por formato.
+
+    O navegador escolhe a menor versão que atende ao 'sizes' do perfil
+    (IMAGENS_PERFIS); o <img> aponta para o original, usado por navegadores
+    sem suporte aos formatos e enquanto as versões não foram geradas.
+    A cor predominante e a prévia (LQIP) vão como fundo do <img>, embutidas
+    no HTML: o espaço da imagem já aparece na primeira pintura, antes do download.
+
+    Uso: {% imagem_filme filme "trilho" "rounded-md w-full h-full object-cover" %}
+    """
+    if not filme or not filme.thumbnail:
+        return {"filme": None}
+    fontes = [
+        {
+            "tipo": TIPOS[formato],
+            "srcset": ", ".join(
+                f"{url} {largura}w"
+                for largura, url in sorted(urls.items(), key=lambda item: int(item[0]))
+            ),
+        }
+        for formato, urls in filme.imagens.items()
+        if formato in TIPOS
+    ]
+    fontes.sort(key=lambda fonte: fonte["tipo"] != "image/avif")  # AVIF primeiro
+    estilo = []
+    if filme.cor_predominante:
+        estilo.append(f"background-color: {filme.cor_predominante}")
+    if filme.placeholder:
+        estilo.append(f"background-image: url({filme.placeholder}); background-size: cover")
+    return {
+        "filme": filme,
+        "estilo": "; ".join(estilo),
+        "fontes": fontes,
+        "sizes": settings.IMAGENS_PERFIS[perfil]["sizes"],
+        "classe": classe,
+        "carregamento": carregamento,
+    }
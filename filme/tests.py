@@ -1,3 +1,2291 @@
-from django.test import TestCase
+import base64
+import importlib.util
+import io
+import json
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from wsgiref.util import setup_testing_defaults
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import CommandError, call_command
+from django.core.signals import request_finished, request_started
+from django.db import DatabaseError, close_old_connections, connection
+from django.test.utils import CaptureQueriesContext
+from django.db.migrations.executor import MigrationExecutor
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.template import Context, Template, TemplateSyntaxError
+from django.urls import Resolver404, clear_url_caches, resolve, reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import benchmark, busca, catalogo, em_alta, estilos, indices
+from .autocompletar import indice_autocompletar
+from .cache import (
+    cache_local, invalidar_catalogo, invalidar_recomendacoes, invalidar_usuario_autenticado, invalidar_usuarios,
+    versao_recomendacoes,
+)
+from .emails import FiltroBloom, email_cadastrado, filtro_emails
+from .eventos import FilaEventos, processar_visualizacoes
+from .imagens import agendar_imagens, gerar_imagens, precisa_gerar
+from .limites import LimitadorTaxa, limitador_taxa
+from .metricas import RegistroMetricas, registro_metricas
+from .context_processors import filme_destaque, lista_filmes_em_alta, lista_filmes_recentes
+from .models import (
+    Episodio, EventoPendente, Filme, FilmeEmAlta, FilmeRelacionado, HistoricoVisualizacao, ProgressoEpisodio,
+    Recomendacao, Usuario, VisualizacaoHora,
+)
+from .paginacao import codificar_cursor, paginar_por_cursor
+from .progresso import BufferProgresso, buffer_progresso
+from .proxy import ProxyCacheESI
+from .recomendacoes import calcular_recomendacoes
+from .relacionados import calcular_relacionados, gravar_relacionados
+from .views import FilmeDetailAssincronaView, FilmeDetailView, HomeFilmesAssincronaView, PesquisaFilmeAssincronaView
+from .videos import intervalo_pedido
+from .visualizacoes import filmes_mais_vistos, gravar_incrementos
+
+
+# Máximo de consultas ao banco por requisição de cada view (nome da URL)
+# Inclui os caminhos "frios" (trilhos e índices em memória ainda não
+# construídos) e as 2 consultas de autenticação (sessão e usuário).
+ORCAMENTO_CONSULTAS = {
+    # Trilhos recentes e em alta (ranking e, antes do primeiro cálculo, total de visualizações)
+    "filme:homepage": 4,
+    "filme:filmes": 8,               # + continuar assistindo, recomendados e catálogo
+    "filme:filmes_fragmento": 3,     # Página do catálogo
+    # Filme, episódios e relacionados; nos testes os eventos são gravados na
+    # requisição (verificação do filme e do usuário, upsert do histórico,
+    # soma no balde por hora do ranking "Em Alta" e no contador, na mesma
+    # transação, com SAVEPOINT e RELEASE), a leitura pela chave dos
+    # validadores do GET condicional e
+    # as posições de retomada
+    "filme:filme_detalhes": 16,
+    "filme:pesquisa": 5,             # Construção do índice de busca em memória
+    "filme:pesquisa_fragmento": 5,
+    "filme:autocompletar": 3,        # Construção do índice do autocompletar
+    "filme:login": 5,
+}
+ORCAMENTO_PADRAO = 10  # Views sem orçamento próprio (ex: admin)
+
+
+class ClienteComOrcamento(Client):
+    """
+    Client de testes que falha qualquer requisição cujo número de consultas
+    ao banco ultrapasse o orçamento da view (ORCAMENTO_CONSULTAS).
+
+    Pega regressões N+1 em views e templates: um laço que consulta o banco
+    por item estoura o orçamento assim que o teste tem alguns itens.
+    """
+
+    def request(self, **request):
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = super().request(**request)
+        try:
+            view = resolve(request["PATH_INFO"]).view_name
+        except Resolver404:
+            return resposta
+        orcamento = ORCAMENTO_CONSULTAS.get(view, ORCAMENTO_PADRAO)
+        if len(consultas) > orcamento:
+            raise AssertionError(
+                f"{view} fez {len(consultas)} consultas (orçamento: {orcamento}):\n"
+                + "\n".join(consulta["sql"] for consulta in consultas.captured_queries)
+            )
+        return resposta
+
+
+# Os testes usam thumbnails fictícias; os eventos são gravados na própria requisição
+@override_settings(IMAGENS_GERAR_AO_ENVIAR=False, EVENTOS_EM_SEGUNDO_PLANO=False)
+class TestCaseComOrcamento(TestCase):
+    """
+    TestCase cujo self.client aplica o orçamento de consultas por view.
+    """
+    client_class = ClienteComOrcamento
+
+
+def reiniciar_busca():
+    """
+    Descarta os índices de busca em memória (cada teste tem seu próprio catálogo).
+    """
+    busca._backends.clear()
+
+
+def reiniciar_autocompletar():
+    """
+    Descarta o índice do autocompletar (será reconstruído no próximo uso).
+    """
+    with indice_autocompletar.lock:
+        indice_autocompletar.instalar(([], {}))
+        indice_autocompletar.versao = None
+
+
+def reiniciar_filtro_emails():
+    """
+    Descarta o filtro de emails da página inicial (será reconstruído no próximo uso).
+    """
+    with filtro_emails.lock:
+        filtro_emails.instalar(FiltroBloom(1))
+        filtro_emails.versao = None
+
+
+def criar_filme(**kwargs):
+    """
+    Cria um Filme com valores padrão para os testes.
+    """
+    dados = {
+        "titulo": "Filme",
+        "categoria": "OUTROS",
+        "duracao": 10,
+        "descricao": "Descrição",
+        "thumbnail": "thumb_filmes/teste.png",
+    }
+    dados.update(kwargs)
+    return Filme.objects.create(**dados)
+
+
+def registrar_historico(usuario, filme):
+    """
+    Registra no histórico que o usuário viu o filme agora, como a fila
+    de eventos faria.
+    """
+    HistoricoVisualizacao.objects.registrar_varios({(usuario.pk, filme.pk): timezone.now()})
+
+
+class CacheCatalogoTests(TestCaseComOrcamento):
+    """
+    Testes do cache dos trilhos do catálogo (context processors).
+    """
+
+    def setUp(self):
+        cache.clear()
+        cache_local.limpar()
+        self.request = RequestFactory().get("/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.antigo = criar_filme(titulo="Antigo", data_criacao="2024-01-01", visualizacoes=5)
+            self.novo = criar_filme(titulo="Novo", data_criacao="2025-01-01", visualizacoes=1)
+
+    def test_trilhos_sao_lazy(self):
+        """Nenhuma consulta é feita se o template não usar os trilhos."""
+        with self.assertNumQueries(0):
+            lista_filmes_recentes(self.request)
+            lista_filmes_em_alta(self.request)
+            filme_destaque(self.request)
+
+    def test_pagina_aquecida_nao_consulta_trilhos(self):
+        """Depois da primeira avaliação, os trilhos vêm do cache."""
+        # Recentes, ranking "Em Alta" (ainda vazio) e total de visualizações
+        with self.assertNumQueries(3):
+            list(lista_filmes_recentes(self.request)["lista_filmes_recentes"])
+            list(lista_filmes_em_alta(self.request)["lista_filmes_em_alta"])
+            self.assertEqual(filme_destaque(self.request)["filme_destaque"].titulo, "Novo")
+
+        cache_local.limpar()  # Força a leitura do cache do Django
+        with self.assertNumQueries(0):
+            recentes = list(lista_filmes_recentes(self.request)["lista_filmes_recentes"])
+            em_alta = list(lista_filmes_em_alta(self.request)["lista_filmes_em_alta"])
+            self.assertEqual(filme_destaque(self.request)["filme_destaque"].titulo, "Novo")
+        self.assertEqual([f.titulo for f in recentes], ["Novo", "Antigo"])
+        self.assertEqual([f.titulo for f in em_alta], ["Antigo", "Novo"])
+
+    def test_alteracao_de_filme_invalida_trilhos(self):
+        """Salvar ou remover um Filme invalida o cache após o commit."""
+        list(lista_filmes_recentes(self.request)["lista_filmes_recentes"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            criar_filme(titulo="Lançamento", data_criacao="2026-01-01")
+        recentes = lista_filmes_recentes(self.request)["lista_filmes_recentes"]
+        self.assertEqual(recentes[0].titulo, "Lançamento")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Filme.objects.get(titulo="Lançamento").delete()
+        recentes = lista_filmes_recentes(self.request)["lista_filmes_recentes"]
+        self.assertEqual([f.titulo for f in recentes], ["Novo", "Antigo"])
+
+    def test_login_nao_consulta_catalogo(self):
+        """Páginas que não exibem os trilhos não consultam o catálogo."""
+        with self.assertNumQueries(0):
+            resposta = self.client.get(reverse("filme:login"), secure=True)
+        self.assertEqual(resposta.status_code, 200)
+
+    def test_homefilmes_exibe_trilhos(self):
+        """A página de filmes continua exibindo os trilhos e o destaque."""
+        usuario = Usuario.objects.create_user("ana", "ana@example.com", "senha-segura-123")
+        self.client.force_login(usuario)
+        resposta = self.client.get(reverse("filme:filmes"), secure=True)
+        self.assertContains(resposta, "Novo")
+        self.assertContains(resposta, reverse("filme:filme_detalhes", args=[self.novo.pk]))
+
+
+class ContadorVisualizacoesTests(TestCaseComOrcamento):
+    """
+    Testes do contador de visualizações gravado em lote com F().
+    """
+
+    def setUp(self):
+        self.filme = criar_filme(titulo="Popular", visualizacoes=10)
+
+    def test_incrementos_iguais_em_um_update(self):
+        """Filmes com o mesmo incremento são gravados com um único UPDATE."""
+        outros = [criar_filme(titulo=f"Filme {i}") for i in range(2)]
+        with self.assertNumQueries(2):
+            gravar_incrementos({self.filme.pk: 3, outros[0].pk: 3, outros[1].pk: 1})
+        self.assertEqual(
+            list(Filme.objects.filter(pk__in=[self.filme.pk, *[f.pk for f in outros]])
+                 .order_by("pk").values_list("visualizacoes", flat=True)),
+            [13, 3, 1],
+        )
+
+    def test_ranking_mais_vistos(self):
+        outros = [criar_filme(titulo=f"Filme {i}", visualizacoes=20 + i) for i in range(8)]
+        ranking = filmes_mais_vistos(8)
+        self.assertEqual(ranking[0], outros[-1])
+        self.assertNotIn(self.filme, ranking)
+
+    def test_detalhes_nao_grava_filme_inteiro(self):
+        """A página de detalhes registra a visualização sem salvar o Filme."""
+        usuario = Usuario.objects.create_user("bia", "bia@example.com", "senha-segura-123")
+        self.client.force_login(usuario)
+        resposta = self.client.get(
+            reverse("filme:filme_detalhes", args=[self.filme.pk]), secure=True
+        )
+        self.assertEqual(resposta.status_code, 200)
+        # A página mostra o total lido antes do evento da visualização ser gravado
+        self.assertContains(resposta, "Visualizações: 10")
+        self.assertEqual(Filme.objects.get(pk=self.filme.pk).visualizacoes, 11)
+
+
+class HistoricoVisualizacaoTests(TestCaseComOrcamento):
+    """
+    Testes do histórico de visualizações (substituto de filmes_vistos).
+    """
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user("caio", "caio@example.com", "senha-segura-123")
+        self.filmes = [criar_filme(titulo=f"Filme {i}") for i in range(10)]
+
+    def test_registrar_e_upsert_idempotente(self):
+        """Registrar o mesmo filme várias vezes mantém uma linha e atualiza a data."""
+        with self.assertNumQueries(1):
+            registrar_historico(self.usuario, self.filmes[0])
+        primeira = HistoricoVisualizacao.objects.get().ultima_visualizacao
+
+        with self.assertNumQueries(1):
+            registrar_historico(self.usuario, self.filmes[0])
+        self.assertEqual(HistoricoVisualizacao.objects.count(), 1)
+        self.assertGreater(HistoricoVisualizacao.objects.get().ultima_visualizacao, primeira)
+
+    def test_continuar_assistindo_limitado_e_ordenado(self):
+        """O trilho traz os mais recentes primeiro, em uma única consulta."""
+        for filme in self.filmes:
+            registrar_historico(self.usuario, filme)
+        registrar_historico(self.usuario, self.filmes[0])
+
+        with self.assertNumQueries(1):
+            recentes = HistoricoVisualizacao.objects.filmes_recentes(self.usuario, limite=8)
+            titulos = [filme.titulo for filme in recentes]
+        self.assertEqual(titulos[:2], ["Filme 0", "Filme 9"])
+        self.assertEqual(len(titulos), 8)
+
+    def test_detalhes_registra_historico(self):
+        """Acessar os detalhes de um filme o coloca no "Continuar Assistindo"."""
+        self.client.force_login(self.usuario)
+        self.client.get(reverse("filme:filme_detalhes", args=[self.filmes[3].pk]), secure=True)
+        resposta = self.client.get(reverse("filme:filmes"), secure=True)
+        self.assertEqual(list(resposta.context["filmes_vistos"]), [self.filmes[3]])
+
+
+class MigracaoHistoricoTests(TransactionTestCase):
+    """
+    Testa a migração de dados do ManyToMany filmes_vistos para o histórico.
+    """
+
+    antes = [("filme", "0001_initial")]
+    depois = [("filme", "0002_historicovisualizacao")]
+
+    def tearDown(self):
+        # Volta o banco para o estado mais recente das migrações
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_copia_filmes_vistos(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.antes)
+        apps = executor.loader.project_state(self.antes).apps
+        UsuarioAntigo = apps.get_model("filme", "Usuario")
+        FilmeAntigo = apps.get_model("filme", "Filme")
+        usuario = UsuarioAntigo.objects.create(username="dani")
+        filmes = [
+            FilmeAntigo.objects.create(
+                titulo=f"Filme {i}", categoria="OUTROS", duracao=1, descricao="", thumbnail="x.png"
+            )
+            for i in range(3)
+        ]
+        for filme in filmes:
+            usuario.filmes_vistos.add(filme)
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.depois)
+        apps = executor.loader.project_state(self.depois).apps
+        Historico = apps.get_model("filme", "HistoricoVisualizacao")
+        ordem = list(
+            Historico.objects.filter(usuario_id=usuario.pk)
+            .order_by("-ultima_visualizacao")
+            .values_list("filme_id", flat=True)
+        )
+        self.assertEqual(ordem, [filme.pk for filme in reversed(filmes)])
+
+
+class PaginacaoCursorTests(TestCaseComOrcamento):
+    """
+    Testes da paginação por cursor (keyset) do catálogo e da pesquisa.
+    """
+
+    def setUp(self):
+        cache.clear()  # A primeira página do catálogo fica no cache
+        cache_local.limpar()
+        # Títulos repetidos exercitam o desempate pelo id
+        self.filmes = [criar_filme(titulo=f"Filme {i % 7}") for i in range(30)]
+        self.usuario = Usuario.objects.create_user("edu", "edu@example.com", "senha-segura-123")
+
+    def test_percorre_todas_as_paginas_sem_repeticao(self):
+        """Seguir os cursores visita cada filme uma única vez, na ordem (titulo, id)."""
+        vistos, cursor = [], None
+        while True:
+            pagina = paginar_por_cursor(Filme.objects.all(), ("titulo", "id"), cursor, 4)
+            vistos.extend(pagina)
+            if not pagina.has_next:
+                break
+            cursor = pagina.proximo_cursor
+        esperado = list(Filme.objects.order_by("titulo", "id"))
+        self.assertEqual(vistos, esperado)
+
+    def test_ordenacao_descendente(self):
+        """Campos com "-" paginam em ordem decrescente."""
+        primeira = paginar_por_cursor(Filme.objects.all(), ("-titulo", "id"), None, 5)
+        segunda = paginar_por_cursor(
+            Filme.objects.all(), ("-titulo", "id"), primeira.proximo_cursor, 5
+        )
+        esperado = list(Filme.objects.order_by("-titulo", "id")[:10])
+        self.assertEqual(list(primeira) + list(segunda), esperado)
+
+    def test_paginas_profundas_nao_usam_offset(self):
+        """Qualquer página é uma única consulta com LIMIT e sem OFFSET."""
+        pagina = paginar_por_cursor(Filme.objects.all(), ("titulo", "id"), None, 20)
+        with CaptureQueriesContext(connection) as consultas:
+            paginar_por_cursor(Filme.objects.all(), ("titulo", "id"), pagina.proximo_cursor, 5)
+        self.assertEqual(len(consultas), 1)
+        self.assertNotIn("OFFSET", consultas[0]["sql"].upper())
+
+    def test_fragmento_json_da_rolagem_infinita(self):
+        """O endpoint de fragmento retorna o HTML dos cards e o próximo cursor."""
+        self.client.force_login(self.usuario)
+        resposta = self.client.get(reverse("filme:filmes"), secure=True)
+        self.assertEqual(len(resposta.context["lista_filmes"]), 24)
+        cursor = resposta.context["page_obj"].proximo_cursor
+
+        resposta = self.client.get(
+            reverse("filme:filmes_fragmento"), {"cursor": cursor}, secure=True
+        )
+        dados = resposta.json()
+        self.assertIsNone(dados["proximo_cursor"])
+        self.assertEqual(dados["html"].count('class="m-4'), 6)
+
+    def test_pesquisa_paginada(self):
+        """A pesquisa também pagina por cursor."""
+        reiniciar_busca()
+        self.client.force_login(self.usuario)
+        resposta = self.client.get(reverse("filme:pesquisa"), {"q": "Filme 1"}, secure=True)
+        self.assertEqual(len(resposta.context["filmes"]), 5)
+        self.assertFalse(resposta.context["is_paginated"])
+
+    def test_cursor_invalido(self):
+        """Um cursor malformado gera HTTP 400."""
+        self.client.force_login(self.usuario)
+        resposta = self.client.get(
+            reverse("filme:filmes_fragmento"), {"cursor": "nao-e-um-cursor"}, secure=True
+        )
+        self.assertEqual(resposta.status_code, 400)
+
+    def test_cursor_com_valores_do_tipo_errado(self):
+        """JSON válido com valores que não servem para a ordenação também gera HTTP 400."""
+        self.client.force_login(self.usuario)
+        for valores in (["t", "abc"], ["t", {"a": 1}], ["t", [1]], [None, 1]):
+            resposta = self.client.get(
+                reverse("filme:filmes"), {"cursor": codificar_cursor(valores)}, secure=True
+            )
+            self.assertEqual(resposta.status_code, 400, valores)
+        resposta = self.client.get(
+            reverse("filme:filmes_fragmento"), {"cursor": codificar_cursor(["t", "7"])}, secure=True
+        )
+        self.assertEqual(resposta.status_code, 200)  # Texto numérico vira o id 7
+
+
+@override_settings(BUSCA_BACKEND="memoria")
+class BuscaTests(TestCaseComOrcamento):
+    """
+    Testes do motor de busca (backend em memória, usado no SQLite).
+    """
+
+    def setUp(self):
+        reiniciar_busca()
+        self.programacao = criar_filme(
+            titulo="Programação em Python",
+            categoria="PROGRAMACAO",
+            descricao="Curso introdutório.",
+        )
+        self.analise = criar_filme(
+            titulo="Análise de Filmes",
+            categoria="ANALISES",
+            descricao="Falamos sobre programação funcional e cinema.",
+        )
+        self.outro = criar_filme(titulo="Palestra Django", descricao="Apresentação.")
+        self.usuario = Usuario.objects.create_user("fabi", "fabi@example.com", "senha-segura-123")
+
+    def titulos(self, consulta):
+        return [filme.titulo for filme in busca.pesquisar(consulta)]
+
+    def test_insensivel_a_acentos(self):
+        """"programacao" encontra "Programação" e vice-versa."""
+        self.assertEqual(self.titulos("programacao")[0], "Programação em Python")
+        self.assertEqual(self.titulos("ANÁLISE"), ["Análise de Filmes"])
+
+    def test_ranking_prioriza_titulo(self):
+        """Ocorrência no título vale mais que na descrição."""
+        self.assertEqual(
+            self.titulos("programação"), ["Programação em Python", "Análise de Filmes"]
+        )
+
+    def test_todas_as_palavras_precisam_casar(self):
+        self.assertEqual(self.titulos("programação python"), ["Programação em Python"])
+        self.assertEqual(self.titulos("python cinema"), [])
+
+    def test_busca_aproximada(self):
+        """Erros de digitação caem na busca aproximada por trigramas."""
+        self.assertEqual(self.titulos("progamacao pyton"), ["Programação em Python"])
+
+    def test_categoria_e_episodios_sao_pesquisaveis(self):
+        self.assertEqual(self.titulos("apresentacao")[0], "Palestra Django")
+        with self.captureOnCommitCallbacks(execute=True):
+            Episodio.objects.create(
+                filme=self.outro, titulo="Middleware e ORM", link_video="https://example.com/v"
+            )
+        self.assertEqual(self.titulos("middleware"), ["Palestra Django"])
+
+    def test_atualizacao_incremental(self):
+        """Salvar e remover filmes atualiza o índice sem reconstruí-lo."""
+        self.titulos("python")  # Constrói o índice
+        with self.captureOnCommitCallbacks(execute=True):
+            self.programacao.titulo = "Programação em Rust"
+            self.programacao.save()
+        self.assertEqual(self.titulos("python"), [])
+        self.assertEqual(self.titulos("rust"), ["Programação em Rust"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.programacao.delete()
+        self.assertEqual(self.titulos("rust"), [])
+
+    def test_titulo_busca_normalizado(self):
+        self.programacao.refresh_from_db()
+        self.assertEqual(self.programacao.titulo_busca, "programacao em python")
+
+    def test_paginacao_da_pesquisa(self):
+        """Os cursores da pesquisa percorrem o ranking sem repetições."""
+        for i in range(7):
+            criar_filme(titulo=f"Python {i}")
+        primeira = busca.pesquisar("python", tamanho=3)
+        segunda = busca.pesquisar("python", primeira.proximo_cursor, 3)
+        terceira = busca.pesquisar("python", segunda.proximo_cursor, 3)
+        todos = list(primeira) + list(segunda) + list(terceira)
+        self.assertEqual(len(todos), 8)
+        self.assertEqual(len(set(todos)), 8)
+        self.assertFalse(terceira.has_next)
+
+    def test_view_de_pesquisa(self):
+        self.client.force_login(self.usuario)
+        resposta = self.client.get(reverse("filme:pesquisa"), {"q": "programacao"}, secure=True)
+        self.assertEqual(
+            [filme.titulo for filme in resposta.context["filmes"]],
+            ["Programação em Python", "Análise de Filmes"],
+        )
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "Busca textual nativa do PostgreSQL")
+class BuscaPostgresTests(TestCaseComOrcamento):
+    """
+    Testes do backend de busca do PostgreSQL (o rank é um float).
+    """
+
+    def setUp(self):
+        # Ranks com empates e valores sem representação exata em float4
+        for i in range(30):
+            criar_filme(titulo=f"Python {i}", descricao="python " * (i % 4) + "curso")
+        self.backend = busca.BackendPostgres()
+        self.backend.reindexar()
+
+    def percorrer(self, consulta, tamanho):
+        filmes, cursor = [], None
+        for _ in range(100):  # Um cursor que repete a fronteira não terminaria
+            pagina = self.backend.pesquisar(consulta, cursor, tamanho)
+            filmes.extend(filme.pk for filme in pagina)
+            if not pagina.has_next:
+                break
+            cursor = pagina.proximo_cursor
+        return filmes
+
+    def test_paginas_sem_repeticoes_nem_lacunas(self):
+        esperado = [filme.pk for filme in self.backend.pesquisar("python", None, 100)]
+        self.assertEqual(len(esperado), 30)
+        for tamanho in (1, 4, 7):
+            self.assertEqual(self.percorrer("python", tamanho), esperado)
+        # Busca aproximada (trigramas), também ordenada por um rank float
+        esperado = [filme.pk for filme in self.backend.pesquisar("pyton", None, 100)]
+        self.assertEqual(len(esperado), 30)
+        self.assertEqual(self.percorrer("pyton", 4), esperado)
+
+
+class AutocompletarTests(TestCaseComOrcamento):
+    """
+    Testes do índice de prefixos e do endpoint JSON do autocompletar.
+    """
+
+    def setUp(self):
+        reiniciar_autocompletar()
+        self.python = criar_filme(titulo="Programação em Python")
+        self.django = criar_filme(titulo="Palestra Django")
+        self.prog_web = criar_filme(titulo="Programando para a Web")
+        self.usuario = Usuario.objects.create_user("gabi", "gabi@example.com", "senha-segura-123")
+
+    def titulos(self, prefixo, limite=8):
+        return [titulo for _, titulo in indice_autocompletar.sugerir(prefixo, limite)]
+
+    def test_prefixo_sem_acentos(self):
+        self.assertEqual(
+            self.titulos("PROGRAMA"), ["Programação em Python", "Programando para a Web"]
+        )
+        self.assertEqual(self.titulos("programação e"), ["Programação em Python"])
+        self.assertEqual(self.titulos("x"), [])
+        self.assertEqual(self.titulos("   "), [])
+
+    def test_inicio_do_titulo_antes_de_palavras_internas(self):
+        criar_filme(titulo="Web Scraping")
+        reiniciar_autocompletar()
+        self.assertEqual(self.titulos("web"), ["Web Scraping", "Programando para a Web"])
+        self.assertEqual(self.titulos("web", limite=1), ["Web Scraping"])
+
+    def test_sugestoes_nao_consultam_banco(self):
+        self.titulos("pal")  # Constrói o índice
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titulos("pal"), ["Palestra Django"])
+
+    def test_sinais_atualizam_indice(self):
+        self.titulos("pal")  # Constrói o índice
+        with self.captureOnCommitCallbacks(execute=True):
+            self.django.titulo = "Oficina Django"
+            self.django.save()
+        self.assertEqual(self.titulos("pal"), [])
+        self.assertEqual(self.titulos("ofi"), ["Oficina Django"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.django.delete()
+        self.assertEqual(self.titulos("django"), [])
+
+    def test_alteracao_em_outro_processo_reconstroi(self):
+        """Outro worker altera o catálogo: a mudança de versão dispara a reconstrução."""
+        self.titulos("pal")  # Constrói o índice
+        Filme.objects.filter(pk=self.django.pk).update(titulo="Oficina Django")  # Sem sinais
+        invalidar_catalogo()
+        with mock.patch.object(
+            indice_autocompletar, "_reconstruir_em_segundo_plano",
+            side_effect=indice_autocompletar.reconstruir,
+        ) as reconstruir:
+            self.titulos("ofi")
+        reconstruir.assert_called_once()
+        self.assertEqual(self.titulos("ofi"), ["Oficina Django"])
+
+    def test_endpoint_json(self):
+        url = reverse("filme:autocompletar")
+        self.assertEqual(self.client.get(url, {"q": "pal"}, secure=True).status_code, 302)
+        self.client.force_login(self.usuario)
+        resposta = self.client.get(url, {"q": "pal"}, secure=True)
+        self.assertEqual(
+            resposta.json(),
+            {"sugestoes": [{
+                "id": self.django.pk,
+                "titulo": "Palestra Django",
+                "url": reverse("filme:filme_detalhes", args=[self.django.pk]),
+            }]},
+        )
+        self.assertIn("max-age", resposta["Cache-Control"])
+
+
+class RelacionadosTests(TestCaseComOrcamento):
+    """
+    Testes do pré-cálculo dos filmes relacionados.
+    """
+
+    def setUp(self):
+        self.a = criar_filme(titulo="A", categoria="PROGRAMACAO")
+        self.b = criar_filme(titulo="B", categoria="ANALISES")
+        self.c = criar_filme(titulo="C", categoria="ANALISES")
+        self.d = criar_filme(titulo="D", categoria="PROGRAMACAO", visualizacoes=10)
+        self.e = criar_filme(titulo="E", categoria="PROGRAMACAO")
+        self.usuarios = [
+            Usuario.objects.create_user(f"u{i}", f"u{i}@example.com", "senha-segura-123")
+            for i in range(3)
+        ]
+
+    def assistir(self, usuario, *filmes):
+        for filme in filmes:
+            registrar_historico(usuario, filme)
+
+    def test_coocorrencia_antes_da_categoria(self):
+        # B é visto junto com A por dois usuários; C por apenas um
+        self.assistir(self.usuarios[0], self.a, self.b, self.c)
+        self.assistir(self.usuarios[1], self.a, self.b)
+        resultado = calcular_relacionados(quantidade=3)
+        self.assertEqual(
+            [filme_id for filme_id, _ in resultado[self.a.pk]],
+            [self.b.pk, self.c.pk, self.d.pk],  # D: mais visto da categoria de A
+        )
+        self.assertEqual(resultado[self.a.pk][2][1], 0.0)
+
+    def test_sem_historico_usa_categoria(self):
+        resultado = calcular_relacionados(quantidade=5)
+        self.assertEqual(
+            [filme_id for filme_id, _ in resultado[self.e.pk]], [self.d.pk, self.a.pk]
+        )
+
+    def test_detalhes_le_relacionados_com_uma_consulta(self):
+        self.assistir(self.usuarios[0], self.a, self.c)
+        gravar_relacionados(calcular_relacionados(quantidade=3))
+        self.assertEqual(FilmeRelacionado.objects.filter(origem=self.a).count(), 3)
+        with self.assertNumQueries(1):
+            relacionados = FilmeRelacionado.objects.filmes(self.a, 2)
+        self.assertEqual(relacionados, [self.c, self.d])
+
+        self.client.force_login(self.usuarios[0])
+        resposta = self.client.get(reverse("filme:filme_detalhes", args=[self.a.pk]), secure=True)
+        self.assertEqual(list(resposta.context["filmes_relacionados"]), [self.c, self.d, self.e])
+
+    def test_filme_sem_calculo_usa_categoria(self):
+        """Filme cadastrado depois do cálculo ainda exibe relacionados."""
+        gravar_relacionados(calcular_relacionados())
+        novo = criar_filme(titulo="F", categoria="ANALISES")
+        self.client.force_login(self.usuarios[0])
+        resposta = self.client.get(reverse("filme:filme_detalhes", args=[novo.pk]), secure=True)
+        self.assertEqual(list(resposta.context["filmes_relacionados"]), [self.b, self.c])
+
+    def test_comando_recalcula(self):
+        saida = StringIO()
+        call_command("calcular_relacionados", quantidade=2, stdout=saida)
+        self.assertIn("8 relacionados gravados para 5 filmes", saida.getvalue())
+        call_command("calcular_relacionados", quantidade=1, stdout=StringIO())
+        self.assertEqual(FilmeRelacionado.objects.count(), 5)
+        call_command("benchmark_relacionados", repeticoes=5, stdout=saida)
+        self.assertIn("pre-calculado", saida.getvalue())
+
+
+@unittest.skipUnless(
+    importlib.util.find_spec("numpy") and importlib.util.find_spec("scipy"),
+    "Dependências opcionais de recomendação (NumPy/SciPy) não instaladas.",
+)
+class RecomendacoesTests(TestCaseComOrcamento):
+    """
+    Testes da filtragem colaborativa item-item.
+    """
+
+    def setUp(self):
+        self.a = criar_filme(titulo="A")
+        self.b = criar_filme(titulo="B")
+        self.c = criar_filme(titulo="C")
+        self.usuarios = [
+            Usuario.objects.create_user(f"r{i}", f"r{i}@example.com", "senha-segura-123")
+            for i in range(3)
+        ]
+        # cos(A,B) = 2/sqrt(3*2) > cos(B,C) = 1/sqrt(2) > cos(A,C) = 1/sqrt(3)
+        vistos = [(self.a, self.b), (self.a, self.b, self.c), (self.a,)]
+        for usuario, filmes in zip(self.usuarios, vistos):
+            for filme in filmes:
+                registrar_historico(usuario, filme)
+
+    def recomendados(self, usuario):
+        return Recomendacao.objects.filmes(usuario)
+
+    def test_recomenda_similares_nao_vistos(self):
+        self.assertEqual(calcular_recomendacoes(trabalhadores=1), 3)
+        self.assertEqual(self.recomendados(self.usuarios[2]), [self.b, self.c])
+        self.assertEqual(self.recomendados(self.usuarios[0]), [self.c])
+        self.assertEqual(self.recomendados(self.usuarios[1]), [])  # Já viu tudo
+        pontuacao = Recomendacao.objects.get(usuario=self.usuarios[0]).pontuacao
+        self.assertAlmostEqual(pontuacao, 1 / 3 ** 0.5 + 1 / 2 ** 0.5, places=5)
+
+    def test_blocos_em_paralelo_dao_o_mesmo_resultado(self):
+        calcular_recomendacoes(trabalhadores=1)
+        esperado = list(Recomendacao.objects.values_list("usuario", "filme", "posicao"))
+        calcular_recomendacoes(bloco_itens=1, bloco_usuarios=1, trabalhadores=4)
+        self.assertEqual(
+            list(Recomendacao.objects.values_list("usuario", "filme", "posicao")), esperado
+        )
+
+    def test_recalculo_substitui_recomendacoes(self):
+        calcular_recomendacoes(trabalhadores=1)
+        registrar_historico(self.usuarios[2], self.b)
+        calcular_recomendacoes(trabalhadores=1)
+        self.assertEqual(self.recomendados(self.usuarios[2]), [self.c])
+
+    def test_usuarios_sem_historico_perdem_recomendacoes(self):
+        calcular_recomendacoes(trabalhadores=1)
+        HistoricoVisualizacao.objects.filter(usuario=self.usuarios[2]).delete()
+        calcular_recomendacoes(trabalhadores=1)
+        self.assertFalse(Recomendacao.objects.filter(usuario=self.usuarios[2]).exists())
+        self.assertEqual(self.recomendados(self.usuarios[0]), [self.c])
+        # Histórico vazio: a matriz não tem usuários, mas as linhas antigas saem
+        HistoricoVisualizacao.objects.all().delete()
+        self.assertEqual(calcular_recomendacoes(trabalhadores=1), 0)
+        self.assertFalse(Recomendacao.objects.exists())
+
+    def test_trilho_recomendados_na_home(self):
+        calcular_recomendacoes(trabalhadores=1)
+        self.client.force_login(self.usuarios[2])
+        resposta = self.client.get(reverse("filme:filmes"), secure=True)
+        self.assertEqual(resposta.context["filmes_recomendados"], [self.b, self.c])
+        self.assertContains(resposta, "Recomendados para você")
+
+    def test_sem_numpy(self):
+        with mock.patch.dict(sys.modules, {"numpy": None}):
+            with self.assertRaises(ImproperlyConfigured):
+                calcular_recomendacoes()
+
+
+class OrcamentoConsultasTests(TestCaseComOrcamento):
+    """
+    Testes das consultas por requisição: o número de consultas de cada
+    view não pode crescer com o número de filmes/episódios exibidos.
+    """
+
+    def setUp(self):
+        cache.clear()
+        cache_local.limpar()
+        reiniciar_busca()
+        reiniciar_autocompletar()
+        self.admin = Usuario.objects.create_superuser("admin", "admin@example.com", "senha-segura-123")
+        self.filmes = []
+        for i in range(6):
+            filme = criar_filme(titulo=f"Filme {i}", categoria="PROGRAMACAO")
+            for j in range(3):
+                Episodio.objects.create(
+                    filme=filme, titulo=f"Episódio {j}", link_video=f"https://example.com/{i}/{j}"
+                )
+            registrar_historico(self.admin, filme)
+            self.filmes.append(filme)
+        self.client.force_login(self.admin)
+
+    def test_views_dentro_do_orcamento(self):
+        """Cada requisição passa pela verificação do ClienteComOrcamento."""
+        self.client.get(reverse("filme:filmes"), secure=True)
+        self.client.get(reverse("filme:filme_detalhes", args=[self.filmes[0].pk]), secure=True)
+        self.client.get(reverse("filme:pesquisa"), {"q": "filme"}, secure=True)
+        self.client.get(reverse("filme:autocompletar"), {"q": "fil"}, secure=True)
+        self.client.logout()
+        self.client.get(reverse("filme:homepage"), secure=True)
+
+    def test_detalhes_carrega_episodios_uma_vez(self):
+        resposta = self.client.get(
+            reverse("filme:filme_detalhes", args=[self.filmes[0].pk]), secure=True
+        )
+        self.assertContains(resposta, "https://example.com/0/0")
+        self.assertContains(resposta, "Episódio 3: Episódio 2")
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(reverse("filme:filme_detalhes", args=[self.filmes[1].pk]), secure=True)
+        episodios = [c for c in consultas if '"filme_episodio"' in c["sql"]]
+        self.assertEqual(len(episodios), 1)
+
+    def test_admin_de_episodios_sem_n_mais_1(self):
+        url = reverse("admin:filme_episodio_changelist")
+        self.client.get(reverse("admin:index"), secure=True)  # Usuário já no cache da autenticação
+        with CaptureQueriesContext(connection) as com_18:
+            self.assertEqual(self.client.get(url, secure=True).status_code, 200)
+        Episodio.objects.filter(filme__in=self.filmes[1:]).delete()
+        with CaptureQueriesContext(connection) as com_3:
+            self.client.get(url, secure=True)
+        self.assertEqual(len(com_18), len(com_3))
+        self.assertEqual(self.client.get(
+            reverse("admin:filme_filme_change", args=[self.filmes[0].pk]), secure=True
+        ).status_code, 200)
+
+    def test_orcamento_estourado_falha(self):
+        with mock.patch.dict(ORCAMENTO_CONSULTAS, {"filme:filmes": 1}):
+            with self.assertRaisesMessage(AssertionError, "filme:filmes"):
+                self.client.get(reverse("filme:filmes"), secure=True)
+
+
+class FragmentosHomeTests(TestCaseComOrcamento):
+    """
+    Testes dos fragmentos cacheados de homefilmes.html.
+    """
+
+    def setUp(self):
+        cache.clear()
+        cache_local.limpar()
+        self.filme = criar_filme(titulo="Primeiro")
+        self.usuario = Usuario.objects.create_user("ivo", "ivo@example.com", "senha-segura-123")
+        self.client.force_login(self.usuario)
+
+    def trilho(self, resposta, titulo, proximo):
+        """Retorna o HTML entre o título do trilho e o título seguinte."""
+        html = resposta.content.decode()
+        return html[html.index(titulo):html.index(proximo)]
+
+    def home(self):
+        return self.client.get(reverse("filme:filmes"), secure=True)
+
+    def test_usuario_recorrente_nao_consulta_catalogo(self):
+        self.home()
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.home()
+        self.assertEqual(len(consultas), 0)  # Nem a sessão e o usuário (cache da autenticação)
+        self.assertContains(resposta, "Primeiro")
+
+    def test_historico_invalida_trilho_do_usuario(self):
+        url = reverse("filme:filme_detalhes", args=[self.filme.pk])
+        self.assertNotIn(url, self.trilho(self.home(), "Continuar Assistindo", "Catálogo"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(url, secure=True)
+        self.assertIn(url, self.trilho(self.home(), "Continuar Assistindo", "Catálogo"))
+
+        # O fragmento pessoal não é compartilhado com outros usuários
+        outro = Usuario.objects.create_user("ana", "ana@example.com", "senha-segura-123")
+        self.client.force_login(outro)
+        self.assertNotIn(url, self.trilho(self.home(), "Continuar Assistindo", "Catálogo"))
+
+    def test_alteracao_de_filme_invalida_trilhos_globais(self):
+        self.home()
+        with self.captureOnCommitCallbacks(execute=True):
+            novo = criar_filme(titulo="Segundo", data_criacao="2100-01-01")
+        resposta = self.home()
+        self.assertIn(
+            reverse("filme:filme_detalhes", args=[novo.pk]),
+            self.trilho(resposta, "Novo", "Em Alta"),
+        )
+        self.assertContains(resposta, "Segundo")
+
+    def test_recalculo_invalida_recomendacoes(self):
+        versao = versao_recomendacoes()
+        invalidar_recomendacoes()
+        self.assertNotEqual(versao_recomendacoes(), versao)
+
+
+class ImagensTests(TestCaseComOrcamento):
+    """
+    Testes das versões redimensionadas das thumbnails (storage local).
+    """
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        configuracao = override_settings(MEDIA_ROOT=self.media)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.filme = criar_filme(titulo="Com capa", thumbnail=self.salvar_png("capa.png", 2000, 1000))
+
+    def salvar_png(self, nome, largura, altura):
+        saida = io.BytesIO()
+        Image.new("RGB", (largura, altura), (200, 30, 30)).save(saida, "PNG")
+        return default_storage.save(f"thumb_filmes/{nome}", ContentFile(saida.getvalue()))
+
+    def test_gera_webp_em_todas_as_larguras(self):
+        self.assertTrue(precisa_gerar(self.filme))
+        self.assertEqual(gerar_imagens([self.filme], processos=2), 1)
+        self.filme.refresh_from_db()
+        self.assertFalse(precisa_gerar(self.filme))
+        webp = self.filme.imagens["webp"]
+        self.assertEqual(sorted(map(int, webp)), [320, 384, 640, 768, 1280, 1920])
+        caminho = webp["640"].removeprefix(settings.MEDIA_URL).lstrip("/")
+        with default_storage.open(caminho) as arquivo, Image.open(arquivo) as imagem:
+            self.assertEqual((imagem.format, imagem.size), ("WEBP", (640, 320)))
+
+    def test_original_pequeno_nao_e_ampliado(self):
+        self.filme.thumbnail = self.salvar_png("pequena.png", 500, 250)
+        self.filme.save()
+        self.assertTrue(precisa_gerar(self.filme))  # Thumbnail trocada
+        gerar_imagens([self.filme], processos=1)
+        self.assertEqual(sorted(map(int, self.filme.imagens["webp"])), [320, 384, 500])
+
+    def test_template_usa_srcset(self):
+        renderizar = Template('{% load imagens %}{% imagem_filme filme "trilho" "capa" %}').render
+        html = renderizar(Context({"filme": self.filme}))
+        self.assertNotIn("<source", html)  # Ainda sem versões: apenas o original
+        self.assertIn(self.filme.thumbnail.url, html)
+        gerar_imagens([self.filme], processos=1)
+        html = renderizar(Context({"filme": self.filme}))
+        self.assertIn('type="image/webp"', html)
+        self.assertIn(f'{self.filme.imagens["webp"]["320"]} 320w', html)
+        self.assertIn('sizes="(max-width: 600px) 50vw, 25vw"', html)
+        self.assertEqual(renderizar(Context({"filme": None})).strip(), "")
+
+    def test_placeholder_e_cor_predominante(self):
+        gerar_imagens([self.filme], processos=1)
+        self.filme.refresh_from_db()
+        self.assertEqual(self.filme.cor_predominante, "#c81e1e")
+        prefixo = "data:image/webp;base64,"
+        self.assertTrue(self.filme.placeholder.startswith(prefixo))
+        self.assertLess(len(self.filme.placeholder), 400)  # Pequena o bastante para ir no HTML
+        previa = base64.b64decode(self.filme.placeholder.removeprefix(prefixo))
+        with Image.open(io.BytesIO(previa)) as imagem:
+            self.assertEqual(imagem.size, (16, 8))
+
+        html = Template('{% load imagens %}{% imagem_filme filme "destaque" %}').render(
+            Context({"filme": self.filme})
+        )
+        self.assertIn("background-color: #c81e1e", html)
+        self.assertIn(f"background-image: url({self.filme.placeholder})", html)
+
+    def test_comando_gera_placeholder_de_filmes_ja_processados(self):
+        gerar_imagens([self.filme], processos=1)
+        Filme.objects.filter(pk=self.filme.pk).update(placeholder="", cor_predominante="")
+        call_command("gerar_imagens", processos=1, stdout=StringIO())
+        self.filme.refresh_from_db()
+        self.assertTrue(self.filme.placeholder)
+        self.assertEqual(self.filme.cor_predominante, "#c81e1e")
+
+    @override_settings(IMAGENS_GERAR_AO_ENVIAR=True)
+    def test_upload_agenda_geracao(self):
+        with mock.patch("filme.signals.agendar_imagens") as agendar:
+            with self.captureOnCommitCallbacks(execute=True):
+                novo = criar_filme(titulo="Novo", thumbnail=self.salvar_png("nova.png", 800, 400))
+            agendar.assert_called_once_with(novo)
+            with self.captureOnCommitCallbacks(execute=True):
+                novo.imagens = {"origem": novo.thumbnail.name}
+                novo.placeholder = "data:image/webp;base64,"
+                novo.save()  # Mesma thumbnail: nada a gerar
+            agendar.assert_called_once()
+
+    def test_comando_de_backfill(self):
+        saida = StringIO()
+        call_command("gerar_imagens", processos=1, stdout=saida)
+        self.assertIn("Imagens geradas para 1 filmes", saida.getvalue())
+        call_command("gerar_imagens", processos=1, stdout=saida)
+        self.assertIn("Imagens geradas para 0 filmes", saida.getvalue())
+
+    def test_lote_invalida_o_catalogo_uma_vez(self):
+        outro = criar_filme(titulo="Outra capa", thumbnail=self.salvar_png("outra.png", 800, 400))
+        with mock.patch("filme.imagens.invalidar_catalogo") as invalidar:
+            self.assertEqual(gerar_imagens([self.filme, outro], processos=1), 2)
+        invalidar.assert_called_once()
+
+    def test_geracao_apos_upload_nao_cria_pool_de_processos(self):
+        # A tarefa da thread roda aqui mesmo, dentro da transação do teste
+        with mock.patch("filme.imagens.ProcessPoolExecutor") as pool, \
+                mock.patch("filme.imagens.connection.close"), \
+                mock.patch("filme.imagens.threading.Thread") as thread:
+            agendar_imagens(self.filme)
+            thread.call_args.kwargs["target"]()
+        pool.assert_not_called()
+        self.filme.refresh_from_db()
+        self.assertIn("webp", self.filme.imagens)
+        self.assertTrue(self.filme.placeholder)
+
+
+class ViewsAssincronasTests(TestCaseComOrcamento):
+    """
+    Testes das versões assíncronas das views do catálogo (VIEWS_ASSINCRONAS=True).
+    """
+
+    def setUp(self):
+        cache.clear()
+        cache_local.limpar()
+        reiniciar_busca()
+        # As rotas são escolhidas na importação de filme.urls: recarrega com a
+        # configuração ativa e, ao final, novamente com a configuração original
+        self.addCleanup(self.recarregar_urls)
+        configuracao = override_settings(VIEWS_ASSINCRONAS=True)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.recarregar_urls()
+
+        self.filmes = [
+            criar_filme(titulo=f"Async {i:02d}", data_criacao=f"2024-01-{i + 1:02d}")
+            for i in range(30)
+        ]
+        self.usuario = Usuario.objects.create_user("jo", "jo@example.com", "senha-segura-123")
+        self.async_client.force_login(self.usuario)
+
+    def recarregar_urls(self):
+        importlib.reload(importlib.import_module("filme.urls"))
+        importlib.reload(importlib.import_module(settings.ROOT_URLCONF))  # Guarda o include() antigo
+        clear_url_caches()
+
+    def test_rotas_usam_views_assincronas(self):
+        self.assertIs(resolve(reverse("filme:filmes")).func.view_class, HomeFilmesAssincronaView)
+        self.assertIs(
+            resolve(reverse("filme:filme_detalhes", args=[1])).func.view_class,
+            FilmeDetailAssincronaView,
+        )
+        self.assertIs(resolve(reverse("filme:pesquisa")).func.view_class, PesquisaFilmeAssincronaView)
+
+    async def test_homefilmes(self):
+        await sync_to_async(registrar_historico)(self.usuario, self.filmes[3])
+        await Recomendacao.objects.acreate(
+            usuario=self.usuario, filme=self.filmes[5], posicao=0, pontuacao=1.0
+        )
+        resposta = await self.async_client.get(reverse("filme:filmes"), secure=True)
+        self.assertEqual(resposta.status_code, 200)
+        html = resposta.content.decode()
+        self.assertIn("Async 29", html[:html.index("Em Alta")])  # Destaque e recentes
+        vistos = html[html.index("Continuar Assistindo"):html.index("Catálogo")]
+        self.assertIn(reverse("filme:filme_detalhes", args=[self.filmes[3].pk]), vistos)
+        recomendados = html[html.index("Recomendados para você"):html.index("Continuar Assistindo")]
+        self.assertIn(reverse("filme:filme_detalhes", args=[self.filmes[5].pk]), recomendados)
+        self.assertEqual(len(resposta.context["lista_filmes"]), 24)
+
+        # Fragmento de rolagem infinita continua do cursor da primeira página
+        cursor = resposta.context["page_obj"].proximo_cursor
+        fragmento = await self.async_client.get(
+            reverse("filme:filmes_fragmento"), {"cursor": cursor}, secure=True
+        )
+        dados = fragmento.json()
+        self.assertIn("Async 24", dados["html"])
+        self.assertIsNone(dados["proximo_cursor"])
+
+    def test_trilhos_do_usuario_em_cache_nao_consultam(self):
+        home = async_to_sync(self.async_client.get)
+        home(reverse("filme:filmes"), secure=True)
+        registro_metricas.limpar()
+        invalidar_usuario_autenticado(self.usuario.pk)  # O usuário vem do banco, em uma thread
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = home(reverse("filme:filmes"), secure=True)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(len(consultas), 1)  # Apenas o usuário (a sessão vem do cache)
+        # As consultas das threads do sync_to_async também entram nas métricas
+        self.assertEqual(
+            registro_metricas.histograma("pyflix_consultas_por_requisicao", view="filme:filmes").soma, 1
+        )
+
+    async def test_detalhes_registra_historico(self):
+        filme = self.filmes[0]
+        resposta = await self.async_client.get(
+            reverse("filme:filme_detalhes", args=[filme.pk]), secure=True
+        )
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.context["filme"], filme)
+        self.assertEqual(len(resposta.context["filmes_relacionados"]), 5)  # Mesma categoria
+        self.assertTrue(
+            await HistoricoVisualizacao.objects.filter(usuario=self.usuario, filme=filme).aexists()
+        )
+        resposta = await self.async_client.get(
+            reverse("filme:filme_detalhes", args=[999999]), secure=True
+        )
+        self.assertEqual(resposta.status_code, 404)
+
+    async def test_get_condicional(self):
+        for url in (reverse("filme:filme_detalhes", args=[self.filmes[0].pk]), reverse("filme:pesquisa") + "?q=async"):
+            etag = (await self.async_client.get(url, secure=True))["ETag"]
+            resposta = await self.async_client.get(url, secure=True, headers={"if-none-match": etag})
+            self.assertEqual(resposta.status_code, 304)
+
+    async def test_pesquisa(self):
+        resposta = await self.async_client.get(reverse("filme:pesquisa"), {"q": "async 07"}, secure=True)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.context["filmes"][0], self.filmes[7])
+        resposta = await self.async_client.get(reverse("filme:pesquisa"), secure=True)
+        self.assertEqual(list(resposta.context["filmes"]), [])
+
+    async def test_exige_login(self):
+        await self.async_client.alogout()
+        resposta = await self.async_client.get(reverse("filme:filmes"), secure=True)
+        self.assertEqual(resposta.status_code, 302)
+        self.assertTrue(resposta["Location"].startswith(reverse("filme:login")))
+
+
+@override_settings(EVENTOS_EM_SEGUNDO_PLANO=True, EVENTOS_ESPERA_FILA_CHEIA=0)
+class FilaEventosTests(TestCaseComOrcamento):
+    """
+    Testes da fila de eventos da página de detalhes.
+
+    A thread de gravação não roda (o SQLite dos testes não aceita escritas
+    de outra conexão durante a transação do teste): os lotes são gravados
+    com drenar(), na thread do teste.
+    """
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user("lia", "lia@example.com", "senha-segura-123")
+        self.filmes = [criar_filme(titulo=f"Evento {i}") for i in range(2)]
+        sem_thread = mock.patch.object(FilaEventos, "_executar")
+        sem_thread.start()
+        self.addCleanup(sem_thread.stop)
+        self.fila = FilaEventos()
+
+    def publicar(self, filme, instante="2024-05-01T10:00:00+00:00", fila=None):
+        (fila or self.fila).publicar(
+            "visualizacao", {"usuario": self.usuario.pk, "filme": filme.pk, "instante": instante}
+        )
+
+    def test_publicar_nao_toca_o_banco_e_drenar_grava_em_lote(self):
+        with self.assertNumQueries(0):
+            self.publicar(self.filmes[0])
+            self.publicar(self.filmes[0], "2024-05-02T10:00:00+00:00")
+            self.publicar(self.filmes[1])
+        self.assertEqual(self.fila.metricas()["profundidade"], 3)
+
+        self.assertEqual(self.fila.drenar(), 3)
+        historico = HistoricoVisualizacao.objects.get(usuario=self.usuario, filme=self.filmes[0])
+        self.assertEqual(historico.ultima_visualizacao.day, 2)  # A mais recente do lote
+        self.assertEqual(HistoricoVisualizacao.objects.filter(usuario=self.usuario).count(), 2)
+        self.assertEqual(Filme.objects.get(pk=self.filmes[0].pk).visualizacoes, 2)  # Na transação do lote
+        metricas = self.fila.metricas()
+        self.assertEqual(
+            (metricas["profundidade"], metricas["processados"], metricas["lotes"]), (0, 3, 1)
+        )
+
+    @override_settings(EVENTOS_FILA_LIMITE=2)
+    def test_fila_cheia_desvia_para_tabela_duravel(self):
+        for _ in range(3):
+            self.publicar(self.filmes[0])
+        self.assertEqual(self.fila.metricas()["desviados"], 1)
+        self.assertEqual(EventoPendente.objects.count(), 1)
+
+        saida = StringIO()
+        call_command("drenar_eventos", stdout=saida)
+        self.assertIn("1 eventos processados", saida.getvalue())
+        self.assertFalse(EventoPendente.objects.exists())
+        self.assertTrue(HistoricoVisualizacao.objects.filter(usuario=self.usuario).exists())
+
+    def test_lote_com_falha_vai_para_tabela_duravel(self):
+        self.publicar(self.filmes[0])
+        with mock.patch("filme.eventos.processar", side_effect=DatabaseError("fora do ar")):
+            with self.assertLogs("filme.eventos", "ERROR"):
+                self.fila.drenar()
+        self.assertEqual(self.fila.metricas()["falhas"], 1)
+        self.assertEqual(EventoPendente.objects.get().dados["filme"], self.filmes[0].pk)
+
+    def test_lote_com_falha_nao_grava_nada_antes_de_ir_para_a_tabela(self):
+        """Falha depois do histórico: a nova tentativa não conta nada duas vezes."""
+        self.publicar(self.filmes[0])
+        with mock.patch.object(
+            VisualizacaoHora.objects, "registrar_varios", side_effect=DatabaseError("fora do ar")
+        ):
+            with self.assertLogs("filme.eventos", "ERROR"):
+                self.fila.drenar()
+        self.assertFalse(HistoricoVisualizacao.objects.exists())
+        self.assertEqual(EventoPendente.objects.count(), 1)
+
+        call_command("drenar_eventos", stdout=StringIO())
+        self.assertEqual(Filme.objects.get(pk=self.filmes[0].pk).visualizacoes, 1)
+        self.assertEqual(VisualizacaoHora.objects.get().quantidade, 1)
+        self.assertFalse(EventoPendente.objects.exists())
+
+    def test_evento_de_filme_removido_e_descartado(self):
+        self.publicar(self.filmes[0])
+        self.publicar(self.filmes[1])
+        self.filmes[1].delete()
+        self.fila.drenar()
+        self.assertEqual(
+            list(HistoricoVisualizacao.objects.values_list("filme_id", flat=True)),
+            [self.filmes[0].pk],
+        )
+        self.assertEqual(Filme.objects.get(pk=self.filmes[0].pk).visualizacoes, 1)
+
+    def test_encerramento_persiste_a_fila(self):
+        self.publicar(self.filmes[0])
+        self.publicar(self.filmes[1])
+        self.assertEqual(self.fila.encerrar(), 2)
+        self.assertEqual(EventoPendente.objects.count(), 2)
+
+    def test_detalhes_publica_sem_gravar_na_requisicao(self):
+        fila = FilaEventos()
+        self.client.force_login(self.usuario)
+        with mock.patch("filme.eventos.fila_eventos", fila):
+            resposta = self.client.get(
+                reverse("filme:filme_detalhes", args=[self.filmes[0].pk]), secure=True
+            )
+        self.assertEqual(resposta.status_code, 200)
+        self.assertFalse(HistoricoVisualizacao.objects.exists())
+        self.assertEqual(fila.metricas()["profundidade"], 1)
+        fila.drenar()
+        self.assertTrue(HistoricoVisualizacao.objects.filter(filme=self.filmes[0]).exists())
+
+
+class BenchmarkTests(TestCaseComOrcamento):
+    """
+    Testes da população sintética e das medições do benchmark de requisições.
+    """
+
+    def setUp(self):
+        reiniciar_busca()
+        reiniciar_autocompletar()
+        cache.clear()
+        cache_local.limpar()
+
+    def test_percentil_e_resumo(self):
+        ordenados = list(range(1, 101))
+        self.assertEqual(
+            [benchmark.percentil(ordenados, p) for p in (50, 95, 99, 100)], [50, 95, 99, 100]
+        )
+        self.assertIsNone(benchmark.percentil([], 50))
+        self.assertEqual(benchmark.resumo([3.0, 1.0, 2.0])["p50_ms"], 2.0)
+
+    def test_popular_e_reprodutivel_e_indexa_a_busca(self):
+        benchmark.popular(filmes=30, episodios_por_filme=2, usuarios=5, vistos_por_usuario=4, tamanho_lote=7)
+        self.assertEqual(Filme.objects.count(), 30)
+        self.assertEqual(Episodio.objects.count(), 60)
+        self.assertEqual(HistoricoVisualizacao.objects.count(), 20)
+        filme = Filme.objects.first()
+        self.assertEqual(filme.titulo_busca, busca.normalizar(filme.titulo))
+        self.assertIn(filme, busca.pesquisar(filme.titulo).object_list)
+
+        titulos = list(Filme.objects.order_by("pk").values_list("titulo", flat=True))
+        Filme.objects.all().delete()
+        benchmark.popular(filmes=30, episodios_por_filme=0, usuarios=0, vistos_por_usuario=0)
+        self.assertEqual(list(Filme.objects.order_by("pk").values_list("titulo", flat=True)), titulos)
+
+    @override_settings(SECURE_SSL_REDIRECT=False, LIMITE_TAXA={})
+    def test_medir_cliente_conta_consultas(self):
+        benchmark.popular(filmes=20, episodios_por_filme=1, usuarios=3, vistos_por_usuario=2)
+        gerador = benchmark.GeradorRequisicoes()
+        usuario = Usuario.objects.first()
+        for cenario in benchmark.CENARIOS:
+            resultado = benchmark.medir_cliente(cenario, usuario, gerador, 5, aquecimento=1)
+            self.assertEqual((resultado["requisicoes"], resultado["erros"]), (5, 0), cenario)
+            if cenario in ("filme_detalhes", "pesquisa"):  # As demais podem ficar todas no cache
+                self.assertGreater(resultado["consultas_por_requisicao"], 0, cenario)
+            self.assertGreater(resultado["alocacao_pico_kb"], 0, cenario)
+
+    @override_settings(SECURE_SSL_REDIRECT=False, LIMITE_TAXA={})
+    def test_autenticacao_no_banco_consulta_sessao_e_usuario(self):
+        benchmark.popular(filmes=5, episodios_por_filme=1, usuarios=2, vistos_por_usuario=1)
+        gerador = benchmark.GeradorRequisicoes()
+        usuario = Usuario.objects.first()
+        no_banco = benchmark.medir_autenticacao_no_banco(["progresso_post"], usuario, gerador, 3)
+        em_cache = benchmark.medir_cliente("progresso_post", usuario, gerador, 3, aquecimento=1)
+        self.assertEqual(no_banco["progresso_post"]["consultas_por_requisicao"], 2)
+        self.assertEqual(em_cache["consultas_por_requisicao"], 0)
+
+    def test_comparar(self):
+        anterior = {"cliente": {"pesquisa": {"p50_ms": 10.0, "p95_ms": 20.0, "consultas_por_requisicao": 3}}}
+        atual = {"cliente": {"pesquisa": {"p50_ms": 5.0, "p95_ms": 20.0, "consultas_por_requisicao": 3}}}
+        self.assertIn("p50_ms 10.0 -> 5.0 (-50.0%)", benchmark.comparar(anterior, atual)[0])
+
+
+class MetricasTests(TestCaseComOrcamento):
+    """
+    Testes do middleware de métricas e do endpoint admin/metrics/.
+    """
+
+    def setUp(self):
+        reiniciar_busca()
+        reiniciar_autocompletar()
+        cache.clear()
+        cache_local.limpar()
+        registro_metricas.limpar()
+        self.usuario = Usuario.objects.create_user("ana", "ana@example.com", "senha-segura-123")
+        criar_filme(titulo="Métricas")
+
+    def test_requisicao_registra_consultas_template_cache_e_tamanho(self):
+        self.client.force_login(self.usuario)
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(reverse("filme:filmes"), secure=True)
+
+        view = "filme:filmes"
+        self.assertEqual(registro_metricas.histograma("pyflix_requisicao_segundos", view=view).total, 1)
+        self.assertEqual(
+            registro_metricas.histograma("pyflix_consultas_por_requisicao", view=view).soma, len(consultas)
+        )
+        # Os trilhos lazy dos context processors consultam o banco durante a renderização
+        tempo_template = registro_metricas.histograma("pyflix_consultas_segundos", view=view, fase="template")
+        self.assertGreater(tempo_template.soma, 0)
+        self.assertGreater(registro_metricas.histograma("pyflix_template_segundos", view=view).soma, 0)
+        self.assertEqual(
+            registro_metricas.histograma("pyflix_resposta_bytes", view=view).soma, len(resposta.content)
+        )
+        self.assertEqual(registro_metricas.contador("pyflix_requisicoes_total", view=view, status="2xx"), 1)
+        self.assertGreater(registro_metricas.contador("pyflix_cache_total", view=view, resultado="falta"), 0)
+        self.assertIsNotNone(
+            registro_metricas.histograma("pyflix_trilho_carregamento_segundos", trilho="recentes")
+        )
+
+        # Segunda visita: os fragmentos e trilhos vêm do cache
+        self.client.get(reverse("filme:filmes"), secure=True)
+        self.assertGreater(registro_metricas.contador("pyflix_cache_total", view=view, resultado="acerto"), 0)
+
+    def test_endpoint_exige_equipe_ou_token(self):
+        url = reverse("metricas")
+        self.client.get(reverse("filme:homepage"), secure=True)
+
+        resposta = self.client.get(url, secure=True)
+        self.assertEqual(resposta.status_code, 403)  # Sem redirecionar ao login (HTML para o scraper)
+        self.assertNotIn("Location", resposta)
+
+        self.usuario.is_staff = True
+        self.usuario.save()
+        self.client.force_login(self.usuario)
+        resposta = self.client.get(url, secure=True)
+        self.assertEqual(resposta["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        texto = resposta.content.decode()
+        self.assertIn("# TYPE pyflix_requisicao_segundos histogram", texto)
+        self.assertIn('pyflix_requisicao_segundos_bucket{view="filme:homepage",le="+Inf"} 1', texto)
+        self.assertIn('pyflix_fila_eventos{metrica="capacidade"}', texto)
+
+        self.client.logout()
+        with override_settings(METRICAS_TOKEN="segredo"):
+            self.assertEqual(
+                self.client.get(url, secure=True, headers={"Authorization": "Bearer segredo"}).status_code, 200
+            )
+            self.assertEqual(
+                self.client.get(url, secure=True, headers={"Authorization": "Bearer outro"}).status_code, 403
+            )
+
+    @override_settings(METRICAS_LENTAS_AMOSTRA=1.0, METRICAS_LENTA_MS=0)
+    def test_requisicao_lenta_amostrada_vai_para_o_log_com_sql(self):
+        self.client.force_login(self.usuario)
+        with self.assertLogs("filme.metricas", "WARNING") as logs:
+            self.client.get(reverse("filme:filmes"), secure=True)
+        self.assertIn("filme:filmes", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
+
+    def test_histograma_cumulativo(self):
+        registro = RegistroMetricas()
+        for valor in (0, 1, 4, 100):
+            registro.observar("pyflix_consultas_por_requisicao", {"view": "v"}, valor)
+        texto = registro.exportar()
+        self.assertIn('pyflix_consultas_por_requisicao_bucket{view="v",le="0"} 1', texto)
+        self.assertIn('pyflix_consultas_por_requisicao_bucket{view="v",le="5"} 3', texto)
+        self.assertIn('pyflix_consultas_por_requisicao_bucket{view="v",le="+Inf"} 4', texto)
+        self.assertIn('pyflix_consultas_por_requisicao_sum{view="v"} 105', texto)
+
+
+class CatalogoImportacaoTests(TestCaseComOrcamento):
+    """
+    Testes dos comandos importar_catalogo/exportar_catalogo.
+    """
+
+    def setUp(self):
+        reiniciar_busca()
+        reiniciar_autocompletar()
+        cache.clear()
+        cache_local.limpar()
+        self.pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pasta)
+        configuracao = override_settings(MEDIA_ROOT=self.pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def registro(self, i, **kwargs):
+        dados = {
+            "identificador": f"ext-{i}",
+            "titulo": f"Importado {i}",
+            "categoria": "PROGRAMACAO",
+            "duracao": 30,
+            "descricao": "Curso importado",
+            "data_criacao": "2024-03-01",
+            "thumbnail": "thumb_filmes/importado.png",
+            "episodios": [{"titulo": "Aula 1", "link_video": f"https://videos.example.com/{i}/1"}],
+        }
+        dados.update(kwargs)
+        return dados
+
+    def importar(self, registros, formato="jsonl", **kwargs):
+        if formato == "jsonl":
+            arquivo = StringIO("".join(json.dumps(registro) + "\n" for registro in registros))
+        else:
+            arquivo = StringIO(registros)
+        erros = []
+        totais = catalogo.importar(arquivo, formato, relatar_erro=lambda *erro: erros.append(erro), **kwargs)
+        return totais, erros
+
+    def test_importacao_faz_upsert_de_filmes_e_episodios(self):
+        totais, erros = self.importar([self.registro(1), self.registro(2)])
+        self.assertEqual((totais["filmes"], totais["episodios"], erros), (2, 2, []))
+        filme = Filme.objects.get(identificador="ext-1")
+        self.assertEqual((filme.titulo_busca, str(filme.data_criacao)), ("importado 1", "2024-03-01"))
+        Filme.objects.filter(pk=filme.pk).update(visualizacoes=7)
+
+        novos_episodios = [
+            {"titulo": "Aula 1", "link_video": "https://videos.example.com/novo"},
+            {"titulo": "Aula 2", "link_video": "https://videos.example.com/1/2"},
+        ]
+        self.importar([self.registro(1, titulo="Renomeado", episodios=novos_episodios)])
+        filme.refresh_from_db()
+        self.assertEqual((filme.titulo, filme.visualizacoes), ("Renomeado", 7))  # Visualizações mantidas
+        self.assertEqual(Filme.objects.count(), 2)
+        self.assertEqual(
+            dict(filme.episodios.values_list("titulo", "link_video")),
+            {"Aula 1": "https://videos.example.com/novo", "Aula 2": "https://videos.example.com/1/2"},
+        )
+        self.assertEqual(busca.pesquisar("renomeado").object_list, [filme])
+
+    def test_registros_invalidos_sao_relatados_e_ignorados(self):
+        registros = [self.registro(1, categoria="TERROR"), self.registro(2), self.registro(3, duracao="x")]
+        totais, erros = self.importar(registros)
+        self.assertEqual((totais["filmes"], totais["erros"]), (1, 2))
+        self.assertEqual([linha for linha, _ in erros], [1, 3])
+        self.assertIn("categoria", erros[0][1])
+
+    def test_consultas_por_lote_nao_crescem_com_os_registros(self):
+        with CaptureQueriesContext(connection) as poucos:
+            self.importar([self.registro(i) for i in range(3)])
+        with CaptureQueriesContext(connection) as muitos:
+            self.importar([self.registro(i) for i in range(100, 160)])
+        self.assertEqual(len(poucos), len(muitos))
+
+    def test_exportacao_csv_e_reimportacao(self):
+        self.importar([self.registro(1), self.registro(2, episodios=[])])
+        saida = StringIO()
+        call_command("exportar_catalogo", "--formato", "csv", stdout=saida)
+        csv_exportado = saida.getvalue()
+        self.assertEqual(len(csv_exportado.splitlines()), 3)  # Cabeçalho, filme com episódio e sem episódios
+
+        Filme.objects.all().delete()
+        totais, erros = self.importar(csv_exportado, "csv")
+        self.assertEqual((totais["filmes"], totais["episodios"], erros), (2, 1, []))
+        self.assertEqual(
+            list(Filme.objects.order_by("identificador").values_list("identificador", "titulo")),
+            [("ext-1", "Importado 1"), ("ext-2", "Importado 2")],
+        )
+
+    def test_episodio_com_video_enviado_sobrevive_a_exportacao(self):
+        self.importar([self.registro(1)])
+        filme = Filme.objects.get()
+        Episodio.objects.create(filme=filme, titulo="Aula 2", video="episodios/aula2.mp4")
+        for formato in ("jsonl", "csv"):
+            saida = StringIO()
+            call_command("exportar_catalogo", "--formato", formato, stdout=saida)
+            Filme.objects.all().delete()
+            totais, erros = self.importar(saida.getvalue(), formato) if formato == "csv" else self.importar(
+                [json.loads(linha) for linha in saida.getvalue().splitlines()]
+            )
+            self.assertEqual((totais["filmes"], totais["episodios"], erros), (1, 2, []), formato)
+            self.assertEqual(
+                dict(Episodio.objects.values_list("titulo", "video")),
+                {"Aula 1": "", "Aula 2": "episodios/aula2.mp4"},
+                formato,
+            )
+
+        # Sem a chave "video", o arquivo já enviado é mantido; sem link e sem arquivo, é inválido
+        self.importar([self.registro(1, episodios=[{"titulo": "Aula 2", "link_video": "https://example.com/2"}])])
+        self.assertEqual(Episodio.objects.get(titulo="Aula 2").video.name, "episodios/aula2.mp4")
+        _, erros = self.importar([self.registro(3, episodios=[{"titulo": "Aula 1", "video": ""}])])
+        self.assertEqual(len(erros), 1)
+
+    def test_thumbnail_remota_e_baixada_uma_vez(self):
+        png = io.BytesIO()
+        Image.new("RGB", (4, 4), (0, 0, 200)).save(png, "PNG")
+        resposta = mock.MagicMock()
+        resposta.__enter__.return_value.read.return_value = png.getvalue()
+        url = "https://imagens.example.com/capa.png"
+        with mock.patch("filme.catalogo.urlopen", return_value=resposta) as baixar:
+            self.importar([self.registro(1, thumbnail=url)])
+            self.importar([self.registro(1, thumbnail=url)])
+        self.assertEqual(baixar.call_count, 1)
+        filme = Filme.objects.get()
+        self.assertTrue(filme.thumbnail.name.startswith("thumb_filmes/importadas/"))
+        self.assertTrue(default_storage.exists(filme.thumbnail.name))
+
+        # Conteúdo que não é imagem: o filme é relatado e não é importado
+        resposta.__enter__.return_value.read.return_value = b"<html>"
+        with mock.patch("filme.catalogo.urlopen", return_value=resposta):
+            totais, erros = self.importar([self.registro(2, thumbnail="https://imagens.example.com/x.png")])
+        self.assertEqual((totais["filmes"], len(erros)), (0, 1))
+
+
+class IndicesTests(TestCaseComOrcamento):
+    """
+    Testes da verificação dos planos das consultas quentes (EXPLAIN).
+    """
+
+    def setUp(self):
+        reiniciar_busca()
+        reiniciar_autocompletar()
+        cache.clear()
+        cache_local.limpar()
+        benchmark.popular(filmes=60, episodios_por_filme=2, usuarios=10, vistos_por_usuario=3)
+
+    def test_consultas_quentes_usam_indice(self):
+        resultados = indices.verificar()
+        self.assertEqual([r["nome"] for r in resultados], [c.nome for c in indices.CONSULTAS])
+        for resultado in resultados:
+            self.assertEqual(resultado["problemas"], [], resultado["plano"])
+            self.assertTrue(resultado["indices"], resultado["nome"])
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "DROP INDEX transacional do SQLite")
+    def test_detecta_regressao_sem_indice(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP INDEX filme_data_criacao_desc_idx")
+        # LIMIT diferente do trilho: o sqlite3 reaproveita o EXPLAIN já preparado
+        # para o mesmo SQL sem perceber a remoção do índice
+        consulta = indices.ConsultaQuente(
+            "recentes", "teste", lambda a: Filme.objects.order_by("-data_criacao")[:7], ordenada=True
+        )
+        problemas = indices.verificar([consulta])[0]["problemas"]
+        self.assertIn("leitura sequencial de filme_filme", problemas)
+        self.assertIn("ordenação fora do índice", problemas)
+
+    def test_analisar_plano_postgres(self):
+        plano = (
+            "Limit  (cost=0.28..0.61 rows=8 width=8)\n"
+            "  ->  Index Scan Backward using filme_data_criacao_desc_idx on filme_filme"
+        )
+        self.assertEqual(
+            indices.analisar(plano, "postgresql", True), ([], ["filme_data_criacao_desc_idx"])
+        )
+        plano = "Limit\n  ->  Sort\n        ->  Seq Scan on filme_filme"
+        self.assertEqual(
+            indices.analisar(plano, "postgresql", True)[0],
+            ["leitura sequencial de filme_filme", "ordenação fora do índice"],
+        )
+
+    def test_verificar_sem_historico(self):
+        HistoricoVisualizacao.objects.all().delete()
+        with self.assertRaises(ValueError):
+            indices.verificar()
+
+
+class EmAltaTests(TestCaseComOrcamento):
+    """
+    Testes do ranking "Em Alta" (baldes por hora e decaimento exponencial).
+    """
+
+    def setUp(self):
+        cache.clear()
+        cache_local.limpar()
+        self.agora = datetime(2026, 10, 18, 12, 30, tzinfo=dt_timezone.utc)
+        self.usuario = Usuario.objects.create_user(username="ana", password="senha")
+
+    def publicar(self, filme, instante, quantidade=1):
+        """Processa 'quantidade' visualizações do filme no instante, como a fila de eventos."""
+        processar_visualizacoes([
+            {"usuario": self.usuario.pk, "filme": filme.pk, "instante": instante.isoformat()}
+        ] * quantidade)
+
+    def test_visualizacoes_somadas_por_hora(self):
+        filme = criar_filme()
+        self.publicar(filme, self.agora, 2)
+        self.publicar(filme, self.agora.replace(minute=59))  # Mesmo balde, balde já existente
+        self.publicar(filme, self.agora - timedelta(hours=1))
+        self.assertEqual(
+            list(VisualizacaoHora.objects.values_list("hora", "quantidade")),
+            [(datetime(2026, 10, 18, 12, tzinfo=dt_timezone.utc), 3),
+             (datetime(2026, 10, 18, 11, tzinfo=dt_timezone.utc), 1)],
+        )
+
+    def test_decaimento_favorece_visualizacoes_recentes(self):
+        antigo = criar_filme(titulo="Antigo", visualizacoes=10_000)
+        recente = criar_filme(titulo="Recente")
+        hora = em_alta.truncar_hora(self.agora)
+        self.publicar(antigo, hora - timedelta(hours=72), 100)  # Três meias-vidas: vale 12,5
+        self.publicar(recente, hora, 20)
+
+        pontuacoes = em_alta.pontuacoes(hora)
+        self.assertAlmostEqual(pontuacoes[antigo.pk], 12.5)
+        self.assertAlmostEqual(pontuacoes[recente.pk], 20)
+        self.assertEqual(
+            [filme_id for filme_id, _ in em_alta.calcular_em_alta(agora=hora)], [recente.pk, antigo.pk]
+        )
+
+    def test_fluxo_sintetico_igual_ao_calculo_direto(self):
+        aleatorio = random.Random(7)
+        filmes = [criar_filme(titulo=f"Filme {i}") for i in range(6)]
+        esperado = {}
+        for _ in range(300):
+            # Popularidade desigual e instantes espalhados por dez dias (parte fora da janela)
+            filme = filmes[min(int(aleatorio.expovariate(0.7)), len(filmes) - 1)]
+            instante = self.agora - timedelta(minutes=aleatorio.randrange(60 * 24 * 10))
+            self.publicar(filme, instante)
+            hora = em_alta.truncar_hora(instante)
+            if hora >= em_alta.inicio_janela(self.agora):
+                idade = (self.agora - hora).total_seconds() / 3600
+                esperado[filme.pk] = esperado.get(filme.pk, 0) + 0.5 ** (idade / 24)
+
+        ranking = em_alta.calcular_em_alta(quantidade=3, agora=self.agora)
+        melhores = sorted(esperado.items(), key=lambda item: -item[1])[:3]
+        self.assertEqual([filme_id for filme_id, _ in ranking], [filme_id for filme_id, _ in melhores])
+        for (_, pontuacao), (_, esperada) in zip(ranking, melhores):
+            self.assertAlmostEqual(pontuacao, esperada)
+
+        self.assertGreater(em_alta.remover_baldes_antigos(self.agora), 0)
+        self.assertFalse(VisualizacaoHora.objects.filter(hora__lt=em_alta.inicio_janela(self.agora)).exists())
+        self.assertEqual(em_alta.calcular_em_alta(quantidade=3, agora=self.agora), ranking)
+
+    def test_trilho_le_ranking_gravado(self):
+        antigo = criar_filme(titulo="Antigo", visualizacoes=10_000)
+        recente = criar_filme(titulo="Recente")
+        request = RequestFactory().get("/")
+        # Sem ranking calculado, o trilho usa o total de visualizações
+        self.assertEqual(list(lista_filmes_em_alta(request)["lista_filmes_em_alta"])[0], antigo)
+
+        self.assertEqual(em_alta.gravar_em_alta([(recente.pk, 3.0), (antigo.pk, 1.0)]), 2)
+        cache.clear()
+        cache_local.limpar()
+        with self.assertNumQueries(1):
+            trilho = list(lista_filmes_em_alta(request)["lista_filmes_em_alta"])
+        self.assertEqual(trilho, [recente, antigo])
+        self.assertEqual(async_to_sync(em_alta.afilmes_em_alta)(8), [recente, antigo])
+
+    def test_comando_calcular_em_alta(self):
+        filme = criar_filme()
+        self.publicar(filme, timezone.now())
+        self.publicar(filme, timezone.now() - timedelta(days=30))
+        saida = StringIO()
+        call_command("calcular_em_alta", stdout=saida)
+        self.assertIn("1 filmes em alta gravados (1 baldes antigos removidos)", saida.getvalue())
+        self.assertEqual(list(FilmeEmAlta.objects.values_list("filme", "posicao")), [(filme.pk, 0)])
+
+
+class FiltroEmailsTests(TestCaseComOrcamento):
+    """
+    Testes da verificação de email da página inicial (filtro de Bloom e
+    índice do email normalizado) e do limite de taxa por IP.
+    """
+
+    def setUp(self):
+        cache.clear()
+        cache_local.limpar()
+        registro_metricas.limpar()
+        limitador_taxa.limpar()
+        reiniciar_filtro_emails()
+        Usuario.objects.create_user(username="ana", email="Ana@Example.com", password="senha")
+
+    def test_filtro_bloom_sem_falsos_negativos(self):
+        filtro = FiltroBloom(1000, 0.01)
+        for i in range(1000):
+            filtro.adicionar(f"usuario{i}@example.com")
+        self.assertTrue(all(f"usuario{i}@example.com" in filtro for i in range(1000)))
+        falsos_positivos = sum(f"outro{i}@example.com" in filtro for i in range(5000))
+        self.assertLess(falsos_positivos, 5000 * 0.03)
+
+    def test_email_novo_nao_consulta_o_banco(self):
+        self.assertTrue(email_cadastrado(" ana@example.COM "))  # Constrói o filtro e confirma no banco
+        with self.assertNumQueries(0):
+            self.assertFalse(email_cadastrado("bia@example.com"))
+        with self.assertNumQueries(1):
+            self.assertTrue(email_cadastrado("ANA@example.com"))
+        self.assertEqual(
+            registro_metricas.contador("pyflix_filtro_emails_total", resultado="evitada"), 1
+        )
+
+    def test_usuario_criado_entra_no_filtro(self):
+        email_cadastrado("ana@example.com")
+        with self.captureOnCommitCallbacks(execute=True):
+            Usuario.objects.create_user(username="bia", email="bia@example.com", password="senha")
+        with self.assertNumQueries(1):  # Filtro continua atual: só a confirmação no banco
+            self.assertTrue(email_cadastrado("bia@example.com"))
+
+    def test_filtro_defasado_consulta_o_banco(self):
+        email_cadastrado("ana@example.com")
+        # Usuário criado por outro processo: só a versão compartilhada muda
+        Usuario.objects.create_user(username="bia", email="bia@example.com", password="senha")
+        invalidar_usuarios()
+        with mock.patch.object(filtro_emails, "_reconstruir_em_segundo_plano") as reconstruir:
+            self.assertTrue(email_cadastrado("bia@example.com"))
+        reconstruir.assert_called_once()
+
+    def test_homepage_direciona_pelo_email(self):
+        resposta = self.client.post(reverse("filme:homepage"), {"email": "ANA@example.com"}, secure=True)
+        self.assertRedirects(resposta, reverse("filme:login"), fetch_redirect_response=False)
+        resposta = self.client.post(reverse("filme:homepage"), {"email": "bia@example.com"}, secure=True)
+        self.assertRedirects(resposta, reverse("filme:criar_conta"), fetch_redirect_response=False)
+
+    @override_settings(LIMITE_TAXA={"homepage": {"por_minuto": 6, "rajada": 3}})
+    def test_limite_taxa_por_ip(self):
+        url = reverse("filme:homepage")
+        for _ in range(3):
+            resposta = self.client.post(url, {"email": "bia@example.com"}, secure=True)
+            self.assertEqual(resposta.status_code, 302)
+        with self.assertNumQueries(0):
+            resposta = self.client.post(url, {"email": "bia@example.com"}, secure=True)
+        self.assertEqual(resposta.status_code, 429)
+        self.assertEqual(resposta["Retry-After"], "10")
+        self.assertEqual(registro_metricas.contador("pyflix_limite_taxa_total", view="homepage"), 1)
+        # Outro IP tem o próprio balde; o GET da página não é limitado
+        resposta = self.client.post(url, {"email": "bia@example.com"}, secure=True, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(resposta.status_code, 302)
+        self.assertEqual(self.client.get(url, secure=True).status_code, 200)
+
+    @override_settings(LIMITE_TAXA={"homepage": {"por_minuto": 6, "rajada": 1}}, LIMITE_TAXA_PROXIES=1)
+    def test_limite_taxa_atras_de_proxy(self):
+        url = reverse("filme:homepage")
+        for ip, esperado in (("1.1.1.1", 302), ("1.1.1.1", 429), ("2.2.2.2", 302)):
+            # O cliente pode forjar o início do cabeçalho; vale o endereço acrescentado pelo proxy
+            resposta = self.client.post(
+                url, {"email": "bia@example.com"}, secure=True, HTTP_X_FORWARDED_FOR=f"9.9.9.9, {ip}"
+            )
+            self.assertEqual(resposta.status_code, esperado, ip)
+
+    def test_limitador_repoe_tokens(self):
+        limitador = LimitadorTaxa(max_clientes=2)
+        self.assertEqual(limitador.consumir("a", 60, 1, agora=0), 0)
+        self.assertAlmostEqual(limitador.consumir("a", 60, 1, agora=0.5), 0.5)
+        self.assertEqual(limitador.consumir("a", 60, 1, agora=1.5), 0)  # Um token por segundo
+        limitador.consumir("b", 60, 1, agora=2)
+        limitador.consumir("c", 60, 1, agora=2)  # Acima do teto: descarta "a"
+        self.assertNotIn("a", limitador._baldes)
+
+
+class EstilosTests(TestCaseComOrcamento):
+    """
+    Testes da folha de estilos compilada, dos ícones embutidos e dos
+    arquivos estáticos com hash e pré-comprimidos.
+    """
+
+    def test_regras_com_variantes(self):
+        css = estilos.gerar_css({"text-center", "md:text-left", "hover:bg-red-700", "w-1/2", "space-x-5"})
+        utilitarios = css.split("@layer utilities")[1]
+        self.assertIn(".w-1\\/2{width:50%}", utilitarios)
+        self.assertIn(".space-x-5>:not(:last-child){margin-inline-end:1.25rem}", utilitarios)
+        self.assertIn("@media (hover:hover){.hover\\:bg-red-700:hover{background-color:#b91c1c}}", utilitarios)
+        # Variantes de tela depois dos utilitários base: md:text-left vence text-center
+        self.assertLess(utilitarios.index(".text-center"), utilitarios.index("@media (min-width:48rem){.md\\:text-left"))
+
+    def test_ordem_dos_lados_e_classes_ignoradas(self):
+        css = estilos.gerar_css({"pl-2", "px-4", "p-1", "rounded-l-none", "rounded-md"})
+        self.assertLess(css.index(".p-1{"), css.index(".px-4{"))
+        self.assertLess(css.index(".px-4{"), css.index(".pl-2{"))
+        self.assertLess(css.index(".rounded-md{"), css.index(".rounded-l-none{"))
+        for classe in ("justufy-between", "bg-opacity-75", "text-decoration-none", "foo:flex", "bg-azul"):
+            self.assertIsNone(estilos.regra(classe))
+
+    def test_arquivo_gerado_esta_atualizado(self):
+        # Falha se algum template mudou de classes sem 'manage.py compilar_estilos'
+        call_command("compilar_estilos", verificar=True, stdout=StringIO())
+
+    def test_verificar_falha_com_utilitario_desconhecido(self):
+        self.assertEqual(
+            estilos.desconhecidas(["justufy-between", "bg-opacity-75", "md:foo", "movie_lis", "form-group", "card"]),
+            ["justufy-between", "bg-opacity-75", "md:foo"],
+        )
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta)
+        (Path(pasta) / "pagina.html").write_text('<div class="flex justufy-between movie_lis"></div>')
+        saida = Path(pasta) / "estilos.css"
+        with override_settings(ESTILOS_FONTES=[Path(pasta)], ESTILOS_SAIDA=saida):
+            call_command("compilar_estilos", stdout=StringIO(), stderr=StringIO())
+            with self.assertRaisesMessage(CommandError, "1 classes desconhecidas"):
+                call_command("compilar_estilos", verificar=True, stdout=StringIO(), stderr=StringIO())
+
+    def test_paginas_sem_css_compilado_no_navegador(self):
+        resposta = self.client.get(reverse("filme:homepage"), secure=True)
+        self.assertContains(resposta, 'href="/static/css/pyflix.css"')
+        self.assertNotContains(resposta, "tailwindcss")
+        self.assertNotContains(resposta, "ionicons")
+        self.assertNotContains(resposta, "bootstrap")
+        self.assertContains(resposta, '<svg xmlns="http://www.w3.org/2000/svg" width="1em"')
+
+    def test_icone_desconhecido(self):
+        with self.assertRaises(TemplateSyntaxError):
+            Template('{% load icones %}{% icone "nao-existe" %}').render(Context())
+
+    def test_collectstatic_gera_nomes_com_hash_e_versoes_comprimidas(self):
+        destino = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, destino)
+        with override_settings(STATIC_ROOT=destino):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            resposta = self.client.get(reverse("filme:homepage"), secure=True)
+            url = re.search(r'href="(/static/css/pyflix\.[0-9a-f]{12}\.css)"', resposta.content.decode())[1]
+            self.assertTrue((Path(destino) / url.removeprefix("/static/")).with_suffix(".css.gz").exists())
+
+            estilo = self.client.get(url, secure=True, headers={"accept-encoding": "gzip"})
+            self.assertEqual(estilo.status_code, 200)
+            self.assertEqual(estilo["Content-Encoding"], "gzip")
+            self.assertIn("immutable", estilo["Cache-Control"])
+            estilo.close()
+
+
+class GetCondicionalTests(TestCaseComOrcamento):
+    """
+    Testes do GET condicional (ETag e Last-Modified) das páginas de detalhes
+    e da pesquisa, das partes pessoais como <esi:include> e do proxy em processo.
+    """
+
+    def setUp(self):
+        cache.clear()
+        cache_local.limpar()
+        reiniciar_busca()
+        self.filme = criar_filme(titulo="Condicional", categoria="ANALISES")
+        self.usuario = Usuario.objects.create_user("rui", "rui@example.com", "senha-segura-123")
+        self.client.force_login(self.usuario)
+        self.url = reverse("filme:filme_detalhes", args=[self.filme.pk])
+
+    def revalidar(self, url, etag, **headers):
+        return self.client.get(url, secure=True, headers={"if-none-match": etag, **headers})
+
+    def test_detalhes_respondem_304_sem_renderizar(self):
+        resposta = self.client.get(self.url, secure=True)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn("Last-Modified", resposta)
+        self.assertIn("private", resposta["Cache-Control"])
+        self.assertIn("no-cache", resposta["Cache-Control"])
+
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.revalidar(self.url, resposta["ETag"])
+        self.assertEqual(resposta.status_code, 304)
+        self.assertEqual(resposta.content, b"")
+        self.assertNotIn("filme_episodio", " ".join(c["sql"] for c in consultas.captured_queries))
+        # A visualização conta mesmo sem renderizar a página
+        self.assertEqual(Filme.objects.get(pk=self.filme.pk).visualizacoes, 2)
+
+    def test_if_modified_since(self):
+        resposta = self.client.get(self.url, secure=True)
+        resposta = self.client.get(
+            self.url, secure=True, headers={"if-modified-since": resposta["Last-Modified"]}
+        )
+        self.assertEqual(resposta.status_code, 304)
+
+    def test_mudancas_do_catalogo_invalidam_os_detalhes(self):
+        esi = {"surrogate-capability": 'pyflix="ESI/1.0"'}
+        mudancas = [
+            lambda: self.filme.save(),
+            lambda: Episodio.objects.create(filme=self.filme, titulo="Ep 1", link_video="https://example.com/1"),
+            lambda: gravar_relacionados({}),
+        ]
+        for mudar in mudancas:
+            etag = self.client.get(self.url, secure=True, headers=esi)["ETag"]
+            self.assertEqual(self.revalidar(self.url, etag, **esi).status_code, 304)
+            with self.captureOnCommitCallbacks(execute=True):
+                mudar()
+            resposta = self.revalidar(self.url, etag, **esi)
+            self.assertEqual(resposta.status_code, 200)
+            self.assertNotEqual(resposta["ETag"], etag)
+
+    def test_pesquisa_responde_304_ate_o_catalogo_mudar(self):
+        url = reverse("filme:pesquisa") + "?q=condicional"
+        etag = self.client.get(url, secure=True)["ETag"]
+        with self.assertNumQueries(0):  # Nem a autenticação (sessão e usuário no cache)
+            self.assertEqual(self.revalidar(url, etag).status_code, 304)
+        self.assertNotEqual(self.client.get(reverse("filme:pesquisa") + "?q=outro", secure=True)["ETag"], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            criar_filme(titulo="Condicional 2")
+        self.assertEqual(self.revalidar(url, etag).status_code, 200)
+
+    def test_etag_sem_proxy_e_pessoal(self):
+        etag = self.client.get(reverse("filme:pesquisa") + "?q=x", secure=True)["ETag"]
+        outro = Usuario.objects.create_user("ana", "ana@example.com", "senha-segura-123")
+        self.client.force_login(outro)
+        self.assertEqual(self.revalidar(reverse("filme:pesquisa") + "?q=x", etag).status_code, 200)
+
+    def test_esi_separa_as_partes_pessoais(self):
+        esi = {"surrogate-capability": 'pyflix="ESI/1.0"'}
+        resposta = self.client.get(self.url, secure=True, headers=esi)
+        self.assertContains(resposta, '<esi:include src="/fragmentos/navbar/"/>', html=False)
+        self.assertContains(resposta, f'<esi:include src="/filmes/{self.filme.pk}/visualizacao/"/>', html=False)
+        self.assertNotContains(resposta, f"/editarperfil/{self.usuario.pk}/")
+        self.assertEqual(resposta["Surrogate-Control"], f'max-age={settings.PROXY_CACHE_MAX_AGE}, content="ESI/1.0"')
+        self.assertEqual(Filme.objects.get(pk=self.filme.pk).visualizacoes, 0)  # Quem registra é o fragmento
+
+        # A mesma página (e ETag) para outro usuário
+        etag = resposta["ETag"]
+        self.client.force_login(Usuario.objects.create_user("ana", "ana@example.com", "senha-segura-123"))
+        self.assertEqual(self.revalidar(self.url, etag, **esi).status_code, 304)
+
+        fragmento = self.client.get(reverse("filme:fragmento_visualizacao", args=[self.filme.pk]), secure=True)
+        self.assertContains(fragmento, "Visualizações: 0")  # Lido antes de gravar o evento
+        self.assertIn("no-cache", fragmento["Cache-Control"])
+
+
+@override_settings(IMAGENS_GERAR_AO_ENVIAR=False, EVENTOS_EM_SEGUNDO_PLANO=False)
+class ProxyCacheESITests(TestCase):
+    """
+    Testes do proxy com cache e ESI (filme/proxy.py) na frente da aplicação WSGI.
+    """
+
+    def setUp(self):
+        cache.clear()
+        cache_local.limpar()
+        # Como o Client de testes: a conexão (com a transação do teste) não é fechada entre requisições
+        for sinal in (request_started, request_finished):
+            sinal.disconnect(close_old_connections)
+            self.addCleanup(sinal.connect, close_old_connections)
+        self.agora = 0
+        self.proxy = ProxyCacheESI(WSGIHandler(), relogio=lambda: self.agora)
+        self.filme = criar_filme(titulo="Proxy")
+        self.caminho = reverse("filme:filme_detalhes", args=[self.filme.pk])
+
+    def sessao(self, nome):
+        """Retorna (usuário, cookie da sessão) de um novo usuário logado."""
+        usuario = Usuario.objects.create_user(nome, f"{nome}@example.com", "senha-segura-123")
+        cliente = Client()
+        cliente.force_login(usuario)
+        return usuario, f"{settings.SESSION_COOKIE_NAME}={cliente.cookies[settings.SESSION_COOKIE_NAME].value}"
+
+    def get(self, caminho, cookie=""):
+        environ = {
+            "PATH_INFO": caminho,
+            "HTTP_HOST": "testserver",
+            "HTTP_COOKIE": cookie,
+            "HTTP_IF_NONE_MATCH": '"qualquer"',
+            "wsgi.url_scheme": "https",
+        }
+        setup_testing_defaults(environ)
+        resposta = {}
+
+        def start_response(status, cabecalhos, exc_info=None):
+            resposta["status"], resposta["cabecalhos"] = status, dict(cabecalhos)
+
+        corpo = b"".join(self.proxy(environ, start_response))
+        return resposta["status"], resposta["cabecalhos"], corpo.decode()
+
+    def test_pagina_compartilhada_com_fragmentos_pessoais(self):
+        (ana, cookie_ana), (bia, cookie_bia) = self.sessao("ana"), self.sessao("bia")
+        status, cabecalhos, corpo = self.get(self.caminho, cookie_ana)
+        self.assertEqual(status, "200 OK")
+        self.assertIn(f"/editarperfil/{ana.pk}/", corpo)
+        self.assertNotIn("esi:include", corpo)
+        self.assertNotIn("Surrogate-Control", cabecalhos)
+        self.assertNotIn("ETag", cabecalhos)  # A página montada é de um usuário
+        self.assertEqual(int(cabecalhos["Content-Length"]), len(corpo.encode()))
+        origem = self.proxy.requisicoes_origem
+
+        # Outro usuário: a página vem do cache, só os fragmentos vão à aplicação
+        _, _, corpo = self.get(self.caminho, cookie_bia)
+        self.assertIn(f"/editarperfil/{bia.pk}/", corpo)
+        self.assertNotIn(f"/editarperfil/{ana.pk}/", corpo)
+        self.assertEqual(self.proxy.requisicoes_origem - origem, 3)  # Navbar, visualização e episódios
+        self.assertEqual(Filme.objects.get(pk=self.filme.pk).visualizacoes, 2)
+
+    def test_revalida_pagina_vencida(self):
+        _, cookie = self.sessao("ana")
+        self.get(self.caminho, cookie)
+        self.agora += settings.PROXY_CACHE_MAX_AGE + 1
+        with mock.patch.object(FilmeDetailView, "resposta_completa") as resposta_completa:
+            status, _, corpo = self.get(self.caminho, cookie)
+        resposta_completa.assert_not_called()  # 304 da aplicação: a página guardada continua valendo
+        self.assertEqual(status, "200 OK")
+        self.assertIn("Proxy", corpo)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.filme.titulo = "Proxy renomeado"
+            self.filme.save()
+        self.agora += settings.PROXY_CACHE_MAX_AGE + 1
+        self.assertIn("Proxy renomeado", self.get(self.caminho, cookie)[2])
+
+    def test_sem_sessao_nao_usa_o_cache(self):
+        status, cabecalhos, _ = self.get(self.caminho)
+        self.assertEqual(status, "302 Found")
+        self.get(self.caminho)
+        self.assertEqual(self.proxy.requisicoes_origem, 2)
+        self.assertEqual(self.proxy._entradas, {})
+
+
+class VideosTests(TestCaseComOrcamento):
+    """
+    Testes dos vídeos enviados dos episódios, servidos com Range (206).
+    """
+
+    def setUp(self):
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta)
+        configuracao = override_settings(VIDEOS_ROOT=pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.conteudo = bytes(range(256)) * 40  # 10240 bytes
+        filme = criar_filme(titulo="Com vídeo")
+        self.episodio = Episodio.objects.create(filme=filme, titulo="Ep 1")
+        self.episodio.video.save("ep1.mp4", ContentFile(self.conteudo))
+        self.url = reverse("filme:video_episodio", args=[self.episodio.pk])
+        self.usuario = Usuario.objects.create_user("teo", "teo@example.com", "senha-segura-123")
+        self.client.force_login(self.usuario)
+
+    def baixar(self, **headers):
+        resposta = self.client.get(self.url, secure=True, headers=headers)
+        self.addCleanup(resposta.close)
+        return resposta, b"".join(resposta.streaming_content) if resposta.streaming else resposta.content
+
+    def test_arquivo_inteiro(self):
+        resposta, corpo = self.baixar()
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(corpo, self.conteudo)
+        self.assertEqual(resposta["Content-Type"], "video/mp4")
+        self.assertEqual(resposta["Accept-Ranges"], "bytes")
+        self.assertEqual(int(resposta["Content-Length"]), len(self.conteudo))
+        self.assertIn("private", resposta["Cache-Control"])
+        self.assertFalse(Episodio(link_video="").url_video)
+        self.assertEqual(self.episodio.url_video, reverse("filme:player_episodio", args=[self.episodio.pk]))
+
+    def test_intervalos(self):
+        casos = {
+            "bytes=100-199": (100, 199),
+            "bytes=10000-": (10000, 10239),
+            "bytes=-40": (10200, 10239),
+            "bytes=10200-99999": (10200, 10239),
+        }
+        for intervalo, (inicio, fim) in casos.items():
+            resposta, corpo = self.baixar(range=intervalo)
+            self.assertEqual(resposta.status_code, 206, intervalo)
+            self.assertEqual(resposta["Content-Range"], f"bytes {inicio}-{fim}/10240")
+            self.assertEqual(int(resposta["Content-Length"]), fim - inicio + 1)
+            self.assertEqual(corpo, self.conteudo[inicio:fim + 1])
+
+    def test_intervalos_ignorados_e_invalidos(self):
+        for intervalo in ("bytes=0-10,20-30", "itens=0-10", "bytes=50-10", "bytes=-"):
+            self.assertEqual(intervalo_pedido(intervalo, 100), None, intervalo)
+            self.assertEqual(self.baixar(range=intervalo)[0].status_code, 200)
+        resposta, _ = self.baixar(range="bytes=10240-")
+        self.assertEqual(resposta.status_code, 416)
+        self.assertEqual(resposta["Content-Range"], "bytes */10240")
+
+    def test_if_range_e_get_condicional(self):
+        completa, _ = self.baixar()
+        self.assertEqual(self.baixar(range="bytes=0-9", if_range=completa["ETag"])[0].status_code, 206)
+        self.assertEqual(self.baixar(range="bytes=0-9", if_range=completa["Last-Modified"])[0].status_code, 206)
+        # Outra versão do arquivo: o cliente recebe o arquivo inteiro
+        self.assertEqual(self.baixar(range="bytes=0-9", if_range='"outra"')[0].status_code, 200)
+        self.assertEqual(self.baixar(if_none_match=completa["ETag"])[0].status_code, 304)
+
+    def test_intervalo_ate_o_fim_usa_o_file_wrapper(self):
+        """Sob gunicorn, o arquivo vai ao wsgi.file_wrapper (sendfile) já na posição do intervalo."""
+        posicoes = []
+
+        def file_wrapper(arquivo, tamanho_bloco):
+            posicoes.append(arquivo.tell())
+            arquivo.close()
+            return []
+
+        environ = {
+            "PATH_INFO": self.url,
+            "HTTP_HOST": "testserver",
+            "HTTP_RANGE": "bytes=4096-",
+            "HTTP_COOKIE": f"{settings.SESSION_COOKIE_NAME}={self.client.cookies[settings.SESSION_COOKIE_NAME].value}",
+            "wsgi.url_scheme": "https",
+            "wsgi.file_wrapper": file_wrapper,
+        }
+        setup_testing_defaults(environ)
+        cabecalhos = {}
+        for sinal in (request_started, request_finished):
+            sinal.disconnect(close_old_connections)
+            self.addCleanup(sinal.connect, close_old_connections)
+        WSGIHandler()(environ, lambda status, lista: cabecalhos.update(lista, status=status))
+        self.assertEqual(cabecalhos["status"], "206 Partial Content")
+        self.assertEqual(cabecalhos["Content-Length"], str(10240 - 4096))
+        self.assertEqual(posicoes, [4096])
+
+    @override_settings(VIDEOS_X_ACCEL_REDIRECT="/videos-internos/")
+    def test_x_accel_redirect(self):
+        resposta, corpo = self.baixar(range="bytes=0-9")
+        self.assertEqual(resposta.status_code, 200)  # O proxy trata o Range
+        self.assertEqual(resposta["X-Accel-Redirect"], f"/videos-internos/{self.episodio.video.name}")
+        self.assertEqual(corpo, b"")
+
+    def test_exige_login_e_video(self):
+        sem_video = Episodio.objects.create(filme=self.episodio.filme, titulo="Ep 2", link_video="https://example.com/2")
+        self.assertEqual(sem_video.url_video, "https://example.com/2")
+        resposta = self.client.get(reverse("filme:video_episodio", args=[sem_video.pk]), secure=True)
+        self.assertEqual(resposta.status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url, secure=True).status_code, 302)
+
+
+@override_settings(PROGRESSO_DESCARGA_INTERVALO=3600, PROGRESSO_DESCARGA_LIMITE=1000)
+class ProgressoEpisodiosTests(TestCaseComOrcamento):
+    """
+    Testes dos heartbeats do player, agrupados em memória, e das posições de retomada.
+    """
+
+    def setUp(self):
+        cache.clear()
+        cache_local.limpar()
+        buffer_progresso.limpar()
+        self.addCleanup(buffer_progresso.limpar)
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta)
+        configuracao = override_settings(VIDEOS_ROOT=pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.filme = criar_filme(titulo="Série")
+        self.episodio = Episodio.objects.create(filme=self.filme, titulo="Ep 1")
+        self.episodio.video.save("ep1.mp4", ContentFile(b"0" * 100))
+        self.outro = Episodio.objects.create(filme=self.filme, titulo="Ep 2", link_video="https://example.com/2")
+        self.usuario = Usuario.objects.create_user("lia", "lia@example.com", "senha-segura-123")
+        self.client.force_login(self.usuario)
+        self.detalhes = reverse("filme:filme_detalhes", args=[self.filme.pk])
+
+    def heartbeat(self, episodio, posicao, duracao=600):
+        return self.client.post(
+            reverse("filme:progresso_episodio", args=[episodio.pk]),
+            {"posicao": posicao, "duracao": duracao},
+            secure=True,
+        )
+
+    def test_heartbeat_nao_vai_ao_banco(self):
+        self.heartbeat(self.episodio, 10)  # Guarda o usuário no cache da autenticação
+        with self.assertNumQueries(0):
+            resposta = self.heartbeat(self.episodio, 30)
+        self.assertEqual(resposta.status_code, 204)
+        self.assertEqual(buffer_progresso.pendentes(self.usuario.pk), {self.episodio.pk: (30.0, 600.0)})
+        self.assertFalse(ProgressoEpisodio.objects.exists())
+
+    def test_heartbeat_invalido(self):
+        for dados in ({"posicao": "x", "duracao": 10}, {"posicao": 1}, {"posicao": "nan", "duracao": 10},
+                      {"posicao": -1, "duracao": 10}, {"posicao": 1, "duracao": 0}):
+            resposta = self.client.post(
+                reverse("filme:progresso_episodio", args=[self.episodio.pk]), dados, secure=True
+            )
+            self.assertEqual(resposta.status_code, 400, dados)
+        self.assertEqual(buffer_progresso.total_pendente(), 0)
+        self.client.logout()
+        self.assertEqual(self.heartbeat(self.episodio, 30).status_code, 302)
+
+    def test_heartbeats_repetidos_viram_um_upsert(self):
+        for posicao in range(0, 300, 10):
+            self.heartbeat(self.episodio, posicao)
+        self.heartbeat(self.outro, 50)
+        self.assertEqual(buffer_progresso.total_pendente(), 2)
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(buffer_progresso.descarregar(), 2)
+        escritas = [c["sql"] for c in consultas.captured_queries if c["sql"].startswith("INSERT")]
+        self.assertEqual(len(escritas), 1)
+        self.assertEqual(buffer_progresso.total_pendente(), 0)
+
+        self.heartbeat(self.episodio, 310)
+        buffer_progresso.descarregar()
+        self.assertEqual(
+            dict(ProgressoEpisodio.objects.values_list("episodio_id", "posicao")),
+            {self.episodio.pk: 310.0, self.outro.pk: 50.0},
+        )
+
+    def test_limite_dispara_a_gravacao(self):
+        with override_settings(PROGRESSO_DESCARGA_LIMITE=2):
+            self.heartbeat(self.episodio, 10)
+            self.assertFalse(ProgressoEpisodio.objects.exists())
+            self.heartbeat(self.outro, 20)
+        self.assertEqual(ProgressoEpisodio.objects.count(), 2)
+        self.assertEqual(buffer_progresso.total_pendente(), 0)
+
+    def test_episodios_removidos_sao_descartados(self):
+        self.heartbeat(self.outro, 20)
+        self.heartbeat(self.episodio, 10)
+        self.outro.delete()
+        self.assertEqual(buffer_progresso.descarregar(), 1)
+        self.assertEqual(list(ProgressoEpisodio.objects.values_list("episodio_id", flat=True)), [self.episodio.pk])
+
+    def test_falha_na_gravacao_devolve_ao_buffer(self):
+        buffer = BufferProgresso()
+        buffer.registrar(self.usuario.pk, self.episodio.pk, 10, 600)
+        with mock.patch.object(ProgressoEpisodio.objects, "registrar_varios", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                buffer.descarregar()
+        self.assertEqual(buffer.pendentes(self.usuario.pk), {self.episodio.pk: (10, 600)})
+        self.assertEqual(buffer.descarregar(), 1)
+
+    def test_falha_na_gravacao_nao_chega_ao_heartbeat(self):
+        with override_settings(PROGRESSO_DESCARGA_LIMITE=1), \
+                mock.patch.object(ProgressoEpisodio.objects, "registrar_varios", side_effect=DatabaseError), \
+                self.assertLogs("filme.progresso", "ERROR"):
+            self.assertEqual(self.heartbeat(self.episodio, 10).status_code, 204)
+        self.assertEqual(buffer_progresso.pendentes(self.usuario.pk), {self.episodio.pk: (10.0, 600.0)})
+
+    @override_settings(EVENTOS_EM_SEGUNDO_PLANO=True, PROGRESSO_DESCARGA_INTERVALO=5)
+    def test_temporizador_grava_a_ultima_posicao_da_sessao(self):
+        """A posição é gravada ao fim do intervalo, sem esperar outro heartbeat."""
+        buffer = BufferProgresso()
+        with mock.patch("filme.progresso.threading.Timer") as temporizador, \
+                mock.patch("filme.progresso.connection.close"):
+            buffer.registrar(self.usuario.pk, self.episodio.pk, 10, 600)
+            buffer.registrar(self.usuario.pk, self.episodio.pk, 20, 600)
+            temporizador.assert_called_once()  # Um único agendamento por intervalo
+            intervalo, ao_fim = temporizador.call_args.args
+            self.assertEqual(intervalo, 5)
+            ao_fim()  # Roda aqui mesmo, dentro da transação do teste
+        self.assertEqual(buffer.total_pendente(), 0)
+        self.assertEqual(ProgressoEpisodio.objects.get().posicao, 20)
+
+    def test_detalhes_mostram_posicao_pendente_e_gravada(self):
+        self.heartbeat(self.episodio, 65)
+        resposta = self.client.get(self.detalhes, secure=True)
+        self.assertContains(resposta, "Continuar de 1:05")
+        self.assertNotContains(resposta, "Continuar de 0:")
+
+        buffer_progresso.descarregar()
+        self.assertContains(self.client.get(self.detalhes, secure=True), "Continuar de 1:05")
+        outro_usuario = Usuario.objects.create_user("ana", "ana@example.com", "senha-segura-123")
+        self.client.force_login(outro_usuario)
+        self.assertNotContains(self.client.get(self.detalhes, secure=True), "Continuar de")
+
+    def test_gravacao_muda_a_etag_dos_detalhes(self):
+        etag = self.client.get(self.detalhes, secure=True)["ETag"]
+        self.heartbeat(self.episodio, 65)
+        buffer_progresso.descarregar()
+        resposta = self.client.get(self.detalhes, secure=True, headers={"if-none-match": etag})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertContains(resposta, "Continuar de 1:05")
+        resposta = self.client.get(self.detalhes, secure=True, headers={"if-none-match": resposta["ETag"]})
+        self.assertEqual(resposta.status_code, 304)
+
+    def test_fragmento_dos_episodios(self):
+        self.heartbeat(self.episodio, 3725, duracao=7200)
+        resposta = self.client.get(reverse("filme:fragmento_episodios", args=[self.filme.pk]), secure=True)
+        self.assertContains(resposta, "Continuar de 1:02:05")
+        self.assertContains(resposta, "Episódio 2: Ep 2")
+
+    def test_player(self):
+        self.heartbeat(self.episodio, 42.5)
+        resposta = self.client.get(reverse("filme:player_episodio", args=[self.episodio.pk]), secure=True)
+        self.assertContains(resposta, 'data-posicao="42.5"')
+        self.assertContains(resposta, reverse("filme:progresso_episodio", args=[self.episodio.pk]))
+        resposta = self.client.get(reverse("filme:player_episodio", args=[self.outro.pk]), secure=True)
+        self.assertRedirects(resposta, "https://example.com/2", fetch_redirect_response=False)
+
+
+class AutenticacaoEmCacheTests(TestCaseComOrcamento):
+    """
+    Testes das sessões (cached_db) e do usuário autenticado no cache.
+    """
+
+    def setUp(self):
+        cache.clear()
+        cache_local.limpar()
+        self.usuario = Usuario.objects.create_user("bia", "bia@example.com", "senha-segura-123")
+        self.client.force_login(self.usuario)
+        self.url = reverse("filme:editar_perfil", args=[self.usuario.pk])
+
+    def test_usuario_visto_nao_consulta_o_banco(self):
+        with self.assertNumQueries(2):  # Usuário da sessão e objeto editado (a sessão veio do cache)
+            self.assertEqual(self.client.get(self.url, secure=True).context["user"], self.usuario)
+        with self.assertNumQueries(1):  # Só o objeto editado: o usuário da sessão veio do cache
+            self.client.get(self.url, secure=True)
+
+    def test_editar_perfil_invalida_o_usuario(self):
+        self.client.get(self.url, secure=True)
+        self.client.post(
+            self.url, {"first_name": "Beatriz", "last_name": "", "email": "bia@example.com"}, secure=True
+        )
+        self.assertEqual(self.client.get(self.url, secure=True).context["user"].first_name, "Beatriz")
+
+    def test_alterar_senha_invalida_as_outras_sessoes(self):
+        outra_sessao = Client()
+        outra_sessao.force_login(self.usuario)
+        self.assertEqual(outra_sessao.get(self.url, secure=True).status_code, 200)
+        senha_nova = "outra-senha-segura-456"
+        resposta = self.client.post(reverse("filme:alterar_senha"), {
+            "old_password": "senha-segura-123", "new_password1": senha_nova, "new_password2": senha_nova,
+        }, secure=True)
+        self.assertRedirects(resposta, reverse("filme:filmes"), fetch_redirect_response=False)
+        self.assertEqual(self.client.get(self.url, secure=True).status_code, 200)  # Sessão atualizada
+        self.assertEqual(outra_sessao.get(self.url, secure=True).status_code, 302)  # Hash antigo
+
+    def test_logout_remove_usuario_e_sessao(self):
+        self.client.get(self.url, secure=True)
+        self.assertIsNotNone(cache.get(f"pyflix:usuario:{self.usuario.pk}"))
+        sessao = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        self.client.post(reverse("filme:logout"), secure=True)
+        self.assertIsNone(cache.get(f"pyflix:usuario:{self.usuario.pk}"))
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = sessao  # Cookie antigo reapresentado
+        self.assertEqual(self.client.get(self.url, secure=True).status_code, 302)
+
+    def test_usuario_desativado_perde_a_sessao(self):
+        self.client.get(self.url, secure=True)
+        self.usuario.is_active = False
+        self.usuario.save()
+        self.assertEqual(self.client.get(self.url, secure=True).status_code, 302)
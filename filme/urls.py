@@ -1,15 +1,32 @@
 # Importações necessárias para configurar URLs
+from django.conf import settings  # VIEWS_ASSINCRONAS
 from django.contrib.auth import views as auth_views  # Views padrão de autenticação do Django
 from django.urls import path, reverse_lazy  # Funções para definir URLs e reversão lazy
 from .views import (  # Importa as views personalizadas da aplicação
+    AutocompletarView, # View JSON do autocompletar da pesquisa
     CriarConta,        # View para criação de conta
     EditarPerfil,      # View para edição de perfil
+    FragmentoEpisodiosView,       # Fragmentos pessoais incluídos pelo proxy com ESI
+    FragmentoNavbarView,
+    FragmentoVisualizacaoView,
+    FilmeDetailAssincronaView,   # Versões assíncronas das views do catálogo
     FilmeDetailView,   # View para detalhes do filme
+    HomeFilmesAssincronaView,
     HomeFilmesView,    # View da página principal de filmes
     HomePageView,      # View da página inicial
+    PesquisaFilmeAssincronaView,
     PesquisaFilmeView, # View para pesquisa de filmes
+    PlayerEpisodioView,      # Player do vídeo enviado, com a posição de retomada
+    ProgressoEpisodioView,   # Heartbeats do player
+    VideoEpisodioView, # Vídeo enviado de um episódio (Range)
 )
 
+# No deploy ASGI (VIEWS_ASSINCRONAS=True), as views do catálogo usam as versões assíncronas
+if settings.VIEWS_ASSINCRONAS:
+    HomeFilmesView = HomeFilmesAssincronaView
+    FilmeDetailView = FilmeDetailAssincronaView
+    PesquisaFilmeView = PesquisaFilmeAssincronaView
+
 # Define o namespace da aplicação para evitar conflitos de nomes
 # Permite referenciar URLs como 'filme:homepage', 'filme:login', etc.
 app_name = 'filme'
@@ -24,15 +41,53 @@ urlpatterns = [
     # Acesso: dominio.com/filmes/
     path('filmes/', HomeFilmesView.as_view(), name='filmes'),
     
+    # Fragmento JSON do catálogo para rolagem infinita
+    # Acesso: dominio.com/filmes/fragmento/?cursor=<cursor>
+    path('filmes/fragmento/', HomeFilmesView.as_view(fragmento=True), name='filmes_fragmento'),
+    
     # Página de detalhes de um filme específico
     # <int:pk> captura o ID do filme como parâmetro inteiro
     # Acesso: dominio.com/filmes/1/, dominio.com/filmes/2/, etc.
     path('filmes/<int:pk>/', FilmeDetailView.as_view(), name='filme_detalhes'),
     
+    # Fragmento com o registro e o total de visualizações do filme
+    # Incluído por <esi:include> na página de detalhes compartilhada pelo proxy
+    # Acesso: dominio.com/filmes/1/visualizacao/
+    path('filmes/<int:pk>/visualizacao/', FragmentoVisualizacaoView.as_view(), name='fragmento_visualizacao'),
+    
+    # Arquivo de vídeo enviado de um episódio, com requisições parciais (Range)
+    # Acesso: dominio.com/episodios/1/video/
+    path('episodios/<int:pk>/video/', VideoEpisodioView.as_view(), name='video_episodio'),
+    
+    # Player do vídeo enviado, retomando da última posição
+    # Acesso: dominio.com/episodios/1/
+    path('episodios/<int:pk>/', PlayerEpisodioView.as_view(), name='player_episodio'),
+    
+    # Heartbeat do player com a posição atual (POST, agrupado em memória)
+    # Acesso: dominio.com/episodios/1/progresso/
+    path('episodios/<int:pk>/progresso/', ProgressoEpisodioView.as_view(), name='progresso_episodio'),
+    
+    # Episódios do filme com as posições de retomada do usuário
+    # Incluído por <esi:include> na página de detalhes compartilhada pelo proxy
+    # Acesso: dominio.com/filmes/1/episodios/
+    path('filmes/<int:pk>/episodios/', FragmentoEpisodiosView.as_view(), name='fragmento_episodios'),
+    
     # Página de pesquisa de filmes
     # Acesso: dominio.com/pesquisa/?q=termo_pesquisa
     path('pesquisa/', PesquisaFilmeView.as_view(), name='pesquisa'),
     
+    # Fragmento JSON da pesquisa para rolagem infinita
+    # Acesso: dominio.com/pesquisa/fragmento/?q=termo&cursor=<cursor>
+    path('pesquisa/fragmento/', PesquisaFilmeView.as_view(fragmento=True), name='pesquisa_fragmento'),
+    
+    # Sugestões JSON do autocompletar da pesquisa
+    # Acesso: dominio.com/pesquisa/autocompletar/?q=prefixo
+    path('pesquisa/autocompletar/', AutocompletarView.as_view(), name='autocompletar'),
+    
+    # Navbar do usuário, incluída por <esi:include> nas páginas compartilhadas pelo proxy
+    # Acesso: dominio.com/fragmentos/navbar/
+    path('fragmentos/navbar/', FragmentoNavbarView.as_view(), name='fragmento_navbar'),
+    
     # Página de login usando a view padrão do Django
     # template_name especifica qual template usar
     # Acesso: dominio.com/login/
@@ -0,0 +1,167 @@
+# Vídeos dos episódios enviados ao Pyflix, servidos com requisições parciais (Range)
+#
+# Os arquivos ficam no disco local, fora de MEDIA_ROOT (só usuários logados
+# assistem). A resposta entrega o arquivo aberto ao servidor WSGI
+# (wsgi.file_wrapper): o gunicorn envia com os.sendfile a partir da posição
+# atual do arquivo, sem copiar os bytes para o Python. Com um proxy na
+# frente (nginx), VIDEOS_X_ACCEL_REDIRECT passa o envio inteiro para ele.
+import mimetypes  # Content-Type pelo nome do arquivo
+import os  # Tamanho e data de modificação (fstat)
+import re  # Cabeçalho Range
+from urllib.parse import quote  # Caminho interno do X-Accel-Redirect
+
+from django.conf import settings  # Pasta dos vídeos e proxy com X-Accel-Redirect
+from django.core.files.storage import FileSystemStorage, storages
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.functional import cached_property
+from django.utils.http import http_date, parse_http_date_safe
+
+_INTERVALO = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+class ArmazenamentoVideos(FileSystemStorage):
+    """
+    Storage dos vídeos: sistema de arquivos local em VIDEOS_ROOT, sem URL
+    pública (os vídeos são servidos pela view VideoEpisodioView).
+    """
+
+    @cached_property
+    def base_location(self):
+        return self._value_or_setting(self._location, settings.VIDEOS_ROOT)
+
+    def _clear_cached_properties(self, setting, **kwargs):
+        super()._clear_cached_properties(setting, **kwargs)
+        if setting == "VIDEOS_ROOT":  # Ex: pasta temporária nos testes
+            self.__dict__.pop("base_location", None)
+            self.__dict__.pop("location", None)
+
+
+def armazenamento_videos():
+    """Storage do campo Episodio.video (alias "videos" de STORAGES)."""
+    return storages["videos"]
+
+
+class IntervaloInvalido(Exception):
+    """O intervalo pedido começa depois do fim do arquivo (416)."""
+
+
+def intervalo_pedido(cabecalho, tamanho):
+    """
+    Retorna (início, fim inclusivo) do cabeçalho Range para um arquivo de
+    'tamanho' bytes, ou None se o arquivo inteiro deve ser enviado.
+
+    Cabeçalhos mal formados e pedidos de vários intervalos são ignorados
+    (o servidor pode responder 200 com o arquivo inteiro); intervalos fora
+    do arquivo levantam IntervaloInvalido.
+    """
+    valores = _INTERVALO.fullmatch(cabecalho.replace(" ", ""))
+    if valores is None or valores[1] == valores[2] == "":
+        return None
+    if valores[1] == "":  # bytes=-N: os últimos N bytes
+        sufixo = int(valores[2])
+        if sufixo == 0 or tamanho == 0:
+            raise IntervaloInvalido
+        return max(tamanho - sufixo, 0), tamanho - 1
+    inicio = int(valores[1])
+    if valores[2] and int(valores[2]) < inicio:
+        return None  # Intervalo mal formado
+    if inicio >= tamanho:
+        raise IntervaloInvalido
+    fim = int(valores[2]) if valores[2] else tamanho - 1  # bytes=N-: até o fim
+    return inicio, min(fim, tamanho - 1)
+
+
+def if_range_confere(cabecalho, etag, modificado_em):
+    """
+    Indica se o If-Range confere com a versão atual do arquivo (ETag forte
+    igual ou data igual à última modificação). Se não conferir, o cliente
+    tem outra versão e recebe o arquivo inteiro.
+    """
+    if cabecalho.startswith(('"', "W/")):
+        return cabecalho == etag  # ETags fracas nunca conferem
+    return parse_http_date_safe(cabecalho) == int(modificado_em)
+
+
+class RespostaIntervalo(FileResponse):
+    """
+    FileResponse de 'tamanho' bytes a partir da posição atual do arquivo.
+
+    Se o intervalo vai até o fim do arquivo (o caso do navegador ao avançar
+    o vídeo: "bytes=N-"), o arquivo continua disponível ao wsgi.file_wrapper
+    (envio com sendfile). Intervalos fechados são lidos em blocos, para que
+    servidores sem corte pelo Content-Length não enviem bytes a mais.
+    """
+    block_size = 64 * 1024
+
+    def __init__(self, arquivo, tamanho, ate_o_fim, **kwargs):
+        self.tamanho = tamanho
+        self.ate_o_fim = ate_o_fim
+        super().__init__(arquivo, **kwargs)
+
+    def _set_streaming_content(self, arquivo):
+        if not hasattr(arquivo, "read"):  # Conteúdo trocado depois (ex: iterador de outro middleware)
+            return super()._set_streaming_content(arquivo)
+        super()._set_streaming_content(arquivo)  # file_to_stream, fechamento e Content-Type
+        self.headers["Content-Length"] = self.tamanho
+        if not self.ate_o_fim:
+            self.file_to_stream = None
+            StreamingHttpResponse._set_streaming_content(self, self._ler(arquivo))
+
+    def _ler(self, arquivo):
+        restante = self.tamanho
+        while restante > 0:
+            bloco = arquivo.read(min(self.block_size, restante))
+            if not bloco:
+                break
+            restante -= len(bloco)
+            yield bloco
+
+
+def resposta_video(request, nome):
+    """
+    Resposta com o vídeo 'nome' do storage: inteiro (200), só o intervalo
+    pedido (206), 304/412 pelos cabeçalhos condicionais ou 416 para um
+    intervalo fora do arquivo. Levanta FileNotFoundError sem o arquivo.
+    """
+    arquivo = open(armazenamento_videos().path(nome), "rb")
+    try:
+        estado = os.fstat(arquivo.fileno())
+        etag = f'"{estado.st_size:x}-{estado.st_mtime_ns:x}"'
+        tipo = mimetypes.guess_type(nome)[0] or "application/octet-stream"
+        resposta = get_conditional_response(request, etag=etag, last_modified=int(estado.st_mtime))
+        intervalo = None
+        if resposta is None:
+            cabecalho = request.headers.get("Range", "")
+            if cabecalho and if_range_confere(request.headers.get("If-Range", etag), etag, estado.st_mtime):
+                try:
+                    intervalo = intervalo_pedido(cabecalho, estado.st_size)
+                except IntervaloInvalido:
+                    resposta = HttpResponse(status=416)
+                    resposta["Content-Range"] = f"bytes */{estado.st_size}"
+        if resposta is not None:
+            arquivo.close()
+        elif settings.VIDEOS_X_ACCEL_REDIRECT:
+            # O proxy envia o arquivo e trata o Range por conta própria
+            arquivo.close()
+            resposta = HttpResponse(content_type=tipo)
+            resposta["X-Accel-Redirect"] = settings.VIDEOS_X_ACCEL_REDIRECT + quote(nome)
+        elif intervalo is None:
+            resposta = FileResponse(arquivo, content_type=tipo)
+            resposta.block_size = RespostaIntervalo.block_size
+        else:
+            inicio, fim = intervalo
+            arquivo.seek(inicio)
+            resposta = RespostaIntervalo(
+                arquivo, fim - inicio + 1, fim == estado.st_size - 1, status=206, content_type=tipo
+            )
+            resposta["Content-Range"] = f"bytes {inicio}-{fim}/{estado.st_size}"
+    except BaseException:
+        arquivo.close()
+        raise
+
+    resposta["Accept-Ranges"] = "bytes"
+    resposta["ETag"] = etag
+    resposta["Last-Modified"] = http_date(estado.st_mtime)
+    patch_cache_control(resposta, private=True, max_age=settings.VIDEOS_MAX_AGE)
+    return resposta
@@ -1,18 +1,240 @@
 # Importações necessárias para criar views Django
-from django.contrib.auth.mixins import LoginRequiredMixin  # Mixin para views que requerem login
-from django.shortcuts import redirect, reverse  # Funções para redirecionamento e reversão de URLs
+import asyncio  # Consultas independentes das views assíncronas em paralelo
+import hashlib  # ETag da pesquisa (termo e cursor)
+import math  # Segundos inteiros do Retry-After
+
+from asgiref.sync import sync_to_async  # Chamadas síncronas (busca, contador) nas views assíncronas
+from django.conf import settings  # Timeouts dos fragmentos cacheados
+from django.contrib.auth.mixins import AccessMixin, LoginRequiredMixin  # Mixins para views que requerem login
+from django.core.cache import cache  # Consulta dos fragmentos já cacheados
+from django.core.cache.utils import make_template_fragment_key  # Chave de um {% cache %}
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse  # Filme inexistente, fragmentos e métricas
+from django.shortcuts import get_object_or_404, redirect, render, reverse  # Redirecionamento, reversão de URLs e fragmentos
+from django.template.loader import render_to_string  # Renderiza o fragmento de cards
+from django.utils.cache import get_conditional_response, patch_cache_control  # GET condicional (304)
+from django.utils.crypto import constant_time_compare  # Token do scraper de métricas
+from django.utils.decorators import method_decorator  # never_cache nos fragmentos pessoais
+from django.utils.functional import SimpleLazyObject  # Trilhos consultados só se renderizados
+from django.utils.http import http_date, quote_etag  # Cabeçalhos ETag e Last-Modified
+from django.views.decorators.cache import never_cache  # Fragmentos pessoais fora de qualquer cache
+from django.views import View  # View base para o endpoint JSON do autocompletar
 from django.views.generic import (  # Views genéricas do Django para reutilização
     DetailView,    # View para exibir detalhes de um objeto
     FormView,      # View para processar formulários
     ListView,      # View para listar objetos
+    TemplateView,  # View para renderizar um template (fragmento da navbar)
     UpdateView,    # View para atualizar objetos
 )
+from django.views.generic.base import TemplateResponseMixin  # Resposta das views assíncronas
 from .forms import CriarContaForm, HomePageForm  # Formulários personalizados da aplicação
-from .models import Filme, Usuario  # Modelos da aplicação
+from .models import Episodio, Filme, HistoricoVisualizacao, Recomendacao, Usuario  # Modelos da aplicação
+from .autocompletar import indice_autocompletar  # Índice de prefixos em memória
+from .emails import email_cadastrado  # Filtro de Bloom + índice de Lower(email)
+from .limites import ip_do_cliente, limitador_taxa  # Limite de taxa por IP (balde de tokens)
+from .busca import pesquisar  # Motor de busca do catálogo
+from .eventos import fila_eventos, registrar_visualizacao  # Gravações da página de detalhes em segundo plano
+from .cache import (  # Cache do catálogo e versões dos fragmentos
+    aestado_paginas,
+    aobter_rail,
+    aversao_catalogo,
+    aversao_historico,
+    aversao_progresso,
+    aversao_recomendacoes,
+    estado_paginas,
+    obter_rail,
+    versao_catalogo,
+    versao_historico,
+    versao_progresso,
+    versao_recomendacoes,
+)
+from .context_processors import afilmes_em_alta, afilmes_recentes  # Trilhos do catálogo (assíncronos)
+from .metricas import (  # Métricas por requisição no formato texto do Prometheus
+    CONTENT_TYPE as METRICAS_CONTENT_TYPE,
+    formatar_medidores,
+    registro_metricas,
+)
+from .paginacao import PaginaCursor, apaginar_por_cursor, paginar_por_cursor  # Paginação por cursor (keyset)
+from .progresso import aprogresso_dos_episodios, buffer_progresso, progresso_dos_episodios  # Posições de retomada
+from .relacionados import afilmes_relacionados, filmes_relacionados  # Relacionados pré-calculados
+from .videos import resposta_video  # Vídeos dos episódios com Range (206)
+
+
+# Mixins reutilizados pelas views da aplicação
+class PaginacaoCursorMixin:
+    """
+    Mixin para ListView que pagina por cursor (keyset) em vez de OFFSET.
+
+    O cursor vem do parâmetro ?cursor= e codifica os valores de ordenação
+    da última linha da página anterior. Com fragmento=True (definido no
+    as_view), a view responde com JSON contendo o HTML dos cards e o
+    próximo cursor, usado pela rolagem infinita.
+    """
+    paginate_by = 24                          # Itens por página
+    ordenacao_cursor = ("titulo", "id")       # Deve terminar em um campo único
+    fragmento = False                         # True: responde JSON para rolagem infinita
+    template_fragmento = "cards_filmes.html"  # Template dos cards do fragmento
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Substitui a paginação padrão (OFFSET) pela paginação por cursor.
+
+        Retorna a mesma tupla esperada pela ListView:
+        (paginator, page, object_list, is_paginated)
+        """
+        pagina = paginar_por_cursor(
+            queryset, self.ordenacao_cursor, self.request.GET.get("cursor"), page_size
+        )
+        return (None, pagina, pagina.object_list, pagina.has_next)
+
+    def render_to_response(self, context, **response_kwargs):
+        """
+        Renderiza a página completa ou, no modo fragmento, apenas os cards em JSON.
+        """
+        if not self.fragmento:
+            return super().render_to_response(context, **response_kwargs)
+        pagina = context["page_obj"]
+        html = render_to_string(
+            self.template_fragmento, {"filmes": pagina.object_list}, request=self.request
+        )
+        return JsonResponse({"html": html, "proximo_cursor": pagina.proximo_cursor})
+
+
+class LimiteTaxaMixin:
+    """
+    Mixin que limita, por IP, as requisições de uma view aberta a anônimos.
+
+    'limite_taxa' é a chave de settings.LIMITE_TAXA com a taxa (por_minuto)
+    e a rajada permitidas; sem essa chave, a view não é limitada. Acima do
+    limite, responde 429 com Retry-After, antes de qualquer consulta.
+    """
+    limite_taxa = None                # Chave de settings.LIMITE_TAXA
+    limite_taxa_metodos = ("POST",)   # Métodos limitados (os que consultam o banco)
+
+    def dispatch(self, request, *args, **kwargs):
+        limite = settings.LIMITE_TAXA.get(self.limite_taxa)
+        if limite and request.method in self.limite_taxa_metodos:
+            espera = limitador_taxa.consumir(
+                (self.limite_taxa, ip_do_cliente(request)), limite["por_minuto"], limite["rajada"]
+            )
+            if espera:
+                registro_metricas.incrementar("pyflix_limite_taxa_total", {"view": self.limite_taxa})
+                return HttpResponse(
+                    "Muitas tentativas. Tente novamente em instantes.",
+                    status=429,
+                    headers={"Retry-After": str(math.ceil(espera))},
+                    content_type="text/plain; charset=utf-8",
+                )
+        return super().dispatch(request, *args, **kwargs)
+
+
+def aceita_esi(request):
+    """Indica se a requisição vem de um proxy reverso que processa ESI."""
+    return "ESI/1.0" in request.headers.get("Surrogate-Capability", "")
+
+
+def resposta_condicional(request, etag, modificado_em):
+    """
+    Retorna a resposta 304 se o cliente já tem a versão atual da página
+    (If-None-Match ou, sem ele, If-Modified-Since); senão, None.
+    """
+    return get_conditional_response(
+        request, etag=quote_etag(etag), last_modified=int(modificado_em.timestamp())
+    )
+
+
+def cabecalhos_condicionais(resposta, etag, modificado_em, esi):
+    """
+    Adiciona os validadores e as regras de cache à resposta (200 ou 304).
+
+    O navegador guarda a página, mas revalida a cada navegação. Para um
+    proxy com ESI, a página (sem as partes pessoais) é compartilhada por
+    PROXY_CACHE_MAX_AGE segundos e revalidada pela ETag depois disso.
+    """
+    resposta["ETag"] = quote_etag(etag)
+    resposta["Last-Modified"] = http_date(modificado_em.timestamp())
+    patch_cache_control(resposta, private=True, no_cache=True)
+    if esi:
+        resposta["Surrogate-Control"] = f'max-age={settings.PROXY_CACHE_MAX_AGE}, content="ESI/1.0"'
+    return resposta
+
+
+def validadores_filme(filme, estado):
+    """
+    ETag (compartilhada) e última mudança da página de detalhes: o filme
+    com os episódios (atualizado_em) e as páginas do catálogo (relacionados
+    e filmes exibidos), dado o estado_paginas().
+    """
+    versao, modificadas_em = estado
+    return (
+        f"filme-{filme.pk}-{int(filme.atualizado_em.timestamp() * 1_000_000)}-{versao}",
+        max(filme.atualizado_em, modificadas_em),
+    )
+
+
+def validadores_pesquisa(request, estado):
+    """ETag (compartilhada) e última mudança de uma página da pesquisa (termo e cursor)."""
+    versao, modificadas_em = estado
+    consulta = hashlib.blake2b(request.GET.urlencode().encode(), digest_size=8).hexdigest()
+    return f"pesquisa-{versao}-{consulta}", modificadas_em
+
+
+def anexar_progresso(episodios, progressos):
+    """Anexa a cada episódio a sua posição de retomada (ou None)."""
+    for episodio in episodios:
+        episodio.progresso = progressos.get(episodio.pk)
+    return episodios
+
+
+class GetCondicionalMixin:
+    """
+    Mixin de GET condicional (ETag e Last-Modified) das páginas do catálogo.
+
+    validadores() calcula, só com dados baratos (versão das páginas no
+    cache e no máximo uma leitura pela chave), a ETag compartilhada e a
+    última mudança da página; se o cliente já tem essa versão, a resposta
+    é 304, antes das consultas da página (resposta_completa()).
+
+    Atrás de um proxy com ESI, as partes pessoais viram <esi:include>
+    ({% fragmento_pessoal %}) e a página é a mesma para todos os usuários.
+    Sem proxy, a página inteira é do usuário: a ETag inclui etag_pessoal().
+    """
+    esi = False  # A requisição vem de um proxy com ESI
+
+    def validadores(self):
+        """Retorna (ETag sem aspas, última mudança); implementado pelas subclasses."""
+        raise NotImplementedError
+
+    def etag_pessoal(self):
+        """Parte da ETag que depende do usuário (páginas sem proxy com ESI)."""
+        return f"u{self.request.user.pk}"
+
+    def nao_modificado(self):
+        """Chamado quando a resposta é 304 (ex: registrar a visualização)."""
+
+    def resposta_completa(self, request, *args, **kwargs):
+        """Renderiza a página (cliente sem a versão atual)."""
+        return super().get(request, *args, **kwargs)
+
+    def get(self, request, *args, **kwargs):
+        self.esi = aceita_esi(request)
+        etag, modificado_em = self.validadores()
+        if not self.esi:
+            etag = f"{etag}-{self.etag_pessoal()}"
+        resposta = resposta_condicional(request, etag, modificado_em)
+        if resposta is None:
+            resposta = self.resposta_completa(request, *args, **kwargs)
+        else:
+            self.nao_modificado()
+        return cabecalhos_condicionais(resposta, etag, modificado_em, self.esi)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["esi"] = self.esi  # Partes pessoais como <esi:include>
+        return context
 
 
 # Definição das views da aplicação
-class HomePageView(FormView):
+class HomePageView(LimiteTaxaMixin, FormView):
     """
     View da página inicial do site.
     
@@ -22,6 +244,7 @@ class HomePageView(FormView):
     """
     template_name = "homepage.html"  # Template a ser renderizado
     form_class = HomePageForm        # Formulário a ser usado
+    limite_taxa = "homepage"         # Verificações de email por IP (settings.LIMITE_TAXA)
 
     def get(self, request, *args, **kwargs):
         """
@@ -38,104 +261,457 @@ class HomePageView(FormView):
         """
         Define para onde redirecionar após envio bem-sucedido do formulário.
         
-        Verifica se o email informado já existe no sistema:
+        Verifica se o email informado já existe no sistema (sem diferenciar
+        maiúsculas; emails certamente novos nem chegam ao banco):
         - Se existe: direciona para página de login
         - Se não existe: direciona para página de criação de conta
         """
         email = self.request.POST.get("email")  # Obtém email do formulário
-        usuarios = Usuario.objects.filter(email=email)  # Busca usuários com esse email
-        if usuarios.exists():
+        if email_cadastrado(email):
             return reverse("filme:login")        # Email existe -> login
         else:
             return reverse("filme:criar_conta")  # Email novo -> criar conta
 
 
-class HomeFilmesView(LoginRequiredMixin, ListView):
+class HomeFilmesView(LoginRequiredMixin, PaginacaoCursorMixin, ListView):
     """
     View da página principal de filmes (área logada).
     
-    Exibe a lista de todos os filmes disponíveis.
+    Exibe o catálogo paginado por cursor (titulo, id) e os filmes
+    vistos recentemente pelo usuário.
     Requer que o usuário esteja logado (LoginRequiredMixin).
     """
     model = Filme                           # Modelo a ser listado
     template_name = "homefilmes.html"       # Template a ser renderizado
     context_object_name = "lista_filmes"    # Nome da variável no template
 
+    def paginate_queryset(self, queryset, page_size):
+        """
+        A primeira página do catálogo é igual para todos os usuários:
+        vem do cache do catálogo em vez de uma consulta por requisição.
+        """
+        if self.fragmento or self.request.GET.get("cursor"):
+            return super().paginate_queryset(queryset, page_size)
+        pagina = obter_rail(
+            "catalogo_inicio",
+            lambda: paginar_por_cursor(queryset, self.ordenacao_cursor, None, page_size),
+        )
+        return (None, pagina, pagina.object_list, pagina.has_next)
 
-class FilmeDetailView(LoginRequiredMixin, DetailView):
+    def get_context_data(self, **kwargs):
+        """
+        Adiciona os trilhos "Continuar Assistindo" e "Recomendados para você"
+        e as versões que chaveiam os fragmentos cacheados do template.
+
+        Os filmes vistos vêm de uma única consulta limitada e ordenada
+        pela visualização mais recente do usuário; as recomendações, da
+        tabela pré-calculada pelo comando 'calcular_recomendacoes'. As duas
+        listas são lazy: só consultam o banco se o fragmento do trilho não
+        estiver no cache.
+        """
+        context = super().get_context_data(**kwargs)
+        if not self.fragmento:  # Os fragmentos de rolagem só precisam dos cards
+            usuario = self.request.user
+            context["filmes_vistos"] = SimpleLazyObject(
+                lambda: HistoricoVisualizacao.objects.filmes_recentes(usuario)
+            )
+            context["filmes_recomendados"] = SimpleLazyObject(
+                lambda: Recomendacao.objects.filmes(usuario)
+            )
+            # Chaves dos fragmentos ({% cache %}): trocam quando o conteúdo muda
+            context["versao_catalogo"] = versao_catalogo()
+            context["versao_historico"] = versao_historico(usuario.pk)
+            context["versao_recomendacoes"] = versao_recomendacoes()
+            context["timeout_catalogo"] = settings.CATALOGO_CACHE_TIMEOUT
+            context["timeout_fragmentos"] = settings.FRAGMENTOS_CACHE_TIMEOUT
+        return context
+
+
+class FilmeDetailView(LoginRequiredMixin, GetCondicionalMixin, DetailView):
     """
     View para exibir detalhes de um filme específico.
     
     Além de exibir as informações do filme, também:
-    - Incrementa o contador de visualizações
-    - Adiciona o filme à lista de filmes vistos pelo usuário
-    - Busca filmes relacionados da mesma categoria
+    - Registra a visualização (contador e histórico) pela fila de eventos
+    - Exibe os filmes relacionados pré-calculados
+    - Responde 304 se o navegador (ou o proxy) já tem a versão atual
     """
     model = Filme                       # Modelo a ser exibido
     template_name = "detalhesfilme.html" # Template a ser renderizado
-    
-    def get(self, request, *args, **kwargs):
+    queryset = Filme.objects.com_episodios()  # Episódios carregados junto com o filme
+
+    def validadores(self):
         """
-        Sobrescreve o método GET para registrar visualização.
-        
-        A cada acesso à página do filme:
-        1. Incrementa contador de visualizações do filme
-        2. Adiciona filme à lista de filmes vistos pelo usuário
+        Lê pela chave só as colunas da validação (404 se o filme não existe).
         """
-        filme = self.get_object()  # Obtém o filme pela pk da URL
-        usuario = request.user     # Usuário atual logado
+        self.filme_validado = get_object_or_404(
+            Filme.objects.only("id", "atualizado_em", "visualizacoes"), pk=self.kwargs["pk"]
+        )
+        return validadores_filme(self.filme_validado, estado_paginas())
+
+    def etag_pessoal(self):
+        # Sem proxy, a página também exibe as posições de retomada do usuário
+        return f"{super().etag_pessoal()}-p{versao_progresso(self.request.user.pk)}"
+
+    def nao_modificado(self):
+        # O navegador reexibe a página guardada (com o total de visualizações
+        # da última renderização): a visualização conta do mesmo jeito
+        if not self.esi:
+            registrar_visualizacao(self.request.user, self.filme_validado)
+
+    def resposta_completa(self, request, *args, **kwargs):
+        """
+        Renderiza a página e registra a visualização.
         
-        # Incrementa contador de visualizações e salva no banco
-        filme.visualizacoes += 1
-        filme.save()
+        A cada acesso à página do filme, publica a visualização
+        (contador do filme e histórico do usuário) na fila de eventos.
+        Atrás de um proxy com ESI, quem registra é o fragmento
+        FragmentoVisualizacaoView, incluído a cada acesso.
+        """
+        self.object = self.get_object()  # Obtém o filme pela pk da URL (uma única vez)
         
-        # Adiciona filme à lista de filmes vistos (ManyToMany)
-        # O .add() já salva automaticamente no banco
-        usuario.filmes_vistos.add(filme)
+        # Publica a visualização na fila de eventos: a thread de gravação
+        # atualiza o histórico (upsert em lote) e o contador (F) fora da requisição
+        if not self.esi:
+            registrar_visualizacao(request.user, self.object)
         
-        return super().get(request, *args, **kwargs)
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
 
     def get_context_data(self, **kwargs):
         """
         Adiciona dados extras ao contexto do template.
         
-        Busca filmes relacionados (mesma categoria) para exibir
-        como sugestões, excluindo o filme atual da lista.
+        Os filmes relacionados vêm da tabela pré-calculada pelo comando
+        'calcular_relacionados' (quem viu este filme também viu), com uma
+        única leitura pela chave do filme. Enquanto o filme não tiver
+        relacionados calculados, usa filmes da mesma categoria.
         """
         context = super().get_context_data(**kwargs)
         
-        # Busca filmes da mesma categoria, exclui o filme atual, limita a 5
-        filmes_relacionados = Filme.objects.filter(
-            categoria=self.object.categoria  # Mesma categoria do filme atual
-        ).exclude(id=self.object.id)[0:5]    # Exclui filme atual, pega 5
+        # Episódios já carregados pelo prefetch (o primeiro é usado no botão Play),
+        # com as posições de retomada do usuário (atrás de um proxy com ESI,
+        # a lista com as posições vem do fragmento FragmentoEpisodiosView)
+        context["episodios"] = list(self.object.episodios.all())
+        if not self.esi:
+            anexar_progresso(
+                context["episodios"], progresso_dos_episodios(self.request.user.pk, context["episodios"])
+            )
+        
+        # Até 5 relacionados, já ordenados por relevância
+        context["filmes_relacionados"] = filmes_relacionados(self.object, 5)
         
-        context["filmes_relacionados"] = filmes_relacionados
+        # Visualizações gravadas (a fila de eventos soma os acessos em lote)
+        context["total_visualizacoes"] = self.object.visualizacoes
         return context
 
 
-class PesquisaFilmeView(LoginRequiredMixin, ListView):
+class PesquisaFilmeView(LoginRequiredMixin, GetCondicionalMixin, PaginacaoCursorMixin, ListView):
     """
     View para pesquisa de filmes.
     
-    Permite aos usuários buscar filmes por título.
+    Permite aos usuários buscar filmes por título, descrição, categoria
+    e títulos dos episódios, com ranking de relevância, sem diferenciar
+    acentos e com busca aproximada para erros de digitação.
     Se não houver termo de pesquisa, retorna lista vazia.
+    Os resultados são paginados por cursor (relevância, id) e só mudam
+    com o catálogo: sem mudança, a resposta é 304, sem pesquisar.
     """
     model = Filme                    # Modelo a ser pesquisado
     template_name = "pesquisa.html"  # Template a ser renderizado
     context_object_name = "filmes"   # Nome da variável no template
 
+    def validadores(self):
+        return validadores_pesquisa(self.request, estado_paginas())
+
     def get_queryset(self):
         """
-        Define quais objetos serão listados baseado na pesquisa.
-        
-        Obtém o parâmetro 'q' da URL (?q=termo_pesquisa) e
-        busca filmes cujo título contenha o termo (case-insensitive).
+        A busca não é feita por queryset, e sim pelo motor de busca
+        (ver paginate_queryset); retorna um queryset vazio.
+        """
+        return Filme.objects.none()
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Obtém o parâmetro 'q' da URL (?q=termo_pesquisa) e pesquisa
+        no backend de busca configurado (PostgreSQL ou índice em memória).
         """
         query = self.request.GET.get("q")  # Parâmetro de pesquisa da URL
+        if not query:
+            return (None, PaginaCursor([], None), [], False)  # Lista vazia se sem pesquisa
+        pagina = pesquisar(query, self.request.GET.get("cursor"), page_size)
+        return (None, pagina, pagina.object_list, pagina.has_next)
+
+
+class AutocompletarView(LoginRequiredMixin, View):
+    """
+    Endpoint JSON do autocompletar da pesquisa.
+
+    Chamado a cada tecla digitada na barra de navegação; as sugestões vêm
+    do índice de prefixos em memória, sem consultar a tabela de filmes.
+    Retorna {"sugestoes": [{"id", "titulo", "url"}]}.
+    """
+    limite = 8        # Máximo de sugestões por resposta
+    max_age = 60      # Segundos que o navegador pode reaproveitar a resposta
+
+    def get(self, request, *args, **kwargs):
+        prefixo = request.GET.get("q", "")[:100]  # Títulos têm no máximo 100 caracteres
+        sugestoes = [
+            {"id": filme_id, "titulo": titulo, "url": reverse("filme:filme_detalhes", args=[filme_id])}
+            for filme_id, titulo in indice_autocompletar.sugerir(prefixo, self.limite)
+        ]
+        resposta = JsonResponse({"sugestoes": sugestoes})
+        resposta["Cache-Control"] = f"private, max-age={self.max_age}"
+        return resposta
+
+
+class MetricasView(View):
+    """
+    Métricas de desempenho deste processo no formato texto do Prometheus.
+
+    Acesso em admin/metrics/ para membros da equipe (sessão do admin) ou
+    com o cabeçalho "Authorization: Bearer <METRICAS_TOKEN>" (scraper do
+    Prometheus). Inclui as métricas da fila de eventos. Sem permissão,
+    responde 403 em vez de redirecionar ao login do admin: o scraper
+    seguiria o redirecionamento e leria o HTML como métricas.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not self.autorizado(request):
+            return HttpResponseForbidden(
+                "Acesso às métricas negado.", content_type="text/plain; charset=utf-8"
+            )
+        conteudo = registro_metricas.exportar() + formatar_medidores(
+            "pyflix_fila_eventos", "Fila de eventos da página de detalhes.",
+            fila_eventos.metricas(), "metrica",
+        )
+        resposta = HttpResponse(conteudo, content_type=METRICAS_CONTENT_TYPE)
+        resposta["Cache-Control"] = "no-store"
+        return resposta
+
+    def autorizado(self, request):
+        token = settings.METRICAS_TOKEN
+        if token and constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return True
+        return request.user.is_active and request.user.is_staff
+
+
+# Versões assíncronas das views do catálogo (deploy ASGI, VIEWS_ASSINCRONAS=True)
+#
+# Usam o ORM assíncrono e disparam as consultas independentes juntas com
+# asyncio.gather; enquanto esperam o banco ou o cache, o worker atende outras
+# requisições, sem uma thread por cliente lento. O template é renderizado
+# pelo handler do Django fora do loop de eventos (TemplateResponse).
+class LoginAssincronoMixin(AccessMixin):
+    """
+    Equivalente assíncrono do LoginRequiredMixin.
+
+    Carrega o usuário com request.auser(), sem bloquear o loop de eventos,
+    e o guarda em request.user para o template (context processor 'auth').
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class HomeFilmesAssincronaView(LoginAssincronoMixin, PaginacaoCursorMixin, TemplateResponseMixin, View):
+    """
+    Versão assíncrona de HomeFilmesView (mesmo template e mesmos caches).
+
+    Os trilhos do catálogo, a primeira página e os trilhos do usuário são
+    carregados juntos. Os trilhos do usuário cujo fragmento já está no
+    cache não são consultados.
+    """
+    template_name = "homefilmes.html"
+
+    async def get(self, request, *args, **kwargs):
+        cursor = request.GET.get("cursor")
+        if self.fragmento or cursor:
+            pagina = await apaginar_por_cursor(
+                Filme.objects.all(), self.ordenacao_cursor, cursor, self.paginate_by
+            )
+            return self.render_to_response(self.contexto_pagina(pagina))
+
+        usuario = request.user
+        versao, versao_vistos, versao_recomendados = await asyncio.gather(
+            aversao_catalogo(), aversao_historico(usuario.pk), aversao_recomendacoes()
+        )
+        chaves = {
+            "filmes_vistos": make_template_fragment_key("home_vistos", [usuario.pk, versao_vistos]),
+            "filmes_recomendados": make_template_fragment_key(
+                "home_recomendados", [usuario.pk, versao_recomendados]
+            ),
+        }
+        em_cache = await cache.aget_many(chaves.values())
+
+        async def trilho_do_usuario(nome, carregar, carregar_sincrono):
+            # Fragmento já cacheado: o template não usa a lista. A versão lazy
+            # síncrona só consulta o banco se o fragmento expirar até a renderização.
+            if chaves[nome] in em_cache:
+                return SimpleLazyObject(lambda: carregar_sincrono(usuario))
+            return await carregar(usuario)
+
+        pagina, recentes, em_alta, vistos, recomendados = await asyncio.gather(
+            aobter_rail(
+                "catalogo_inicio",
+                lambda: apaginar_por_cursor(
+                    Filme.objects.all(), self.ordenacao_cursor, None, self.paginate_by
+                ),
+            ),
+            afilmes_recentes(),
+            afilmes_em_alta(),
+            trilho_do_usuario(
+                "filmes_vistos",
+                HistoricoVisualizacao.objects.afilmes_recentes,
+                HistoricoVisualizacao.objects.filmes_recentes,
+            ),
+            trilho_do_usuario(
+                "filmes_recomendados", Recomendacao.objects.afilmes, Recomendacao.objects.filmes
+            ),
+        )
+
+        context = self.contexto_pagina(pagina)
+        context.update({
+            # Substituem os context processors (lazy e síncronos) de mesmo nome
+            "lista_filmes_recentes": recentes,
+            "lista_filmes_em_alta": em_alta,
+            "filme_destaque": recentes[0] if recentes else None,
+            "filmes_vistos": vistos,
+            "filmes_recomendados": recomendados,
+            "versao_catalogo": versao,
+            "versao_historico": versao_vistos,
+            "versao_recomendacoes": versao_recomendados,
+            "timeout_catalogo": settings.CATALOGO_CACHE_TIMEOUT,
+            "timeout_fragmentos": settings.FRAGMENTOS_CACHE_TIMEOUT,
+        })
+        return self.render_to_response(context)
+
+    def contexto_pagina(self, pagina):
+        """Contexto equivalente ao da ListView para uma página do catálogo."""
+        return {
+            "view": self,
+            "page_obj": pagina,
+            "is_paginated": pagina.has_next,
+            "object_list": pagina.object_list,
+            "lista_filmes": pagina.object_list,
+        }
+
+
+class FilmeDetailAssincronaView(LoginAssincronoMixin, TemplateResponseMixin, View):
+    """
+    Versão assíncrona de FilmeDetailView.
+
+    Depois de carregar o filme (com os episódios), a publicação da
+    visualização e a leitura dos relacionados são disparadas juntas.
+    """
+    template_name = "detalhesfilme.html"
+
+    async def get(self, request, pk, *args, **kwargs):
+        esi = aceita_esi(request)
+        try:
+            validado = await Filme.objects.only("id", "atualizado_em", "visualizacoes").aget(pk=pk)
+        except Filme.DoesNotExist:
+            raise Http404("Filme não encontrado.")
+        etag, modificado_em = validadores_filme(validado, await aestado_paginas())
+        if not esi:
+            etag = f"{etag}-u{request.user.pk}-p{await aversao_progresso(request.user.pk)}"
+        resposta = resposta_condicional(request, etag, modificado_em)
+        if resposta is not None:
+            if not esi:
+                await sync_to_async(registrar_visualizacao)(request.user, validado)
+            return cabecalhos_condicionais(resposta, etag, modificado_em, esi)
+
+        try:
+            filme = await Filme.objects.com_episodios().aget(pk=pk)
+        except Filme.DoesNotExist:
+            raise Http404("Filme não encontrado.")
+
+        # Com a fila cheia a publicação pode gravar no banco: roda fora do loop
+        # (atrás de um proxy com ESI, quem registra é o fragmento da visualização
+        # e as posições de retomada vêm do fragmento dos episódios)
+        episodios = list(filme.episodios.all())  # Já carregados pelo prefetch
+        progressos = {}
+        if esi:
+            relacionados = await afilmes_relacionados(filme, 5)
+        else:
+            relacionados, progressos, _ = await asyncio.gather(
+                afilmes_relacionados(filme, 5),
+                aprogresso_dos_episodios(request.user.pk, episodios),
+                sync_to_async(registrar_visualizacao)(request.user, filme),
+            )
+        resposta = self.render_to_response({
+            "view": self,
+            "object": filme,
+            "filme": filme,
+            "episodios": anexar_progresso(episodios, progressos),
+            "filmes_relacionados": relacionados,
+            "total_visualizacoes": filme.visualizacoes,
+            "esi": esi,
+        })
+        return cabecalhos_condicionais(resposta, etag, modificado_em, esi)
+
+
+class PesquisaFilmeAssincronaView(LoginAssincronoMixin, PaginacaoCursorMixin, TemplateResponseMixin, View):
+    """
+    Versão assíncrona de PesquisaFilmeView.
+
+    O motor de busca é síncrono (PostgreSQL ou índice em memória) e roda
+    na thread do ORM, sem bloquear o loop de eventos.
+    """
+    template_name = "pesquisa.html"
+
+    async def get(self, request, *args, **kwargs):
+        esi = aceita_esi(request)
+        etag, modificado_em = validadores_pesquisa(request, await aestado_paginas())
+        if not esi:
+            etag = f"{etag}-u{request.user.pk}"
+        resposta = resposta_condicional(request, etag, modificado_em)
+        if resposta is not None:
+            return cabecalhos_condicionais(resposta, etag, modificado_em, esi)
+
+        query = request.GET.get("q")  # Parâmetro de pesquisa da URL
         if query:
-            # icontains = busca case-insensitive que contém o termo
-            return Filme.objects.filter(titulo__icontains=query)
-        return Filme.objects.none()  # Retorna queryset vazio se sem pesquisa
+            pagina = await sync_to_async(pesquisar)(query, request.GET.get("cursor"), self.paginate_by)
+        else:
+            pagina = PaginaCursor([], None)  # Lista vazia se sem pesquisa
+        resposta = self.render_to_response({
+            "view": self,
+            "page_obj": pagina,
+            "is_paginated": pagina.has_next,
+            "object_list": pagina.object_list,
+            "filmes": pagina.object_list,
+            "esi": esi,
+        })
+        return cabecalhos_condicionais(resposta, etag, modificado_em, esi)
+
+
+@method_decorator(never_cache, name="dispatch")
+class FragmentoNavbarView(TemplateView):
+    """
+    Navbar do usuário (ou de login, para anônimos), incluída pelo proxy
+    com ESI nas páginas compartilhadas ({% fragmento_pessoal %}).
+    """
+    template_name = "navbar.html"
+
+
+@method_decorator(never_cache, name="dispatch")
+class FragmentoVisualizacaoView(LoginRequiredMixin, View):
+    """
+    Registra a visualização do filme e exibe o total.
+
+    Incluído pelo proxy com ESI na página de detalhes compartilhada, que
+    não passa pela view a cada acesso: a visualização é registrada aqui.
+    """
+
+    def get(self, request, pk, *args, **kwargs):
+        filme = get_object_or_404(Filme.objects.only("id", "visualizacoes"), pk=pk)
+        registrar_visualizacao(request.user, filme)
+        return render(request, "visualizacoes.html", {
+            "total_visualizacoes": filme.visualizacoes,
+        })
 
 
 class EditarPerfil(LoginRequiredMixin, UpdateView):
@@ -186,3 +762,85 @@ class CriarConta(FormView):
         """
         form.save()  # Cria o usuário no banco de dados
         return super().form_valid(form)
+
+
+class VideoEpisodioView(LoginRequiredMixin, View):
+    """
+    Serve o vídeo enviado de um episódio, só para usuários logados.
+
+    Atende requisições parciais (Range -> 206, com If-Range): o player
+    avança o vídeo pedindo só o trecho a partir do ponto escolhido, sem
+    recomeçar a transferência. O arquivo é enviado pelo servidor WSGI
+    (sendfile) ou pelo proxy (X-Accel-Redirect), ver filme/videos.py.
+    """
+
+    def get(self, request, pk, *args, **kwargs):
+        episodio = get_object_or_404(Episodio.objects.only("id", "video"), pk=pk)
+        if not episodio.video:
+            raise Http404("Episódio sem vídeo enviado.")
+        try:
+            return resposta_video(request, episodio.video.name)
+        except FileNotFoundError:
+            raise Http404("Arquivo do vídeo não encontrado.")
+
+
+@method_decorator(never_cache, name="dispatch")
+class FragmentoEpisodiosView(LoginRequiredMixin, View):
+    """
+    Episódios do filme com as posições de retomada do usuário.
+
+    Incluído pelo proxy com ESI na página de detalhes compartilhada.
+    """
+
+    def get(self, request, pk, *args, **kwargs):
+        episodios = list(Episodio.objects.filter(filme_id=pk))
+        anexar_progresso(episodios, progresso_dos_episodios(request.user.pk, episodios))
+        return render(request, "episodios.html", {"episodios": episodios})
+
+
+class PlayerEpisodioView(LoginRequiredMixin, DetailView):
+    """
+    Player do vídeo enviado de um episódio.
+
+    Começa da posição de retomada do usuário e envia a posição atual a
+    cada PROGRESSO_HEARTBEAT segundos (static/js/progresso.js). Episódios
+    sem arquivo enviado redirecionam para o link externo.
+    """
+    template_name = "player.html"
+    context_object_name = "episodio"
+    queryset = Episodio.objects.com_filme()
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        if not self.object.video:
+            return redirect(self.object.link_video)
+        return self.render_to_response(self.get_context_data(object=self.object))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        progresso = progresso_dos_episodios(self.request.user.pk, [self.object]).get(self.object.pk)
+        context["posicao"] = progresso.posicao if progresso else 0
+        context["intervalo_heartbeat"] = settings.PROGRESSO_HEARTBEAT
+        return context
+
+
+class ProgressoEpisodioView(LoginRequiredMixin, View):
+    """
+    Heartbeat do player: posição e duração atuais, em segundos (POST).
+
+    Só substitui a posição do par (usuário, episódio) no buffer do
+    processo, sem ir ao banco: a gravação é feita em lote (ver
+    filme/progresso.py). Episódios removidos são descartados na gravação.
+    """
+
+    def post(self, request, pk, *args, **kwargs):
+        try:
+            posicao = float(request.POST["posicao"])
+            duracao = float(request.POST["duracao"])
+        except (KeyError, ValueError):
+            return JsonResponse({"erro": "Informe a posição e a duração em segundos."}, status=400)
+        if not (math.isfinite(posicao) and math.isfinite(duracao) and 0 <= posicao and 0 < duracao):
+            return JsonResponse({"erro": "Posição ou duração inválida."}, status=400)
+        buffer_progresso.registrar(request.user.pk, pk, min(posicao, duracao), duracao)
+        return HttpResponse(status=204)
+
@@ -0,0 +1,38 @@
+# Contador de visualizações: incrementos atômicos em lote e ranking dos mais vistos
+#
+# As visualizações chegam pela fila de eventos (filme/eventos.py), que soma
+# os incrementos de um lote inteiro e os grava com gravar_incrementos(), na
+# mesma transação do histórico. As views leem Filme.visualizacoes direto:
+# não há contagem pendente em memória a somar.
+from collections import defaultdict
+
+from django.db.models import F  # Expressão para incremento atômico no banco
+
+from .models import Filme
+
+
+def gravar_incrementos(incrementos):
+    """
+    Soma os incrementos {filme_id: quantidade} às visualizações gravadas.
+
+    Em vez de um UPDATE de linha inteira (ler, somar, salvar), usa
+    UPDATE ... SET visualizacoes = visualizacoes + N, que é atômico no banco
+    e não perde incrementos entre workers concorrentes. Filmes com o mesmo
+    incremento são agrupados em um único UPDATE. Não abre transação: quem
+    chama grava junto com o resto do lote.
+    """
+    por_incremento = defaultdict(list)  # {incremento: [ids]}
+    for filme_id, quantidade in incrementos.items():
+        por_incremento[quantidade].append(filme_id)
+    for quantidade, ids in sorted(por_incremento.items()):
+        Filme.objects.filter(pk__in=sorted(ids)).update(visualizacoes=F("visualizacoes") + quantidade)
+
+
+def filmes_mais_vistos(limite):
+    """Retorna os 'limite' filmes com mais visualizações gravadas."""
+    return list(Filme.objects.order_by("-visualizacoes")[:limite])
+
+
+async def afilmes_mais_vistos(limite):
+    """Versão assíncrona de filmes_mais_vistos(), com o ORM assíncrono."""
+    return [filme async for filme in Filme.objects.order_by("-visualizacoes")[:limite]]
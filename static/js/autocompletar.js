@@ -0,0 +1,43 @@
+// Autocompletar da pesquisa: sugere títulos a cada tecla, a partir do índice em memória do servidor
+// Uso: <input data-autocompletar="url" list="id-do-datalist">
+document.querySelectorAll('[data-autocompletar]').forEach(campo => {
+    const lista = document.getElementById(campo.getAttribute('list'))
+    const destinos = new Map()   // título sugerido -> URL dos detalhes do filme
+    let espera = null
+    let controlador = null
+
+    const sugerir = async () => {
+        const termo = campo.value.trim()
+        if (!termo) return
+        if (controlador) controlador.abort()   // Descarta a resposta da tecla anterior
+        controlador = new AbortController()
+
+        const url = new URL(campo.dataset.autocompletar, window.location.origin)
+        url.searchParams.set('q', termo)
+        try {
+            const resposta = await fetch(url, { headers: { 'Accept': 'application/json' }, signal: controlador.signal })
+            if (!resposta.ok) return
+            const dados = await resposta.json()
+            destinos.clear()
+            lista.replaceChildren(...dados.sugestoes.map(sugestao => {
+                destinos.set(sugestao.titulo, sugestao.url)
+                const opcao = document.createElement('option')
+                opcao.value = sugestao.titulo
+                return opcao
+            }))
+        } catch (erro) {
+            if (erro.name !== 'AbortError') throw erro
+        }
+    }
+
+    campo.addEventListener('input', () => {
+        // Escolher uma sugestão leva direto aos detalhes do filme
+        const destino = destinos.get(campo.value)
+        if (destino) {
+            window.location.href = destino
+            return
+        }
+        clearTimeout(espera)
+        espera = setTimeout(sugerir, 150)   // Espera o usuário parar de digitar
+    })
+})
@@ -0,0 +1,27 @@
+// Progresso do player: retoma da última posição e envia heartbeats periódicos
+// Uso: <video data-progresso="url" data-posicao="segundos" data-intervalo="segundos" data-csrf="token">
+document.querySelectorAll('video[data-progresso]').forEach(video => {
+    const intervalo = Number(video.dataset.intervalo) * 1000
+    let ultimaEnviada = null
+
+    const enviar = () => {
+        const posicao = Math.floor(video.currentTime)
+        if (!video.duration || posicao === ultimaEnviada) return   // Parado: nada de novo
+        ultimaEnviada = posicao
+        const dados = new FormData()
+        dados.append('csrfmiddlewaretoken', video.dataset.csrf)
+        dados.append('posicao', video.currentTime)
+        dados.append('duracao', video.duration)
+        // keepalive: o envio termina mesmo se a página for fechada
+        fetch(video.dataset.progresso, { method: 'POST', body: dados, keepalive: true, credentials: 'same-origin' })
+    }
+
+    video.addEventListener('loadedmetadata', () => {
+        const posicao = Number(video.dataset.posicao)
+        if (posicao > 0 && posicao < video.duration - 5) video.currentTime = posicao
+    }, { once: true })
+    video.addEventListener('pause', enviar)
+    video.addEventListener('ended', enviar)
+    window.addEventListener('pagehide', enviar)
+    setInterval(() => { if (!video.paused) enviar() }, intervalo)
+})
@@ -0,0 +1,27 @@
+// Rolagem infinita: carrega a próxima página (por cursor) quando o sentinela aparece na tela
+// Uso: <div data-rolagem-infinita data-url="..." data-proximo="cursor"> ... </div>
+//      seguido de um elemento com a classe "rolagem-sentinela"
+document.querySelectorAll('[data-rolagem-infinita]').forEach(lista => {
+    const sentinela = lista.nextElementSibling
+    let carregando = false
+
+    const carregar = async () => {
+        const cursor = lista.dataset.proximo
+        if (!cursor || carregando) return
+        carregando = true
+
+        const url = new URL(lista.dataset.url, window.location.origin)
+        url.searchParams.set('cursor', cursor)
+        const resposta = await fetch(url, { headers: { 'Accept': 'application/json' } })
+        if (resposta.ok) {
+            const dados = await resposta.json()
+            lista.insertAdjacentHTML('beforeend', dados.html)
+            lista.dataset.proximo = dados.proximo_cursor || ''
+        }
+        carregando = false
+    }
+
+    new IntersectionObserver(entradas => {
+        if (entradas.some(entrada => entrada.isIntersecting)) carregar()
+    }, { rootMargin: '600px' }).observe(sentinela)
+})